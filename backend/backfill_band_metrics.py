@@ -0,0 +1,95 @@
+"""
+One-shot backfill of the `band_metrics` summary for stored analyses.
+
+Analyses saved before band dwell times and transition durations were
+computed at analysis time have no `band_metrics` field, and report
+listings show zeroed times for them. This script computes the summary
+from each file's transitions and signal samples and writes it back.
+
+The analysis catalog (which report listings read) is rebuilt afterwards.
+
+Usage (from backend/):
+    python backfill_band_metrics.py
+    python backfill_band_metrics.py --base-dir /app/data/analyses --force
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+from src.tools.band_metrics import (  # noqa: E402
+    BAND_METRICS_VERSION,
+    analysis_band_inputs,
+    compute_band_metrics,
+)
+
+
+def needs_backfill(data: dict, force: bool) -> bool:
+    metrics = data.get("band_metrics")
+    if force or not isinstance(metrics, dict):
+        return True
+    return metrics.get("version", 0) < BAND_METRICS_VERSION
+
+
+def backfill_file(path: Path, force: bool = False, dry_run: bool = False) -> bool:
+    """Adds (or refreshes) `band_metrics` in one analysis JSON. Returns True if updated."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not needs_backfill(data, force):
+        return False
+
+    transitions, signal_samples = analysis_band_inputs(data)
+    data["band_metrics"] = compute_band_metrics(transitions, signal_samples)
+    if dry_run:
+        return True
+
+    # Write next to the original and swap, so a crash never leaves a truncated file
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-dir", default="data/analyses",
+                        help="Analyses directory (Vendor/Device/<analysis_id>.json)")
+    parser.add_argument("--force", action="store_true",
+                        help="Recompute metrics that are already present")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would change without writing")
+    args = parser.parse_args()
+
+    base_dir = Path(args.base_dir).resolve()
+    if not base_dir.exists():
+        print(f"Analyses directory not found: {base_dir}")
+        sys.exit(1)
+
+    updated = skipped = failed = 0
+    for analysis_file in sorted(base_dir.glob("*/*/*.json")):
+        try:
+            if backfill_file(analysis_file, force=args.force, dry_run=args.dry_run):
+                updated += 1
+            else:
+                skipped += 1
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"  ! {analysis_file}: {e}")
+
+    action = "would update" if args.dry_run else "updated"
+    print(f"{action} {updated}, already current {skipped}, failed {failed}")
+
+    if updated and not args.dry_run:
+        # Report listings read band times from the analysis catalog
+        from src.core.analysis_catalog import AnalysisCatalog
+        cataloged = AnalysisCatalog(base_dir).rebuild()
+        print(f"analysis catalog rebuilt ({cataloged} analyses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark of the native pcap reader against the tshark path of WiresharkTool.
+
+Usage (from backend/):
+    python benchmarks/capture_reader_benchmark.py path/to/capture.pcapng
+    python benchmarks/capture_reader_benchmark.py --synthetic-frames 200000
+
+Both paths feed the same parser (`_ingest_fields`), so the script also
+checks that they produce the same summary counters.
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+backend_dir = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=backend_dir.parent / ".env")
+sys.path.insert(0, str(backend_dir))
+
+from src.tools.wireshark_tool import WiresharkTool  # noqa: E402
+
+
+def _radiotap(frequency: int, signal: int) -> bytes:
+    # Present: Flags (1), Channel (3), dBm antenna signal (5)
+    present = (1 << 1) | (1 << 3) | (1 << 5)
+    # Flags(1) + pad(1) to align Channel on 2 bytes, Channel(4), Signal(1)
+    body = struct.pack("<BxHHb", 0, frequency, 0x00A0, signal)
+    return struct.pack("<BBHI", 0, 0, 8 + len(body), present) + body
+
+
+def _mac(value: int) -> bytes:
+    return value.to_bytes(6, "big")
+
+
+def _mgmt(subtype: int, da: bytes, sa: bytes, bssid: bytes, body: bytes) -> bytes:
+    return struct.pack("<BBH", subtype << 4, 0, 0) + da + sa + bssid + b"\x00\x00" + body
+
+
+def write_synthetic_capture(path: str, frames: int) -> None:
+    """
+    Writes a radiotap pcap with a realistic mix of Beacons, data frames and
+    periodic roaming sequences: BTM-assisted 2.4 → 5 GHz reassociation and
+    deauth-forced 5 → 2.4 GHz reassociation.
+    """
+    ap_24, ap_5 = _mac(0x02AA00000001), _mac(0x02AA00000002)
+    clients = [_mac(0x3C0000000000 + i) for i in range(1, 9)]
+    ssid_ie = b"\x00\x06" + b"PipeAP"
+    beacon_body = b"\x00" * 8 + b"\x64\x00" + b"\x11\x04" + ssid_ie
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 127))
+        ts = 1_700_000_000.0
+        for i in range(frames):
+            ts += 0.001
+            client = clients[(i // 400) % len(clients)]
+            step = i % 400
+            if step == 0:
+                frame = _radiotap(2412, -45) + _mgmt(13, client, ap_24, ap_24, b"\x0a\x07\x01\x01\x00\x00")
+            elif step == 1:
+                frame = _radiotap(2412, -60) + _mgmt(13, ap_24, client, ap_24, b"\x0a\x08\x01\x00\x00")
+            elif step == 2:
+                frame = _radiotap(5180, -55) + _mgmt(2, ap_5, client, ap_5, b"\x11\x04\x0a\x00" + ap_24 + ssid_ie)
+            elif step == 3:
+                frame = _radiotap(5180, -50) + _mgmt(3, client, ap_5, ap_5, b"\x11\x04\x00\x00\x01\xc0")
+            elif step == 200:
+                frame = _radiotap(5180, -50) + _mgmt(12, client, ap_5, ap_5, b"\x08\x00")
+            elif step == 201:
+                frame = _radiotap(2412, -62) + _mgmt(2, ap_24, client, ap_24, b"\x11\x04\x0a\x00" + ap_5 + ssid_ie)
+            elif step == 202:
+                frame = _radiotap(2412, -45) + _mgmt(3, client, ap_24, ap_24, b"\x11\x04\x00\x00\x01\xc0")
+            elif i % 10 == 0:
+                frequency, bssid = (2412, ap_24) if i % 20 == 0 else (5180, ap_5)
+                frame = _radiotap(frequency, -40) + _mgmt(8, b"\xff" * 6, bssid, bssid, beacon_body)
+            else:
+                # QoS data, client -> AP (ToDS)
+                header = struct.pack("<BBH", 0x88, 0x41, 0) + ap_5 + client + ap_5 + b"\x00\x00" + b"\x00\x00"
+                frame = _radiotap(5180, -58 - (i % 15)) + header + b"\x00" * 64
+            sec = int(ts)
+            usec = int(round((ts - sec) * 1_000_000))
+            f.write(struct.pack("<IIII", sec, usec, len(frame), len(frame)))
+            f.write(frame)
+
+
+def _time_parse(label: str, parse) -> dict:
+    start = time.perf_counter()
+    state = parse()
+    elapsed = time.perf_counter() - start
+    frames = len(state["frames"])
+    print(f"{label:<8} {frames:>10} frames  {elapsed:8.3f} s  {frames / elapsed if elapsed else 0:12.0f} frames/s")
+    return {"state": state, "elapsed": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="?", help="pcap/pcapng file to benchmark")
+    parser.add_argument("--synthetic-frames", type=int, default=100000,
+                        help="Frames of the synthetic capture used when no file is given")
+    args = parser.parse_args()
+
+    tool = WiresharkTool()
+    tmp_path = None
+    capture = args.capture
+    if not capture:
+        fd, tmp_path = tempfile.mkstemp(suffix=".pcap")
+        os.close(fd)
+        write_synthetic_capture(tmp_path, args.synthetic_frames)
+        capture = tmp_path
+
+    try:
+        print(f"Capture: {capture} ({os.path.getsize(capture) / 1e6:.1f} MB)")
+        native = _time_parse("native", lambda: tool._parse_capture_native(capture))
+        if native["state"] is None:
+            print("The native reader does not support this capture (tshark fallback would be used).")
+            return
+
+        import shutil
+        if not shutil.which("tshark"):
+            print("tshark not found in PATH: skipping the tshark comparison.")
+            return
+
+        def parse_tshark():
+            state = tool._new_parse_state()
+            cmd = tool._build_tshark_command(shutil.which("tshark"), capture)
+            for line in tool._stream_tshark_rows(cmd):
+                tool._ingest_row(state, line)
+            return state
+
+        tshark = _time_parse("tshark", parse_tshark)
+        print(f"Speedup: {tshark['elapsed'] / native['elapsed']:.1f}x")
+
+        native_counts = native["state"]["frames"].summary_counts()
+        tshark_counts = tshark["state"]["frames"].summary_counts()
+        native_counters = native["state"]["frames"].band_counters()
+        tshark_counters = tshark["state"]["frames"].band_counters()
+        same = native_counts == tshark_counts and native_counters == tshark_counters
+        print("Summary counters match:" , "yes" if same else "NO")
+        if not same:
+            print("  native:", native_counts, native_counters)
+            print("  tshark:", tshark_counts, tshark_counters)
+    finally:
+        if tmp_path:
+            os.unlink(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Regression benchmark of steering transition detection.
+
+Generates synthetic management events (deauth / disassoc, reassociation,
+BTM) in the format produced by WiresharkTool's parser and times
+`_analyze_steering_patterns` at growing sizes. Detection should scale
+linearly: the time per event must stay roughly flat between sizes.
+
+Usage (from backend/):
+    python benchmarks/transition_detection_benchmark.py
+    python benchmarks/transition_detection_benchmark.py --events 100000 --max-seconds 5
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+backend_dir = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=backend_dir.parent / ".env")
+sys.path.insert(0, str(backend_dir))
+
+from src.tools.wireshark_tool import WiresharkTool  # noqa: E402
+
+AP_24 = "02:aa:00:00:00:01"
+AP_5 = "02:aa:00:00:00:02"
+BANDS = {AP_24: ("2.4GHz", "2412"), AP_5: ("5GHz", "5180")}
+
+
+def _event(timestamp, subtype, event_type, sa, da, client, bssid, reason="", status=""):
+    band, frequency = BANDS[bssid]
+    return {
+        "timestamp": timestamp,
+        "type": event_type,
+        "subtype": subtype,
+        "sa": sa,
+        "da": da,
+        "client_mac": client,
+        "bssid": bssid,
+        "ssid": "PipeAP",
+        "band": band,
+        "frequency": frequency,
+        "reason_code": reason,
+        "assoc_status_code": status,
+        "signal_strength": "-55",
+    }
+
+
+def generate_events(count: int, clients: int = 200, seed: int = 7) -> list:
+    """
+    Mix of roaming clients plus one client hit by a deauth flood (many
+    deauths within the reassociation timeout and no response), the case
+    where a forward scan per deauth degrades to quadratic time.
+    """
+    rng = random.Random(seed)
+    macs = [f"3c:00:00:00:{i >> 8:02x}:{i & 0xff:02x}" for i in range(clients)]
+    flooded = "3c:ff:00:00:00:01"
+    events = []
+    timestamp = 1_700_000_000.0
+    current = {mac: AP_24 for mac in macs}
+
+    flood_share = count // 5
+    for i in range(flood_share):
+        events.append(_event(timestamp + i * 0.0001, 12, "Deauthentication",
+                             AP_5, flooded, flooded, AP_5, reason="5"))
+
+    while len(events) < count:
+        timestamp += rng.uniform(0.01, 0.2)
+        client = rng.choice(macs)
+        old_bssid = current[client]
+        new_bssid = AP_5 if old_bssid == AP_24 else AP_24
+        if rng.random() < 0.5:
+            events.append(_event(timestamp, 12, "Deauthentication", old_bssid, client, client, old_bssid, reason="5"))
+        else:
+            events.append(_event(timestamp, 13, "Action", old_bssid, client, client, old_bssid))
+        timestamp += 0.05
+        events.append(_event(timestamp, 2, "Reassociation Request", client, new_bssid, client, new_bssid))
+        timestamp += 0.01
+        status = "0" if rng.random() < 0.9 else "17"
+        events.append(_event(timestamp, 3, "Reassociation Response", new_bssid, client, client, new_bssid, status=status))
+        if status == "0":
+            current[client] = new_bssid
+
+    return events[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100000, help="Largest number of events to time")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Fail (exit code 1) if the largest run takes longer than this")
+    args = parser.parse_args()
+
+    tool = WiresharkTool()
+    bssid_info = {bssid: {"band": band, "ssid": "PipeAP", "frequency": freq} for bssid, (band, freq) in BANDS.items()}
+
+    elapsed = 0.0
+    for size in (args.events // 4, args.events // 2, args.events):
+        events = generate_events(size)
+        start = time.perf_counter()
+        result = tool._analyze_steering_patterns(events, bssid_info, band_counters={}, primary_client_mac=None)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} events  {elapsed:8.3f} s  {elapsed / size * 1e6:7.2f} us/event  "
+              f"{len(result['transitions'])} transitions")
+
+    if args.max_seconds is not None and elapsed > args.max_seconds:
+        print(f"FAIL: {args.events} events took {elapsed:.3f} s (limit {args.max_seconds} s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
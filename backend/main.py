@@ -73,6 +73,24 @@ async def startup_event():
         logger.error(f"Error al inicializar la base de datos: {e}")
         raise
 
+    # Reencolar las narrativas LLM que quedaron pendientes al detenerse el servidor
+    from src.services.narrative_jobs import get_narrative_worker
+    try:
+        recovered = get_narrative_worker().recover()
+        if recovered:
+            logger.info(f"{recovered} narrativas pendientes reencoladas")
+    except Exception as e:
+        logger.error(f"Error al reencolar narrativas pendientes: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detiene el pool de procesos de análisis de capturas y el de narrativas"""
+    from src.services.analysis_jobs import get_analysis_job_manager
+    from src.services.narrative_jobs import get_narrative_worker
+    get_analysis_job_manager().shutdown()
+    get_narrative_worker().shutdown()
+
 # Incluir routers de la API (deben ir antes del catch-all del frontend)
 app.include_router(files.router)
 app.include_router(agent.router)
@@ -0,0 +1,56 @@
+"""
+Recovery command for the analysis catalog and its materialized statistics.
+
+The catalog (report listings, id lookups) and the report statistics are
+maintained incrementally on every save and delete. If they drift from the
+files on disk (files copied or removed by hand, a restored backup), this
+re-indexes every stored analysis and recomputes the statistics.
+
+Usage (from backend/):
+    python rebuild_analysis_catalog.py
+    python rebuild_analysis_catalog.py --stats-only
+    python rebuild_analysis_catalog.py --base-dir /app/data/analyses
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+from src.core.analysis_catalog import AnalysisCatalog  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-dir", default="data/analyses",
+                        help="Analyses directory (Vendor/Device/<analysis_id>.json)")
+    parser.add_argument("--stats-only", action="store_true",
+                        help="Only recompute the statistics from the catalog rows (no file scan)")
+    args = parser.parse_args()
+
+    base_dir = Path(args.base_dir).resolve()
+    if not base_dir.exists():
+        print(f"Analyses directory not found: {base_dir}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    catalog = AnalysisCatalog(base_dir)
+    if args.stats_only:
+        catalog.rebuild_statistics()
+    else:
+        cataloged = catalog.rebuild()
+        print(f"cataloged {cataloged} analyses")
+
+    stats = catalog.statistics()
+    print(
+        f"statistics: {stats['total_reports']} reports, "
+        f"{len(stats['vendors'])} vendors, "
+        f"{stats['transition_time']['count']} transitions "
+        f"({time.perf_counter() - started:.2f} s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
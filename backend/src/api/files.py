@@ -1,8 +1,11 @@
 """
 API endpoints for file management - Refactored to use repositories.
-Exposes upload, list and delete operations without logging logic.
+Exposes upload, list and delete operations without logging logic, and the
+download of analysis capture fragments.
 """
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.responses import FileResponse
 from typing import List
 from sqlalchemy.orm import Session as SQLSession
 from ..models.schemas import FileUploadResponse, FileListResponse
@@ -156,6 +159,36 @@ async def list_files(db: SQLSession = Depends(get_db)):
     ]
 
 
+# Service used to resolve analysis fragments (created on first download)
+_band_steering_service = None
+
+
+def _get_band_steering_service():
+    global _band_steering_service
+    if _band_steering_service is None:
+        from ..services.band_steering_service import BandSteeringService
+        _band_steering_service = BandSteeringService()
+    return _band_steering_service
+
+
+@router.get("/fragments/{analysis_id}/{fragment_name}")
+async def download_fragment(analysis_id: str, fragment_name: str):
+    """
+    Downloads a fragment of a Band Steering analysis. The pcap is cut from
+    the stored capture on the first request and cached afterwards.
+    """
+    fragment_id = fragment_name[:-len(".pcap")] if fragment_name.endswith(".pcap") else fragment_name
+    service = _get_band_steering_service()
+    fragment_path = await asyncio.to_thread(service.get_fragment_file, analysis_id, fragment_id)
+    if fragment_path is None:
+        raise HTTPException(status_code=404, detail="Fragment not found")
+    return FileResponse(
+        path=str(fragment_path),
+        filename=f"{fragment_id}.pcap",
+        media_type="application/vnd.tcpdump.pcap"
+    )
+
+
 @router.delete("/{document_id}")
 async def delete_file(
     document_id: str,
@@ -5,129 +5,223 @@ logging or business responsibilities.
 """
 
 import asyncio
-import concurrent.futures
 import os
+import tarfile
 import uuid
+import zipfile
 from pathlib import Path
+from typing import AsyncIterator, List, Tuple
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 import json
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from ..services.analysis_jobs import (
+    JOB_FAILED,
+    JobQueueFullError,
+    get_analysis_job_manager,
+)
+from ..services.analysis_batches import get_analysis_batch_manager
 from ..services.band_steering_service import BandSteeringService
+from ..core.capture_cache import get_capture_parse_cache
+from ..tools.narrative_template import NARRATIVE_PENDING
+from ..settings import settings
 
 router = APIRouter(prefix="/network-analysis", tags=["network-analysis"])
 
-# Instantiate orchestrator service
-band_steering_service = BandSteeringService()
+CAPTURE_SUFFIXES = (".pcap", ".pcapng")
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
 
-# Thread pool executor for heavy tshark operations
-_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="wireshark_analysis")
 
+def _uploads_dir() -> Path:
+    """Temporary directory for uploads (created on demand)."""
+    base_dir = Path(__file__).resolve().parents[2]
+    uploads_dir = base_dir / "databases" / "uploads"
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    return uploads_dir
 
-@router.post("/analyze")
-async def analyze_network_capture(
-    file: UploadFile = File(...),
-    user_metadata: str | None = Form(None),
-):
+
+async def _save_upload(file: UploadFile) -> Path:
     """
-    Uploads a capture file and performs the full Band Steering process.
+    Validates the uploaded capture and stores it in the uploads directory.
+    Returns the absolute path of the stored file.
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="A capture file must be provided.")
 
     filename_lower = file.filename.lower()
-    if not (filename_lower.endswith(".pcap") or filename_lower.endswith(".pcapng")):
+    if not filename_lower.endswith(CAPTURE_SUFFIXES):
         raise HTTPException(
             status_code=400,
             detail="Only .pcap or .pcapng capture files are accepted.",
         )
 
     # Temporary directory for upload
-    base_dir = Path(__file__).resolve().parents[2]
-    uploads_dir = base_dir / "databases" / "uploads"
-    uploads_dir.mkdir(parents=True, exist_ok=True)
+    uploads_dir = _uploads_dir()
 
     temp_name = f"{uuid.uuid4()}_{file.filename}"
     temp_path = uploads_dir / temp_name
-    
+    content = await file.read()
+    temp_path.write_bytes(content)
+    # Ensure temp_path is absolute before passing it to the service
+    return temp_path.resolve()
+
+
+def _parse_user_metadata(user_metadata: str | None):
+    """
+    Parses optional user metadata (SSID, client MAC, analysis scope, etc.).
+    An invalid `scope` block is rejected here, before the upload is stored.
+    """
+    if not user_metadata:
+        return None
+    try:
+        metadata = json.loads(user_metadata)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(metadata, dict):
+        return None
     try:
-        content = await file.read()
-        temp_path.write_bytes(content)
+        BandSteeringService.build_capture_scope(metadata)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid analysis scope: {str(e)}")
+    return metadata
 
 
-        # Parse optional user metadata (SSID, client MAC, etc.)
-        metadata_dict = None
-        if user_metadata:
-            try:
-                metadata_dict = json.loads(user_metadata)
-            except json.JSONDecodeError:
-                metadata_dict = None
-
-        # Execute the service in a separate thread (tshark is blocking)
-        # Ensure temp_path is absolute before passing it to the service
-        temp_path_abs = temp_path.resolve()
-        loop = asyncio.get_event_loop()
-        result_pkg = await loop.run_in_executor(
-            _executor,
-            lambda: asyncio.run(
-                band_steering_service.process_capture(
-                    str(temp_path_abs),
-                    user_metadata=metadata_dict,
-                    original_filename=file.filename,
-                )
-            )
+# Chunk size used when streaming archives and archive members to disk
+_COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def _extract_archive_captures(
+    archive_path: Path,
+    captures: List[Tuple[str, str]],
+    limit: int,
+    budget: List[int],
+) -> None:
+    """
+    Extracts the .pcap / .pcapng members of a zip or tar archive into the
+    uploads directory (flattened; other members are ignored), appending
+    (absolute path, original name) to `captures` as each member is written so
+    the caller can clean up after a failure. `budget` holds the bytes that may
+    still be extracted for the batch. Raises ValueError above `limit` captures
+    or when the budget runs out.
+    """
+    uploads_dir = _uploads_dir()
+
+    def store(name: str, source) -> None:
+        if len(captures) >= limit:
+            raise ValueError(f"Too many captures in the batch (limit {limit}).")
+        target = uploads_dir / f"{uuid.uuid4()}_{name}"
+        captures.append((str(target.resolve()), name))
+        with open(target, "wb") as out:
+            while chunk := source.read(_COPY_CHUNK_BYTES):
+                budget[0] -= len(chunk)
+                if budget[0] < 0:
+                    raise ValueError(
+                        "Captures extracted from the batch archives exceed "
+                        f"{settings.batch_max_extracted_mb} MB."
+                    )
+                out.write(chunk)
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                # Only the base name is kept, so members cannot escape the uploads dir
+                name = Path(member.filename).name
+                if not member.is_dir() and name.lower().endswith(CAPTURE_SUFFIXES):
+                    with archive.open(member) as source:
+                        store(name, source)
+    else:
+        with tarfile.open(archive_path, "r:*") as archive:
+            for member in archive:
+                name = Path(member.name).name
+                if member.isfile() and name.lower().endswith(CAPTURE_SUFFIXES):
+                    source = archive.extractfile(member)
+                    if source is not None:
+                        store(name, source)
+
+
+async def _stream_to_disk(file: UploadFile, target: Path) -> None:
+    """Writes an upload to `target` in chunks instead of reading it whole."""
+    with open(target, "wb") as out:
+        while chunk := await file.read(_COPY_CHUNK_BYTES):
+            out.write(chunk)
+
+
+async def _save_batch_uploads(files: List[UploadFile]) -> List[Tuple[str, str]]:
+    """
+    Stores the captures of a batch: plain .pcap / .pcapng uploads plus the
+    captures found inside .zip / .tar(.gz) archives. If any file is rejected,
+    every capture already stored for the batch is removed.
+    """
+    limit = settings.batch_max_files
+    budget = [settings.batch_max_extracted_mb * 1024 * 1024]
+    captures: List[Tuple[str, str]] = []
+    try:
+        for file in files:
+            filename_lower = (file.filename or "").lower()
+            if filename_lower.endswith(ARCHIVE_SUFFIXES):
+                archive_path = _uploads_dir() / f"{uuid.uuid4()}_{Path(file.filename).name}"
+                try:
+                    await _stream_to_disk(file, archive_path)
+                    await asyncio.to_thread(
+                        _extract_archive_captures, archive_path, captures, limit, budget
+                    )
+                except ValueError as e:
+                    raise HTTPException(status_code=413, detail=str(e))
+                except (zipfile.BadZipFile, tarfile.TarError) as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid archive {file.filename}: {str(e)}")
+                finally:
+                    archive_path.unlink(missing_ok=True)
+            else:
+                if len(captures) >= limit:
+                    raise HTTPException(status_code=413, detail=f"Too many captures in the batch (limit {limit}).")
+                captures.append((str(await _save_upload(file)), file.filename))
+
+        if not captures:
+            raise HTTPException(status_code=400, detail="The batch contains no .pcap or .pcapng captures.")
+    except BaseException:
+        for path, _ in captures:
+            Path(path).unlink(missing_ok=True)
+        raise
+    return captures
+
+
+def _submit_job(temp_path: Path, metadata_dict, filename: str):
+    """Queues the analysis of a stored upload; the upload is removed if it is not queued."""
+    try:
+        return get_analysis_job_manager().submit(
+            str(temp_path),
+            user_metadata=metadata_dict,
+            original_filename=filename,
         )
-        # CRITICAL: The temporary file must exist when the analysis is saved
-        # Ensure the path is absolute and the file exists
-        if not temp_path_abs.exists():
-            raise HTTPException(
-                status_code=500,
-                detail="Temporary file was lost during processing",
-            )
-
-        analysis = result_pkg["analysis"]
-        raw_stats = result_pkg["raw_stats"]
-
-        # Format response for FULL compatibility with the current frontend
-        try:
-            # Safely serialize all Pydantic objects
-            response_data = {
-                "file_name": analysis.filename,
-                "analysis": analysis.analysis_text,
-                "stats": raw_stats,  # Keep stats structure for the dashboard
-                "band_steering": {
-                    "analysis_id": analysis.analysis_id,
-                    "verdict": analysis.verdict,
-                    "device": analysis.devices[0].model_dump() if analysis.devices and len(analysis.devices) > 0 else {},
-                    "compliance_checks": [c.model_dump(mode='json') for c in analysis.compliance_checks] if analysis.compliance_checks else [],
-                    "fragments_count": len(analysis.fragments) if analysis.fragments else 0,
-                    # Add data for Band Steering chart
-                    "btm_events": [e.model_dump(mode='json') for e in analysis.btm_events] if analysis.btm_events else [],
-                    "transitions": [t.model_dump(mode='json') for t in analysis.transitions] if analysis.transitions else [],
-                    "signal_samples": [s.model_dump(mode='json') for s in analysis.signal_samples] if analysis.signal_samples else []
-                }
-            }
-            return JSONResponse(content=response_data)
-        except Exception as serialization_error:
-            # Try minimal response
-            try:
-                minimal_response = {
-                    "file_name": analysis.filename if hasattr(analysis, 'filename') else "unknown",
-                    "analysis": analysis.analysis_text if hasattr(analysis, 'analysis_text') else "Error generating analysis",
-                    "stats": raw_stats,
-                    "band_steering": {
-                        "analysis_id": str(analysis.analysis_id) if hasattr(analysis, 'analysis_id') else "unknown",
-                        "verdict": str(analysis.verdict) if hasattr(analysis, 'verdict') else "UNKNOWN",
-                        "error": f"Serialization error: {str(serialization_error)}"
-                    }
-                }
-                return JSONResponse(content=minimal_response)
-            except Exception:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Critical error serializing response: {str(serialization_error)}"
-                )
+    except JobQueueFullError as e:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+@router.post("/analyze")
+async def analyze_network_capture(
+    file: UploadFile = File(...),
+    user_metadata: str | None = Form(None),
+):
+    """
+    Uploads a capture file and performs the full Band Steering process.
+    Runs on the analysis worker pool and waits for the result.
+    """
+    metadata_dict = _parse_user_metadata(user_metadata)
+    temp_path_abs = await _save_upload(file)
+    job = _submit_job(temp_path_abs, metadata_dict, file.filename)
+
+    try:
+        # DO NOT delete the file - it is copied to the analysis folder on persistence
+        future = get_analysis_job_manager().get_future(job["job_id"])
+        output = await asyncio.wrap_future(future)
+        # Returned here; the job keeps only its status
+        get_analysis_job_manager().release_result(job["job_id"])
+        return JSONResponse(content=output["response"])
     except RuntimeError as e:
         # Typical errors from pyshark/tshark not installed
         raise HTTPException(
@@ -142,9 +236,248 @@ async def analyze_network_capture(
             status_code=500,
             detail=f"Error analyzing network capture: {str(e)}",
         )
+
+
+@router.post("/jobs", status_code=202)
+async def create_analysis_job(
+    file: UploadFile = File(...),
+    user_metadata: str | None = Form(None),
+):
+    """
+    Uploads a capture file and enqueues its analysis.
+    Returns the job id immediately; poll `GET /jobs/{job_id}` for progress.
+    Responds 429 when the analysis queue is full.
+    """
+    metadata_dict = _parse_user_metadata(user_metadata)
+    temp_path_abs = await _save_upload(file)
+    return _submit_job(temp_path_abs, metadata_dict, file.filename)
+
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    """
+    Status of an analysis job and progress of each stage
+    (parsing, classification, btm, fragments, narrative, persistence).
+    `narrative_status` stays "pending" after completion while the LLM
+    narrative is generated in the background; poll until it changes.
+    """
+    status = get_analysis_job_manager().get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found.")
+    return status
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_analysis_job_result(job_id: str):
+    """
+    Result of a completed job, in the same format as `POST /analyze`.
+    Responds 409 while the job is still queued or running, and 410 once the
+    result was released (jobs of a batch or of `POST /analyze`); the stored
+    analysis is then served from `result_url`.
+    """
+    manager = get_analysis_job_manager()
+    status = manager.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found.")
+    if status["status"] == JOB_FAILED:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing network capture: {status['error']}",
+        )
+    if status["result_released"]:
+        raise HTTPException(
+            status_code=410,
+            detail=f"Analysis job result was released; the stored analysis is at {status['result_url']}.",
+        )
+    result = manager.get_result(job_id)
+    if result is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Analysis job is {status['status']}.",
+        )
+    return JSONResponse(content=result)
+
+
+# Seconds without events before an SSE keep-alive comment is sent
+_SSE_KEEPALIVE_SECONDS = 15
+
+
+async def _stream_job_events(job_id: str) -> AsyncIterator[str]:
+    """
+    Streams the events of an analysis job as Server-Sent Events:
+    `job` (current status), `status` / `stage` changes, `snapshot` (partial
+    parse results) and finally `final` (full analysis) or `error`, then `done`.
+    If the final analysis has its narrative pending, the stream stays open
+    for the `narrative` event before `done`.
+    """
+    manager = get_analysis_job_manager()
+    queue = manager.subscribe(job_id)
+    if queue is None:
+        yield f"data: {json.dumps({'type': 'error', 'data': {'message': 'Analysis job not found.'}})}\n\n"
+        return
+
+    try:
+        yield f"data: {json.dumps({'type': 'job', 'data': manager.get_status(job_id)}, default=str)}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=_SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+            event_type = event.get("type")
+            if event_type == "final":
+                narrative_status = (event["data"].get("analysis") or {}).get("narrative_status")
+                if narrative_status == NARRATIVE_PENDING:
+                    continue
+            if event_type in ("final", "error", "narrative"):
+                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                break
+    finally:
+        manager.unsubscribe(job_id, queue)
+
+
+def _sse_response(job_id: str) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_job_events(job_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # Disable buffering in nginx
+            "X-Analysis-Job-Id": job_id,
+        },
+    )
+
+
+@router.post("/analyze/stream")
+async def analyze_network_capture_stream(
+    file: UploadFile = File(...),
+    user_metadata: str | None = Form(None),
+):
+    """
+    Uploads a capture file and streams the analysis over Server-Sent Events.
+    While the capture is parsed, `snapshot` events carry running frame and
+    BTM / association / deauth counters, newly detected transitions and
+    downsampled signal points (cadence: `analysis_snapshot_interval_seconds`).
+    The `final` event carries the full `BandSteeringAnalysis`.
+    """
+    metadata_dict = _parse_user_metadata(user_metadata)
+    temp_path_abs = await _save_upload(file)
+    job = _submit_job(temp_path_abs, metadata_dict, file.filename)
+    return _sse_response(job["job_id"])
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_analysis_job_events(job_id: str):
+    """
+    Attaches to the event stream of an existing job (same events as
+    `POST /analyze/stream`).
+    """
+    if get_analysis_job_manager().get_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found.")
+    return _sse_response(job_id)
+
+
+async def _stream_batch_events(batch_id: str) -> AsyncIterator[str]:
+    """
+    Streams a batch as Server-Sent Events: `batch` (current status), one
+    `file` event per capture as its analysis finishes, then `summary`
+    (fleet summary) and `done`.
+    """
+    manager = get_analysis_batch_manager()
+    queue = manager.subscribe(batch_id)
+    if queue is None:
+        yield f"data: {json.dumps({'type': 'error', 'data': {'message': 'Analysis batch not found.'}})}\n\n"
+        return
+
+    try:
+        yield f"data: {json.dumps({'type': 'batch', 'data': manager.get_status(batch_id)}, default=str)}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=_SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+            if event.get("type") == "summary":
+                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                break
     finally:
-        # DO NOT delete the file - it will be saved for later download
-        # The file will be moved to the analysis folder in band_steering_service
-        pass
+        manager.unsubscribe(batch_id, queue)
+
+
+def _batch_sse_response(batch_id: str) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_batch_events(batch_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # Disable buffering in nginx
+            "X-Analysis-Batch-Id": batch_id,
+        },
+    )
+
 
+@router.post("/batch", status_code=202)
+async def create_analysis_batch(
+    files: List[UploadFile] = File(...),
+    user_metadata: str | None = Form(None),
+):
+    """
+    Uploads many captures (.pcap / .pcapng files and/or .zip / .tar(.gz)
+    archives of them) and analyzes them concurrently, at most
+    `batch_concurrency` at a time. `user_metadata` applies to every capture.
+    Returns the batch id immediately; poll `GET /batch/{batch_id}` or
+    subscribe to `GET /batch/{batch_id}/events`.
+    """
+    metadata_dict = _parse_user_metadata(user_metadata)
+    captures = await _save_batch_uploads(files)
+    return get_analysis_batch_manager().submit(captures, user_metadata=metadata_dict)
 
+
+@router.post("/batch/stream")
+async def analyze_batch_stream(
+    files: List[UploadFile] = File(...),
+    user_metadata: str | None = Form(None),
+):
+    """
+    Same as `POST /batch`, streaming per-file results over Server-Sent
+    Events as they finish and the fleet summary at the end.
+    """
+    metadata_dict = _parse_user_metadata(user_metadata)
+    captures = await _save_batch_uploads(files)
+    batch = get_analysis_batch_manager().submit(captures, user_metadata=metadata_dict)
+    return _batch_sse_response(batch["batch_id"])
+
+
+@router.get("/batch/{batch_id}")
+async def get_analysis_batch(batch_id: str):
+    """
+    Status of a batch with the results of the captures finished so far and,
+    once every capture is done, the fleet summary (verdict distribution,
+    BTM success rate percentiles, per-vendor breakdown).
+    """
+    status = get_analysis_batch_manager().get_status(batch_id, include_results=True)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Analysis batch not found.")
+    return status
+
+
+@router.get("/batch/{batch_id}/events")
+async def stream_analysis_batch_events(batch_id: str):
+    """Attaches to the event stream of an existing batch."""
+    if get_analysis_batch_manager().get_status(batch_id) is None:
+        raise HTTPException(status_code=404, detail="Analysis batch not found.")
+    return _batch_sse_response(batch_id)
+
+
+@router.get("/cache/stats")
+async def get_capture_cache_stats():
+    """
+    Hit/miss counters and disk usage of the parsed-capture cache.
+    """
+    return get_capture_parse_cache().stats()
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Header
 from fastapi.responses import FileResponse, Response
 from fastapi import Body
 from pathlib import Path
 import json
 from typing import List, Dict, Any, Optional
 from io import BytesIO
-from datetime import datetime
-from collections import Counter
+from datetime import datetime, timedelta
+import hashlib
 import pytz
 from ..services.band_steering_service import BandSteeringService
+from ..core.analysis_storage import load_analysis, raw_path_for
+from ..core.analysis_catalog import SORT_COLUMNS, decode_cursor, encode_cursor
 from ..agent.llm_client import LLMClient
 
 # WeasyPrint will be imported lazily only when needed
@@ -37,111 +39,149 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 service = BandSteeringService()
 llm_client = LLMClient()
 
+# Page size limit of the paginated listing
+MAX_REPORTS_PAGE_SIZE = 500
+
+def _report_summary(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Listing entry of a catalog row."""
+    return {
+        "id": record["analysis_id"],
+        "filename": record["filename"],  # Original pcap name
+        "timestamp": record["analysis_timestamp"],
+        "vendor": record["vendor"],
+        "model": record["model"],
+        "verdict": record["verdict"],
+        "time_2_4ghz": record["time_2_4ghz"] or 0.0,
+        "time_5ghz": record["time_5ghz"] or 0.0,
+        "transition_times": record["transition_times"],
+    }
+
+def _timestamp_bound(value: Optional[str], name: str, end: bool = False) -> Optional[str]:
+    """
+    Catalog timestamp bound of a date / datetime query parameter. A date-only
+    `date_to` covers the whole day (bound at the next midnight).
+    """
+    if not value:
+        return None
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected an ISO date or datetime")
+    if end and len(value) == 10:
+        bound += timedelta(days=1)
+    return bound.isoformat()
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 # Handle both /reports and /reports/
 @router.get("", include_in_schema=True)
 @router.get("/", include_in_schema=True)
-async def list_reports():
+async def list_reports(
+    response: Response,
+    vendor: Optional[str] = Query(None, description="Exact vendor"),
+    model: Optional[str] = Query(None, description="Exact device model"),
+    verdict: Optional[str] = Query(None, description="Exact verdict"),
+    date_from: Optional[str] = Query(None, description="Analyses at or after this ISO date/datetime"),
+    date_to: Optional[str] = Query(None, description="Analyses before this ISO datetime (a date includes the whole day)"),
+    filename: Optional[str] = Query(None, description="Substring of the capture filename (case-insensitive)"),
+    sort: str = Query("timestamp", description=f"Sort key: {', '.join(SORT_COLUMNS)}"),
+    order: str = Query("desc", description="asc or desc"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_REPORTS_PAGE_SIZE, description="Page size; enables pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    Lists all saved analyses organized by brand.
+    Lists saved analyses, filtered and sorted by the catalog.
+
+    Without `limit` / `cursor` the response is the full list (as before);
+    with them it is a page `{"items", "next_cursor", "limit"}`, where
+    `next_cursor` is null on the last page. Responses carry an ETag derived
+    from the catalog revision: an unchanged listing returns 304.
     """
-    reports = []
-    base_dir = service.base_dir
-    
-    
-    if not base_dir.exists():
-        return []
-        
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort '{sort}'. Use one of: {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    descending = order == "desc"
+    paginated = limit is not None or cursor is not None
+    page_size = limit or 50
+
+    filters = {
+        "vendor": vendor,
+        "model": model,
+        "verdict": verdict,
+        "date_from": _timestamp_bound(date_from, "date_from"),
+        "date_to": _timestamp_bound(date_to, "date_to", end=True),
+        "filename": filename,
+    }
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort, descending)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        # Traverse Brand / Device / Analysis.json
-        for vendor_dir in base_dir.iterdir():
-            if not vendor_dir.is_dir():
-                continue
-            
-            for device_dir in vendor_dir.iterdir():
-                if not device_dir.is_dir():
-                    continue
-                
-                for analysis_file in device_dir.glob("*.json"):
-                    try:
-                        with open(analysis_file, "r", encoding="utf-8") as f:
-                            data = json.load(f)
-                            # Extract device info
-                            devices = data.get("devices", [])
-                            if not devices or len(devices) == 0:
-                                continue
-                            
-                            device = devices[0]
-                            
-                            # Get data to calculate band times
-                            transitions = []
-                            signal_samples = []
-                            
-                            # Try to get from band_steering structure (new structure)
-                            band_steering = data.get("band_steering", {})
-                            if isinstance(band_steering, dict):
-                                transitions = band_steering.get("transitions", [])
-                                signal_samples = band_steering.get("signal_samples", [])
-                            
-                            # Fallback: try from root level (old structure)
-                            if not transitions:
-                                transitions = data.get("transitions", [])
-                            if not signal_samples:
-                                signal_samples = data.get("signal_samples", [])
-                            
-                            # Calculate band times
-                            time_2_4ghz, time_5ghz, transition_times_list = _calculate_band_times(
-                                transitions, signal_samples
-                            )
-                            
-                            verdict = data.get("verdict")
-                            analysis_id = data.get("analysis_id")
-                            
-                            reports.append({
-                                "id": analysis_id,
-                                "filename": data.get("filename"), # Original pcap name
-                                "timestamp": data.get("analysis_timestamp"),
-                                "vendor": device.get("vendor", "Unknown"),
-                                "model": device.get("device_model", "Unknown"),
-                                "verdict": verdict,
-                                "time_2_4ghz": time_2_4ghz,
-                                "time_5ghz": time_5ghz,
-                                "transition_times": transition_times_list
-                            })
-                    except (json.JSONDecodeError, Exception):
-                        pass
-        
-        # Sort by timestamp descending
-        reports.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        return reports
+        # Same catalog revision and query -> same response
+        query_key = json.dumps([filters, sort, order, paginated, page_size, cursor], sort_keys=True)
+        revision = service.catalog.revision()
+        etag = 'W/"' + hashlib.sha1(f"{revision}:{query_key}".encode("utf-8")).hexdigest() + '"'
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+
+        # Catalog rows carry the listing fields (band times are precomputed
+        # when the analysis is saved): no analysis JSON is opened
+        records, next_key = service.catalog.query(
+            filters=filters,
+            sort=sort,
+            descending=descending,
+            limit=page_size if paginated else None,
+            after=after,
+        )
+        items = [_report_summary(record) for record in records]
+        if not paginated:
+            return items
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(next_key, sort, descending) if next_key else None,
+            "limit": page_size,
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/captures/{capture_id}")
+async def get_capture_rollup(capture_id: str):
+    """
+    Capture-level rollup of a multi-client analysis (`"multi_client": true`
+    in the upload metadata): verdict distribution, failed checks and one
+    summary row per station with the id of its analysis.
+    """
+    try:
+        rollup = service.get_capture_rollup(capture_id)
+    except (OSError, json.JSONDecodeError) as e:
+        raise HTTPException(status_code=500, detail=f"Error reading capture rollup: {str(e)}")
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="Capture rollup not found")
+    return rollup
+
 @router.get("/{analysis_id}/download")
 async def download_capture(analysis_id: str):
     """
     Downloads the original pcap file for an analysis.
     """
-    base_dir = service.base_dir
-    
     try:
-        # Find the analysis JSON file
-        analysis_file = None
-        json_files = list(base_dir.glob(f"**/{analysis_id}.json"))
-        for json_file in json_files:
-            analysis_file = json_file
-            break
-        
-        if not analysis_file:
+        record = service.catalog.get(analysis_id)
+        if not record:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        
-        # Read JSON to get pcap file path
-        with open(analysis_file, "r", encoding="utf-8") as f:
-            analysis_data = json.load(f)
-        
-        
         # Get pcap file path
-        pcap_path = analysis_data.get("original_file_path")
+        pcap_path = record.get("capture_path")
         
         if not pcap_path:
             # Old report without saved file
@@ -155,8 +195,8 @@ async def download_capture(analysis_id: str):
         if not pcap_file.exists():
             raise HTTPException(status_code=404, detail="The pcap file no longer exists on the server")
         
-        # Get original filename from JSON
-        original_filename = analysis_data.get("filename", "capture.pcap")
+        # Get original filename from the catalog
+        original_filename = record.get("filename") or "capture.pcap"
         
         if not original_filename.endswith((".pcap", ".pcapng")):
             # Ensure correct extension
@@ -175,6 +215,29 @@ async def download_capture(analysis_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
 
+def _delete_analysis(analysis_id: str) -> bool:
+    """
+    Deletes the JSON of an analysis (summary and raw stats blob) and its
+    catalog row in one transaction (the row is kept if a file cannot be
+    removed). False if not found.
+    """
+    def remove(record: Dict[str, Any]) -> None:
+        json_path = Path(record["json_path"])
+        raw_path_for(json_path).unlink(missing_ok=True)
+        json_path.unlink(missing_ok=True)
+    
+    return service.catalog.delete(analysis_id, remove=remove) is not None
+
+def _remove_empty_dirs(base_dir: Path) -> None:
+    """Removes Vendor/Device folders left empty after deleting reports."""
+    for vendor_dir in base_dir.iterdir():
+        if vendor_dir.is_dir():
+            for device_dir in vendor_dir.iterdir():
+                if device_dir.is_dir() and not any(device_dir.iterdir()):
+                    device_dir.rmdir()
+            if not any(vendor_dir.iterdir()):
+                vendor_dir.rmdir()
+
 # IMPORTANT: Specific routes must go BEFORE generic routes with parameters
 # FastAPI evaluates routes in order, so /batch must go before /{analysis_id}
 
@@ -204,27 +267,16 @@ async def delete_batch_reports(request: Dict[str, List[str]]):
             }
         
         for analysis_id in ids:
-            found = False
-            for analysis_file in base_dir.glob(f"**/{analysis_id}.json"):
-                try:
-                    analysis_file.unlink()
-                    deleted_count += 1
-                    found = True
-                    break
-                except Exception:
-                    pass
-            
-            if not found:
+            try:
+                found = _delete_analysis(analysis_id)
+            except Exception:
+                found = False
+            if found:
+                deleted_count += 1
+            else:
                 not_found.append(analysis_id)
         
-        # Clean up empty directories
-        for vendor_dir in base_dir.iterdir():
-            if vendor_dir.is_dir():
-                for device_dir in vendor_dir.iterdir():
-                    if device_dir.is_dir() and not any(device_dir.iterdir()):
-                        device_dir.rmdir()
-                if not any(vendor_dir.iterdir()):
-                    vendor_dir.rmdir()
+        _remove_empty_dirs(base_dir)
         
         message = f"Deleted {deleted_count} reports"
         if not_found:
@@ -256,19 +308,16 @@ async def delete_all_reports():
         # Find all analysis JSON files
         for analysis_file in base_dir.glob("**/*.json"):
             try:
+                raw_path_for(analysis_file).unlink(missing_ok=True)
                 analysis_file.unlink()
                 deleted_count += 1
             except Exception:
                 pass
         
-        # Clean up empty directories
-        for vendor_dir in base_dir.iterdir():
-            if vendor_dir.is_dir():
-                for device_dir in vendor_dir.iterdir():
-                    if device_dir.is_dir() and not any(device_dir.iterdir()):
-                        device_dir.rmdir()
-                if not any(vendor_dir.iterdir()):
-                    vendor_dir.rmdir()
+        # Re-index whatever could not be deleted
+        service.catalog.rebuild()
+        
+        _remove_empty_dirs(base_dir)
         
         return {"status": "success", "message": f"Deleted {deleted_count} reports", "deleted": deleted_count}
     except Exception as e:
@@ -279,16 +328,8 @@ async def delete_report(analysis_id: str):
     """
     Deletes a specific report by its ID.
     """
-    base_dir = service.base_dir
     try:
-        # Find the file in the folder structure
-        found = False
-        for analysis_file in base_dir.glob(f"**/{analysis_id}.json"):
-            analysis_file.unlink()
-            found = True
-            break
-            
-        if not found:
+        if not _delete_analysis(analysis_id):
             raise HTTPException(status_code=404, detail="Report not found")
             
         return {"status": "success", "message": f"Report {analysis_id} deleted"}
@@ -303,15 +344,9 @@ async def save_pdf(analysis_id: str, html_content: str = Body(..., media_type="t
     Persists the analysis report PDF from the HTML provided by the frontend.
     Called when the user clicks "Export PDF" in NetworkAnalysisPage.
     """
-    base_dir = service.base_dir
-    
     try:
         # Find the analysis JSON file to get the directory path
-        analysis_file = None
-        json_files = list(base_dir.glob(f"**/{analysis_id}.json"))
-        for json_file in json_files:
-            analysis_file = json_file
-            break
+        analysis_file = service.find_analysis_file(analysis_id)
         
         if not analysis_file:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -389,6 +424,8 @@ async def save_pdf(analysis_id: str, html_content: str = Body(..., media_type="t
                         pass
                 raise
             
+            service.catalog.set_pdf_path(analysis_id, str(pdf_path))
+            
             return {
                 "status": "success", 
                 "message": "PDF saved successfully", 
@@ -425,29 +462,25 @@ async def download_pdf(analysis_id: str):
     Downloads the persisted analysis report PDF.
     If the PDF does not exist, it generates it automatically from the analysis data.
     """
-    base_dir = service.base_dir
-    
     try:
+        record = service.catalog.get(analysis_id)
+        if not record:
+            raise HTTPException(
+                status_code=404,
+                detail="Analysis not found"
+            )
+        
         # Find the persisted PDF file
-        pdf_files = list(base_dir.glob(f"**/{analysis_id}.pdf"))
+        pdf_file = Path(record["pdf_path"]) if record.get("pdf_path") else None
         
         # If the PDF does not exist, generate it automatically
-        if not pdf_files:
-            
-            # Find the analysis JSON file
-            json_files = list(base_dir.glob(f"**/{analysis_id}.json"))
-            if not json_files:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Analysis not found"
-                )
+        if pdf_file is None or not pdf_file.exists():
             
-            analysis_file = json_files[0]
+            analysis_file = Path(record["json_path"])
             
-            # Read analysis JSON
+            # Read analysis JSON (the PDF only uses the diagnostics raw stats)
             try:
-                with open(analysis_file, "r", encoding="utf-8") as f:
-                    analysis_data = json.load(f)
+                analysis_data = load_analysis(analysis_file, raw_sections=["diagnostics"])
             except Exception as e:
                 raise HTTPException(
                     status_code=500,
@@ -489,6 +522,7 @@ async def download_pdf(analysis_id: str):
                         pdf_path.unlink()
                         raise Exception(f"Invalid PDF (header: {header})")
                 
+                service.catalog.set_pdf_path(analysis_id, str(pdf_path))
                 
             except Exception as pdf_error:
                 if pdf_path.exists():
@@ -502,7 +536,7 @@ async def download_pdf(analysis_id: str):
                 )
         else:
             # The PDF already exists, use the one found
-            pdf_path = pdf_files[0]
+            pdf_path = pdf_file
         
         # Validate that PDF exists and has content
         if not pdf_path.exists():
@@ -540,33 +574,16 @@ async def download_pdf(analysis_id: str):
                 detail=f"Error validating PDF: {str(header_error)}"
             )
         
-        # Get original filename from JSON for download name
-        json_files = list(base_dir.glob(f"**/{analysis_id}.json"))
+        # Download name from the catalog: device model, else the capture name
         filename = f"report_{analysis_id}.pdf"
-        if json_files:
-            try:
-                with open(json_files[0], "r", encoding="utf-8") as f:
-                    analysis_data = json.load(f)
-                    # Try to get device model first
-                    devices = analysis_data.get("devices", [])
-                    if devices and len(devices) > 0:
-                        model = devices[0].get("device_model", "")
-                        if model and model != "Unknown" and model != "Generic":
-                            filename = f"Pipe {model.upper()}.pdf"
-                        else:
-                            # Fallback to filename
-                            original_filename = analysis_data.get("filename", "")
-                            if original_filename:
-                                clean_name = original_filename.split('.')[0].replace('_', ' ').strip()
-                                filename = f"Pipe {clean_name.upper()}.pdf"
-                    else:
-                        # Fallback to filename
-                        original_filename = analysis_data.get("filename", "")
-                        if original_filename:
-                            clean_name = original_filename.split('.')[0].replace('_', ' ').strip()
-                            filename = f"Pipe {clean_name.upper()}.pdf"
-            except Exception:
-                pass
+        model = record.get("model") or ""
+        if model and model != "Unknown" and model != "Generic":
+            filename = f"Pipe {model.upper()}.pdf"
+        else:
+            original_filename = record.get("filename") or ""
+            if original_filename:
+                clean_name = original_filename.split('.')[0].replace('_', ' ').strip()
+                filename = f"Pipe {clean_name.upper()}.pdf"
         
         return FileResponse(
             path=str(pdf_path),
@@ -585,7 +602,7 @@ def _generate_pdf_html(analysis_data: Dict[str, Any]) -> str:
     filename = analysis_data.get("filename", "Unknown")
     clean_name = filename.split('.')[0].replace('_', ' ').strip()
     verdict = analysis_data.get("verdict", "UNKNOWN")
-    analysis_text = analysis_data.get("analysis_text", "No analysis available")
+    analysis_text = analysis_data.get("analysis_text") or "No analysis available"
     
     # Device information
     devices = analysis_data.get("devices", [])
@@ -1228,321 +1245,38 @@ def _generate_pdf_html(analysis_data: Dict[str, Any]) -> str:
 @router.get("/stats")
 async def get_reports_stats():
     """
-    Gets aggregate statistics for all reports.
+    Gets aggregate statistics for all reports, read from the statistics
+    materialized in the analysis catalog.
     """
-    base_dir = service.base_dir
-    reports = []
-    
     try:
-        if not base_dir.exists():
-            return {
-                "total_reports": 0,
-                "verdict_distribution": {},
-                "top_vendors": [],
-                "last_capture": None,
-                "success_rate": 0.0
-            }
-        
-        # Collect all reports (similar to list_reports)
-        for vendor_dir in base_dir.iterdir():
-            if not vendor_dir.is_dir():
-                continue
-            
-            for device_dir in vendor_dir.iterdir():
-                if not device_dir.is_dir():
-                    continue
-                
-                for analysis_file in device_dir.glob("*.json"):
-                    try:
-                        with open(analysis_file, "r", encoding="utf-8") as f:
-                            data = json.load(f)
-                            devices = data.get("devices", [])
-                            if not devices or len(devices) == 0:
-                                continue
-                            
-                            device = devices[0]
-                            reports.append({
-                                "id": data.get("analysis_id"),
-                                "filename": data.get("filename"),
-                                "timestamp": data.get("analysis_timestamp"),
-                                "vendor": device.get("vendor", "Unknown"),
-                                "model": device.get("device_model", "Unknown"),
-                                "verdict": data.get("verdict")
-                            })
-                    except Exception:
-                        pass
-        
-        if not reports:
-            return {
-                "total_reports": 0,
-                "verdict_distribution": {},
-                "top_vendors": [],
-                "last_capture": None,
-                "success_rate": 0.0
-            }
-        
-        # Calculate statistics
-        total = len(reports)
-        verdict_counter = Counter([r.get("verdict", "UNKNOWN") for r in reports])
-        vendor_counter = Counter([r.get("vendor", "Unknown") for r in reports])
-        
-        # Verdict distribution
-        verdict_distribution = dict(verdict_counter)
-        
-        # Top 3 vendors
-        top_vendors = [{"vendor": vendor, "count": count} for vendor, count in vendor_counter.most_common(3)]
-        
-        # Last capture
-        sorted_reports = sorted(reports, key=lambda x: x.get("timestamp", ""), reverse=True)
-        last_capture = sorted_reports[0].get("timestamp") if sorted_reports else None
-        
-        # Success rate (SUCCESS, EXCELLENT, GOOD)
-        success_verdicts = ["SUCCESS", "EXCELLENT", "GOOD"]
-        success_count = sum(1 for r in reports if r.get("verdict", "").upper() in success_verdicts)
-        success_rate = (success_count / total * 100) if total > 0 else 0.0
-        
+        stats = service.catalog.statistics()
         return {
-            "total_reports": total,
-            "verdict_distribution": verdict_distribution,
-            "top_vendors": top_vendors,
-            "last_capture": last_capture,
-            "success_rate": round(success_rate, 2)
+            "total_reports": stats["total_reports"],
+            "verdict_distribution": stats["verdict_distribution"],
+            # Top 3 vendors
+            "top_vendors": stats["vendors"][:3],
+            "last_capture": stats["last_capture"],
+            # Success rate (SUCCESS, EXCELLENT, GOOD)
+            "success_rate": stats["success_rate"],
+            "btm_success_rate": stats["btm_success_rate"],
+            "transition_time": stats["transition_time"],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating statistics: {str(e)}")
 
-def _calculate_band_times(transitions: List[Dict[str, Any]], signal_samples: List[Dict[str, Any]]) -> tuple:
+@router.get("/stats/brands/{brand}")
+async def get_brand_stats(brand: str):
     """
-    Calculates the total accumulated time in each band and a list of individual transition times.
-    Extracts data directly from Wireshark, explicitly excluding transition periods.
-    
-    PHILOSOPHY:
-    - Time in band is calculated using Wireshark signal samples
-    - Transition periods (between start_time and end_time) are EXCLUDED from time in band
-    - Transition time is simply the duration of each transition (end_time - start_time)
-    
-    Args:
-        transitions: List of transitions with start_time, end_time, from_band, to_band, duration
-        signal_samples: List of signal samples with timestamp and band (Wireshark's source of truth)
-        
-    Returns:
-        Tuple (time_2_4ghz, time_5ghz, transition_times_list) where transition_times_list is a list of durations
+    Aggregate statistics of one brand (vendor): verdicts, success rate, BTM
+    success-rate and transition-time quantiles, and counts per model.
     """
-    time_2_4ghz = 0.0
-    time_5ghz = 0.0
-    transition_times = []  # List of individual times for each transition
-    
-    if not transitions and not signal_samples:
-        return (0.0, 0.0, [])
-    
-    # 1. Extract individual durations for each successful transition with band change
-    # We only care about transitions that actually involve a band change
-    valid_transitions = []
-    for trans in transitions:
-        if not trans.get("start_time") or not trans.get("is_successful"):
-            continue
-        
-        # Only count transitions with physical band change
-        if not trans.get("is_band_change"):
-            continue
-            
-        from_band = _normalize_band(trans.get("from_band", ""))
-        to_band = _normalize_band(trans.get("to_band", ""))
-        
-        # Verify that there's a real band change
-        if from_band and to_band and from_band != to_band:
-            valid_transitions.append(trans)
-            
-            # Calculate transition duration (time it takes to drop one band and pick up another)
-            start_time = float(trans.get("start_time", 0))
-            end_time = float(trans.get("end_time", start_time))
-            duration = end_time - start_time
-            
-            if duration > 0:
-                transition_times.append(duration)
-    
-    # Sort transitions by time
-    valid_transitions = sorted(valid_transitions, key=lambda x: float(x.get("start_time", 0)))
-    
-    # 2. Get all timestamps to calculate total time
-    all_timestamps = []
-    
-    # Add transition timestamps
-    for trans in valid_transitions:
-        start = trans.get("start_time")
-        end = trans.get("end_time")
-        if start:
-            try:
-                all_timestamps.append(float(start))
-            except (ValueError, TypeError):
-                pass
-        if end:
-            try:
-                all_timestamps.append(float(end))
-            except (ValueError, TypeError):
-                pass
-    
-    # Add signal sample timestamps (Wireshark's source of truth)
-    if signal_samples:
-        for sample in signal_samples:
-            ts = sample.get("timestamp")
-            if ts:
-                try:
-                    all_timestamps.append(float(ts))
-                except (ValueError, TypeError):
-                    pass
-    
-    if not all_timestamps:
-        return (0.0, 0.0, transition_times)
-    
-    min_time = min(all_timestamps)
-    max_time = max(all_timestamps)
-    total_time = max_time - min_time
-    
-    if total_time <= 0:
-        return (0.0, 0.0, transition_times)
-    
-    # 3. Build list of transition periods to exclude them
-    transition_periods = []
-    for trans in valid_transitions:
-        start_time = float(trans.get("start_time", 0))
-        end_time = float(trans.get("end_time", start_time))
-        if end_time > start_time:
-            transition_periods.append((start_time, end_time))
-    
-    # 4. Calculate time in each band using signal samples (Wireshark's source of truth)
-    # Filter and sort valid signal samples
-    valid_samples = []
-    for sample in (signal_samples or []):
-        band = sample.get("band", "")
-        timestamp = sample.get("timestamp")
-        if band and timestamp:
-            try:
-                ts = float(timestamp)
-                band_normalized = _normalize_band(band)
-                if band_normalized in ["2.4 GHz", "5 GHz"]:
-                    valid_samples.append({
-                        "timestamp": ts,
-                        "band": band_normalized
-                    })
-            except (ValueError, TypeError):
-                pass
-    
-    if not valid_samples:
-        # If no signal samples, use transition-based method (less precise)
-        if valid_transitions:
-            current_band = None
-            last_time = min_time
-            
-            for trans in valid_transitions:
-                start_time = float(trans.get("start_time", 0))
-                from_band = _normalize_band(trans.get("from_band", ""))
-                to_band = _normalize_band(trans.get("to_band", ""))
-                
-                # Determine initial band if it's the first transition
-                if current_band is None:
-                    current_band = from_band if from_band else to_band
-                
-                # Time in current band until transition starts (EXCLUDING transition)
-                if current_band and start_time > last_time:
-                    period = start_time - last_time
-                    if current_band == "2.4 GHz":
-                        time_2_4ghz += period
-                    elif current_band == "5 GHz":
-                        time_5ghz += period
-                
-                # Update band and time (after transition)
-                current_band = to_band if to_band else from_band
-                last_time = float(trans.get("end_time", start_time))
-            
-            # Final time after last transition
-            if current_band and last_time < max_time:
-                period = max_time - last_time
-                if current_band == "2.4 GHz":
-                    time_2_4ghz += period
-                elif current_band == "5 GHz":
-                    time_5ghz += period
-    else:
-        # Precise method: use signal samples and exclude transition periods
-        valid_samples = sorted(valid_samples, key=lambda x: x["timestamp"])
-        
-        # Group consecutive samples of the same band
-        i = 0
-        while i < len(valid_samples):
-            current_band = valid_samples[i]["band"]
-            period_start = valid_samples[i]["timestamp"]
-            period_end = period_start
-            
-            # Find the end of the continuous period in the same band
-            j = i + 1
-            while j < len(valid_samples):
-                next_sample = valid_samples[j]
-                next_ts = next_sample["timestamp"]
-                next_band = next_sample["band"]
-                
-                # Check if we are in a transition period
-                in_transition = False
-                for trans_start, trans_end in transition_periods:
-                    if trans_start <= next_ts <= trans_end:
-                        in_transition = True
-                        break
-                
-                # If band changed or we are in transition, end period
-                if next_band != current_band or in_transition:
-                    break
-                
-                # If interval is reasonable (max 5 seconds), continue period
-                if next_ts - period_end <= 5.0:
-                    period_end = next_ts
-                    j += 1
-                else:
-                    # Interval too large, end period
-                    break
-            
-            # Calculate period duration (excluding any part that is in transition)
-            period_duration = period_end - period_start
-            
-            # Check if period overlaps with any transition
-            for trans_start, trans_end in transition_periods:
-                # If overlap, reduce duration
-                if period_start < trans_end and period_end > trans_start:
-                    overlap_start = max(period_start, trans_start)
-                    overlap_end = min(period_end, trans_end)
-                    overlap_duration = overlap_end - overlap_start
-                    period_duration -= overlap_duration
-            
-            # Only add if duration is positive and not completely in transition
-            if period_duration > 0:
-                if current_band == "2.4 GHz":
-                    time_2_4ghz += period_duration
-                elif current_band == "5 GHz":
-                    time_5ghz += period_duration
-            
-            i = j
-    
-    # 5. Consistency check: time in bands + time in transitions should not exceed total time
-    total_transition_time = sum(transition_times)
-    total_band_time = time_2_4ghz + time_5ghz
-    expected_total = total_time - total_transition_time
-    
-    # If substantial discrepancy, adjust proportionally
-    if expected_total > 0 and total_band_time > expected_total * 1.1:
-        scale = expected_total / total_band_time
-        time_2_4ghz *= scale
-        time_5ghz *= scale
-    
-    return (round(time_2_4ghz, 2), round(time_5ghz, 2), transition_times)
-
-def _normalize_band(band: str) -> str:
-    """Normalizes band name to standard format."""
-    if not band:
-        return ""
-    band_lower = band.lower()
-    if "2.4" in band_lower or "2400" in band_lower:
-        return "2.4 GHz"
-    elif "5" in band_lower and ("ghz" in band_lower or "5000" in band_lower):
-        return "5 GHz"
-    return band
+    try:
+        stats = service.get_brand_statistics(brand)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating statistics: {str(e)}")
+    if "error" in stats:
+        raise HTTPException(status_code=404, detail=stats["error"])
+    return stats
 
 def _generate_summary_pdf_html(reports: List[Dict[str, Any]], ai_summary_text: str = "") -> str:
     """
@@ -2190,13 +1924,9 @@ async def export_reports(
     """
     Exports reports in AI-generated HTML format.
     """
-    base_dir = service.base_dir
     reports_to_export = []
     
     try:
-        if not base_dir.exists():
-            raise HTTPException(status_code=404, detail="No reports found")
-        
         # If IDs provided, export only those
         target_ids = None
         if ids and ids.strip():
@@ -2205,67 +1935,28 @@ async def export_reports(
             if id_list:
                 target_ids = set(id_list)
         
-        # Collect reports
-        for vendor_dir in base_dir.iterdir():
-            if not vendor_dir.is_dir():
+        # Collect reports: listing fields from the catalog, the narrative
+        # (not cataloged) from each selected analysis summary
+        for record in service.catalog.list(sorted(target_ids) if target_ids else None):
+            try:
+                summary = load_analysis(Path(record["json_path"]), include_raw=False)
+                analysis_text = summary.get("analysis_text") or ""
+            except Exception:
                 continue
             
-            for device_dir in vendor_dir.iterdir():
-                if not device_dir.is_dir():
-                    continue
-                
-                for analysis_file in device_dir.glob("*.json"):
-                    try:
-                        with open(analysis_file, "r", encoding="utf-8") as f:
-                            data = json.load(f)
-                            analysis_id = data.get("analysis_id")
-                            
-                            # Filter by IDs if specified
-                            if target_ids and analysis_id not in target_ids:
-                                continue
-                            
-                            devices = data.get("devices", [])
-                            if not devices or len(devices) == 0:
-                                continue
-                            
-                            device = devices[0]
-                            # Get full data to calculate band times
-                            # Data may be in different structures based on analysis version
-                            transitions = []
-                            signal_samples = []
-                            
-                            # Try from band_steering structure (new structure)
-                            band_steering = data.get("band_steering", {})
-                            if isinstance(band_steering, dict):
-                                transitions = band_steering.get("transitions", [])
-                                signal_samples = band_steering.get("signal_samples", [])
-                            
-                            # Fallback: try from root level (old structure)
-                            if not transitions:
-                                transitions = data.get("transitions", [])
-                            if not signal_samples:
-                                signal_samples = data.get("signal_samples", [])
-                            
-                            # Calculate band times
-                            time_2_4ghz, time_5ghz, transition_times_list = _calculate_band_times(
-                                transitions, signal_samples
-                            )
-                            
-                            reports_to_export.append({
-                                "id": analysis_id,
-                                "filename": data.get("filename"),
-                                "timestamp": data.get("analysis_timestamp"),
-                                "vendor": device.get("vendor", "Unknown"),
-                                "model": device.get("device_model", "Unknown"),
-                                "verdict": data.get("verdict"),
-                                "analysis_text": data.get("analysis_text", ""),
-                                "total_packets": data.get("total_packets", 0),
-                                "time_2_4ghz": time_2_4ghz,
-                                "time_5ghz": time_5ghz,
-                                "transition_times": transition_times_list
-                            })
-                    except Exception:
-                        pass
+            reports_to_export.append({
+                "id": record["analysis_id"],
+                "filename": record["filename"],
+                "timestamp": record["analysis_timestamp"],
+                "vendor": record["vendor"],
+                "model": record["model"],
+                "verdict": record["verdict"],
+                "analysis_text": analysis_text,
+                "total_packets": record["total_packets"] or 0,
+                "time_2_4ghz": record["time_2_4ghz"] or 0.0,
+                "time_5ghz": record["time_5ghz"] or 0.0,
+                "transition_times": record["transition_times"]
+            })
         
         if not reports_to_export:
             raise HTTPException(status_code=404, detail="No reports found to export")
@@ -2297,19 +1988,18 @@ async def export_reports(
         raise HTTPException(status_code=500, detail=f"Error exporting reports: {str(e)}")
 
 @router.get("/{analysis_id}")
-async def get_report(analysis_id: str):
+async def get_report(
+    analysis_id: str,
+    include_raw: bool = Query(True, description="Include raw_stats (read from the raw stats blob)")
+):
     """
     Gets detail for a specific report by ID.
     """
-    base_dir = service.base_dir
-    
     try:
-        # Search for file in folder structure
-        for analysis_file in base_dir.glob(f"**/{analysis_id}.json"):
-            with open(analysis_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-                
-        raise HTTPException(status_code=404, detail="Report not found")
+        data = service.load_analysis(analysis_id, include_raw=include_raw)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Report not found")
+        return data
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
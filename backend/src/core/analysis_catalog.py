@@ -0,0 +1,600 @@
+"""
+Catalog of stored analyses.
+SQLite table mapping each analysis id to its JSON file, the fields shown in
+report listings (vendor, model, verdict, timestamp, band metrics) and its
+artifact paths (stored capture, PDF), so listings never open an analysis
+JSON and lookups by id are a primary-key read instead of a recursive glob.
+
+Listings are filtered, sorted and keyset-paginated in SQL (`query`), and
+every change bumps a revision counter used for listing ETags.
+
+Report statistics are materialized next to the rows (`stat_*` tables):
+counts per verdict and the BTM success-rate / transition-time quantile
+sketches, for all analyses, per vendor and per vendor model. Each write adds
+or subtracts the contribution of the rows it changes in the same
+transaction, so `statistics()` reads a few aggregate rows however many
+analyses are stored; `rebuild_statistics()` recomputes them from the rows.
+
+The catalog is written in the same transaction as the file it describes
+(`upsert(..., publish=...)`, `delete(..., remove=...)`) and rebuilt from the
+analyses directory when it is created, so existing deployments are indexed
+on first use.
+"""
+import base64
+import json
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..settings import settings
+from ..tools.band_metrics import stored_band_metrics
+from ..utils.quantile_sketch import QuantileSketch
+
+# Bump when the table changes: an older catalog is dropped and rebuilt from disk
+ANALYSIS_CATALOG_VERSION = 4
+
+CATALOG_FILENAME = "catalog.sqlite3"
+
+# Listing sort keys -> catalog column
+SORT_COLUMNS = {
+    "timestamp": "analysis_timestamp",
+    "vendor": "vendor",
+    "model": "model",
+    "verdict": "verdict",
+    "filename": "filename",
+}
+
+# Verdicts counted as successful in the report statistics
+SUCCESS_VERDICTS = ("SUCCESS", "EXCELLENT", "GOOD")
+
+# Quantile sketches of the report statistics (per-analysis BTM success rate,
+# every transition duration in seconds)
+SKETCH_METRICS = ("btm_success_rate", "transition_time")
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+# Exact-match listing filters -> catalog column
+FILTER_COLUMNS = {"vendor": "vendor", "model": "model", "verdict": "verdict"}
+
+_COLUMNS = (
+    "analysis_id", "json_path", "filename", "analysis_timestamp", "vendor", "model", "verdict",
+    "total_packets", "time_2_4ghz", "time_5ghz", "transition_times", "btm_requests", "btm_responses",
+    "btm_success_rate", "capture_path", "pdf_path",
+)
+
+_SCHEMA = (
+    """
+CREATE TABLE analyses (
+    analysis_id TEXT PRIMARY KEY,
+    json_path TEXT NOT NULL,
+    filename TEXT,
+    analysis_timestamp TEXT,
+    vendor TEXT,
+    model TEXT,
+    verdict TEXT,
+    total_packets INTEGER,
+    time_2_4ghz REAL,
+    time_5ghz REAL,
+    transition_times TEXT,
+    btm_requests INTEGER,
+    btm_responses INTEGER,
+    btm_success_rate REAL,
+    capture_path TEXT,
+    pdf_path TEXT
+)
+""",
+    # Keyset pagination: one (sort value, id) index per sortable column
+    *(
+        f"CREATE INDEX analyses_by_{name} ON analyses (COALESCE({column}, ''), analysis_id)"
+        for name, column in SORT_COLUMNS.items()
+    ),
+    # Revision counter bumped by every change (ETags of listings)
+    *(
+        f"CREATE TRIGGER analyses_revision_{event.lower()} AFTER {event} ON analyses "
+        "BEGIN UPDATE catalog_meta SET value = value + 1 WHERE key = 'revision'; END"
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ),
+)
+
+# Materialized statistics, keyed by scope (see `_stat_scopes`)
+_STATS_TABLES = ("stat_counts", "stat_buckets", "stat_latest")
+_STATS_SCHEMA = (
+    "CREATE TABLE stat_counts (scope TEXT, name TEXT, value INTEGER NOT NULL, "
+    "PRIMARY KEY (scope, name)) WITHOUT ROWID",
+    "CREATE TABLE stat_buckets (scope TEXT, metric TEXT, bucket INTEGER, count INTEGER NOT NULL, "
+    "PRIMARY KEY (scope, metric, bucket)) WITHOUT ROWID",
+    "CREATE TABLE stat_latest (scope TEXT PRIMARY KEY, analysis_timestamp TEXT) WITHOUT ROWID",
+)
+
+# Survives rebuilds, so a revision number is never reused
+_META_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('revision', 0)",
+)
+
+_UPSERT = (
+    f"INSERT OR REPLACE INTO analyses ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+
+
+def catalog_record(data: Dict[str, Any], json_path: Path) -> Dict[str, Any]:
+    """
+    Catalog row of a stored analysis JSON. Vendor and model are None for
+    analyses without devices (listings skip them); band metrics missing from
+    older analyses are computed here.
+    """
+    devices = data.get("devices") or []
+    device = devices[0] if devices else None
+    metrics = stored_band_metrics(data)
+    pdf_path = json_path.with_suffix(".pdf")
+    return {
+        "analysis_id": data.get("analysis_id") or json_path.stem,
+        "json_path": str(json_path),
+        "filename": data.get("filename"),
+        "analysis_timestamp": data.get("analysis_timestamp"),
+        "vendor": device.get("vendor", "Unknown") if device else None,
+        "model": device.get("device_model", "Unknown") if device else None,
+        "verdict": data.get("verdict"),
+        "total_packets": data.get("total_packets", 0),
+        "time_2_4ghz": metrics.get("time_2_4ghz", 0.0),
+        "time_5ghz": metrics.get("time_5ghz", 0.0),
+        "transition_times": metrics.get("transition_times", []),
+        "btm_requests": data.get("btm_requests", 0),
+        "btm_responses": data.get("btm_responses", 0),
+        "btm_success_rate": data.get("btm_success_rate", 0.0),
+        "capture_path": data.get("original_file_path"),
+        "pdf_path": str(pdf_path) if pdf_path.exists() else None,
+    }
+
+
+def _stat_scope(vendor: Optional[str] = None, model: Optional[str] = None) -> str:
+    """Statistics scope key: all analyses, one vendor, or one vendor model."""
+    if vendor is None:
+        return json.dumps([])
+    if model is None:
+        return json.dumps(["vendor", vendor])
+    return json.dumps(["model", vendor, model])
+
+
+def _stat_scopes(record: Dict[str, Any]) -> List[Tuple[str, Tuple[str, ...]]]:
+    """(scope, scope filter values) of the statistics a catalog row counts in."""
+    vendor = record["vendor"]
+    model = record.get("model") or "Unknown"
+    return [
+        (_stat_scope(), ()),
+        (_stat_scope(vendor), (vendor,)),
+        (_stat_scope(vendor, model), (vendor, model)),
+    ]
+
+
+def _child_scope_range(kind: str, *parents: str) -> Tuple[str, str]:
+    """Key range of the scopes of a kind under some parents (e.g. every vendor)."""
+    prefix = json.dumps([kind, *parents, ""])[:-2]
+    # Scope keys are ASCII (json.dumps escapes the rest)
+    return prefix, prefix + "\x7f"
+
+
+class AnalysisCatalog:
+    """
+    Catalog of the analyses stored under `base_dir`.
+
+    Every operation opens its own short-lived connection: the catalog is
+    shared by the API process and the analysis worker processes, and SQLite
+    (WAL mode, busy timeout) serializes their writes.
+    """
+
+    def __init__(self, base_dir: Path, db_path: Optional[str] = None):
+        self.base_dir = Path(base_dir)
+        path = Path(db_path or settings.analysis_catalog_path or self.base_dir / CATALOG_FILENAME)
+        if not path.is_absolute():
+            path = path.resolve()
+        self.db_path = path
+        self._initialize()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(str(self.db_path), timeout=30.0)) as conn:
+            conn.row_factory = sqlite3.Row
+            yield conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database write lock from its start."""
+        with self._connect() as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _initialize(self) -> None:
+        """Creates the table, rebuilding it from disk if new or from another version."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != ANALYSIS_CATALOG_VERSION:
+            self.rebuild()
+
+    @staticmethod
+    def _row_values(record: Dict[str, Any]) -> tuple:
+        values = dict(record)
+        values["transition_times"] = json.dumps(values.get("transition_times") or [])
+        return tuple(values.get(column) for column in _COLUMNS)
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["transition_times"] = json.loads(record["transition_times"] or "[]")
+        return record
+
+    def upsert(self, record: Dict[str, Any], publish: Optional[Callable[[], None]] = None) -> None:
+        """
+        Inserts or replaces the row of an analysis. `publish` (e.g. moving the
+        JSON into place) runs inside the transaction: if it raises, the row is
+        rolled back.
+        """
+        with self._write() as conn:
+            previous = self._fetch(conn, record["analysis_id"])
+            values = self._row_values(record)
+            conn.execute(_UPSERT, values)
+            if previous is not None:
+                self._apply_statistics(conn, [previous], -1)
+            self._apply_statistics(conn, [self._to_record(dict(zip(_COLUMNS, values)))], 1)
+            if publish is not None:
+                publish()
+
+    def _fetch(self, conn: sqlite3.Connection, analysis_id: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute("SELECT * FROM analyses WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Row of an analysis, or None if it is not cataloged."""
+        with self._connect() as conn:
+            return self._fetch(conn, analysis_id)
+
+    def find_json(self, analysis_id: str) -> Optional[Path]:
+        """Path of the analysis JSON. Rows whose file is gone are dropped."""
+        record = self.get(analysis_id)
+        if record is None:
+            return None
+        json_path = Path(record["json_path"])
+        if not json_path.exists():
+            self.delete(analysis_id)
+            return None
+        return json_path
+
+    def list(self, ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Rows of the analyses with devices (optionally only `ids`), newest first."""
+        rows, _ = self.query(ids=ids)
+        return rows
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: str = "timestamp",
+        descending: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        Rows of the analyses with devices matching `filters`, sorted by
+        `sort` (a SORT_COLUMNS key) then id, starting after the keyset
+        `after`. Returns the rows and the keyset of the last one when more
+        rows follow (None on the last page).
+
+        Filters: vendor / model / verdict (exact), date_from / date_to (ISO
+        timestamps, inclusive / exclusive), filename (substring).
+        """
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        sort_value = f"COALESCE({column}, '')"
+        filters = filters or {}
+
+        conditions = ["vendor IS NOT NULL"]
+        params: List[Any] = []
+        for name, filter_column in FILTER_COLUMNS.items():
+            if filters.get(name):
+                conditions.append(f"COALESCE({filter_column}, '') = ?")
+                params.append(filters[name])
+        if filters.get("date_from"):
+            conditions.append("COALESCE(analysis_timestamp, '') >= ?")
+            params.append(filters["date_from"])
+        if filters.get("date_to"):
+            conditions.append("COALESCE(analysis_timestamp, '') < ?")
+            params.append(filters["date_to"])
+        if filters.get("filename"):
+            conditions.append("filename LIKE ? ESCAPE '\\'")
+            escaped = filters["filename"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if ids is not None:
+            conditions.append(f"analysis_id IN ({', '.join('?' for _ in ids)})")
+            params.extend(ids)
+        if after is not None:
+            # Keyset condition (sort_value, id) < / > after, spelled so that the
+            # first term is an index range on the sort value
+            op = "<" if descending else ">"
+            conditions.append(f"{sort_value} {op}= ? AND ({sort_value} {op} ? OR analysis_id {op} ?)")
+            params.extend((after[0], after[0], after[1]))
+
+        direction = "DESC" if descending else "ASC"
+        query = (
+            f"SELECT *, {sort_value} AS sort_value FROM analyses WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {sort_value} {direction}, analysis_id {direction}"
+        )
+        if limit is not None:
+            # One extra row tells whether there is a next page
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        next_key = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1]["sort_value"], rows[-1]["analysis_id"])
+        records = []
+        for row in rows:
+            record = self._to_record(row)
+            record.pop("sort_value", None)
+            records.append(record)
+        return records, next_key
+
+    def revision(self) -> int:
+        """Change counter of the catalog: equal revisions mean identical listings."""
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM catalog_meta WHERE key = 'revision'").fetchone()[0]
+
+    def set_pdf_path(self, analysis_id: str, pdf_path: Optional[str]) -> None:
+        with self._connect() as conn, conn:
+            conn.execute("UPDATE analyses SET pdf_path = ? WHERE analysis_id = ?", (pdf_path, analysis_id))
+
+    def delete(
+        self,
+        analysis_id: str,
+        remove: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Deletes the row of an analysis and returns it (None if not cataloged).
+        `remove(record)` (e.g. unlinking the JSON) runs inside the transaction:
+        if it raises, the row is kept.
+        """
+        with self._write() as conn:
+            record = self._fetch(conn, analysis_id)
+            if record is None:
+                return None
+            conn.execute("DELETE FROM analyses WHERE analysis_id = ?", (analysis_id,))
+            self._apply_statistics(conn, [record], -1)
+            if remove is not None:
+                remove(record)
+        return record
+
+    def clear(self) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM analyses")
+            for table in _STATS_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+
+    def rebuild(self) -> int:
+        """
+        Re-indexes every analysis JSON under `base_dir` (Vendor/Device/<id>.json,
+        skipping `_`-prefixed folders such as multi-client rollups). Returns the
+        number of analyses cataloged.
+
+        The write lock is held during the scan, so an analysis saved
+        concurrently is either seen by the scan or upserted after it.
+        """
+        with self._write() as conn:
+            rows = [self._row_values(record) for record in self._scan()]
+            for table in ("analyses",) + _STATS_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in _META_SCHEMA + _SCHEMA + _STATS_SCHEMA:
+                conn.execute(statement)
+            conn.executemany(_UPSERT, rows)
+            self._rebuild_statistics(conn)
+            conn.execute(f"PRAGMA user_version = {ANALYSIS_CATALOG_VERSION}")
+        return len(rows)
+
+    def rebuild_statistics(self) -> None:
+        """Recomputes the materialized statistics from the catalog rows (recovery)."""
+        with self._write() as conn:
+            self._rebuild_statistics(conn)
+
+    def _rebuild_statistics(self, conn: sqlite3.Connection) -> None:
+        for table in _STATS_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        records = (self._to_record(row) for row in conn.execute("SELECT * FROM analyses").fetchall())
+        self._apply_statistics(conn, records, 1)
+
+    def _apply_statistics(self, conn: sqlite3.Connection, records, sign: int) -> None:
+        """
+        Adds (sign 1) or subtracts (sign -1) the contribution of catalog rows
+        to the materialized statistics. Rows without devices are not counted,
+        as in listings.
+        """
+        counts: Counter = Counter()
+        buckets: Counter = Counter()
+        latest: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        removed_latest: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        sketch = QuantileSketch(SKETCH_RELATIVE_ACCURACY)
+
+        for record in records:
+            if record.get("vendor") is None:
+                continue
+            verdict = record.get("verdict") or "UNKNOWN"
+            timestamp = record.get("analysis_timestamp") or ""
+            sketch_buckets = Counter()
+            if record.get("btm_requests"):
+                sketch_buckets[("btm_success_rate", sketch.bucket(record.get("btm_success_rate") or 0.0))] += 1
+            for value in record.get("transition_times") or []:
+                if isinstance(value, (int, float)):
+                    sketch_buckets[("transition_time", sketch.bucket(value))] += 1
+
+            for scope, scope_values in _stat_scopes(record):
+                counts[(scope, "total")] += sign
+                counts[(scope, f"verdict:{verdict}")] += sign
+                if verdict.upper() in SUCCESS_VERDICTS:
+                    counts[(scope, "successes")] += sign
+                if record.get("btm_requests"):
+                    counts[(scope, "btm_analyses")] += sign
+                for (metric, bucket), count in sketch_buckets.items():
+                    buckets[(scope, metric, bucket)] += sign * count
+                if sign > 0:
+                    if scope not in latest or timestamp > latest[scope][0]:
+                        latest[scope] = (timestamp, scope_values)
+                elif scope not in removed_latest or timestamp > removed_latest[scope][0]:
+                    removed_latest[scope] = (timestamp, scope_values)
+
+        counts = {key: value for key, value in counts.items() if value}
+        buckets = {key: value for key, value in buckets.items() if value}
+        conn.executemany(
+            "INSERT INTO stat_counts (scope, name, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (scope, name) DO UPDATE SET value = value + excluded.value",
+            [(*key, value) for key, value in counts.items()],
+        )
+        conn.executemany(
+            "DELETE FROM stat_counts WHERE scope = ? AND name = ? AND value <= 0", list(counts)
+        )
+        conn.executemany(
+            "INSERT INTO stat_buckets (scope, metric, bucket, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (scope, metric, bucket) DO UPDATE SET count = count + excluded.count",
+            [(*key, value) for key, value in buckets.items()],
+        )
+        conn.executemany(
+            "DELETE FROM stat_buckets WHERE scope = ? AND metric = ? AND bucket = ? AND count <= 0",
+            list(buckets),
+        )
+        conn.executemany(
+            "INSERT INTO stat_latest (scope, analysis_timestamp) VALUES (?, ?) "
+            "ON CONFLICT (scope) DO UPDATE SET analysis_timestamp = MAX(analysis_timestamp, excluded.analysis_timestamp)",
+            [(scope, timestamp) for scope, (timestamp, _) in latest.items()],
+        )
+        # The latest capture is not subtractable: recomputed for the scopes
+        # that lost their latest row
+        conditions = ["vendor IS NOT NULL", "COALESCE(vendor, '') = ?", "COALESCE(model, 'Unknown') = ?"]
+        for scope, (timestamp, scope_values) in removed_latest.items():
+            stored = conn.execute(
+                "SELECT analysis_timestamp FROM stat_latest WHERE scope = ?", (scope,)
+            ).fetchone()
+            if stored is not None and timestamp < (stored[0] or ""):
+                continue
+            row = conn.execute(
+                "SELECT COALESCE(analysis_timestamp, '') FROM analyses WHERE "
+                + " AND ".join(conditions[:len(scope_values) + 1])
+                + " ORDER BY COALESCE(analysis_timestamp, '') DESC, analysis_id DESC LIMIT 1",
+                scope_values,
+            ).fetchone()
+            if row is None:
+                conn.execute("DELETE FROM stat_latest WHERE scope = ?", (scope,))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO stat_latest (scope, analysis_timestamp) VALUES (?, ?)",
+                    (scope, row[0]),
+                )
+
+    def statistics(self, vendor: Optional[str] = None, model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Materialized statistics of all analyses, one vendor or one vendor
+        model: totals, verdict distribution, success rate, latest capture,
+        BTM success-rate and transition-time quantiles, and the breakdown by
+        vendor (all analyses) or by model (one vendor).
+        """
+        scope = _stat_scope(vendor, model if vendor is not None else None)
+        with self._connect() as conn:
+            counts = {
+                row["name"]: row["value"]
+                for row in conn.execute("SELECT name, value FROM stat_counts WHERE scope = ?", (scope,))
+            }
+            sketches = {metric: QuantileSketch(SKETCH_RELATIVE_ACCURACY) for metric in SKETCH_METRICS}
+            for row in conn.execute("SELECT metric, bucket, count FROM stat_buckets WHERE scope = ?", (scope,)):
+                if row["metric"] in sketches:
+                    sketches[row["metric"]].buckets[row["bucket"]] = row["count"]
+            latest = conn.execute(
+                "SELECT analysis_timestamp FROM stat_latest WHERE scope = ?", (scope,)
+            ).fetchone()
+
+            breakdown = []
+            if vendor is None or model is None:
+                kind, parents = ("vendor", ()) if vendor is None else ("model", (vendor,))
+                low, high = _child_scope_range(kind, *parents)
+                for row in conn.execute(
+                    "SELECT scope, value FROM stat_counts WHERE scope > ? AND scope < ? AND name = 'total'",
+                    (low, high),
+                ):
+                    breakdown.append({kind: json.loads(row["scope"])[-1], "count": row["value"]})
+        breakdown.sort(key=lambda entry: entry["count"], reverse=True)
+
+        total = counts.get("total", 0)
+        result = {
+            "total_reports": total,
+            "verdict_distribution": {
+                name.split(":", 1)[1]: value for name, value in counts.items() if name.startswith("verdict:")
+            },
+            "last_capture": latest["analysis_timestamp"] if latest and latest["analysis_timestamp"] else None,
+            "success_rate": round(counts.get("successes", 0) / total * 100, 2) if total else 0.0,
+            "btm_success_rate": sketches["btm_success_rate"].summary((0.1, 0.5, 0.9)),
+            "transition_time": sketches["transition_time"].summary((0.5, 0.9, 0.99)),
+        }
+        if vendor is None:
+            result["vendors"] = breakdown
+        elif model is None:
+            result["models"] = breakdown
+        return result
+
+    def _scan(self) -> Iterator[Dict[str, Any]]:
+        if not self.base_dir.exists():
+            return
+        for json_path in self.base_dir.glob("*/*/*.json"):
+            if json_path.parent.parent.name.startswith("_"):
+                continue
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(data, dict):
+                yield catalog_record(data, json_path)
+
+
+def encode_cursor(key: Tuple[str, str], sort: str, descending: bool) -> str:
+    """Opaque listing cursor of a keyset (bound to the sort it was produced with)."""
+    payload = json.dumps([sort, descending, key[0], key[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[str, str]:
+    """Keyset of a listing cursor. Raises ValueError if malformed or from another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, value, analysis_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort or cursor_descending != descending:
+        raise ValueError("Cursor does not match the requested sort")
+    return str(value), str(analysis_id)
+
+
+# One catalog per analyses directory, shared within the process
+_catalogs: Dict[str, AnalysisCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_analysis_catalog(base_dir: Path) -> AnalysisCatalog:
+    """Gets or creates the catalog of an analyses directory."""
+    key = str(Path(base_dir).resolve())
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(key)
+            if catalog is None:
+                catalog = _catalogs[key] = AnalysisCatalog(Path(key))
+    return catalog
@@ -0,0 +1,142 @@
+"""
+Two-part storage of persisted analyses.
+`<analysis_id>.json` is the summary document read on hot paths (verdict,
+checks, transitions, narrative, artifact paths); the parse statistics
+(`raw_stats`: diagnostics, wireshark_raw samples, steering events, signal
+samples) go to `<analysis_id>.raw.jsonl.gz`, read only when a drill-down
+needs them.
+
+Raw blob layout: gzip-compressed lines of `<section name as JSON>\\t<value as
+JSON>`, one per top-level `raw_stats` key, after a header line. Loading some
+sections only decodes those lines.
+
+Analyses saved before the split keep `raw_stats` inline in the summary;
+they are migrated the first time they are loaded or updated.
+"""
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+RAW_STATS_FORMAT = "jsonl.gz"
+RAW_STATS_VERSION = 1
+RAW_SUFFIX = ".raw.jsonl.gz"
+
+# Summary key naming the raw blob (file name, relative to the summary folder)
+RAW_STATS_FILE_KEY = "raw_stats_file"
+
+_HEADER_SECTION = "__header__"
+
+
+def raw_path_for(json_path: Path) -> Path:
+    """Path of the raw stats blob of a summary document."""
+    json_path = Path(json_path)
+    return json_path.with_name(json_path.stem + RAW_SUFFIX)
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def write_raw_stats(raw_path: Path, raw_stats: Dict[str, Any]) -> Path:
+    """
+    Writes the raw stats blob to a temporary file next to `raw_path` and
+    returns it; the caller moves it into place (`os.replace`).
+    """
+    tmp_path = _tmp_path(raw_path)
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        header = {"format": RAW_STATS_FORMAT, "version": RAW_STATS_VERSION}
+        f.write(f"{json.dumps(_HEADER_SECTION)}\t{json.dumps(header)}\n")
+        for section, value in raw_stats.items():
+            f.write(f"{json.dumps(section)}\t{json.dumps(value, ensure_ascii=False, default=str)}\n")
+    return tmp_path
+
+
+def read_raw_stats(raw_path: Path, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Loads the raw stats blob, or only the given top-level sections.
+    Returns None if the blob does not exist.
+    """
+    wanted = set(sections) if sections is not None else None
+    raw_stats: Dict[str, Any] = {}
+    try:
+        with gzip.open(raw_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                name, _, value = line.partition("\t")
+                section = json.loads(name)
+                if section == _HEADER_SECTION or (wanted is not None and section not in wanted):
+                    continue
+                raw_stats[section] = json.loads(value)
+                if wanted is not None and len(raw_stats) == len(wanted):
+                    break
+    except FileNotFoundError:
+        return None
+    return raw_stats
+
+
+def split_analysis(data: Dict[str, Any], json_path: Path) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    (summary, raw_stats) of a full analysis dict. The summary references the
+    raw blob when there are raw stats to store.
+    """
+    summary = dict(data)
+    raw_stats = summary.pop("raw_stats", None)
+    if raw_stats is not None:
+        summary[RAW_STATS_FILE_KEY] = raw_path_for(json_path).name
+    return summary, raw_stats
+
+
+def write_summary(json_path: Path, summary: Dict[str, Any]) -> Path:
+    """Writes the summary document to a temporary file and returns it (see `write_raw_stats`)."""
+    tmp_path = _tmp_path(json_path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4, ensure_ascii=False)
+    return tmp_path
+
+
+def migrate_analysis(json_path: Path, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Moves the inline `raw_stats` of a pre-split analysis to its blob and
+    rewrites the summary. Returns the summary. Safe to run concurrently: both
+    files are replaced atomically with identical content.
+    """
+    json_path = Path(json_path)
+    summary, raw_stats = split_analysis(data, json_path)
+    if raw_stats is None:
+        return summary
+    raw_tmp = write_raw_stats(raw_path_for(json_path), raw_stats)
+    os.replace(raw_tmp, raw_path_for(json_path))
+    os.replace(write_summary(json_path, summary), json_path)
+    return summary
+
+
+def load_analysis(
+    json_path: Path,
+    include_raw: bool = True,
+    raw_sections: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Stored analysis: the summary, plus `raw_stats` (all of it, or only
+    `raw_sections`) when `include_raw`. Pre-split files are migrated.
+    """
+    json_path = Path(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if "raw_stats" in data:
+        raw_stats = data["raw_stats"]
+        data = migrate_analysis(json_path, data)
+        if include_raw:
+            if raw_sections is not None and isinstance(raw_stats, dict):
+                raw_stats = {key: raw_stats[key] for key in raw_sections if key in raw_stats}
+            data["raw_stats"] = raw_stats
+        return data
+
+    if include_raw:
+        raw_stats = None
+        if data.get(RAW_STATS_FILE_KEY):
+            raw_stats = read_raw_stats(json_path.parent / data[RAW_STATS_FILE_KEY], raw_sections)
+        data["raw_stats"] = raw_stats
+    return data
@@ -0,0 +1,254 @@
+"""
+Content-addressed disk cache of parsed capture results.
+Avoids re-running tshark and the whole parse when the same capture is
+uploaded again (e.g. retesting with different metadata).
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..settings import settings
+
+# Bump when the structure produced by WiresharkTool._extract_basic_stats changes,
+# so entries written by an older parser are never served.
+PARSE_CACHE_VERSION = 5
+
+_ENTRY_SUFFIX = ".json.gz"
+
+# Hit/miss/eviction counters, kept in the cache directory because lookups
+# happen in the analysis worker processes while stats are served by the API
+_STATS_FILENAME = "stats.sqlite3"
+_COUNTERS = ("hits", "misses", "evictions")
+
+
+def hash_capture_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of the capture bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CaptureParseCache:
+    """
+    Stores parse results as gzip-compressed JSON files named after a key that
+    combines the capture content hash with everything that affects the parse
+    (tshark field list, tshark version, parse options).
+
+    Eviction is LRU by file modification time (refreshed on every hit) and is
+    triggered whenever the total size exceeds `max_bytes`.
+
+    The counters live in a small SQLite file next to the entries, so every
+    process using the same directory adds to (and reports) the same totals.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ):
+        base_path = Path(cache_dir or settings.capture_cache_dir)
+        if not base_path.is_absolute():
+            base_path = base_path.resolve()
+        self.cache_dir = base_path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.capture_cache_max_bytes
+        self.enabled = settings.capture_cache_enabled if enabled is None else enabled
+
+        self._lock = threading.Lock()
+        self._stats_path = self.cache_dir / _STATS_FILENAME
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._init_counters()
+
+    def _connect_counters(self):
+        return closing(sqlite3.connect(str(self._stats_path), timeout=30.0))
+
+    def _init_counters(self) -> None:
+        try:
+            with self._connect_counters() as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                    [(name,) for name in _COUNTERS],
+                )
+        except sqlite3.Error:
+            pass
+
+    def _bump(self, name: str, amount: int = 1) -> None:
+        """Adds to a shared counter (best effort: a failure never breaks a lookup)."""
+        if not amount:
+            return
+        try:
+            with self._connect_counters() as conn, conn:
+                conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+        except sqlite3.Error:
+            pass
+
+    def counters(self) -> Dict[str, int]:
+        """Hits, misses and evictions of every process sharing the cache directory."""
+        values = dict.fromkeys(_COUNTERS, 0)
+        if not self.enabled:
+            return values
+        try:
+            with self._connect_counters() as conn:
+                values.update(conn.execute("SELECT name, value FROM counters").fetchall())
+        except sqlite3.Error:
+            pass
+        return values
+
+    def make_key(self, file_path: str, parse_options: Dict[str, Any]) -> str:
+        """
+        Builds the cache key for a capture. `parse_options` must include
+        every input that changes the parse output (fields, tshark version,
+        client hint, ...). Values must be JSON-serializable.
+        """
+        material = json.dumps(
+            {
+                "version": PARSE_CACHE_VERSION,
+                "capture_sha256": hash_capture_file(file_path),
+                "options": parse_options,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns a fresh copy of the cached parse result, or None on miss."""
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            # Refresh recency for LRU eviction
+            os.utime(path, None)
+        except FileNotFoundError:
+            data = None
+        except (OSError, ValueError):
+            # Corrupt or partially written entry: drop it and treat as a miss
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            data = None
+
+        self._bump("misses" if data is None else "hits")
+        return data
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        """Stores a parse result and evicts old entries if over quota."""
+        if not self.enabled:
+            return
+
+        path = self._entry_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=5) as f:
+                json.dump(data, f, default=str)
+            # Atomic publish: readers never see a partially written entry
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+
+        self._evict_if_needed()
+
+    def _list_entries(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(_ENTRY_SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        evicted = 0
+        with self._lock:
+            entries = self._list_entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            # Oldest (least recently used) first
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                    evicted += 1
+                except OSError:
+                    pass
+        self._bump("evictions", evicted)
+
+    def clear(self) -> int:
+        """Removes every entry. Returns the number of files deleted."""
+        removed = 0
+        with self._lock:
+            for _, _, path in self._list_entries():
+                try:
+                    os.unlink(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current disk usage."""
+        entries = self._list_entries() if self.enabled else []
+        counters = self.counters()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "evictions": counters["evictions"],
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "cache_dir": str(self.cache_dir),
+            "timestamp": time.time(),
+        }
+
+
+# Global instance shared by every BandSteeringService in the process
+_capture_parse_cache: Optional[CaptureParseCache] = None
+_capture_parse_cache_lock = threading.Lock()
+
+
+def get_capture_parse_cache() -> CaptureParseCache:
+    """Gets or creates the process-wide capture parse cache."""
+    global _capture_parse_cache
+    if _capture_parse_cache is None:
+        with _capture_parse_cache_lock:
+            if _capture_parse_cache is None:
+                _capture_parse_cache = CaptureParseCache()
+    return _capture_parse_cache
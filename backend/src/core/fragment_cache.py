@@ -0,0 +1,172 @@
+"""
+Disk cache of materialized capture fragments.
+Fragments are only described at analysis time; the pcap of a fragment is
+written the first time it is downloaded and kept here under a byte quota,
+evicting the least recently used files.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..settings import settings
+
+# Fragments used (served or written) this recently are never evicted: the
+# path handed to a download is only opened once the response starts
+EVICTION_GRACE_SECONDS = 30.0
+
+
+class FragmentCache:
+    """
+    Stores fragment files by key (one file per analysis fragment).
+
+    `get_or_create` deduplicates concurrent requests for the same key: only
+    the first caller runs the extraction, the others wait for its result.
+    Eviction is LRU by file modification time (refreshed on every hit) and is
+    triggered whenever the total size exceeds `max_bytes`; fragments used
+    within `EVICTION_GRACE_SECONDS` are skipped, so a path just returned to a
+    concurrent download is not deleted before the file is opened.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        base_path = Path(cache_dir or settings.fragment_cache_dir)
+        if not base_path.is_absolute():
+            base_path = base_path.resolve()
+        self.cache_dir = base_path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.fragment_cache_max_bytes
+
+        self._lock = threading.Lock()
+        # key -> Future of the extraction in progress
+        self._in_flight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / Path(key).name
+
+    def get_or_create(self, key: str, producer: Callable[[Path], Optional[int]]) -> Optional[Path]:
+        """
+        Path of the cached fragment `key`, running `producer(tmp_path)` to
+        write it on a miss. The producer returns the packet count, or None if
+        the fragment could not be extracted (nothing is cached then).
+        """
+        path = self._entry_path(key)
+        try:
+            # Refresh recency for LRU eviction
+            os.utime(path, None)
+            with self._lock:
+                self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+        if not owner:
+            return future.result()
+
+        result = None
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            if producer(tmp_path) is not None:
+                # Atomic publish: readers never see a partially written fragment
+                os.replace(tmp_path, path)
+                result = path
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            with self._lock:
+                self._in_flight.pop(key, None)
+            if not future.done():
+                future.set_result(result)
+
+        if result is not None:
+            self._evict_if_needed(keep=result)
+        return result
+
+    def _list_entries(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _evict_if_needed(self, keep: Optional[Path] = None) -> None:
+        """
+        Evicts the least recently used fragments over quota, never `keep`
+        (just served) nor those used within the grace period.
+        """
+        with self._lock:
+            entries = self._list_entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            recent = time.time() - EVICTION_GRACE_SECONDS
+            # Oldest (least recently used) first
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes or mtime >= recent:
+                    break
+                if keep is not None and path == str(keep):
+                    continue
+                try:
+                    os.unlink(path)
+                    total -= size
+                    self.evictions += 1
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current disk usage."""
+        entries = self._list_entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "in_flight": len(self._in_flight),
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "cache_dir": str(self.cache_dir),
+                "timestamp": time.time(),
+            }
+
+
+# Global instance shared by every BandSteeringService in the process
+_fragment_cache: Optional[FragmentCache] = None
+_fragment_cache_lock = threading.Lock()
+
+
+def get_fragment_cache() -> FragmentCache:
+    """Gets or creates the process-wide fragment cache."""
+    global _fragment_cache
+    if _fragment_cache is None:
+        with _fragment_cache_lock:
+            if _fragment_cache is None:
+                _fragment_cache = FragmentCache()
+    return _fragment_cache
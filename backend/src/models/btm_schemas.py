@@ -160,7 +160,8 @@ class CaptureFragment(BaseModel):
     description: str = Field(..., description="Human description of the fragment")
     start_time: float = Field(..., description="Start timestamp")
     end_time: float = Field(..., description="End timestamp")
-    packet_count: int = Field(0, description="Number of packets in the fragment")
+    packet_count: Optional[int] = Field(None, description="Number of packets in the fragment (None until it is materialized)")
+    client_mac: Optional[str] = Field(None, description="Client the fragment was cut for")
     file_path: Optional[str] = Field(None, description="Absolute path to the generated file")
     download_url: Optional[str] = Field(None, description="Relative URL for download")
 
@@ -181,6 +182,7 @@ class BandSteeringAnalysis(BaseModel):
     Root object that contains ALL results of a capture analysis.
     """
     analysis_id: str = Field(..., description="Analysis UUID")
+    capture_id: Optional[str] = Field(None, description="Capture rollup this analysis belongs to (multi-client mode)")
     filename: str = Field(..., description="Original pcap filename")
     analysis_timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Analysis date")
     
@@ -206,6 +208,9 @@ class BandSteeringAnalysis(BaseModel):
     failed_transitions: int = Field(0, description="Total failed transitions")
     
     loops_detected: bool = Field(False, description="Was band ping-pong detected?")
+
+    # Band dwell times and transition durations (see tools/band_metrics.py)
+    band_metrics: Optional[Dict[str, Any]] = Field(None, description="Time per band and transition duration summary")
     
     # Compliance and Support
     kvr_support: KVRSupport = Field(default_factory=KVRSupport, description="KVR support summary")
@@ -214,6 +219,8 @@ class BandSteeringAnalysis(BaseModel):
     # Final Result
     verdict: str = Field(..., description="Final verdict: 'SUCCESS', 'PARTIAL', 'FAILED', 'NO_DATA'")
     analysis_text: Optional[str] = Field(None, description="Narrative report generated by AI")
+    narrative_source: Optional[str] = Field(None, description="Origin of analysis_text: 'template' or 'llm'")
+    narrative_status: Optional[str] = Field(None, description="Narrative state: 'pending', 'completed' or 'failed'")
     
     # Complete Raw Data (for UI reconstruction)
     raw_stats: Optional[Dict[str, Any]] = Field(None, description="Complete Wireshark stats (diagnostics, steering_analysis, etc.)")
@@ -0,0 +1,330 @@
+"""
+Batch analysis of many captures (e.g. every pcap of a firmware build).
+A batch feeds its captures to the analysis job manager keeping at most
+`batch_concurrency` of them in flight, publishes each file's result as soon
+as its job finishes and, once all are done, builds a fleet summary
+(verdict distribution, BTM success percentiles, per-vendor breakdown).
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from ..settings import settings
+from .analysis_jobs import (
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JobQueueFullError,
+    AnalysisJobManager,
+    get_analysis_job_manager,
+)
+
+# Seconds to wait before retrying a submission rejected by a full job queue
+_QUEUE_FULL_RETRY_SECONDS = 1.0
+
+
+def summarize_batch(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fleet summary of the per-file results of a batch: verdict distribution,
+    BTM success rate percentiles (over captures with BTM requests) and a
+    per-vendor breakdown.
+    """
+    completed = [r for r in results if r["status"] == JOB_COMPLETED]
+    failed = [r for r in results if r["status"] == JOB_FAILED]
+
+    def rate_percentiles(rates: List[float]) -> Dict[str, Any]:
+        if not rates:
+            return {"count": 0, "mean": None, "p10": None, "p50": None, "p90": None}
+        values = np.asarray(rates, dtype=np.float64)
+        p10, p50, p90 = np.percentile(values, [10, 50, 90])
+        return {
+            "count": int(len(values)),
+            "mean": round(float(values.mean()), 4),
+            "p10": round(float(p10), 4),
+            "p50": round(float(p50), 4),
+            "p90": round(float(p90), 4),
+        }
+
+    success_verdicts = ("SUCCESS", "EXCELLENT", "GOOD")
+    by_vendor: Dict[str, List[Dict[str, Any]]] = {}
+    for result in completed:
+        by_vendor.setdefault(result.get("vendor") or "Unknown", []).append(result)
+
+    vendors = []
+    for vendor, vendor_results in by_vendor.items():
+        verdicts = Counter(r.get("verdict") or "UNKNOWN" for r in vendor_results)
+        successes = sum(count for verdict, count in verdicts.items() if verdict.upper() in success_verdicts)
+        vendors.append({
+            "vendor": vendor,
+            "captures": len(vendor_results),
+            "verdict_distribution": dict(verdicts),
+            "success_rate": round(successes / len(vendor_results) * 100, 2),
+            "btm_success_rate": rate_percentiles(
+                [r["btm_success_rate"] for r in vendor_results if r.get("btm_requests")]
+            ),
+        })
+    vendors.sort(key=lambda v: v["captures"], reverse=True)
+
+    verdicts = Counter(r.get("verdict") or "UNKNOWN" for r in completed)
+    successes = sum(count for verdict, count in verdicts.items() if verdict.upper() in success_verdicts)
+    return {
+        "total_files": len(results),
+        "completed": len(completed),
+        "failed": len(failed),
+        "verdict_distribution": dict(verdicts),
+        "success_rate": round(successes / len(completed) * 100, 2) if completed else 0.0,
+        "btm_success_rate": rate_percentiles(
+            [r["btm_success_rate"] for r in completed if r.get("btm_requests")]
+        ),
+        "vendors": vendors,
+        "errors": [{"file_name": r["file_name"], "error": r["error"]} for r in failed],
+    }
+
+
+def _file_result(file_name: str, job_id: Optional[str], future: Future) -> Dict[str, Any]:
+    """Compact per-file result of a finished analysis job."""
+    result = {
+        "file_name": file_name,
+        "job_id": job_id,
+        "status": JOB_COMPLETED,
+        "analysis_id": None,
+        "verdict": None,
+        "vendor": None,
+        "model": None,
+        "btm_requests": 0,
+        "btm_success_rate": 0.0,
+        "successful_transitions": 0,
+        "failed_transitions": 0,
+        "error": None,
+    }
+    error = future.exception()
+    if error is not None:
+        result.update(status=JOB_FAILED, error=str(error))
+        return result
+
+    analysis = future.result()["analysis"] or {}
+    devices = analysis.get("devices") or [{}]
+    result.update({
+        "analysis_id": analysis.get("analysis_id") or analysis.get("capture_id"),
+        "verdict": analysis.get("verdict"),
+        "vendor": devices[0].get("vendor"),
+        "model": devices[0].get("device_model"),
+        "btm_requests": analysis.get("btm_requests", 0),
+        "btm_success_rate": analysis.get("btm_success_rate", 0.0),
+        "successful_transitions": analysis.get("successful_transitions", 0),
+        "failed_transitions": analysis.get("failed_transitions", 0),
+    })
+    return result
+
+
+class AnalysisBatchManager:
+    """
+    Runs batches of captures on top of `AnalysisJobManager`.
+
+    Each batch has a feeder thread that submits its captures one at a time,
+    never keeping more than `concurrency` jobs of the batch in flight (and
+    waiting while the job queue is full). Finished batches are kept for
+    `analysis_job_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        job_manager: Optional[AnalysisJobManager] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self._job_manager = job_manager
+        self.concurrency = concurrency or settings.batch_concurrency or settings.analysis_workers
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        # batch_id -> [(event loop, asyncio.Queue)] of the live event subscribers
+        self._subscribers: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def job_manager(self) -> AnalysisJobManager:
+        return self._job_manager or get_analysis_job_manager()
+
+    def _prune_finished(self) -> None:
+        cutoff = time.time() - settings.analysis_job_ttl_seconds
+        expired = [
+            batch_id for batch_id, batch in self._batches.items()
+            if batch["finished_at"] and batch["finished_at"] < cutoff
+        ]
+        for batch_id in expired:
+            self._batches.pop(batch_id, None)
+            self._subscribers.pop(batch_id, None)
+
+    def submit(
+        self,
+        captures: List[Tuple[str, str]],
+        user_metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Starts a batch over `captures` ([(file_path, original_filename)]) and
+        returns its initial status. `user_metadata` applies to every capture.
+        """
+        batch_id = str(uuid.uuid4())
+        with self._lock:
+            self._prune_finished()
+            self._batches[batch_id] = {
+                "batch_id": batch_id,
+                "status": JOB_QUEUED,
+                "created_at": time.time(),
+                "finished_at": None,
+                "total_files": len(captures),
+                "pending": len(captures),
+                "files": [
+                    {"file_name": name, "job_id": None, "status": JOB_QUEUED}
+                    for _, name in captures
+                ],
+                "results": [],
+                "summary": None,
+            }
+
+        feeder = threading.Thread(
+            target=self._feed,
+            args=(batch_id, captures, user_metadata),
+            name=f"analysis_batch_{batch_id[:8]}",
+            daemon=True,
+        )
+        feeder.start()
+        return self.get_status(batch_id)
+
+    def _feed(self, batch_id: str, captures: List[Tuple[str, str]], user_metadata) -> None:
+        """Submits the captures of a batch, bounded by `concurrency` jobs in flight."""
+        slots = threading.BoundedSemaphore(max(1, self.concurrency))
+        with self._lock:
+            self._batches[batch_id]["status"] = JOB_RUNNING
+            self._publish(batch_id, {"type": "status", "data": {"status": JOB_RUNNING}})
+
+        for index, (file_path, file_name) in enumerate(captures):
+            slots.acquire()
+            job_id = None
+            while True:
+                try:
+                    job = self.job_manager.submit(
+                        file_path,
+                        user_metadata=user_metadata,
+                        original_filename=file_name,
+                    )
+                    job_id = job["job_id"]
+                    future = self.job_manager.get_future(job_id)
+                    break
+                except JobQueueFullError:
+                    time.sleep(_QUEUE_FULL_RETRY_SECONDS)
+                except Exception as e:
+                    # Failed to submit: record it as a failed file right away
+                    future = Future()
+                    future.set_exception(e)
+                    break
+
+            with self._lock:
+                entry = self._batches[batch_id]["files"][index]
+                entry["job_id"] = job_id
+                entry["status"] = JOB_RUNNING
+
+            def on_done(f: Future, index=index, file_name=file_name, job_id=job_id) -> None:
+                try:
+                    result = _file_result(file_name, job_id, f)
+                    if job_id is not None:
+                        # Only the compact result is kept; the full one is in /reports
+                        self.job_manager.release_result(job_id)
+                    self._on_file_done(batch_id, index, result)
+                finally:
+                    slots.release()
+
+            future.add_done_callback(on_done)
+
+    def _on_file_done(self, batch_id: str, index: int, result: Dict[str, Any]) -> None:
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return
+            batch["files"][index]["status"] = result["status"]
+            batch["results"].append(result)
+            batch["pending"] -= 1
+            done = batch["total_files"] - batch["pending"]
+            self._publish(batch_id, {
+                "type": "file",
+                "data": {**result, "completed_files": done, "total_files": batch["total_files"]},
+            })
+            if batch["pending"] == 0:
+                batch["summary"] = summarize_batch(batch["results"])
+                batch["status"] = JOB_COMPLETED
+                batch["finished_at"] = time.time()
+                self._publish(batch_id, {"type": "summary", "data": batch["summary"]})
+                self._subscribers.pop(batch_id, None)
+
+    def _publish(self, batch_id: str, event: Dict[str, Any]) -> None:
+        """Hands an event to every subscriber of the batch (caller holds the lock)."""
+        for loop, queue in self._subscribers.get(batch_id, []):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's event loop is closed
+                pass
+
+    def get_status(self, batch_id: str, include_results: bool = False) -> Optional[Dict[str, Any]]:
+        """Batch status and per-file progress; results and summary on request."""
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return None
+            status = {key: value for key, value in batch.items() if key not in ("files", "results", "summary")}
+            status["files"] = [dict(entry) for entry in batch["files"]]
+            if include_results:
+                status["results"] = list(batch["results"])
+                status["summary"] = batch["summary"]
+            return status
+
+    def subscribe(self, batch_id: str) -> Optional["asyncio.Queue"]:
+        """
+        Registers an event subscriber for the batch on the running event loop.
+        It receives the results already available as `file` events, then the
+        rest as they finish, and finally the `summary` event. Returns None for
+        unknown batches.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return None
+            for done, result in enumerate(batch["results"], start=1):
+                queue.put_nowait({
+                    "type": "file",
+                    "data": {**result, "completed_files": done, "total_files": batch["total_files"]},
+                })
+            if batch["summary"] is not None:
+                queue.put_nowait({"type": "summary", "data": batch["summary"]})
+            else:
+                self._subscribers.setdefault(batch_id, []).append((loop, queue))
+        return queue
+
+    def unsubscribe(self, batch_id: str, queue: "asyncio.Queue") -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(batch_id, [])
+            self._subscribers[batch_id] = [entry for entry in subscribers if entry[1] is not queue]
+            if not self._subscribers[batch_id]:
+                self._subscribers.pop(batch_id, None)
+
+
+# Process-wide batch manager (created lazily)
+_batch_manager: Optional[AnalysisBatchManager] = None
+_batch_manager_lock = threading.Lock()
+
+
+def get_analysis_batch_manager() -> AnalysisBatchManager:
+    """Gets or creates the process-wide analysis batch manager."""
+    global _batch_manager
+    if _batch_manager is None:
+        with _batch_manager_lock:
+            if _batch_manager is None:
+                _batch_manager = AnalysisBatchManager()
+    return _batch_manager
@@ -0,0 +1,432 @@
+"""
+Background execution of capture analyses.
+Runs `BandSteeringService.process_capture` on a bounded process pool and
+keeps the status and per-stage progress of every job in memory, so the API
+can return immediately and let clients poll for the result or subscribe to
+its events (stage changes, partial parse snapshots, final result). When the
+LLM narrative is deferred, the job completes with it pending and one more
+`narrative` event follows once `NarrativeWorker` has generated it.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Optional, List
+
+from ..settings import settings
+from .band_steering_service import ANALYSIS_STAGES
+from .narrative_jobs import get_narrative_worker
+from ..tools.narrative_template import NARRATIVE_PENDING, NARRATIVE_FAILED
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """Raised when every worker is busy and the waiting queue is full."""
+
+
+# Service instance of each worker process (created on first job)
+_worker_service = None
+
+
+def _run_analysis_job(
+    job_id: str,
+    file_path: str,
+    user_metadata: Optional[Dict[str, str]],
+    original_filename: Optional[str],
+    progress_queue,
+) -> Dict[str, Any]:
+    """
+    Entry point executed inside a worker process. Reports stage progress and
+    parse snapshots through `progress_queue` and returns the serialized
+    analysis response together with the full analysis (without `raw_stats`,
+    which the response already carries as `stats`) and the pending narrative
+    request, if any. Multi-client jobs return the capture rollup in place of
+    the single analysis.
+    """
+    global _worker_service
+    from .band_steering_service import BandSteeringService
+
+    if _worker_service is None:
+        _worker_service = BandSteeringService()
+
+    def on_progress(stage: str, status: str) -> None:
+        progress_queue.put({"job_id": job_id, "stage": stage, "status": status, "timestamp": time.time()})
+
+    def on_snapshot(snapshot: Dict[str, Any]) -> None:
+        progress_queue.put({"job_id": job_id, "snapshot": snapshot, "timestamp": time.time()})
+
+    progress_queue.put({"job_id": job_id, "stage": None, "status": JOB_RUNNING, "timestamp": time.time()})
+    result_pkg = asyncio.run(
+        _worker_service.process_capture(
+            file_path,
+            user_metadata=user_metadata,
+            original_filename=original_filename,
+            progress_callback=on_progress,
+            snapshot_callback=on_snapshot,
+        )
+    )
+    if "rollup" in result_pkg:
+        return {
+            "response": BandSteeringService.build_multi_client_response(result_pkg),
+            "analysis": result_pkg["rollup"],
+        }
+    return {
+        "response": BandSteeringService.build_analysis_response(result_pkg),
+        "analysis": result_pkg["analysis"].model_dump(mode="json", exclude={"raw_stats"}),
+        "narrative": result_pkg.get("pending_narrative"),
+    }
+
+
+class AnalysisJobManager:
+    """
+    Bounded job queue in front of a process pool.
+
+    At most `max_workers` analyses run at once and `max_queued` more may wait;
+    further submissions raise `JobQueueFullError`. Finished jobs (and their
+    results) are kept for `job_ttl_seconds`; callers that consume a result
+    right away (batches, `POST /analyze`) drop it with `release_result`.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        job_ttl_seconds: Optional[int] = None,
+    ):
+        self.max_workers = max(1, max_workers or settings.analysis_workers)
+        self.max_queued = max(0, max_queued if max_queued is not None else settings.analysis_queue_size)
+        self.job_ttl_seconds = job_ttl_seconds or settings.analysis_job_ttl_seconds
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        # job_id -> [(event loop, asyncio.Queue)] of the live event subscribers
+        self._subscribers: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress_queue = None
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def _ensure_started(self) -> None:
+        """Starts the pool and the progress dispatcher on first use."""
+        if self._executor is not None:
+            return
+        # "spawn" avoids forking the server process while it holds threads and open clients
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._progress_queue = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_progress,
+            name="analysis_job_progress",
+            daemon=True,
+        )
+        self._dispatcher.start()
+
+    def _dispatch_progress(self) -> None:
+        """Applies the progress messages sent by the workers to the job table."""
+        while True:
+            try:
+                message = self._progress_queue.get()
+            except Exception:
+                return
+            with self._lock:
+                job = self._jobs.get(message["job_id"])
+                if not job or job["status"] in (JOB_COMPLETED, JOB_FAILED):
+                    continue
+                event = self._apply_message(job, message)
+                if event:
+                    self._publish(job["job_id"], event)
+
+    def _apply_message(self, job: Dict[str, Any], message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Updates the job with a worker message and returns the event to publish."""
+        timestamp = message["timestamp"]
+        if "snapshot" in message:
+            job["latest_snapshot"] = message["snapshot"]
+            return {"type": "snapshot", "data": message["snapshot"]}
+
+        stage, status = message["stage"], message["status"]
+        if stage is None:
+            job["status"] = status
+            job["started_at"] = timestamp
+            return {"type": "status", "data": {"status": status}}
+
+        stage_info = job["stages"].get(stage)
+        if stage_info is None:
+            return None
+        stage_info["status"] = status
+        if status == JOB_RUNNING:
+            stage_info["started_at"] = timestamp
+            job["current_stage"] = stage
+        else:
+            stage_info["finished_at"] = timestamp
+        self._update_progress(job)
+        return {"type": "stage", "data": {"stage": stage, "status": status, "progress": job["progress"]}}
+
+    def _publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Hands an event to every subscriber of the job (caller holds the lock)."""
+        for loop, queue in self._subscribers.get(job_id, []):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's event loop is closed
+                pass
+
+    @staticmethod
+    def _update_progress(job: Dict[str, Any]) -> None:
+        done = sum(1 for info in job["stages"].values() if info["status"] == JOB_COMPLETED)
+        job["progress"] = round(done / len(ANALYSIS_STAGES), 3)
+
+    def _prune_finished(self) -> None:
+        cutoff = time.time() - self.job_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._futures.pop(job_id, None)
+            self._subscribers.pop(job_id, None)
+
+    def submit(
+        self,
+        file_path: str,
+        user_metadata: Optional[Dict[str, str]] = None,
+        original_filename: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Enqueues an analysis and returns its initial status.
+        Raises `JobQueueFullError` if the queue is at capacity.
+        """
+        with self._lock:
+            self._prune_finished()
+            pending = sum(
+                1 for job in self._jobs.values()
+                if job["status"] in (JOB_QUEUED, JOB_RUNNING)
+            )
+            if pending >= self.max_workers + self.max_queued:
+                raise JobQueueFullError(
+                    f"Analysis queue is full ({pending} jobs pending)."
+                )
+
+            self._ensure_started()
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": JOB_QUEUED,
+                "file_name": original_filename,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "current_stage": None,
+                "progress": 0.0,
+                "stages": {
+                    stage: {"status": "pending", "started_at": None, "finished_at": None}
+                    for stage in ANALYSIS_STAGES
+                },
+                "error": None,
+                "error_type": None,
+                "latest_snapshot": None,
+                "result": None,
+                "analysis": None,
+                "analysis_id": None,
+                "result_url": None,
+                "result_released": False,
+                "narrative_status": None,
+            }
+            future = self._executor.submit(
+                _run_analysis_job,
+                job_id,
+                file_path,
+                user_metadata,
+                original_filename,
+                self._progress_queue,
+            )
+            self._futures[job_id] = future
+
+        future.add_done_callback(lambda f, job_id=job_id: self._on_job_done(job_id, f))
+        return self.get_status(job_id)
+
+    def _on_job_done(self, job_id: str, future: Future) -> None:
+        narrative_request = None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["finished_at"] = time.time()
+            error = future.exception()
+            if error is None:
+                output = future.result()
+                job["status"] = JOB_COMPLETED
+                job["result"] = output["response"]
+                job["analysis"] = output["analysis"]
+                self._set_stored_analysis(job, output["analysis"] or {})
+                job["narrative_status"] = (output["analysis"] or {}).get("narrative_status")
+                narrative_request = output.get("narrative")
+                job["current_stage"] = None
+                for info in job["stages"].values():
+                    info["status"] = JOB_COMPLETED
+                job["progress"] = 1.0
+            else:
+                job["status"] = JOB_FAILED
+                job["error"] = str(error)
+                job["error_type"] = type(error).__name__
+                current = job["current_stage"]
+                if current and job["stages"][current]["status"] == JOB_RUNNING:
+                    job["stages"][current]["status"] = JOB_FAILED
+            self._publish(job_id, self._final_event(job))
+            if narrative_request is None:
+                self._subscribers.pop(job_id, None)
+
+        if narrative_request is not None:
+            # Subscribers stay registered until the `narrative` event
+            narrative_future = get_narrative_worker().submit(narrative_request)
+            narrative_future.add_done_callback(lambda f, job_id=job_id: self._on_narrative_done(job_id, f))
+
+    def _on_narrative_done(self, job_id: str, future: Future) -> None:
+        """Applies a generated narrative to the job result and notifies subscribers."""
+        if future.cancelled():
+            # Worker shut down: the narrative stays pending and spooled for the next start
+            return
+        error = future.exception()
+        if error is None:
+            fields = future.result()
+        else:
+            fields = {"narrative_status": NARRATIVE_FAILED}
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["narrative_status"] = fields.get("narrative_status")
+            if job["analysis"] is not None:
+                job["analysis"].update(fields)
+            if job["result"] is not None:
+                job["result"]["narrative_status"] = fields.get("narrative_status")
+                if "analysis_text" in fields:
+                    job["result"]["analysis"] = fields["analysis_text"]
+            self._publish(job_id, {"type": "narrative", "data": {"job_id": job_id, **fields}})
+            self._subscribers.pop(job_id, None)
+
+    @staticmethod
+    def _set_stored_analysis(job: Dict[str, Any], analysis: Dict[str, Any]) -> None:
+        """Id and report URL of the persisted analysis (or multi-client capture rollup)."""
+        if "capture_id" in analysis and "analysis_id" not in analysis:
+            job["analysis_id"] = analysis["capture_id"]
+            job["result_url"] = f"/reports/captures/{analysis['capture_id']}"
+        elif analysis.get("analysis_id"):
+            job["analysis_id"] = analysis["analysis_id"]
+            job["result_url"] = f"/reports/{analysis['analysis_id']}"
+
+    def release_result(self, job_id: str) -> None:
+        """
+        Drops the full response and analysis of a finished job, and its
+        future, which holds them as well. Status, `analysis_id` and
+        `result_url` are kept; the stored analysis stays available from the
+        reports API.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in (JOB_COMPLETED, JOB_FAILED):
+                return
+            self._futures.pop(job_id, None)
+            if job["status"] == JOB_COMPLETED:
+                job["result"] = None
+                job["analysis"] = None
+                job["result_released"] = True
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the job status and stage progress (without the result payload)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = {key: value for key, value in job.items() if key not in ("result", "analysis", "stages")}
+            status["stages"] = {stage: dict(info) for stage, info in job["stages"].items()}
+            status["result_ready"] = job["status"] == JOB_COMPLETED and not job["result_released"]
+            return status
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the analysis response of a completed job, None otherwise (or once released)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job["result"] if job and job["status"] == JOB_COMPLETED else None
+
+    @staticmethod
+    def _final_event(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Last event of a job stream: the full analysis, or the error."""
+        if job["status"] == JOB_COMPLETED and job["result_released"]:
+            return {"type": "final", "data": {
+                "analysis": None, "response": None, "analysis_id": job["analysis_id"], "result_url": job["result_url"],
+            }}
+        if job["status"] == JOB_COMPLETED:
+            response = job["result"]
+            analysis = dict(job["analysis"] or {})
+            analysis["raw_stats"] = response.get("stats")
+            return {"type": "final", "data": {"analysis": analysis, "response": response}}
+        return {"type": "error", "data": {"message": job["error"], "type": job["error_type"]}}
+
+    def subscribe(self, job_id: str) -> Optional["asyncio.Queue"]:
+        """
+        Registers an event subscriber for the job on the running event loop.
+        The queue receives status / stage / snapshot events and ends with a
+        `final` or `error` event, followed by a `narrative` event while the
+        narrative is pending. If the job already finished, the final event is
+        queued right away. Returns None for unknown jobs.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in (JOB_COMPLETED, JOB_FAILED):
+                queue.put_nowait(self._final_event(job))
+                if job["narrative_status"] == NARRATIVE_PENDING:
+                    self._subscribers.setdefault(job_id, []).append((loop, queue))
+            else:
+                if job["latest_snapshot"]:
+                    queue.put_nowait({"type": "snapshot", "data": job["latest_snapshot"]})
+                self._subscribers.setdefault(job_id, []).append((loop, queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: "asyncio.Queue") -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            self._subscribers[job_id] = [entry for entry in subscribers if entry[1] is not queue]
+            if not self._subscribers[job_id]:
+                self._subscribers.pop(job_id, None)
+
+    def get_future(self, job_id: str) -> Optional[Future]:
+        """Future of the job's worker call (used by the synchronous endpoint)."""
+        with self._lock:
+            return self._futures.get(job_id)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            try:
+                self._manager.shutdown()
+            except Exception:
+                pass
+
+
+# Process-wide job manager (created lazily)
+_job_manager: Optional[AnalysisJobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_analysis_job_manager() -> AnalysisJobManager:
+    """Gets or creates the process-wide analysis job manager."""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = AnalysisJobManager()
+    return _job_manager
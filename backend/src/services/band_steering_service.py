@@ -5,7 +5,8 @@ This class coordinates the high-level flow of Band Steering analysis:
 - Uses `WiresharkTool` to extract raw data from the capture.
 - Uses `BTMAnalyzer` for specialized BTM analysis and compliance.
 - Uses `DeviceClassifier` to identify the device.
-- Uses `FragmentExtractor` to extract relevant fragments from the capture.
+- Uses `FragmentExtractor` to describe relevant fragments of the capture (cut on download).
+- Uses `NarrativeTemplate` for the deterministic report narrative.
 - Handles results persistence and indexing for RAG.
 
 All specific domain logic is delegated to these specialized components.
@@ -14,18 +15,46 @@ import json
 import os
 import shutil
 import re
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 
-from ..tools.wireshark_tool import WiresharkTool
+from ..tools.wireshark_tool import WiresharkTool, TSHARK_FIELDS
 from ..tools.btm_analyzer import BTMAnalyzer
+from ..tools.transition_engine import TransitionEngine
+from ..tools.band_metrics import compute_band_metrics
+from ..tools.narrative_template import (
+    NarrativeTemplate,
+    NARRATIVE_LLM,
+    NARRATIVE_TEMPLATE,
+    NARRATIVE_TEMPLATE_FIRST,
+    NARRATIVE_PENDING,
+    NARRATIVE_COMPLETED,
+    NARRATIVE_FAILED,
+)
 from ..tools.device_classifier import DeviceClassifier
+from ..tools.capture_scope import CaptureScope
+from ..tools.capture_index import CaptureIndex, index_path_for
+from ..utils.mac_registry import MacRegistry, is_valid_client_mac, normalize_mac
 from .fragment_extractor import FragmentExtractor
 from .embeddings_service import process_and_store_pdf  # Para indexar si generamos PDF
 from ..models.btm_schemas import BandSteeringAnalysis, DeviceInfo
+from ..core.capture_cache import CaptureParseCache, get_capture_parse_cache
+from ..core.fragment_cache import FragmentCache, get_fragment_cache
+from ..core.analysis_catalog import AnalysisCatalog, catalog_record, get_analysis_catalog
+from ..core import analysis_storage
+from ..settings import settings
 from ..repositories.qdrant_repository import get_qdrant_repository
 
+# Pipeline stages reported to progress callbacks, in execution order
+ANALYSIS_STAGES = ("parsing", "classification", "btm", "fragments", "narrative", "persistence")
+
+# Folder (under base_dir) holding the rollup and shared capture of multi-client analyses
+CAPTURES_DIR = "_captures"
+
 
 class BandSteeringService:
     """
@@ -41,7 +70,11 @@ class BandSteeringService:
         wireshark_tool: Optional[WiresharkTool] = None,
         btm_analyzer: Optional[BTMAnalyzer] = None,
         device_classifier: Optional[DeviceClassifier] = None,
-        fragment_extractor: Optional[FragmentExtractor] = None
+        fragment_extractor: Optional[FragmentExtractor] = None,
+        fragment_cache: Optional[FragmentCache] = None,
+        parse_cache: Optional[CaptureParseCache] = None,
+        narrative_template: Optional[NarrativeTemplate] = None,
+        catalog: Optional[AnalysisCatalog] = None,
     ):
         # Ensure the base directory is absolute
         # In Docker, use /app/data/analyses; in local, use resolved relative path
@@ -56,54 +89,89 @@ class BandSteeringService:
         self.btm_analyzer = btm_analyzer or BTMAnalyzer()
         self.device_classifier = device_classifier or DeviceClassifier()
         self.fragment_extractor = fragment_extractor or FragmentExtractor()
+        self.fragment_cache = fragment_cache or get_fragment_cache()
+        self.parse_cache = parse_cache or get_capture_parse_cache()
+        self.narrative_template = narrative_template or NarrativeTemplate()
         
         # Create base directory if it doesn't exist
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog = catalog or get_analysis_catalog(self.base_dir)
 
     async def process_capture(
         self, 
         file_path: str, 
         user_metadata: Optional[Dict[str, str]] = None,
-        original_filename: Optional[str] = None
+        original_filename: Optional[str] = None,
+        progress_callback: Optional[Callable[[str, str], None]] = None,
+        snapshot_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> Dict[str, Any]:
         """
         Executes the complete Band Steering analysis cycle:
         extraction → classification → BTM analysis → fragmentation → AI report → persistence → indexing.
+
+        `progress_callback(stage, status)` is called with status "running" and
+        "completed" around each stage of `ANALYSIS_STAGES`.
+        `snapshot_callback(snapshot)` receives partial parse results while the
+        capture is being parsed (not called when the parse cache is hit).
+
+        With `user_metadata["multi_client"]` set, every station is analyzed
+        (see `process_capture_multi_client`).
         """
+        if self.is_multi_client(user_metadata):
+            return await self.process_capture_multi_client(
+                file_path,
+                user_metadata=user_metadata,
+                original_filename=original_filename,
+                progress_callback=progress_callback,
+                snapshot_callback=snapshot_callback,
+            )
+
         file_name = original_filename or os.path.basename(file_path)
+        report = self._stage_reporter(progress_callback)
         
         # 1. Raw data extraction (WiresharkTool)
-        ssid_hint = (user_metadata or {}).get("ssid") if user_metadata else None
+        report("parsing", "running")
         client_mac_hint = (user_metadata or {}).get("client_mac") if user_metadata else None
-        raw_data = self.wireshark_tool._extract_basic_stats(
+        raw_data = self._extract_raw_data(
             file_path=file_path,
-            ssid_filter=ssid_hint,
             client_mac_hint=client_mac_hint,
+            scope=self.build_capture_scope(user_metadata),
+            snapshot_callback=snapshot_callback,
         )
+        report("parsing", "completed")
         
         # 2. Identification and Classification of the Device
+        report("classification", "running")
         device_info = self._determine_primary_mac_and_device(
             raw_data=raw_data,
             user_metadata=user_metadata,
             file_name=file_name,
             client_mac_hint=client_mac_hint,
         )
+        report("classification", "completed")
 
         # 3. Specialized BTM analysis and compliance (BTMAnalyzer)
+        report("btm", "running")
         analysis = self._run_btm_analysis(raw_data, file_name, device_info)
+        report("btm", "completed")
 
-        # 4. Fragment Extraction (FragmentExtractor)
-        analysis.fragments = self._extract_fragments(analysis, file_path)
+        # 4. Fragment descriptions (FragmentExtractor; pcaps are cut on download)
+        report("fragments", "running")
+        analysis.fragments = self._describe_fragments(analysis)
+        report("fragments", "completed")
 
-        # 5. Narrative Report Generation (AI)
+        # 5. Narrative Report Generation (template and/or AI, see `analysis_narrative_mode`)
+        report("narrative", "running")
         technical_summary = self._build_technical_summary_and_verdict(
             raw_data=raw_data,
             file_name=file_name,
             analysis=analysis,
         )
-        analysis.analysis_text = self.wireshark_tool._ask_llm_for_analysis(technical_summary)
+        self._write_narrative(analysis, raw_data, technical_summary)
+        report("narrative", "completed")
 
         # 6. Save user_metadata in raw_data for persistence
+        report("persistence", "running")
         self._attach_user_metadata(raw_data, user_metadata)
 
         # 7. Save raw_stats in the analysis object for persistence
@@ -112,14 +180,395 @@ class BandSteeringService:
         # 8. Organization, persistence, and indexing
         save_path = self._persist_analysis(analysis, device_info, file_path)
         self._index_analysis_for_rag(analysis)
+        report("persistence", "completed")
+
+        # 9. Pending LLM narrative: handed back to be generated in the
+        # background (see NarrativeWorker), or generated now when not deferred
+        pending_narrative = None
+        if analysis.narrative_status == NARRATIVE_PENDING:
+            pending_narrative = self._narrative_request(analysis, raw_data, technical_summary, save_path)
+            if not self.narrative_deferred():
+                for field, value in self.complete_narrative(pending_narrative).items():
+                    setattr(analysis, field, value)
+                pending_narrative = None
 
         # Return analysis object and raw data (for frontend compatibility)
         return {
             "analysis": analysis,
             "raw_stats": raw_data,
             "save_path": save_path,
+            "pending_narrative": pending_narrative,
+        }
+
+    async def process_capture_multi_client(
+        self,
+        file_path: str,
+        user_metadata: Optional[Dict[str, str]] = None,
+        original_filename: Optional[str] = None,
+        progress_callback: Optional[Callable[[str, str], None]] = None,
+        snapshot_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Multi-client mode: parses the capture once, partitions the steering
+        events by station and runs device classification, BTM analysis,
+        compliance checks and fragment descriptions for every station in
+        parallel (`multi_client_workers` processes).
+
+        Each station gets its own persisted `BandSteeringAnalysis`, linked by
+        `capture_id` to a capture-level rollup. Stations get the template
+        narrative only (no LLM call per station).
+        """
+        file_name = original_filename or os.path.basename(file_path)
+        report = self._stage_reporter(progress_callback)
+        capture_id = str(uuid.uuid4())
+
+        # 1. Single parse with the per-station breakdown
+        report("parsing", "running")
+        raw_data = self._extract_raw_data(
+            file_path=file_path,
+            client_mac_hint=None,
+            scope=self.build_capture_scope(user_metadata),
+            snapshot_callback=snapshot_callback,
+            multi_client=True,
+        )
+        report("parsing", "completed")
+
+        # 2. Per-station classification, BTM analysis and fragments
+        client_raws = [
+            self._client_raw_data(raw_data, client)
+            for client in raw_data.get("clients", {}).values()
+        ]
+        for stage in ("classification", "btm", "fragments"):
+            report(stage, "running")
+
+        # The station analyses are pure Python (GIL-bound): processes, not threads
+        jobs = [
+            (str(self.base_dir), client_raw, file_name, capture_id, user_metadata)
+            for client_raw in client_raws
+        ]
+        workers = min(self._multi_client_workers(), len(jobs))
+        if workers < 2:
+            outcomes = [self._analyze_client_safely(*job[1:]) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_analyze_station, *zip(*jobs)))
+
+        analyses = [o for o in outcomes if isinstance(o, BandSteeringAnalysis)]
+        errors = [o for o in outcomes if not isinstance(o, BandSteeringAnalysis)]
+        for stage in ("classification", "btm", "fragments"):
+            report(stage, "completed")
+
+        # 3. Capture-level rollup (replaces the per-station narrative)
+        report("narrative", "running")
+        rollup = self.build_capture_rollup(capture_id, file_name, raw_data, analyses, errors)
+        report("narrative", "completed")
+
+        # 4. Persistence: the capture is stored once and shared by every station
+        report("persistence", "running")
+        capture_dir = self.base_dir / CAPTURES_DIR / capture_id
+        capture_dir.mkdir(parents=True, exist_ok=True)
+        stored_capture = self._store_original_capture(file_path, capture_dir, capture_id)
+        save_paths = []
+        for analysis in analyses:
+            save_paths.append(self._save_analysis_result(
+                analysis,
+                analysis.devices[0],
+                stored_capture_path=stored_capture,
+            ))
+            self._index_analysis_for_rag(analysis)
+        rollup["original_file_path"] = stored_capture
+        with open(capture_dir / "rollup.json", "w", encoding="utf-8") as f:
+            json.dump(rollup, f, indent=4, ensure_ascii=False)
+        report("persistence", "completed")
+
+        return {
+            "analyses": analyses,
+            "rollup": rollup,
+            "raw_stats": raw_data,
+            "save_paths": save_paths,
+        }
+
+    @staticmethod
+    def _multi_client_workers() -> int:
+        """Worker processes for multi-client station analyses (0 in settings = all cores)."""
+        return max(1, settings.multi_client_workers or os.cpu_count() or 1)
+
+    def _analyze_client_safely(self, *args) -> Any:
+        """`_analyze_client`, with a failure reported as an error entry for the rollup."""
+        try:
+            return self._analyze_client(*args)
+        except Exception as e:
+            client_raw = args[0]
+            return {"client_mac": client_raw["diagnostics"]["client_mac"], "error": str(e)}
+
+    def _analyze_client(
+        self,
+        client_raw: Dict[str, Any],
+        file_name: str,
+        capture_id: str,
+        user_metadata: Optional[Dict[str, str]],
+    ) -> BandSteeringAnalysis:
+        """Analysis of one station of a multi-client capture (`_client_raw_data` view)."""
+        client_mac = client_raw["diagnostics"]["client_mac"]
+
+        # User-provided vendor / model only describe the station they name
+        manual_info = None
+        if user_metadata and normalize_mac(user_metadata.get("client_mac")) == client_mac:
+            manual_info = user_metadata
+        device_info = self.device_classifier.classify_device(client_mac, manual_info)
+
+        analysis = self._run_btm_analysis(client_raw, file_name, device_info)
+        analysis.capture_id = capture_id
+        analysis.fragments = self._describe_fragments(analysis)
+        self._recalculate_verdict(analysis)
+        analysis.analysis_text = self.narrative_template.render(analysis, client_raw)
+        analysis.narrative_source = NARRATIVE_TEMPLATE
+        analysis.narrative_status = NARRATIVE_COMPLETED
+
+        if user_metadata and user_metadata.get("ssid"):
+            self._attach_user_metadata(client_raw, {"ssid": user_metadata["ssid"], "client_mac": client_mac})
+        analysis.raw_stats = client_raw
+        return analysis
+
+    @staticmethod
+    def _client_raw_data(raw_data: Dict[str, Any], client: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        View of the capture stats for one station: its own events, steering
+        analysis, BTM counters, raw frame summary and signal series over the
+        shared capture data. The capture-wide `wireshark_raw` (samples and
+        totals of every station) is not carried over.
+        """
+        client_raw = {key: value for key, value in raw_data.items() if key != "clients"}
+        client_raw.update({
+            "steering_events": client["steering_events"],
+            "steering_analysis": client["steering_analysis"],
+            "signal_samples": client["signal_samples"],
+            "signal_stats": client["signal_stats"],
+        })
+        diagnostics = dict(raw_data.get("diagnostics", {}))
+        diagnostics.pop("user_metadata", None)
+        diagnostics.update({
+            "client_mac": client["client_mac"],
+            "band_counters": client["band_counters"],
+            "wireshark_raw": client["wireshark_raw"],
+            "steering_events_count": len(client["steering_events"]),
+        })
+        client_raw["diagnostics"] = diagnostics
+        return client_raw
+
+    @staticmethod
+    def build_capture_rollup(
+        capture_id: str,
+        file_name: str,
+        raw_data: Dict[str, Any],
+        analyses: List[BandSteeringAnalysis],
+        errors: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Capture-level summary of a multi-client analysis."""
+        clients = []
+        for analysis in analyses:
+            device = analysis.devices[0] if analysis.devices else None
+            clients.append({
+                "analysis_id": analysis.analysis_id,
+                "client_mac": device.mac_address if device else None,
+                "vendor": device.vendor if device else "Unknown",
+                "model": device.device_model if device else None,
+                "verdict": analysis.verdict,
+                "btm_requests": analysis.btm_requests,
+                "btm_responses": analysis.btm_responses,
+                "btm_success_rate": analysis.btm_success_rate,
+                "successful_transitions": analysis.successful_transitions,
+                "failed_transitions": analysis.failed_transitions,
+                "band_change_transitions": sum(1 for t in analysis.transitions if t.is_band_change),
+                "loops_detected": analysis.loops_detected,
+                "band_metrics": analysis.band_metrics,
+            })
+        clients.sort(key=lambda c: (c["verdict"] != "FAILED", c["client_mac"] or ""))
+
+        failed_checks = Counter(
+            check.check_name
+            for analysis in analyses
+            for check in analysis.compliance_checks
+            if not check.passed
+        )
+        steering = raw_data.get("steering_analysis", {})
+        return {
+            "capture_id": capture_id,
+            "filename": file_name,
+            "analysis_timestamp": datetime.now().isoformat(),
+            "total_packets": raw_data.get("total_packets", 0),
+            "wlan_packets": raw_data.get("total_wlan_packets", 0),
+            "stations_detected": steering.get("clients_analyzed", len(raw_data.get("clients", {}))),
+            "clients_analyzed": len(analyses),
+            "verdict_distribution": dict(Counter(analysis.verdict for analysis in analyses)),
+            "failed_checks": dict(failed_checks.most_common()),
+            "totals": {
+                "btm_requests": sum(c["btm_requests"] for c in clients),
+                "btm_responses": sum(c["btm_responses"] for c in clients),
+                "successful_transitions": sum(c["successful_transitions"] for c in clients),
+                "failed_transitions": sum(c["failed_transitions"] for c in clients),
+                "band_change_transitions": sum(c["band_change_transitions"] for c in clients),
+                "clients_with_loops": sum(1 for c in clients if c["loops_detected"]),
+            },
+            "clients": clients,
+            "errors": errors or [],
         }
 
+    def get_capture_rollup(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        """Stored rollup of a multi-client analysis, None if it does not exist."""
+        rollup_path = self.base_dir / CAPTURES_DIR / Path(capture_id).name / "rollup.json"
+        if not rollup_path.exists():
+            return None
+        with open(rollup_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def is_multi_client(user_metadata: Optional[Dict[str, Any]]) -> bool:
+        return bool((user_metadata or {}).get("multi_client"))
+
+    @staticmethod
+    def _stage_reporter(progress_callback: Optional[Callable[[str, str], None]]) -> Callable[[str, str], None]:
+        """Wraps `progress_callback` so a failing callback never aborts the analysis."""
+        def report(stage: str, status: str) -> None:
+            if progress_callback:
+                try:
+                    progress_callback(stage, status)
+                except Exception:
+                    pass
+        return report
+
+    @staticmethod
+    def _band_steering_payload(analysis: BandSteeringAnalysis) -> Dict[str, Any]:
+        """`band_steering` block of the frontend payload for one analysis."""
+        return {
+            "analysis_id": analysis.analysis_id,
+            "verdict": analysis.verdict,
+            "device": analysis.devices[0].model_dump() if analysis.devices and len(analysis.devices) > 0 else {},
+            "compliance_checks": [c.model_dump(mode='json') for c in analysis.compliance_checks] if analysis.compliance_checks else [],
+            "fragments_count": len(analysis.fragments) if analysis.fragments else 0,
+            # Add data for Band Steering chart
+            "btm_events": [e.model_dump(mode='json') for e in analysis.btm_events] if analysis.btm_events else [],
+            "transitions": [t.model_dump(mode='json') for t in analysis.transitions] if analysis.transitions else [],
+            "signal_samples": [s.model_dump(mode='json') for s in analysis.signal_samples] if analysis.signal_samples else []
+        }
+
+    @staticmethod
+    def build_multi_client_response(result_pkg: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Serializes the result of `process_capture_multi_client`: the capture
+        stats (without the per-station breakdown), the rollup and the
+        `band_steering` block of every station.
+        """
+        rollup = result_pkg["rollup"]
+        raw_stats = {key: value for key, value in result_pkg["raw_stats"].items() if key != "clients"}
+        return {
+            "file_name": rollup["filename"],
+            "multi_client": True,
+            "capture_id": rollup["capture_id"],
+            "stats": raw_stats,
+            "rollup": rollup,
+            "clients": [
+                {
+                    "client_mac": analysis.devices[0].mac_address if analysis.devices else None,
+                    "band_steering": BandSteeringService._band_steering_payload(analysis),
+                }
+                for analysis in result_pkg["analyses"]
+            ],
+        }
+
+    @staticmethod
+    def build_analysis_response(result_pkg: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Serializes the result of `process_capture` into the JSON payload
+        expected by the frontend (`file_name`, `analysis`, `stats`, `band_steering`).
+        Falls back to a minimal payload if some Pydantic object fails to serialize.
+        """
+        analysis = result_pkg["analysis"]
+        raw_stats = result_pkg["raw_stats"]
+
+        try:
+            return {
+                "file_name": analysis.filename,
+                "analysis": analysis.analysis_text,
+                "narrative_status": analysis.narrative_status,
+                "stats": raw_stats,  # Keep stats structure for the dashboard
+                "band_steering": BandSteeringService._band_steering_payload(analysis),
+            }
+        except Exception as serialization_error:
+            return {
+                "file_name": analysis.filename if hasattr(analysis, 'filename') else "unknown",
+                "analysis": analysis.analysis_text if hasattr(analysis, 'analysis_text') else "Error generating analysis",
+                "stats": raw_stats,
+                "band_steering": {
+                    "analysis_id": str(analysis.analysis_id) if hasattr(analysis, 'analysis_id') else "unknown",
+                    "verdict": str(analysis.verdict) if hasattr(analysis, 'verdict') else "UNKNOWN",
+                    "error": f"Serialization error: {str(serialization_error)}"
+                }
+            }
+
+    @staticmethod
+    def build_capture_scope(user_metadata: Optional[Dict[str, Any]]) -> Optional[CaptureScope]:
+        """
+        Scope of the analysis requested in `user_metadata["scope"]`.
+        `true` scopes to the SSID / client MAC given in the metadata; a dict
+        sets the filters and budgets explicitly (see `CaptureScope`).
+        Raises ValueError for invalid values.
+        """
+        scope = (user_metadata or {}).get("scope")
+        if scope is True:
+            scope = {
+                "ssid": user_metadata.get("ssid"),
+                "client_mac": user_metadata.get("client_mac"),
+            }
+        return CaptureScope.from_metadata(scope)
+
+    def _extract_raw_data(
+        self,
+        file_path: str,
+        client_mac_hint: Optional[str],
+        scope: Optional[CaptureScope] = None,
+        snapshot_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        multi_client: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Returns the parsed capture statistics, served from the parse cache when
+        the same capture was already parsed with the same options.
+        Results cut short by the parse time budget are not cached.
+        """
+        cache_key = None
+        if self.parse_cache.enabled:
+            try:
+                cache_key = self.parse_cache.make_key(
+                    file_path,
+                    {
+                        "fields": list(TSHARK_FIELDS),
+                        "tshark_version": self.wireshark_tool.get_tshark_version(),
+                        "reader": settings.capture_reader,
+                        "client_mac_hint": client_mac_hint,
+                        "scope": scope.to_dict() if scope else None,
+                        "multi_client": multi_client,
+                        "signal_sample_points": settings.signal_sample_points,
+                    },
+                )
+                cached = self.parse_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            except OSError:
+                cache_key = None
+
+        raw_data = self.wireshark_tool._extract_basic_stats(
+            file_path=file_path,
+            client_mac_hint=client_mac_hint,
+            scope=scope,
+            snapshot_callback=snapshot_callback,
+            multi_client=multi_client,
+        )
+
+        stop_reason = raw_data.get("scope", {}).get("stop_reason")
+        if cache_key and stop_reason != "max_parse_seconds":
+            self.parse_cache.put(cache_key, raw_data)
+        return raw_data
+
     def _determine_primary_mac_and_device(
         self,
         raw_data: Dict[str, Any],
@@ -133,33 +582,16 @@ class BandSteeringService:
         """
         steering_events = raw_data.get("steering_events", [])
 
-        def is_valid_client_mac(mac: str) -> bool:
-            if not mac or mac == "ff:ff:ff:ff:ff:ff" or mac == "00:00:00:00:00:00":
-                return False
-            try:
-                first_octet = int(mac.split(":")[0], 16)
-                # Multicast bit should not be active
-                if first_octet & 1:
-                    return False
-            except Exception:
-                return False
-            return True
-
         primary_mac = "unknown"
 
-        # Get known BSSIDs for validation
+        # Known BSSIDs, so an AP address is never taken as the client
         bssid_info = raw_data.get("diagnostics", {}).get("bssid_info", {})
-        known_bssids = set()
-        if bssid_info:
-            for bssid in bssid_info.keys():
-                if bssid:
-                    known_bssids.add(bssid.lower().replace("-", ":"))
+        mac_registry = MacRegistry.from_bssids(bssid_info)
 
         # Prefer the MAC provided by the user if valid
         if client_mac_hint and is_valid_client_mac(client_mac_hint):
-            hint_normalized = client_mac_hint.lower().replace("-", ":")
             # If it's a known BSSID, we don't use it as client MAC
-            if hint_normalized not in known_bssids:
+            if not mac_registry.is_bssid(client_mac_hint):
                 primary_mac = client_mac_hint
         else:
             # Try to get it from steering events
@@ -185,26 +617,62 @@ class BandSteeringService:
             filename=file_name,
         )
 
-    def _extract_fragments(
+    def _describe_fragments(self, analysis: BandSteeringAnalysis) -> List[Any]:
+        """
+        Describes a fragment for each transition with band change. Nothing is
+        written here: the pcap is extracted on its first download
+        (`get_fragment_file`).
+        """
+        windows = [
+            self.fragment_extractor.channel_transition_window(transition.client_mac, transition.start_time)
+            for transition in analysis.transitions
+            if transition.is_band_change
+        ]
+        return self.fragment_extractor.describe_time_ranges(windows, analysis.analysis_id)
+
+    def find_analysis_file(self, analysis_id: str) -> Optional[Path]:
+        """Path of a stored analysis JSON (catalog lookup), None if unknown."""
+        return self.catalog.find_json(analysis_id)
+
+    def load_analysis(
         self,
-        analysis: BandSteeringAnalysis,
-        file_path: str,
-    ) -> List[Any]:
-        """
-        Extracts relevant fragments from the capture for each transition with band change.
-        Returns the list of generated `CaptureFragment`.
-        """
-        fragments: List[Any] = []
-        for transition in analysis.transitions:
-            if transition.is_band_change:
-                frag = self.fragment_extractor.extract_channel_transition(
-                    input_file=file_path,
-                    client_mac=transition.client_mac,
-                    transition_time=transition.start_time,
-                )
-                if frag:
-                    fragments.append(frag)
-        return fragments
+        analysis_id: str,
+        include_raw: bool = True,
+        raw_sections: Optional[List[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Stored analysis, None if unknown. `raw_stats` is only read from the
+        raw blob when `include_raw` (all of it, or only `raw_sections`).
+        """
+        analysis_file = self.find_analysis_file(analysis_id)
+        if analysis_file is None:
+            return None
+        return analysis_storage.load_analysis(analysis_file, include_raw=include_raw, raw_sections=raw_sections)
+
+    def get_fragment_file(self, analysis_id: str, fragment_id: str) -> Optional[Path]:
+        """
+        Materialized pcap of a fragment of a stored analysis, extracted from
+        the stored capture on first request and then served from the fragment
+        cache. None if the analysis, the fragment or the capture is missing.
+        """
+        data = self.load_analysis(analysis_id, include_raw=False)
+        if data is None:
+            return None
+
+        fragment = next(
+            (frag for frag in data.get("fragments") or [] if frag.get("fragment_id") == fragment_id),
+            None,
+        )
+        capture_path = data.get("original_file_path")
+        if fragment is None or not capture_path:
+            return None
+
+        return self.fragment_cache.get_or_create(
+            f"{analysis_id}_{fragment_id}.pcap",
+            lambda output_path: self.fragment_extractor.write_fragment(
+                capture_path, fragment["start_time"], fragment["end_time"], output_path
+            ),
+        )
 
     def _run_btm_analysis(
         self,
@@ -214,8 +682,7 @@ class BandSteeringService:
     ) -> BandSteeringAnalysis:
         """
         Encapsulates the preparation of `band_counters` and the call to `BTMAnalyzer`,
-        updating auxiliary structures of `raw_data` to maintain metric consistency
-        across the entire system.
+        which reuses the transitions and counters of `steering_analysis`.
         """
         steering_events = raw_data.get("steering_events", [])
         signal_samples = raw_data.get("signal_samples", [])
@@ -229,6 +696,14 @@ class BandSteeringService:
         if wireshark_raw:
             combined_stats["wireshark_raw"] = wireshark_raw
 
+        # Transitions come from the same TransitionEngine pass that produced
+        # steering_analysis (no second grouping of the events).
+        transitions = None
+        if "association_transitions" in raw_data.get("steering_analysis", {}):
+            transitions = TransitionEngine.to_steering_transitions(
+                raw_data["steering_analysis"]["association_transitions"]
+            )
+
         analysis = self.btm_analyzer.analyze_btm_events(
             steering_events=steering_events,
             band_counters=combined_stats,
@@ -236,35 +711,20 @@ class BandSteeringService:
             device_info=device_info,
             signal_samples=signal_samples,
             wireshark_raw=wireshark_raw,
+            transitions=transitions,
         )
 
-        # SYNCHRONIZE: Update steering_analysis with the values calculated in
-        # BTMAnalyzer so that all panels show the same values.
-        # In this direction, BTMAnalyzer can only *refine* values already
-        # derived from WiresharkTool, but never invent counters that
-        # contradict `wireshark_raw.summary`.
-        primary_mac = device_info.mac_address
-        if "steering_analysis" in raw_data:
-            synchronized_metrics = self._synchronize_steering_metrics(
-                analysis,
-                steering_events,
-                primary_client_mac=primary_mac,
-            )
-            raw_data["steering_analysis"].update(synchronized_metrics)
-
-        # COMPARE: Raw Wireshark vs Processed Data
-        wireshark_compare = self._compare_wireshark_raw_vs_processed(
-            wireshark_raw,
-            raw_data.get("steering_analysis", {}),
-            analysis,
-        )
-        if "diagnostics" in raw_data:
-            raw_data["diagnostics"]["wireshark_compare"] = wireshark_compare
-
         # Complete global data that BTMAnalyzer does not have
         analysis.total_packets = raw_data.get("total_packets", 0)
         analysis.wlan_packets = raw_data.get("total_wlan_packets", 0)
 
+        # Band dwell times and transition durations, computed once here so
+        # report listings read them instead of walking the samples.
+        analysis.band_metrics = compute_band_metrics(
+            [t.model_dump(mode='json') for t in analysis.transitions],
+            [s.model_dump(mode='json') for s in analysis.signal_samples],
+        )
+
         return analysis
 
     def _build_technical_summary_and_verdict(
@@ -285,13 +745,7 @@ class BandSteeringService:
         )
 
         # Recalculate the verdict based on corrected checks.
-        corrected_verdict = self.btm_analyzer._determine_verdict(
-            checks=analysis.compliance_checks,
-            transitions=analysis.transitions,
-            btm_rate=analysis.btm_success_rate,
-            success_count=analysis.successful_transitions,
-        )
-        analysis.verdict = corrected_verdict
+        self._recalculate_verdict(analysis)
 
         # Add compliance info to summary for the LLM
         technical_summary += "\n\n## COMPLIANCE AUDIT (BAND STEERING)\n\n"
@@ -300,7 +754,7 @@ class BandSteeringService:
         # Add explicit information about band changes correctly calculated BEFORE the checks
         # so the agent has clear context from the start
         steering_check = next(
-            (c for c in analysis.compliance_checks if c.check_name == "Steering Efectivo"),
+            (c for c in analysis.compliance_checks if c.category == "performance"),
             None,
         )
         if steering_check:
@@ -401,6 +855,114 @@ class BandSteeringService:
 
         return technical_summary
 
+    @staticmethod
+    def narrative_deferred() -> bool:
+        """True when the LLM narrative is generated after the analysis is returned."""
+        return settings.analysis_narrative_deferred and settings.analysis_narrative_mode in (
+            NARRATIVE_LLM,
+            NARRATIVE_TEMPLATE_FIRST,
+        )
+
+    def _write_narrative(
+        self,
+        analysis: BandSteeringAnalysis,
+        raw_data: Dict[str, Any],
+        technical_summary: str,
+    ) -> None:
+        """
+        Fills `analysis_text` according to `analysis_narrative_mode`:
+        - "template": the deterministic template (no network call).
+        - "template_first": the template, with the LLM narrative pending.
+        - "llm": the LLM narrative, pending when narratives are deferred
+          (`analysis_text` stays empty until it is generated); when not
+          deferred the LLM is called here, falling back to the template.
+        """
+        mode = settings.analysis_narrative_mode
+        if mode == NARRATIVE_LLM:
+            if self.narrative_deferred():
+                analysis.analysis_text = None
+                analysis.narrative_source = None
+                analysis.narrative_status = NARRATIVE_PENDING
+                return
+            try:
+                analysis.analysis_text = self.wireshark_tool._ask_llm_for_analysis(technical_summary)
+                analysis.narrative_source = NARRATIVE_LLM
+                analysis.narrative_status = NARRATIVE_COMPLETED
+                return
+            except Exception:
+                analysis.narrative_status = NARRATIVE_FAILED
+        else:
+            analysis.narrative_status = (
+                NARRATIVE_PENDING if mode == NARRATIVE_TEMPLATE_FIRST else NARRATIVE_COMPLETED
+            )
+        analysis.analysis_text = self.narrative_template.render(analysis, raw_data)
+        analysis.narrative_source = NARRATIVE_TEMPLATE
+
+    def _narrative_request(
+        self,
+        analysis: BandSteeringAnalysis,
+        raw_data: Dict[str, Any],
+        technical_summary: str,
+        save_path: str,
+    ) -> Dict[str, Any]:
+        """
+        Everything `complete_narrative` needs to generate the LLM narrative of
+        a persisted analysis later, possibly in another process.
+        """
+        fallback_text = None
+        if analysis.narrative_source != NARRATIVE_TEMPLATE:
+            fallback_text = self.narrative_template.render(analysis, raw_data)
+        return {
+            "analysis_id": analysis.analysis_id,
+            "save_path": save_path,
+            "technical_summary": technical_summary,
+            "fallback_text": fallback_text,
+        }
+
+    def complete_narrative(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generates the LLM narrative of a persisted analysis and writes it to
+        its stored JSON. If the LLM call fails the narrative is marked failed
+        and the template narrative is kept (or stored, from `fallback_text`).
+        Returns the fields written.
+        """
+        try:
+            text = self.wireshark_tool._ask_llm_for_analysis(request["technical_summary"])
+        except Exception:
+            text = None
+
+        if text:
+            fields = {
+                "analysis_text": text,
+                "narrative_source": NARRATIVE_LLM,
+                "narrative_status": NARRATIVE_COMPLETED,
+            }
+        else:
+            fields = {"narrative_status": NARRATIVE_FAILED}
+            if request.get("fallback_text"):
+                fields["analysis_text"] = request["fallback_text"]
+                fields["narrative_source"] = NARRATIVE_TEMPLATE
+        self._update_stored_analysis(request["save_path"], fields)
+        return fields
+
+    @staticmethod
+    def _update_stored_analysis(save_path: str, fields: Dict[str, Any]) -> None:
+        """Rewrites some top-level fields of a stored analysis summary (raw stats are untouched)."""
+        path = Path(save_path)
+        data = analysis_storage.load_analysis(path, include_raw=False)
+        data.update(fields)
+        # Write next to the original and swap, so readers never see a truncated file
+        os.replace(analysis_storage.write_summary(path, data), path)
+
+    def _recalculate_verdict(self, analysis: BandSteeringAnalysis) -> None:
+        """Sets the final verdict from the compliance checks and transitions."""
+        analysis.verdict = self.btm_analyzer._determine_verdict(
+            checks=analysis.compliance_checks,
+            transitions=analysis.transitions,
+            btm_rate=analysis.btm_success_rate,
+            success_count=analysis.successful_transitions,
+        )
+
     @staticmethod
     def _attach_user_metadata(
         raw_data: Dict[str, Any],
@@ -425,236 +987,6 @@ class BandSteeringService:
             user_meta["client_mac"] = client_mac
 
 
-    def _synchronize_steering_metrics(
-        self, 
-        analysis: BandSteeringAnalysis, 
-        steering_events: List[Dict[str, Any]],
-        primary_client_mac: str
-    ) -> Dict[str, Any]:
-        """
-        Synchronizes steering_analysis metrics with values calculated in BTMAnalyzer.
-        This ensures that all panels (metrics, compliance checks, chart) show the same values.
-        
-        Uses the SAME logic as compliance checks to ensure consistency.
-        """
-        # USE EXACTLY THE SAME LOGIC as compliance checks to ensure consistency
-        
-        # Count successful band change transitions
-        band_change_transitions = sum(1 for t in analysis.transitions if t.is_successful and t.is_band_change)
-        
-        # Count successful transitions between different BSSIDs (roaming within the same band)
-        # SAME CRITERIA as compliance checks: only BSSID changes, not all transitions without band change
-        bssid_change_transitions = sum(
-            1
-            for t in analysis.transitions
-            if t.is_successful
-            and t.from_bssid
-            and t.to_bssid
-            and t.from_bssid != t.to_bssid
-        )
-        
-        # Count successful BTM responses (client cooperation with steering)
-        btm_successful_responses = sum(
-            1 for e in steering_events 
-            if e.get("type") == "btm" 
-            and e.get("event_type") == "response"
-            and (e.get("status_code") == 0 or str(e.get("status_code")) == "0")
-            and (not primary_client_mac or e.get("client_mac") == primary_client_mac)
-        )
-        
-        # SAME CRITERIA as compliance checks: Effective steering ONLY if there is:
-        # 1. At least 1 successful band change, OR
-        # 2. At least 1 successful transition between different BSSIDs
-        # NOTE: BTM Accept only counts if there is also band or BSSID change
-        # (a BTM Accept without physical change is not effective steering)
-        # CORRECTION: Count ALL successful transitions (not just the max)
-        # A transition can have band change AND BSSID change, but only counts once
-        total_successful_transitions = sum(1 for t in analysis.transitions if t.is_successful)
-        steering_effective_count = max(band_change_transitions, bssid_change_transitions)
-        
-        # If there is BTM Accept BUT there is also band/BSSID change, it is effective steering
-        # If there is only BTM Accept without physical changes, it is NOT effective steering
-        if btm_successful_responses > 0 and steering_effective_count == 0:
-            # BTM Accept without physical change: not effective steering
-            total_successful = 0
-        else:
-            # Use total successful transitions (not just the max between types)
-            # This ensures all are counted: band changes + association transitions
-            total_successful = total_successful_transitions
-        
-        # Count BTM requests for the primary client
-        btm_requests_count = sum(
-            1 for e in steering_events 
-            if e.get("type") == "btm" 
-            and e.get("event_type") == "request"
-            and (not primary_client_mac or e.get("client_mac") == primary_client_mac)
-        )
-        
-        # Total attempts is the max between BTM requests and number of transitions
-        # This ensures that if there are more transitions than requests, all are counted
-        total_attempts = max(btm_requests_count, len(analysis.transitions))
-        
-        # Calculate average time of successful transitions
-        successful_transition_times = [
-            t.duration for t in analysis.transitions 
-            if t.is_successful and t.duration and t.duration > 0
-        ]
-        avg_time = sum(successful_transition_times) / len(successful_transition_times) if successful_transition_times else 0
-        
-        return {
-            "steering_attempts": total_attempts,
-            "successful_transitions": total_successful,
-            "failed_transitions": max(0, total_attempts - total_successful),
-            "avg_transition_time": round(avg_time, 3),
-            "max_transition_time": round(max(successful_transition_times) if successful_transition_times else 0, 3),
-            "verdict": analysis.verdict
-        }
-    
-    def _compare_wireshark_raw_vs_processed(
-        self,
-        wireshark_raw: Optional[Dict[str, Any]],
-        steering_analysis: Dict[str, Any],
-        analysis: BandSteeringAnalysis
-    ) -> Dict[str, Any]:
-        """
-        Compares Wireshark raw data with processed data to detect inconsistencies.
-        Returns a dictionary with found mismatches.
-        """
-        if not wireshark_raw:
-            return {
-                "enabled": False,
-                "reason": "wireshark_raw not available",
-                "mismatches": []
-            }
-        
-        mismatches = []
-        raw_summary = wireshark_raw.get("summary", {})
-        raw_btm = raw_summary.get("btm", {})
-        raw_assoc = raw_summary.get("assoc", {})
-        raw_reassoc = raw_summary.get("reassoc", {})
-        
-        # Comparison 1: BTM Requests
-        raw_btm_requests = raw_btm.get("requests", 0)
-        processed_steering_attempts = steering_analysis.get("steering_attempts", 0)
-        if raw_btm_requests > 0 and processed_steering_attempts != raw_btm_requests:
-            mismatches.append({
-                "field": "btm_requests_vs_steering_attempts",
-                "raw_value": raw_btm_requests,
-                "processed_value": processed_steering_attempts,
-                "delta": processed_steering_attempts - raw_btm_requests,
-                "severity": "warning",
-                "explanation": f"Steering attempts ({processed_steering_attempts}) may include Deauth/Disassoc in addition to BTM Requests ({raw_btm_requests})"
-            })
-        
-        # Comparison 2: BTM Responses Accept vs Successful Transitions
-        raw_btm_accept = raw_btm.get("responses_accept", 0)
-        processed_successful = steering_analysis.get("successful_transitions", 0)
-        # Use the max between successful transitions and BTM accepts (as in compliance checks)
-        analysis_successful = max(
-            sum(1 for t in analysis.transitions if t.is_successful),
-            raw_btm_accept
-        )
-        if raw_btm_accept > 0 and processed_successful != analysis_successful:
-            mismatches.append({
-                "field": "btm_accept_vs_successful_transitions",
-                "raw_value": raw_btm_accept,
-                "processed_value": processed_successful,
-                "expected_value": analysis_successful,
-                "delta": processed_successful - analysis_successful,
-                "severity": "error" if abs(processed_successful - analysis_successful) > 1 else "warning",
-                "explanation": f"BTM Accept raw: {raw_btm_accept}, Successful transitions: {sum(1 for t in analysis.transitions if t.is_successful)}, Expected: {analysis_successful}, Processed: {processed_successful}"
-            })
-        
-        # Comparison 3: Association/Reassociation counts (basic coherence)
-        raw_assoc_req = raw_assoc.get("requests", 0)
-        raw_assoc_resp = raw_assoc.get("responses", 0)
-        raw_reassoc_req = raw_reassoc.get("requests", 0)
-        raw_reassoc_resp = raw_reassoc.get("responses", 0)
-        
-        # Comparison 4: Total Deauth / Disassoc
-        raw_deauth = raw_summary.get("deauth", {})
-        raw_disassoc = raw_summary.get("disassoc", {})
-        raw_deauth_count = raw_deauth.get("count", 0)
-        raw_disassoc_count = raw_disassoc.get("count", 0)
-
-        # Count steering events that are Deauth/Disassoc directed to the client
-        processed_deauth = 0
-        processed_disassoc = 0
-        if analysis.transitions:
-            for t in analysis.transitions:
-                # Transitions do not contain all events 1:1, so here 
-                # we only check if there is a gross deviation (e.g. 0 vs many).
-                # Fine counting is done in compliance checks.
-                pass
-        # If Wireshark detects disconnections but the analysis doesn't see any
-        if (raw_deauth_count + raw_disassoc_count) > 0 and analysis.loops_detected is False:
-            mismatches.append({
-                "field": "forced_disconnect_visibility",
-                "raw_value": {
-                    "deauth": raw_deauth_count,
-                    "disassoc": raw_disassoc_count,
-                },
-                "processed_value": "no_loops_detected",
-                "severity": "warning",
-                "explanation": "Wireshark detects disconnections (Deauth/Disassoc) but the analysis does not mark loops; check stability in narrative report."
-            })
-
-        # Check inconsistencies in freq_band_map
-        freq_band_inconsistencies = []
-        freq_band_map = raw_summary.get("freq_band_map", {})
-        for freq_str, band in freq_band_map.items():
-            try:
-                freq_val = int(freq_str)
-                expected_band = "2.4GHz" if 2400 <= freq_val <= 2500 else ("5GHz" if 5000 <= freq_val <= 6000 else None)
-                if expected_band and band != expected_band:
-                    freq_band_inconsistencies.append({
-                        "frequency": freq_val,
-                        "raw_band": band,
-                        "expected_band": expected_band
-                    })
-            except (ValueError, TypeError):
-                pass
-        
-        if freq_band_inconsistencies:
-            mismatches.append({
-                "field": "freq_band_inconsistencies",
-                "raw_value": freq_band_inconsistencies,
-                "processed_value": None,
-                "severity": "error",
-                "explanation": f"{len(freq_band_inconsistencies)} inconsistencies detected between frequency and assigned band"
-            })
-        
-        # Comparison 4: BTM Status Codes
-        raw_status_codes = raw_btm.get("status_codes", [])
-        processed_status_codes = []
-        for event in analysis.btm_events:
-            if event.status_code is not None and str(event.status_code) not in processed_status_codes:
-                processed_status_codes.append(str(event.status_code))
-        
-        if set(raw_status_codes) != set(processed_status_codes):
-            mismatches.append({
-                "field": "btm_status_codes",
-                "raw_value": raw_status_codes,
-                "processed_value": processed_status_codes,
-                "severity": "warning",
-                "explanation": "Status codes may differ if events were filtered for the primary client"
-            })
-        
-        return {
-            "enabled": True,
-            "total_mismatches": len(mismatches),
-            "mismatches": mismatches,
-            "summary": {
-                "raw_btm_requests": raw_btm_requests,
-                "raw_btm_responses": raw_btm.get("responses", 0),
-                "raw_btm_accept": raw_btm_accept,
-                "processed_steering_attempts": processed_steering_attempts,
-                "processed_successful_transitions": processed_successful,
-                "raw_assoc": f"{raw_assoc_req}/{raw_assoc_resp}",
-                "raw_reassoc": f"{raw_reassoc_req}/{raw_reassoc_resp}"
-            }
-        }
-    
     def _index_analysis_for_rag(self, analysis: BandSteeringAnalysis):
         """
         Converts the analysis result to text and indexes it in Qdrant.
@@ -700,11 +1032,64 @@ class BandSteeringService:
         except Exception as e:
             pass
 
-    def _save_analysis_result(self, analysis: BandSteeringAnalysis, device: DeviceInfo, original_file_path: Optional[str] = None) -> str:
+    @staticmethod
+    def _store_original_capture(original_file_path: Optional[str], target_dir: Path, prefix: str) -> Optional[str]:
+        """
+        Copies the original pcap file to `target_dir` as `{prefix}_{name}` for
+        later download. Returns the stored path, or None if it could not be copied.
+        """
+        if not original_file_path:
+            return None
+        # Ensure path is absolute
+        original_path = Path(original_file_path)
+        if not original_path.is_absolute():
+            original_path = original_path.resolve()
+        if not original_path.exists():
+            return None
+        try:
+            pcap_filename = original_path.name
+            # Clean UUID from name if it exists (format UUID_Name.pcap)
+            if "_" in pcap_filename and len(pcap_filename.split("_")[0]) == 36:
+                pcap_filename = "_".join(pcap_filename.split("_")[1:])
+
+            saved_pcap_path = target_dir / f"{prefix}_{pcap_filename}"
+            shutil.copy2(original_path, saved_pcap_path)
+        except Exception:
+            return None
+        BandSteeringService._store_capture_index(original_path, saved_pcap_path)
+        return str(saved_pcap_path)
+
+    @staticmethod
+    def _store_capture_index(original_path: Path, saved_pcap_path: Path) -> None:
+        """
+        Stores the sidecar packet index next to the saved capture, reusing the
+        one built for the upload (copy2 keeps the mtime it is keyed on) or
+        building it. Captures the native reader cannot walk get no index.
+        """
+        if not settings.capture_index_enabled:
+            return
+        try:
+            source_index = index_path_for(original_path)
+            if source_index.exists():
+                shutil.copy2(source_index, index_path_for(saved_pcap_path))
+            CaptureIndex.load_or_build(saved_pcap_path)
+        except OSError:
+            pass
+
+    def _save_analysis_result(
+        self,
+        analysis: BandSteeringAnalysis,
+        device: DeviceInfo,
+        original_file_path: Optional[str] = None,
+        stored_capture_path: Optional[str] = None,
+    ) -> str:
         """
         Organizes files into folders by Brand/Model.
         Structure: data/analyses/{Vendor}/{Model_or_MAC}/{analysis_id}.json
-        Also saves the original pcap file for later download.
+        (summary) and {analysis_id}.raw.jsonl.gz (raw stats).
+        Also saves the original pcap file for later download, unless
+        `stored_capture_path` points to a copy already stored (multi-client
+        analyses share one copy of the capture).
 
         Persistence logic is kept here so as not to overload
         domain components (analysis, classification, etc.).
@@ -719,51 +1104,53 @@ class BandSteeringService:
         json_path = target_dir / f"{analysis.analysis_id}.json"
         
         # Save the original pcap file if it exists
-        saved_pcap_path = None
-        if original_file_path:
-            # Ensure path is absolute
-            original_path = Path(original_file_path)
-            if not original_path.is_absolute():
-                original_path = original_path.resolve()
-            if original_path.exists():
-                try:
-                    # Copy the pcap file to the analysis folder
-                    pcap_filename = original_path.name
-                    # Clean UUID from name if it exists (format UUID_Name.pcap)
-                    if "_" in pcap_filename and len(pcap_filename.split("_")[0]) == 36:
-                        pcap_filename = "_".join(pcap_filename.split("_")[1:])
-                    
-                    saved_pcap_path = target_dir / f"{analysis.analysis_id}_{pcap_filename}"
-                    shutil.copy2(original_path, saved_pcap_path)
-                    saved_pcap_path = str(saved_pcap_path)
-                except Exception:
-                    saved_pcap_path = None
+        saved_pcap_path = stored_capture_path or self._store_original_capture(
+            original_file_path, target_dir, analysis.analysis_id
+        )
         
         # Save file path in analysis
         # NOTE: Do not assign directly to Pydantic object (it's not a model field)
         # It will be saved in the dict when serializing for JSON persistence
         
-        with open(json_path, "w", encoding="utf-8") as f:
-            # Convert to dict to add additional fields
-            # Use model_dump with mode='json' to serialize datetime correctly
-            analysis_dict = analysis.model_dump(mode='json', exclude_none=False)
-            
-            # Ensure raw_stats (which contains user_metadata) is ALWAYS saved
-            # Although raw_stats is a model field, we force it explicitly
-            # because model_dump may not include it if it's None or if there are serialization issues
-            if hasattr(analysis, 'raw_stats'):
-                analysis_dict["raw_stats"] = analysis.raw_stats
-            # If attribute doesn't exist, simply don't include in JSON
-            
-            if saved_pcap_path:
-                analysis_dict["original_file_path"] = saved_pcap_path
-            
-            # Ensure verdict is present in final dict
-            if not analysis_dict.get("verdict") and getattr(analysis, "verdict", None):
-                analysis_dict["verdict"] = analysis.verdict
-            
-            json.dump(analysis_dict, f, indent=4, ensure_ascii=False)
-            
+        # Convert to dict to add additional fields
+        # Use model_dump with mode='json' to serialize datetime correctly
+        analysis_dict = analysis.model_dump(mode='json', exclude_none=False)
+
+        # Ensure raw_stats (which contains user_metadata) is ALWAYS saved
+        # Although raw_stats is a model field, we force it explicitly
+        # because model_dump may not include it if it's None or if there are serialization issues
+        if hasattr(analysis, 'raw_stats'):
+            analysis_dict["raw_stats"] = analysis.raw_stats
+        # If attribute doesn't exist, simply don't include in JSON
+
+        if saved_pcap_path:
+            analysis_dict["original_file_path"] = saved_pcap_path
+
+        # Ensure verdict is present in final dict
+        if not analysis_dict.get("verdict") and getattr(analysis, "verdict", None):
+            analysis_dict["verdict"] = analysis.verdict
+
+        # Summary document and raw stats blob (see analysis_storage). Both are
+        # moved into place inside the catalog transaction, so the catalog never
+        # lists an analysis whose files were not written (or vice versa)
+        summary, raw_stats = analysis_storage.split_analysis(analysis_dict, json_path)
+        raw_path = analysis_storage.raw_path_for(json_path)
+        tmp_paths = [analysis_storage.write_summary(json_path, summary)]
+        if raw_stats is not None:
+            tmp_paths.append(analysis_storage.write_raw_stats(raw_path, raw_stats))
+
+        def publish() -> None:
+            if raw_stats is not None:
+                os.replace(tmp_paths[1], raw_path)
+            os.replace(tmp_paths[0], json_path)
+
+        try:
+            self.catalog.upsert(catalog_record(summary, json_path), publish=publish)
+        finally:
+            for tmp_path in tmp_paths:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
         return str(json_path)
 
     def _persist_analysis(
@@ -785,12 +1172,30 @@ class BandSteeringService:
 
     def get_brand_statistics(self, brand: str) -> Dict[str, Any]:
         """
-        Returns aggregated statistics for a specific brand.
+        Returns aggregated statistics for a specific brand, from the
+        statistics materialized in the analysis catalog. The brand may also
+        be given in its folder form (spaces as underscores).
         """
-        brand_dir = self.base_dir / brand.replace(" ", "_")
-        if not brand_dir.exists():
-            return {"error": "Brand not found"}
-            
-        # Logic to loop through files and average compliance scores, etc.
-        # (Future implementation as needed)
-        return {"brand": brand, "status": "active"}
+        for vendor in dict.fromkeys((brand, brand.replace("_", " "))):
+            stats = self.catalog.statistics(vendor=vendor)
+            if stats["total_reports"]:
+                return {"brand": vendor, **stats}
+        return {"error": "Brand not found"}
+
+
+# Service of each multi-client worker process, per analyses directory
+_station_services: Dict[str, BandSteeringService] = {}
+
+
+def _analyze_station(
+    base_dir: str,
+    client_raw: Dict[str, Any],
+    file_name: str,
+    capture_id: str,
+    user_metadata: Optional[Dict[str, str]],
+) -> Any:
+    """Entry point of one station analysis inside a multi-client worker process."""
+    service = _station_services.get(base_dir)
+    if service is None:
+        service = _station_services[base_dir] = BandSteeringService(base_data_dir=base_dir)
+    return service._analyze_client_safely(client_raw, file_name, capture_id, user_metadata)
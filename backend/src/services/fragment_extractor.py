@@ -1,122 +1,150 @@
 """
 Specialized service for extracting relevant fragments from PCAP files.
-Its sole responsibility is to isolate time ranges using tshark so other
-components can consume them.
+Its sole responsibility is to describe the time ranges of an analysis and
+write them on demand (natively from the capture, or with tshark); the
+written files are owned by `FragmentCache`.
 """
 import os
 import subprocess
 import shutil
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from ..models.btm_schemas import CaptureFragment
+from ..settings import settings
+from ..tools.capture_index import CaptureIndex
+from ..tools.pcap_reader import PcapReader, UnsupportedCaptureError
 
 class FragmentExtractor:
     """
-    Extracts network capture fragments using tshark.
+    Extracts network capture fragments.
     Allows visualizing specific events without having to open 100MB+ captures.
     """
 
-    def __init__(self, output_base_dir: str = "data/fragments"):
-        # Ensure the base directory is absolute
-        base_path = Path(output_base_dir)
-        if not base_path.is_absolute():
-            # If relative, resolve it from the current working directory
-            base_path = Path(output_base_dir).resolve()
-        self.output_base_dir = base_path
+    def __init__(self):
         self.tshark_path = shutil.which("tshark")
-        
-        # Ensure the output directory exists
-        self.output_base_dir.mkdir(parents=True, exist_ok=True)
-        
-        if not self.tshark_path:
-            pass
 
-    def extract_time_range(
-        self, 
-        input_file: str, 
-        start_time: float, 
-        end_time: float, 
-        output_name: str,
-        description: str,
-        padding_seconds: float = 1.0
-    ) -> Optional[CaptureFragment]:
+    @staticmethod
+    def fragment_id(window: Dict[str, Any]) -> str:
+        return f"{window['output_name']}_{int(window['start_time'])}"
+
+    def describe_time_ranges(self, windows: List[Dict[str, Any]], analysis_id: str) -> List[CaptureFragment]:
         """
-        Extracts a specific time range from a capture.
-        Adds a margin (padding) before and after for context.
+        Describes the fragments of an analysis (window, client, download URL)
+        without writing anything. They are materialized on download with
+        `write_fragment`. Windows producing the same fragment are listed once.
         """
-        if not self.tshark_path:
-            return None
+        fragments: Dict[str, CaptureFragment] = {}
+        for window in windows:
+            fragment_id = self.fragment_id(window)
+            if fragment_id in fragments:
+                continue
+            padding = window.get("padding_seconds", 1.0)
+            fragments[fragment_id] = CaptureFragment(
+                fragment_id=fragment_id,
+                fragment_type="time_range",
+                description=window["description"],
+                start_time=window["start_time"] - padding,
+                end_time=window["end_time"] + padding,
+                packet_count=None,
+                client_mac=window.get("client_mac"),
+                download_url=f"/files/fragments/{analysis_id}/{fragment_id}.pcap",
+            )
+        return list(fragments.values())
 
-        # Configure paths
+    def write_fragment(self, input_file: str, start_time: float, end_time: float, output_path: Path) -> Optional[int]:
+        """
+        Writes the packets of [start_time, end_time] (padding already applied)
+        to `output_path`. Returns the packet count, None if extraction failed.
+        """
         input_path = Path(input_file)
         if not input_path.exists():
             return None
+        targets = [{"path": Path(output_path), "t_start": start_time, "t_end": end_time}]
+        counts = self._split_indexed(input_path, targets)
+        if counts is None:
+            counts = self._split_native(input_path, targets)
+        if counts is None:
+            counts = self._split_tshark(input_path, targets)
+        return counts[0]
+
+    @staticmethod
+    def _split_indexed(input_path: Path, targets: List[Dict[str, Any]]) -> Optional[List[int]]:
+        """
+        Copies each window's records straight out of the capture using its
+        sidecar index (built now if missing); None if it cannot be indexed.
+        """
+        if not settings.capture_index_enabled or settings.capture_reader == "tshark":
+            return None
+        index = CaptureIndex.load_or_build(input_path)
+        if index is None:
+            return None
+        try:
+            return [
+                index.write_time_range(target["t_start"], target["t_end"], target["path"])
+                for target in targets
+            ]
+        except OSError:
+            return None
 
-        output_filename = f"{output_name}_{int(start_time)}.pcap"
-        output_path = self.output_base_dir / output_filename
+    @staticmethod
+    def _split_native(input_path: Path, targets: List[Dict[str, Any]]) -> Optional[List[int]]:
+        """Single-pass split with the native reader; None if it cannot read the capture."""
+        if settings.capture_reader == "tshark":
+            return None
+        try:
+            return PcapReader(str(input_path)).split_time_ranges(
+                [(target["t_start"], target["t_end"]) for target in targets],
+                [str(target["path"]) for target in targets],
+            )
+        except (UnsupportedCaptureError, OSError):
+            return None
 
-        # Adjust times with padding
-        t_start = start_time - padding_seconds
-        t_end = end_time + padding_seconds
+    def _split_tshark(self, input_path: Path, targets: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """One tshark pass per window, run concurrently; None for windows that failed."""
+        if not self.tshark_path:
+            return [None] * len(targets)
+        workers = max(1, min(len(targets), settings.fragment_workers or os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fragment_tshark") as pool:
+            return list(pool.map(lambda target: self._tshark_extract(input_path, target), targets))
 
-        # tshark command to filter by time
+    def _tshark_extract(self, input_path: Path, target: Dict[str, Any]) -> Optional[int]:
         # -Y (display filter) usando frame.time_epoch
-        filter_str = f"frame.time_epoch >= {t_start} && frame.time_epoch <= {t_end}"
-        
+        filter_str = f"frame.time_epoch >= {target['t_start']} && frame.time_epoch <= {target['t_end']}"
         cmd = [
             self.tshark_path,
             "-r", str(input_path),
             "-Y", filter_str,
-            "-w", str(output_path)
+            "-w", str(target["path"])
         ]
-
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Get packet count from the fragment
-            count_cmd = [self.tshark_path, "-r", str(output_path), "-T", "fields", "-e", "frame.number"]
-            count_result = subprocess.run(count_cmd, capture_output=True, text=True)
-            packet_count = len(count_result.stdout.splitlines())
-
-            return CaptureFragment(
-                fragment_id=f"frag_{int(start_time)}",
-                fragment_type="time_range",
-                description=description,
-                start_time=t_start,
-                end_time=t_end,
-                packet_count=packet_count,
-                file_path=str(output_path.absolute()),
-                download_url=f"/api/files/fragments/{output_filename}"
-            )
-
-        except subprocess.CalledProcessError as e:
-            return None
-        except Exception as e:
+            subprocess.run(cmd, capture_output=True, text=True, check=True)
+            # Count the packets of the (small) fragment from its record headers
+            return PcapReader(str(target["path"])).count_packets()
+        except (subprocess.CalledProcessError, UnsupportedCaptureError, OSError):
             return None
 
-    def extract_btm_sequence(self, input_file: str, client_mac: str, request_time: float) -> Optional[CaptureFragment]:
-        """
-        Extracts specifically a BTM sequence (Request -> Response -> Association).
-        """
-        return self.extract_time_range(
-            input_file=input_file,
-            start_time=request_time,
-            end_time=request_time + 3.0, # We assume 3 seconds for the complete sequence
-            output_name=f"btm_{client_mac.replace(':', '')}",
-            description=f"BTM sequence for client {client_mac}",
-            padding_seconds=0.5
-        )
+    @staticmethod
+    def btm_sequence_window(client_mac: str, request_time: float) -> Dict[str, Any]:
+        """Window of a BTM sequence (Request -> Response -> Association)."""
+        return {
+            "start_time": request_time,
+            "end_time": request_time + 3.0, # We assume 3 seconds for the complete sequence
+            "output_name": f"btm_{client_mac.replace(':', '')}",
+            "description": f"BTM sequence for client {client_mac}",
+            "client_mac": client_mac,
+            "padding_seconds": 0.5,
+        }
 
-    def extract_channel_transition(self, input_file: str, client_mac: str, transition_time: float) -> Optional[CaptureFragment]:
-        """
-        Extracts the fragment where the channel/band change is seen.
-        """
-        return self.extract_time_range(
-            input_file=input_file,
-            start_time=transition_time,
-            end_time=transition_time + 1.0,
-            output_name=f"steer_{client_mac.replace(':', '')}",
-            description=f"Channel/band change for client {client_mac}",
-            padding_seconds=1.5 # More margin to see traffic before and after
-        )
+    @staticmethod
+    def channel_transition_window(client_mac: str, transition_time: float) -> Dict[str, Any]:
+        """Window where the channel/band change is seen."""
+        return {
+            "start_time": transition_time,
+            "end_time": transition_time + 1.0,
+            "output_name": f"steer_{client_mac.replace(':', '')}",
+            "description": f"Channel/band change for client {client_mac}",
+            "client_mac": client_mac,
+            "padding_seconds": 1.5, # More margin to see traffic before and after
+        }
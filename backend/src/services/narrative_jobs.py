@@ -0,0 +1,130 @@
+"""
+Deferred generation of LLM analysis narratives.
+Analyses are persisted and returned with the narrative marked pending; the
+LLM call runs here afterwards, off the analysis workers, and its text is
+written back to the stored analysis JSON. Queued requests are spooled to disk
+until their narrative is stored, so a restart does not leave them pending.
+"""
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from ..core import analysis_storage
+from ..settings import settings
+from ..tools.narrative_template import NARRATIVE_PENDING
+
+
+class NarrativeWorker:
+    """
+    Small thread pool that completes pending narratives. The LLM call is
+    I/O bound, so threads in the API process are enough and the process pool
+    stays free for parsing.
+
+    Each request is written to `spool_dir` when queued and removed once its
+    narrative is stored; `recover` queues again whatever a previous run left.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, spool_dir: Optional[str] = None):
+        self.max_workers = max(1, max_workers or settings.narrative_workers)
+        spool_path = Path(spool_dir or settings.narrative_spool_dir)
+        if not spool_path.is_absolute():
+            spool_path = spool_path.resolve()
+        self.spool_dir = spool_path
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._service = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        """Creates the pool and the service on first use."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            # Imported lazily: the service module is heavy to load
+            from .band_steering_service import BandSteeringService
+            self._service = BandSteeringService()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="analysis_narrative",
+            )
+
+    def submit(self, request: Dict[str, Any]) -> Future:
+        """
+        Queues the narrative of a persisted analysis (see
+        `BandSteeringService._narrative_request`). The future resolves to the
+        fields written to the stored analysis.
+        """
+        self._ensure_started()
+        self._spool(request)
+        return self._executor.submit(self._complete, request)
+
+    def _spool_path(self, analysis_id: str) -> Path:
+        return self.spool_dir / f"{analysis_id}.json"
+
+    def _spool(self, request: Dict[str, Any]) -> None:
+        """Writes a queued request to the spool (atomically)."""
+        path = self._spool_path(request["analysis_id"])
+        tmp_path = path.with_suffix(".json.tmp")
+        try:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(request, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The narrative is still generated; it just cannot be recovered
+            tmp_path.unlink(missing_ok=True)
+
+    def _complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        fields = self._service.complete_narrative(request)
+        self._spool_path(request["analysis_id"]).unlink(missing_ok=True)
+        return fields
+
+    def recover(self) -> int:
+        """
+        Queues again the spooled narratives of a previous run (the process
+        stopped while they were queued or being generated). Requests whose
+        analysis was deleted or is no longer pending are discarded.
+        Returns the number of narratives queued.
+        """
+        if not self.spool_dir.exists():
+            return 0
+        queued = 0
+        for path in sorted(self.spool_dir.glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    request = json.load(f)
+                data = analysis_storage.load_analysis(Path(request["save_path"]), include_raw=False)
+            except (OSError, ValueError, KeyError, TypeError):
+                path.unlink(missing_ok=True)
+                continue
+            if data.get("narrative_status") != NARRATIVE_PENDING:
+                path.unlink(missing_ok=True)
+                continue
+            self.submit(request)
+            queued += 1
+        return queued
+
+    def shutdown(self) -> None:
+        """
+        Stops the pool. Narratives being generated are finished; queued ones
+        are dropped but stay spooled, so `recover` queues them on next start.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Process-wide narrative worker (created lazily)
+_narrative_worker: Optional[NarrativeWorker] = None
+_narrative_worker_lock = threading.Lock()
+
+
+def get_narrative_worker() -> NarrativeWorker:
+    """Gets or creates the process-wide narrative worker."""
+    global _narrative_worker
+    if _narrative_worker is None:
+        with _narrative_worker_lock:
+            if _narrative_worker is None:
+                _narrative_worker = NarrativeWorker()
+    return _narrative_worker
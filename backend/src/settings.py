@@ -77,6 +77,62 @@ class Settings(BaseSettings):
     redis_password: Optional[str] = None  # Redis password (optional)
     cache_enabled: bool = True
 
+    # Capture parse cache (content-addressed, on local disk)
+    capture_cache_enabled: bool = True
+    capture_cache_dir: str = "data/cache/captures"
+    capture_cache_max_bytes: int = 1024 * 1024 * 1024  # 1 GB, LRU eviction above this
+
+    # Capture reader: "auto" (native pcap/pcapng reader, tshark fallback) | "tshark"
+    capture_reader: str = "auto"
+
+    # Parallel parsing of large captures (split with editcap, slices parsed in worker processes)
+    parallel_parse_enabled: bool = True
+    parallel_parse_workers: int = 0  # 0 = one worker per CPU core
+    parallel_parse_min_bytes: int = 256 * 1024 * 1024  # Captures smaller than this are parsed serially
+    parallel_parse_slice_packets: int = 250000
+
+    # Sidecar packet index (<capture>.idx, timestamp/MAC -> record offsets) built for
+    # stored captures; fragments are cut from it without dissecting the capture
+    capture_index_enabled: bool = True
+
+    # Fragment pcaps are cut on first download and kept in an LRU disk cache
+    fragment_cache_dir: str = "data/fragments"
+    fragment_cache_max_bytes: int = 512 * 1024 * 1024  # 512 MB
+
+    # Catalog of stored analyses (SQLite: id -> JSON path, listing fields, artifacts)
+    analysis_catalog_path: Optional[str] = None  # None = catalog.sqlite3 in the analyses directory
+
+    # Fragment extraction: concurrent tshark passes when the native reader cannot split the capture
+    fragment_workers: int = 0  # 0 = one per CPU core
+
+    # Signal chart: RSSI points kept per capture (LTTB downsampling)
+    signal_sample_points: int = 500
+
+    # Analysis narrative: "template" (deterministic, no network call) | "llm" |
+    # "template_first" (template returned at once, replaced by the LLM narrative)
+    analysis_narrative_mode: str = "template_first"
+    analysis_narrative_deferred: bool = True  # LLM narrative generated in the background, after the analysis is returned
+    narrative_workers: int = 2  # Threads generating deferred narratives
+    narrative_spool_dir: str = "data/narratives"  # Queued narratives, re-queued after a restart
+
+    # OUI vendor registry: IEEE CSV exports (None = bundled src/data/oui), else Wireshark's manuf file
+    oui_registry_dir: Optional[str] = None
+    oui_manuf_path: str = "/usr/share/wireshark/manuf"
+
+    # Multi-client mode: one analysis per station of a single parse
+    multi_client_max_stations: int = 64  # Stations with the most steering events are kept
+    multi_client_workers: int = 4  # Processes analyzing stations in parallel (0 = one per CPU core)
+
+    # Capture analysis jobs (process pool shared by /analyze and /jobs)
+    analysis_workers: int = 2
+    analysis_queue_size: int = 8  # Jobs waiting for a worker; more are rejected with 429
+    analysis_job_ttl_seconds: int = 3600  # Finished jobs are forgotten after this
+    analysis_snapshot_interval_seconds: float = 1.0  # Partial results cadence while parsing (0 = off)
+    analysis_snapshot_signal_points: int = 100  # Max new signal points per snapshot
+    batch_concurrency: int = 0  # Captures of one batch in flight at once (0 = analysis_workers)
+    batch_max_files: int = 500  # Captures accepted per batch (files plus archive members)
+    batch_max_extracted_mb: int = 4096  # Total size of the captures extracted from a batch's archives
+
     # Ragas Evaluation
     ragas_enabled: bool = False  # Disable Ragas callbacks by default to avoid rate limits
     
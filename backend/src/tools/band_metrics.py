@@ -0,0 +1,315 @@
+"""
+Band dwell times and transition durations of an analysis.
+Computed once when the analysis is produced and stored as the compact
+`band_metrics` summary, so report listings and exports never walk
+transitions or signal samples. Older analyses get it computed when they are
+cataloged (and persisted by the backfill script).
+"""
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Bump when the computation changes so the backfill script recomputes
+# metrics stored by earlier versions.
+BAND_METRICS_VERSION = 1
+
+
+def calculate_band_times(transitions: List[Dict[str, Any]], signal_samples: List[Dict[str, Any]]) -> tuple:
+    """
+    Calculates the total accumulated time in each band and a list of individual transition times.
+    Extracts data directly from Wireshark, explicitly excluding transition periods.
+    
+    PHILOSOPHY:
+    - Time in band is calculated using Wireshark signal samples
+    - Transition periods (between start_time and end_time) are EXCLUDED from time in band
+    - Transition time is simply the duration of each transition (end_time - start_time)
+    
+    Args:
+        transitions: List of transitions with start_time, end_time, from_band, to_band, duration
+        signal_samples: List of signal samples with timestamp and band (Wireshark's source of truth)
+        
+    Returns:
+        Tuple (time_2_4ghz, time_5ghz, transition_times_list) where transition_times_list is a list of durations
+    """
+    time_2_4ghz = 0.0
+    time_5ghz = 0.0
+    transition_times = []  # List of individual times for each transition
+    
+    if not transitions and not signal_samples:
+        return (0.0, 0.0, [])
+    
+    # 1. Extract individual durations for each successful transition with band change
+    # We only care about transitions that actually involve a band change
+    valid_transitions = []
+    for trans in transitions:
+        if not trans.get("start_time") or not trans.get("is_successful"):
+            continue
+        
+        # Only count transitions with physical band change
+        if not trans.get("is_band_change"):
+            continue
+            
+        from_band = normalize_band_label(trans.get("from_band", ""))
+        to_band = normalize_band_label(trans.get("to_band", ""))
+        
+        # Verify that there's a real band change
+        if from_band and to_band and from_band != to_band:
+            valid_transitions.append(trans)
+            
+            # Calculate transition duration (time it takes to drop one band and pick up another)
+            start_time = float(trans.get("start_time", 0))
+            end_time = float(trans.get("end_time", start_time))
+            duration = end_time - start_time
+            
+            if duration > 0:
+                transition_times.append(duration)
+    
+    # Sort transitions by time
+    valid_transitions = sorted(valid_transitions, key=lambda x: float(x.get("start_time", 0)))
+    
+    # 2. Get all timestamps to calculate total time
+    all_timestamps = []
+    
+    # Add transition timestamps
+    for trans in valid_transitions:
+        start = trans.get("start_time")
+        end = trans.get("end_time")
+        if start:
+            try:
+                all_timestamps.append(float(start))
+            except (ValueError, TypeError):
+                pass
+        if end:
+            try:
+                all_timestamps.append(float(end))
+            except (ValueError, TypeError):
+                pass
+    
+    # Add signal sample timestamps (Wireshark's source of truth)
+    if signal_samples:
+        for sample in signal_samples:
+            ts = sample.get("timestamp")
+            if ts:
+                try:
+                    all_timestamps.append(float(ts))
+                except (ValueError, TypeError):
+                    pass
+    
+    if not all_timestamps:
+        return (0.0, 0.0, transition_times)
+    
+    min_time = min(all_timestamps)
+    max_time = max(all_timestamps)
+    total_time = max_time - min_time
+    
+    if total_time <= 0:
+        return (0.0, 0.0, transition_times)
+    
+    # 3. Build list of transition periods to exclude them
+    transition_periods = []
+    for trans in valid_transitions:
+        start_time = float(trans.get("start_time", 0))
+        end_time = float(trans.get("end_time", start_time))
+        if end_time > start_time:
+            transition_periods.append((start_time, end_time))
+    
+    # 4. Calculate time in each band using signal samples (Wireshark's source of truth)
+    # Filter and sort valid signal samples
+    valid_samples = []
+    for sample in (signal_samples or []):
+        band = sample.get("band", "")
+        timestamp = sample.get("timestamp")
+        if band and timestamp:
+            try:
+                ts = float(timestamp)
+                band_normalized = normalize_band_label(band)
+                if band_normalized in ["2.4 GHz", "5 GHz"]:
+                    valid_samples.append({
+                        "timestamp": ts,
+                        "band": band_normalized
+                    })
+            except (ValueError, TypeError):
+                pass
+    
+    if not valid_samples:
+        # If no signal samples, use transition-based method (less precise)
+        if valid_transitions:
+            current_band = None
+            last_time = min_time
+            
+            for trans in valid_transitions:
+                start_time = float(trans.get("start_time", 0))
+                from_band = normalize_band_label(trans.get("from_band", ""))
+                to_band = normalize_band_label(trans.get("to_band", ""))
+                
+                # Determine initial band if it's the first transition
+                if current_band is None:
+                    current_band = from_band if from_band else to_band
+                
+                # Time in current band until transition starts (EXCLUDING transition)
+                if current_band and start_time > last_time:
+                    period = start_time - last_time
+                    if current_band == "2.4 GHz":
+                        time_2_4ghz += period
+                    elif current_band == "5 GHz":
+                        time_5ghz += period
+                
+                # Update band and time (after transition)
+                current_band = to_band if to_band else from_band
+                last_time = float(trans.get("end_time", start_time))
+            
+            # Final time after last transition
+            if current_band and last_time < max_time:
+                period = max_time - last_time
+                if current_band == "2.4 GHz":
+                    time_2_4ghz += period
+                elif current_band == "5 GHz":
+                    time_5ghz += period
+    else:
+        # Precise method: use signal samples and exclude transition periods
+        valid_samples = sorted(valid_samples, key=lambda x: x["timestamp"])
+        
+        # Group consecutive samples of the same band
+        i = 0
+        while i < len(valid_samples):
+            current_band = valid_samples[i]["band"]
+            period_start = valid_samples[i]["timestamp"]
+            period_end = period_start
+            
+            # Find the end of the continuous period in the same band
+            j = i + 1
+            while j < len(valid_samples):
+                next_sample = valid_samples[j]
+                next_ts = next_sample["timestamp"]
+                next_band = next_sample["band"]
+                
+                # Check if we are in a transition period
+                in_transition = False
+                for trans_start, trans_end in transition_periods:
+                    if trans_start <= next_ts <= trans_end:
+                        in_transition = True
+                        break
+                
+                # If band changed or we are in transition, end period
+                if next_band != current_band or in_transition:
+                    break
+                
+                # If interval is reasonable (max 5 seconds), continue period
+                if next_ts - period_end <= 5.0:
+                    period_end = next_ts
+                    j += 1
+                else:
+                    # Interval too large, end period
+                    break
+            
+            # Calculate period duration (excluding any part that is in transition)
+            period_duration = period_end - period_start
+            
+            # Check if period overlaps with any transition
+            for trans_start, trans_end in transition_periods:
+                # If overlap, reduce duration
+                if period_start < trans_end and period_end > trans_start:
+                    overlap_start = max(period_start, trans_start)
+                    overlap_end = min(period_end, trans_end)
+                    overlap_duration = overlap_end - overlap_start
+                    period_duration -= overlap_duration
+            
+            # Only add if duration is positive and not completely in transition
+            if period_duration > 0:
+                if current_band == "2.4 GHz":
+                    time_2_4ghz += period_duration
+                elif current_band == "5 GHz":
+                    time_5ghz += period_duration
+            
+            i = j
+    
+    # 5. Consistency check: time in bands + time in transitions should not exceed total time
+    total_transition_time = sum(transition_times)
+    total_band_time = time_2_4ghz + time_5ghz
+    expected_total = total_time - total_transition_time
+    
+    # If substantial discrepancy, adjust proportionally
+    if expected_total > 0 and total_band_time > expected_total * 1.1:
+        scale = expected_total / total_band_time
+        time_2_4ghz *= scale
+        time_5ghz *= scale
+    
+    return (round(time_2_4ghz, 2), round(time_5ghz, 2), transition_times)
+
+def normalize_band_label(band: str) -> str:
+    """Normalizes band name to the report format ("2.4 GHz" / "5 GHz")."""
+    if not band:
+        return ""
+    band_lower = band.lower()
+    if "2.4" in band_lower or "2400" in band_lower:
+        return "2.4 GHz"
+    elif "5" in band_lower and ("ghz" in band_lower or "5000" in band_lower):
+        return "5 GHz"
+    return band
+
+
+def compute_band_metrics(
+    transitions: Optional[List[Dict[str, Any]]],
+    signal_samples: Optional[List[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Compact summary stored with the analysis: time in each band, the
+    duration of every band-changing transition and its distribution
+    (count, mean, p50, p90, max, in seconds).
+    """
+    time_2_4ghz, time_5ghz, transition_times = calculate_band_times(
+        transitions or [], signal_samples or []
+    )
+    metrics: Dict[str, Any] = {
+        "version": BAND_METRICS_VERSION,
+        "time_2_4ghz": time_2_4ghz,
+        "time_5ghz": time_5ghz,
+        "transition_times": [round(t, 4) for t in transition_times],
+        "transition_count": len(transition_times),
+        "transition_time_mean": None,
+        "transition_time_p50": None,
+        "transition_time_p90": None,
+        "transition_time_max": None,
+    }
+    if transition_times:
+        durations = np.asarray(transition_times, dtype=np.float64)
+        p50, p90 = np.percentile(durations, [50, 90])
+        metrics.update({
+            "transition_time_mean": round(float(durations.mean()), 4),
+            "transition_time_p50": round(float(p50), 4),
+            "transition_time_p90": round(float(p90), 4),
+            "transition_time_max": round(float(durations.max()), 4),
+        })
+    return metrics
+
+
+def analysis_band_inputs(data: Dict[str, Any]) -> tuple:
+    """
+    (transitions, signal_samples) of a stored analysis JSON, taken from the
+    `band_steering` structure or, for older files, from the root level.
+    """
+    transitions = []
+    signal_samples = []
+
+    band_steering = data.get("band_steering", {})
+    if isinstance(band_steering, dict):
+        transitions = band_steering.get("transitions", [])
+        signal_samples = band_steering.get("signal_samples", [])
+
+    if not transitions:
+        transitions = data.get("transitions", [])
+    if not signal_samples:
+        signal_samples = data.get("signal_samples", [])
+    return transitions, signal_samples
+
+
+def stored_band_metrics(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `band_metrics` summary of a stored analysis JSON. Analyses saved before
+    the summary existed get it computed from their transitions and signal
+    samples (not written back; the backfill script persists it).
+    """
+    metrics = data.get("band_metrics")
+    if isinstance(metrics, dict):
+        return metrics
+    return compute_band_metrics(*analysis_band_inputs(data))
@@ -27,7 +27,9 @@ from ..models.btm_schemas import (
     CaptureFragment,
     SignalSample,
 )
-from ..utils.deauth_validator import DeauthValidator, REASSOC_TIMEOUT_SECONDS
+from ..utils.deauth_validator import DeauthValidator
+from ..utils.mac_registry import normalize_mac
+from .transition_engine import TransitionEngine
 
 
 class BTMAnalyzer:
@@ -46,24 +48,35 @@ class BTMAnalyzer:
         filename: str = "unknown.pcap",
         device_info: Optional[DeviceInfo] = None,
         signal_samples: List[Dict[str, Any]] = None,
-        wireshark_raw: Optional[Dict[str, Any]] = None
+        wireshark_raw: Optional[Dict[str, Any]] = None,
+        transitions: Optional[List[SteeringTransition]] = None,
     ) -> BandSteeringAnalysis:
         """
         Main entry point.
         Analyzes raw events and counters to generate a structured BTM report.
+
+        `transitions` are the association transitions `TransitionEngine`
+        produced alongside WiresharkTool's `steering_analysis` (whose counters
+        come in `band_counters`); when omitted, the engine runs here.
         """
         start_time = datetime.now()
         
         # 1. Extract and structure BTM events
         btm_events_list = self._extract_btm_schemas(steering_events)
         
-        # 2. Analyze steering transitions (Aggressive vs Assisted)
-        transitions = self._analyze_transitions(steering_events, btm_events_list)
+        # 2. Steering transitions (Aggressive vs Assisted), shared with WiresharkTool
+        if transitions is None:
+            engine_result = TransitionEngine().analyze(steering_events, band_counters=band_counters)
+            transitions = TransitionEngine.to_steering_transitions(engine_result["association_transitions"])
+            band_counters = {
+                **{key: engine_result[key] for key in ("steering_attempts", "successful_transitions", "loop_detected")},
+                **band_counters,
+            }
         
         # 3. Detect steering patterns
         steering_type = self._detect_steering_pattern(transitions, band_counters)
         
-        # 4. Calculate aggregated metrics (Synchronize with WiresharkTool)
+        # 4. Aggregated metrics (same counters as WiresharkTool's steering_analysis)
         btm_stats = band_counters.get("btm_stats", {})
         btm_responses = btm_stats.get("responses", 0)
 
@@ -71,7 +84,7 @@ class BTMAnalyzer:
         # GOLDEN RULE: WiresharkTool/tshark = source of truth
         # ============================================================
         # PRIORITY ORDER for attempts/success metrics:
-        # 1) Counters calculated by WiresharkTool in steering_analysis
+        # 1) Counters of the transition engine (WiresharkTool steering_analysis)
         # 2) Raw counters from wireshark_raw.summary.btm (if they exist)
         # 3) Local fallback using transitions (only if 1 and 2 do not exist)
 
@@ -218,253 +231,6 @@ class BTMAnalyzer:
                 ))
         return schemas
 
-    def _analyze_transitions(self, raw_events: List[Dict[str, Any]], btm_events: List[BTMEvent]) -> List[SteeringTransition]:
-        """
-        Analyzes the time sequence to identify complete transitions.
-        Detects if it was Aggressive (Deauth) or Assisted (BTM/Reassoc).
-        """
-        transitions = []
-        
-        # Group events by client, filtering BSSIDs
-        # BSSIDs have the least significant bit of the first octet at 0, but are AP addresses
-        # We need to filter addresses that are known BSSIDs
-        def is_likely_bssid(mac: str, bssid_list: list = None) -> bool:
-            """Determines if a MAC is likely a BSSID (AP) rather than a client"""
-            if not mac:
-                return True
-            # If it's in the list of known BSSIDs, it's a BSSID
-            if bssid_list:
-                mac_normalized = mac.lower().replace('-', ':')
-                for bssid in bssid_list:
-                    if bssid.lower().replace('-', ':') == mac_normalized:
-                        return True
-            return False
-        
-        # Get list of known BSSIDs from events
-        known_bssids = set()
-        for e in raw_events:
-            bssid = e.get("bssid") or e.get("ap_bssid")
-            if bssid:
-                known_bssids.add(bssid)
-        
-        events_by_client = {}
-        for e in raw_events:
-            c = e.get("client_mac")
-            if c and not is_likely_bssid(c, list(known_bssids)):
-                if c not in events_by_client: events_by_client[c] = []
-                events_by_client[c].append(e)
-                
-        # Analyze per client
-        for client, events in events_by_client.items():
-            sorted_events = sorted(events, key=lambda x: x["timestamp"])
-            
-            # Máquina de estados simple
-            last_btm_req = None
-            last_deauth = None
-            
-            
-            for i, ev in enumerate(sorted_events):
-                etype = ev.get("type")
-                subtype = ev.get("subtype")
-                event_type = ev.get("event_type")  # For BTM events: "request" or "response"
-                timestamp = ev.get("timestamp", 0)
-                
-                # 1. Detect transition start
-                # BTM events have type="btm" and event_type="request" or "response"
-                # Also check by subtype 13 and action_code 7 (BTM Request)
-                is_btm_request = (
-                    (etype == "btm" and event_type == "request") or
-                    (subtype == 13 and str(ev.get("action_code", "")) == "7") or
-                    (subtype == 13 and ev.get("action_code") == 7)
-                )
-                
-                if is_btm_request:
-                    last_btm_req = ev
-                elif etype in ["Deauthentication", "Disassociation"] or subtype in [10, 12]:
-                    # Validate that deauth is directed to the client and is forced
-                    
-                    is_forced, classification, desc = DeauthValidator.validate_and_classify(ev, client)
-                    
-                    # Solo contar como "agresivo" si es forzado Y viene del AP (no del cliente)
-                    # If classification == "forced_to_client", it means the AP kicks out the client
-                    # If classification == "graceful", it is voluntary client exit
-                    if is_forced and classification == "forced_to_client":
-                        last_deauth = ev
-                    
-                # 2. Detect transition end (Reassociation)
-                if etype in ["Reassociation Response", "Association Response"] or subtype in [1, 3]:
-                    # Check success (Status Code 0)
-                    assoc_status = str(ev.get("assoc_status_code", ""))
-                    is_success = assoc_status in ["0", "0x00", "0x0", "0x0000"]
-                    
-                    
-                    if is_success:
-                        # Check if there are BTM events in the time window that were not detected as Requests
-                        window_start = timestamp - REASSOC_TIMEOUT_SECONDS
-                        btm_events_in_window = [
-                            e for e in sorted_events[:i]
-                            if e.get("timestamp", 0) >= window_start
-                            and (e.get("type") == "btm" or e.get("subtype") == 13)
-                        ]
-                        
-                        # Also show ALL events in window for diagnostics
-                        all_events_in_window = [
-                            e for e in sorted_events[:i]
-                            if e.get("timestamp", 0) >= window_start
-                        ]
-                        
-                        if all_events_in_window:
-                            for idx, ev in enumerate(all_events_in_window):
-                                ev_time_diff = timestamp - ev.get("timestamp", 0)
-                        
-                        # Search for recent BTM Requests in window that were not detected
-                        recent_btm_requests = []
-                        for btm_ev in btm_events_in_window:
-                            btm_etype = btm_ev.get("type")
-                            btm_event_type = btm_ev.get("event_type")
-                            btm_subtype = btm_ev.get("subtype")
-                            btm_action_code = btm_ev.get("action_code")
-                            
-                            # Check if it's a BTM Request
-                            is_btm_req = (
-                                (btm_etype == "btm" and btm_event_type == "request") or
-                                (btm_subtype == 13 and str(btm_action_code) == "7") or
-                                (btm_subtype == 13 and btm_action_code == 7)
-                            )
-                            
-                            if is_btm_req:
-                                recent_btm_requests.append(btm_ev)
-                        
-                        # If there are recent BTM Requests in the window, use the most recent
-                        if recent_btm_requests:
-                            # Sort by timestamp descending to get the most recent
-                            recent_btm_requests.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
-                            most_recent_btm = recent_btm_requests[0]
-                            btm_time_diff = timestamp - most_recent_btm.get("timestamp", 0)
-                            
-                            if btm_time_diff < REASSOC_TIMEOUT_SECONDS:
-                                # Update last_btm_req with the most recent
-                                if not last_btm_req or most_recent_btm.get("timestamp", 0) > last_btm_req.get("timestamp", 0):
-                                    last_btm_req = most_recent_btm
-                        
-                        if btm_events_in_window and not last_btm_req:
-                            for btm_ev in btm_events_in_window:
-                                pass
-                        
-                        # Determine type based on previous events
-                        time_since_deauth = None
-                        time_since_btm = None
-                        
-                        if last_deauth:
-                            time_since_deauth = ev["timestamp"] - last_deauth["timestamp"]
-                        
-                        if last_btm_req:
-                            time_since_btm = ev["timestamp"] - last_btm_req["timestamp"]
-                        
-                        
-                        # Priority: Recent Deauth > Recent BTM > Unknown
-                        if last_deauth and time_since_deauth is not None and time_since_deauth < REASSOC_TIMEOUT_SECONDS:
-                            # It's Aggressive (there was a recent deauth)
-                            start_node = last_deauth
-                            s_type = SteeringType.AGGRESSIVE
-                        elif last_btm_req and time_since_btm is not None and time_since_btm < REASSOC_TIMEOUT_SECONDS:
-                            # It's Assisted (there was a recent BTM req)
-                            start_node = last_btm_req
-                            s_type = SteeringType.ASSISTED
-                        else:
-                            # Roaming espontáneo o Asistido sin captura de Request
-                            start_node = ev # Usamos el mismo evento como inicio si no hay previo
-                            s_type = SteeringType.UNKNOWN
-                            if last_btm_req:
-                                pass
-                            elif last_deauth:
-                                pass
-                            else:
-                                # Mostrar eventos previos con más detalle
-                                prev_events = sorted_events[max(0, i-10):i]
-                                for prev_idx, prev_ev in enumerate(prev_events):
-                                    prev_etype = prev_ev.get('type')
-                                    prev_event_type = prev_ev.get('event_type')
-                                    prev_subtype = prev_ev.get('subtype')
-                                    prev_action_code = prev_ev.get('action_code')
-                                    prev_timestamp = prev_ev.get('timestamp', 0)
-                                    time_diff = timestamp - prev_timestamp if prev_timestamp else None
-                        
-                        # Crear transición
-                        start_time = start_node["timestamp"]
-                        end_time = ev["timestamp"]
-                        duration = end_time - start_time
-                        
-                        # Datos de cambio
-                        from_bssid = start_node.get("bssid")
-                        to_bssid = ev.get("bssid")
-                        
-                        # Inferir bandas (si tenemos info)
-                        from_band = start_node.get("band")
-                        to_band = ev.get("band")
-                        
-                        is_band_change = False
-                        if from_band and to_band and from_band != to_band:
-                           is_band_change = True
-                           
-                        transitions.append(SteeringTransition(
-                            client_mac=client,
-                            steering_type=s_type,
-                            start_time=start_time,
-                            end_time=end_time,
-                            duration=duration,
-                            from_bssid=from_bssid,
-                            to_bssid=to_bssid,
-                            from_band=from_band,
-                            to_band=to_band,
-                            is_successful=True,
-                            is_band_change=is_band_change,
-                        ))
-                        
-                        # Reset estados SOLO si fueron usados en esta transición Y están fuera de la ventana
-                        # Esto permite que múltiples transiciones puedan usar el mismo BTM Request
-                        # si están dentro de la ventana de tiempo (puede haber múltiples reassociations
-                        # después de un solo BTM Request)
-                        if s_type == SteeringType.AGGRESSIVE and last_deauth == start_node:
-                            # Se usó el deauth, resetearlo después de usarlo
-                            last_deauth = None
-                        elif s_type == SteeringType.ASSISTED and last_btm_req == start_node:
-                            # Se usó el BTM Request, pero NO resetearlo todavía
-                            # porque puede haber más transiciones que lo necesiten dentro de la ventana
-                            # El BTM Request se mantendrá activo hasta que expire la ventana de tiempo
-                            # o hasta que se detecte un nuevo BTM Request
-                            pass  # No resetear, permitir reutilización dentro de la ventana
-                        # If it is UNKNOWN, do not reset anything because no previous state was used
-        
-        # Post-procesamiento: marcar cambios de banda aunque los frames individuales
-        # no lo hayan indicado explícitamente. Si vemos que, para un mismo cliente,
-        # las transiciones consecutivas usan bandas distintas (por ejemplo, primero
-        # 2.4GHz y luego 5GHz), consideramos que hubo un cambio de banda físico
-        # entre ellas, aunque cada transición aislada esté etiquetada como
-        # \"dentro de la misma banda\".
-        if transitions:
-            transitions_sorted = sorted(transitions, key=lambda t: t.start_time)
-            last_band_by_client = {}
-            
-            for t in transitions_sorted:
-                band = t.to_band or t.from_band
-                if not band:
-                    continue
-                
-                client_id = t.client_mac
-                last_band = last_band_by_client.get(client_id)
-                
-                if last_band and last_band != band:
-                    # Marcar este salto como cambio de banda si aún no lo estaba
-                    if not t.from_band:
-                        t.from_band = last_band
-                    t.to_band = band
-                    t.is_band_change = True
-                
-                last_band_by_client[client_id] = band
-        
-        return transitions
-
     def _detect_steering_pattern(self, transitions: List[SteeringTransition], band_counters: dict) -> SteeringType:
         """Determines the predominant steering pattern in the capture."""
         if not transitions:
@@ -663,34 +429,14 @@ class BTMAnalyzer:
         reassoc_resp = raw_reassoc.get("responses", 0)
         reassoc_resp_success = raw_reassoc.get("responses_success", 0)
 
-        primary_client = device_info.mac_address if device_info else None
+        primary_client = normalize_mac(device_info.mac_address) if device_info else None
 
-        # Smart filters for Deauth/Disassoc
-        forced_deauth_count = 0
-        forced_disassoc_count = 0
-        client_directed_deauth_count = 0
-        client_directed_disassoc_count = 0
-
-        for e in steering_events or []:
-            st = e.get("subtype")
-            # Disconnection analysis (ONLY IF IT IS THE ANALYZED CLIENT)
-            if st in [10, 12] and primary_client:
-                is_forced, classification, desc = DeauthValidator.validate_and_classify(
-                    e, primary_client
-                )
-
-                # Check if it's directed to the client (even if not forced)
-                is_directed = DeauthValidator.is_directed_to_client(e, primary_client)
-
-                if is_directed:
-                    if st == 10:
-                        client_directed_disassoc_count += 1
-                        if is_forced:
-                            forced_disassoc_count += 1
-                    else:
-                        client_directed_deauth_count += 1
-                        if is_forced:
-                            forced_deauth_count += 1
+        # Smart filters for Deauth/Disassoc (ONLY IF IT IS THE ANALYZED CLIENT)
+        disconnections = DeauthValidator.count_client_disconnections(steering_events, primary_client)
+        client_directed_deauth_count = disconnections["deauth"]
+        client_directed_disassoc_count = disconnections["disassoc"]
+        forced_deauth_count = disconnections["deauth_forced"]
+        forced_disassoc_count = disconnections["disassoc_forced"]
 
         assoc_failures = band_counters.get("association_failures", [])
         failure_count = len(assoc_failures)
@@ -0,0 +1,222 @@
+"""
+Sidecar packet index of a capture file.
+Maps every packet to its timestamp and byte range in the capture, and every
+unicast MAC address (clients and BSSIDs) to the packets it appears in, so
+time-window fragments can be cut by copying record ranges out of the
+memory-mapped capture without dissecting anything.
+
+File layout (little endian), stored as `<capture>.idx` next to the capture:
+    header      magic "PCIX", version, flags, capture size, capture mtime (ns),
+                packet count, header block count, MAC count
+    blocks      (start, end) u64 pairs of the non-packet records (pcap global
+                header, pcapng SHB / IDB / ...)
+    timestamps  f64[packets]
+    offsets     u64[packets]   record start (record header included)
+    lengths     u32[packets]   record length
+    macs        6 bytes[MACs], sorted
+    postings    u32[MACs + 1] CSR offsets, then u32 packet indices
+"""
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from .pcap_reader import PcapReader, UnsupportedCaptureError, frame_addresses
+
+CAPTURE_INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+_MAGIC = b"PCIX"
+_HEADER = struct.Struct("<4sHHQqIII")
+_FLAG_SORTED = 0x1  # Packet timestamps are non-decreasing in file order
+
+
+def index_path_for(capture_path: Union[str, Path]) -> Path:
+    """Path of the sidecar index of a capture."""
+    capture_path = Path(capture_path)
+    return capture_path.with_name(capture_path.name + INDEX_SUFFIX)
+
+
+def _mac_bytes(mac: str) -> bytes:
+    return bytes.fromhex(mac.replace(":", "").replace("-", ""))
+
+
+def build_capture_index(capture_path: Union[str, Path], index_path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Indexes the capture in one pass over its record headers and 802.11
+    addresses and writes the sidecar file. Raises UnsupportedCaptureError for
+    captures the native reader cannot walk.
+    """
+    capture_path = Path(capture_path)
+    index_path = Path(index_path) if index_path else index_path_for(capture_path)
+    stat = capture_path.stat()
+
+    blocks = array("Q")
+    timestamps = array("d")
+    offsets = array("Q")
+    lengths = array("I")
+    postings: Dict[bytes, array] = {}
+
+    for timestamp, start, end, linktype, data in PcapReader(str(capture_path)).records():
+        if timestamp is None:
+            blocks.append(start)
+            blocks.append(end)
+            continue
+        packet = len(timestamps)
+        timestamps.append(timestamp)
+        offsets.append(start)
+        lengths.append(end - start)
+        for mac in set(frame_addresses(linktype, data)):
+            packet_list = postings.get(mac)
+            if packet_list is None:
+                packet_list = postings[mac] = array("I")
+            packet_list.append(packet)
+
+    times = np.frombuffer(timestamps, dtype=np.float64)
+    flags = _FLAG_SORTED if len(times) < 2 or bool(np.all(np.diff(times) >= 0)) else 0
+
+    macs = sorted(postings)
+    starts = array("I", [0])
+    for mac in macs:
+        starts.append(starts[-1] + len(postings[mac]))
+
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(
+            _MAGIC, CAPTURE_INDEX_VERSION, flags, stat.st_size, stat.st_mtime_ns,
+            len(timestamps), len(blocks) // 2, len(macs),
+        ))
+        for values in (blocks, timestamps, offsets, lengths):
+            f.write(values.tobytes())
+        f.write(b"".join(macs))
+        f.write(starts.tobytes())
+        for mac in macs:
+            f.write(postings[mac].tobytes())
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class CaptureIndex:
+    """
+    Loaded sidecar index. Answers time-window and per-MAC packet queries and
+    writes slices of the capture by copying raw records.
+    """
+
+    def __init__(self, capture_path: Path, buffer: bytes):
+        self.capture_path = capture_path
+        magic, version, flags, size, mtime_ns, packets, block_count, mac_count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != CAPTURE_INDEX_VERSION:
+            raise ValueError("Unsupported capture index")
+        self.capture_size = size
+        self.capture_mtime_ns = mtime_ns
+        self.is_sorted = bool(flags & _FLAG_SORTED)
+
+        offset = _HEADER.size
+
+        def take(dtype, count: int) -> np.ndarray:
+            nonlocal offset
+            values = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += values.nbytes
+            return values
+
+        self.blocks = take("<u8", block_count * 2).reshape(-1, 2)
+        self.timestamps = take("<f8", packets)
+        self.offsets = take("<u8", packets)
+        self.lengths = take("<u4", packets)
+        macs = take("u1", mac_count * 6).reshape(-1, 6)
+        self._macs = {bytes(row): position for position, row in enumerate(macs)}
+        self._posting_starts = take("<u4", mac_count + 1)
+        self._postings = take("<u4", int(self._posting_starts[-1]))
+
+    @classmethod
+    def load(cls, capture_path: Union[str, Path]) -> Optional["CaptureIndex"]:
+        """
+        Loads the sidecar index of a capture. Returns None if there is none,
+        or if it is from another version or no longer matches the capture.
+        """
+        capture_path = Path(capture_path)
+        index_path = index_path_for(capture_path)
+        try:
+            buffer = index_path.read_bytes()
+            index = cls(capture_path, buffer)
+            stat = capture_path.stat()
+        except (OSError, ValueError, struct.error):
+            return None
+        if index.capture_size != stat.st_size or index.capture_mtime_ns != stat.st_mtime_ns:
+            return None
+        return index
+
+    @classmethod
+    def load_or_build(cls, capture_path: Union[str, Path]) -> Optional["CaptureIndex"]:
+        """Loads the sidecar index, building it first if missing or stale."""
+        index = cls.load(capture_path)
+        if index is not None:
+            return index
+        try:
+            build_capture_index(capture_path)
+        except (UnsupportedCaptureError, OSError):
+            return None
+        return cls.load(capture_path)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def packets_in_range(self, start: float, end: float) -> np.ndarray:
+        """Indices of the packets with start <= timestamp <= end, in file order."""
+        if self.is_sorted:
+            first = np.searchsorted(self.timestamps, start, side="left")
+            last = np.searchsorted(self.timestamps, end, side="right")
+            return np.arange(first, last)
+        return np.flatnonzero((self.timestamps >= start) & (self.timestamps <= end))
+
+    def packets_for_mac(self, mac: str) -> np.ndarray:
+        """Indices of the packets where the address appears (addr1-3), in file order."""
+        position = self._macs.get(_mac_bytes(mac))
+        if position is None:
+            return np.empty(0, dtype=np.uint32)
+        return self._postings[self._posting_starts[position]:self._posting_starts[position + 1]]
+
+    def write_packets(self, packets: np.ndarray, output_path: Union[str, Path]) -> int:
+        """
+        Writes the given packets (file-order indices) to `output_path` as a
+        capture in the original format: the header blocks preceding the last
+        packet plus the raw packet records, interleaved in file order.
+        Returns the number of packets written.
+        """
+        packets = np.asarray(packets, dtype=np.int64)
+        with open(self.capture_path, "rb") as f, open(output_path, "wb", buffering=1024 * 1024) as out:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                block = 0
+                for packet in packets:
+                    start = int(self.offsets[packet])
+                    # Headers (e.g. an IDB) that come before this packet
+                    while block < len(self.blocks) and self.blocks[block][0] < start:
+                        out.write(mm[int(self.blocks[block][0]):int(self.blocks[block][1])])
+                        block += 1
+                    out.write(mm[start:start + int(self.lengths[packet])])
+                if not len(packets):
+                    # Empty fragment: a valid capture with only the leading headers
+                    while block < len(self.blocks) and (block == 0 or self.blocks[block][0] == self.blocks[block - 1][1]):
+                        out.write(mm[int(self.blocks[block][0]):int(self.blocks[block][1])])
+                        block += 1
+        return len(packets)
+
+    def write_time_range(
+        self,
+        start: float,
+        end: float,
+        output_path: Union[str, Path],
+        mac: Optional[str] = None,
+    ) -> int:
+        """
+        Writes the packets of [start, end] (only those involving `mac`, if
+        given) to `output_path`. Returns the number of packets written.
+        """
+        packets = self.packets_in_range(start, end)
+        if mac:
+            packets = np.intersect1d(packets, self.packets_for_mac(mac), assume_unique=True)
+        return self.write_packets(packets, output_path)
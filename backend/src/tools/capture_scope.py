@@ -0,0 +1,146 @@
+"""
+Scope of a capture analysis.
+Restricts the frames that are parsed (SSID, client MAC, time window) and
+bounds the parsing work (packet and time budgets). Filters are turned into
+a tshark display filter, or applied as a pre-filter on the rows of the
+native reader; budgets stop parsing early.
+"""
+import re
+from typing import Dict, Any, Optional, List, Set
+
+from ..utils.mac_registry import normalize_mac
+from .pcap_reader import F_TIME, F_SUBTYPE, F_BSSID, F_SA, F_DA
+
+_MAC_RE = re.compile(r"^[0-9a-f]{2}(:[0-9a-f]{2}){5}$")
+
+# Beacons are kept in client-scoped analyses: they carry the band and SSID
+# of every BSSID and feed the preventive steering counters
+_BEACON_SUBTYPE = "0x0008"
+
+
+def _positive_number(value: Any, cast) -> Optional[Any]:
+    if value is None or value == "":
+        return None
+    number = cast(value)
+    if number <= 0:
+        raise ValueError(f"Scope budget must be positive, got {value!r}")
+    return number
+
+
+class CaptureScope:
+    """
+    Frame filters and work budgets of a scoped analysis.
+
+    `start_time` / `end_time` are seconds relative to the first frame of the
+    capture (like Wireshark's `frame.time_relative`). `max_packets` counts
+    frames that pass the filters; `max_parse_seconds` bounds parse wall time.
+    """
+
+    def __init__(
+        self,
+        ssid: Optional[str] = None,
+        client_mac: Optional[str] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        max_packets: Optional[int] = None,
+        max_parse_seconds: Optional[float] = None,
+    ):
+        self.ssid = ssid.strip() if ssid and ssid.strip() else None
+
+        self.client_mac = None
+        if client_mac:
+            mac = normalize_mac(client_mac)
+            if not _MAC_RE.match(mac):
+                raise ValueError(f"Invalid client MAC in scope: {client_mac!r}")
+            self.client_mac = mac
+
+        self.start_time = float(start_time) if start_time not in (None, "") else None
+        self.end_time = float(end_time) if end_time not in (None, "") else None
+        if self.start_time is not None and self.start_time < 0:
+            raise ValueError("Scope start_time must be >= 0")
+        if self.start_time is not None and self.end_time is not None and self.end_time < self.start_time:
+            raise ValueError("Scope end_time must be >= start_time")
+
+        self.max_packets = _positive_number(max_packets, int)
+        self.max_parse_seconds = _positive_number(max_parse_seconds, float)
+
+        # BSSIDs advertising `ssid`, resolved by the parser before filtering
+        self.ssid_bssids: Optional[Set[str]] = None
+
+    @classmethod
+    def from_metadata(cls, scope: Optional[Dict[str, Any]]) -> Optional["CaptureScope"]:
+        """Builds a scope from the `scope` block of the user metadata."""
+        if not scope or not isinstance(scope, dict):
+            return None
+        result = cls(
+            ssid=scope.get("ssid"),
+            client_mac=scope.get("client_mac"),
+            start_time=scope.get("start_time"),
+            end_time=scope.get("end_time"),
+            max_packets=scope.get("max_packets"),
+            max_parse_seconds=scope.get("max_parse_seconds"),
+        )
+        return None if result.is_empty else result
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(self.ssid or self.client_mac or self.start_time is not None or self.end_time is not None)
+
+    @property
+    def has_budget(self) -> bool:
+        return bool(self.max_packets or self.max_parse_seconds)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.has_filters and not self.has_budget
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Requested scope, as reported in the stats and used in cache keys."""
+        return {
+            "ssid": self.ssid,
+            "client_mac": self.client_mac,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "max_packets": self.max_packets,
+            "max_parse_seconds": self.max_parse_seconds,
+        }
+
+    def _bssid_filter(self) -> Optional[Set[str]]:
+        # An SSID that matched no BSSID is ignored instead of discarding every frame
+        return self.ssid_bssids if self.ssid and self.ssid_bssids else None
+
+    def display_filter(self) -> Optional[str]:
+        """tshark display filter (`-Y`) equivalent to the frame filters."""
+        clauses: List[str] = []
+        bssids = self._bssid_filter()
+        if bssids:
+            clauses.append("wlan.bssid in {%s}" % ", ".join(sorted(bssids)))
+        if self.client_mac:
+            clauses.append(f"(wlan.addr == {self.client_mac} || wlan.fc.type_subtype == {_BEACON_SUBTYPE})")
+        if self.start_time is not None:
+            clauses.append(f"frame.time_relative >= {self.start_time}")
+        if self.end_time is not None:
+            clauses.append(f"frame.time_relative <= {self.end_time}")
+        return " && ".join(clauses) if clauses else None
+
+    def matches(self, fields: List[str], relative_time: float) -> bool:
+        """Pre-filter for native reader rows (same semantics as `display_filter`)."""
+        if self.start_time is not None and relative_time < self.start_time:
+            return False
+        if self.end_time is not None and relative_time > self.end_time:
+            return False
+        bssids = self._bssid_filter()
+        if bssids and fields[F_BSSID] not in bssids:
+            return False
+        if self.client_mac and fields[F_SUBTYPE] != _BEACON_SUBTYPE:
+            mac = self.client_mac
+            if fields[F_SA] != mac and fields[F_DA] != mac and fields[F_BSSID] != mac:
+                return False
+        return True
+
+    @staticmethod
+    def row_time(fields: List[str]) -> float:
+        try:
+            return float(fields[F_TIME])
+        except (TypeError, ValueError):
+            return 0.0
@@ -4,9 +4,10 @@ Uses OUILookup and heuristics to determine vendor and category,
 without logging responsibilities.
 """
 import re
-from typing import List, Dict, Optional
+from typing import Dict, Optional
 
 from ..utils.oui_lookup import oui_lookup
+from ..utils.mac_registry import mac_flags, is_locally_administered, MAC_INVALID
 from ..models.btm_schemas import DeviceInfo, DeviceCategory
 
 class DeviceClassifier:
@@ -23,11 +24,8 @@ class DeviceClassifier:
         """Validates if a string is a valid MAC address."""
         if not mac_address or not isinstance(mac_address, str):
             return False
-        # Remove common separators (: - .)
-        # IMPORTANT: The hyphen must go at the end or escaped to avoid range interpretation
-        mac_clean = re.sub(r'[:.\s-]', '', mac_address.lower())
-        # Must have exactly 12 hexadecimal characters
-        return len(mac_clean) == 12 and all(c in '0123456789abcdef' for c in mac_clean)
+        # Accepts ":", "-", "." separated or bare 12 hex digit spellings
+        return not mac_flags(mac_address) & MAC_INVALID
 
     def classify_device(
         self, 
@@ -149,12 +147,7 @@ class DeviceClassifier:
         """
         if not self._is_valid_mac(mac_address):
             return False
-        try:
-            mac_clean = re.sub(r'[:.\s-]', '', mac_address.lower())
-            first_octet = int(mac_clean[0:2], 16)
-            return (first_octet & 0x02) != 0
-        except (ValueError, IndexError):
-            return False
+        return is_locally_administered(mac_address)
 
     def _categorize_device(self, vendor: str, mac_address: str) -> DeviceCategory:
         """Simple heuristic to categorize devices."""
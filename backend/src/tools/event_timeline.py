@@ -0,0 +1,72 @@
+"""
+Per-client timeline of band steering events.
+Built once per client from the time-ordered event list, it keeps the
+timestamps and, for each frame subtype, the positions where it occurs, so
+"next (re)association response after this deauth" is a bisect lookup
+instead of a forward scan over a copy of the remaining events.
+"""
+from bisect import bisect_right
+from typing import Dict, Any, List, Optional, Iterable, Iterator, FrozenSet
+
+# (Re)Association Responses close an aggressive steering sequence
+RESPONSE_SUBTYPES = frozenset({1, 3})
+
+
+class ClientTimeline:
+    """
+    Time-ordered events of one client with per-subtype position indexes.
+    Behaves like the underlying list for iteration, indexing and `len()`.
+    """
+
+    __slots__ = ("client_mac", "events", "timestamps", "_positions", "_merged")
+
+    def __init__(self, client_mac: str, events: List[Dict[str, Any]]):
+        # `events` must already be sorted by timestamp
+        self.client_mac = client_mac
+        self.events = events
+        self.timestamps = [event["timestamp"] for event in events]
+        self._positions: Dict[Any, List[int]] = {}
+        for position, event in enumerate(events):
+            self._positions.setdefault(event["subtype"], []).append(position)
+        self._merged: Dict[FrozenSet, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.events)
+
+    def __getitem__(self, index):
+        return self.events[index]
+
+    def positions(self, subtypes: Iterable[int]) -> List[int]:
+        """Sorted positions of the events with any of `subtypes` (cached per set)."""
+        key = frozenset(subtypes)
+        merged = self._merged.get(key)
+        if merged is None:
+            merged = sorted(
+                position
+                for subtype in key
+                for position in self._positions.get(subtype, ())
+            )
+            self._merged[key] = merged
+        return merged
+
+    def next_of(
+        self,
+        subtypes: Iterable[int],
+        after: int,
+        max_timestamp: Optional[float] = None,
+    ) -> Optional[int]:
+        """
+        Position of the first event with one of `subtypes` after position
+        `after`, or None if there is none (or it is later than `max_timestamp`).
+        """
+        positions = self.positions(subtypes)
+        k = bisect_right(positions, after)
+        if k == len(positions):
+            return None
+        position = positions[k]
+        if max_timestamp is not None and self.timestamps[position] > max_timestamp:
+            return None
+        return position
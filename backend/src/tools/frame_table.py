@@ -0,0 +1,408 @@
+"""
+Columnar frame table for parsed captures.
+Stores one row per frame in typed arrays (instead of per-packet dicts) so
+that the capture-wide counters can be computed with vectorized NumPy
+operations once parsing is done.
+"""
+
+from array import array
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ..utils.mac_registry import MacRegistry
+from .signal_downsampling import downsample_indices
+
+# Sentinel for "field not present / not parseable" in integer columns
+MISSING = -1
+
+# RSSI column keeps only realistic values (-120 < rssi < 0); 0 means "no sample"
+RSSI_MISSING = 0
+
+# Frame subtypes as reported by wlan.fc.type_subtype
+SUBTYPE_ASSOC_REQ = 0
+SUBTYPE_ASSOC_RESP = 1
+SUBTYPE_REASSOC_REQ = 2
+SUBTYPE_REASSOC_RESP = 3
+SUBTYPE_PROBE_REQ = 4
+SUBTYPE_PROBE_RESP = 5
+SUBTYPE_BEACON = 8
+SUBTYPE_DISASSOC = 10
+SUBTYPE_DEAUTH = 12
+SUBTYPE_ACTION = 13
+SUBTYPE_DATA = 0x20
+SUBTYPE_QOS_DATA = 0x28
+
+CATEGORY_RADIO_MEASUREMENT = 5  # 802.11k
+CATEGORY_WNM = 10  # 802.11v
+ACTION_BTM_REQUEST = 7
+ACTION_BTM_RESPONSE = 8
+
+
+def _fit(value: Optional[int], low: int, high: int) -> int:
+    """Returns the value if it fits the column range, MISSING otherwise."""
+    if value is None or value < low or value > high:
+        return MISSING
+    return value
+
+
+class FrameTable:
+    """
+    Append-only columnar storage of the per-frame fields used by the
+    band steering analysis.
+
+    MAC addresses (through a `MacRegistry`) and protocol stacks are interned
+    to integer ids, so a row costs a few dozen bytes regardless of how many
+    times an address repeats.
+    """
+
+    def __init__(self) -> None:
+        self.timestamps = array("d")
+        self.subtypes = array("h")
+        self.frequencies = array("i")  # MHz, 0 when unknown
+        self.rssi = array("b")
+        self.categories = array("h")
+        self.actions = array("h")
+        self.btm_status = array("i")
+        self.assoc_status = array("i")
+        self.reason_codes = array("i")
+        self.bssid_ids = array("i")
+        self.sa_ids = array("i")
+        self.da_ids = array("i")
+        self.protocol_ids = array("i")
+        self.is_wlan = array("b")
+
+        self.mac_registry = MacRegistry()
+        self.protocol_stacks: List[str] = []
+        self._protocol_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def macs(self) -> List[str]:
+        """Normalized MAC of each interned id."""
+        return self.mac_registry.macs
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def intern_mac(self, mac: str) -> int:
+        """Returns the integer id of a MAC (MISSING for empty values)."""
+        return self.mac_registry.intern(mac)
+
+    def mac_id(self, mac: str) -> int:
+        """Looks up the id of an already interned MAC without adding it."""
+        return self.mac_registry.id_of(mac)
+
+    def _intern_protocols(self, protocols: str) -> int:
+        if not protocols:
+            return MISSING
+        stack_id = self._protocol_ids.get(protocols)
+        if stack_id is None:
+            stack_id = len(self.protocol_stacks)
+            self._protocol_ids[protocols] = stack_id
+            self.protocol_stacks.append(protocols)
+        return stack_id
+
+    def append(
+        self,
+        timestamp: float,
+        subtype: int,
+        frequency: int,
+        rssi: Optional[int],
+        category: int,
+        action: int,
+        btm_status: int,
+        assoc_status: int,
+        reason_code: int,
+        bssid: str,
+        sa: str,
+        da: str,
+        protocols: str,
+    ) -> None:
+        """Appends one frame. Out-of-range values are stored as MISSING."""
+        self.timestamps.append(timestamp)
+        self.subtypes.append(_fit(subtype, 0, 0x7FFF))
+        self.frequencies.append(frequency if 0 < frequency < 100000 else 0)
+        self.rssi.append(rssi if rssi is not None and -120 < rssi < 0 else RSSI_MISSING)
+        self.categories.append(_fit(category, 0, 0xFF))
+        self.actions.append(_fit(action, 0, 0xFF))
+        self.btm_status.append(_fit(btm_status, 0, 0xFFFF))
+        self.assoc_status.append(_fit(assoc_status, 0, 0xFFFF))
+        self.reason_codes.append(_fit(reason_code, 0, 0xFFFF))
+        self.bssid_ids.append(self.intern_mac(bssid))
+        self.sa_ids.append(self.intern_mac(sa))
+        self.da_ids.append(self.intern_mac(da))
+        self.protocol_ids.append(self._intern_protocols(protocols))
+        self.is_wlan.append(1 if protocols and "wlan" in protocols.lower() else 0)
+
+    def extend(self, other: "FrameTable") -> None:
+        """
+        Appends all rows of another table (e.g. a capture slice parsed in a
+        worker process), re-mapping its interned ids onto this table.
+        """
+        if not len(other):
+            return
+
+        for name in ("timestamps", "subtypes", "frequencies", "rssi", "categories",
+                     "actions", "btm_status", "assoc_status", "reason_codes", "is_wlan"):
+            getattr(self, name).extend(getattr(other, name))
+
+        mac_map = np.array(self.mac_registry.merge(other.mac_registry) or [MISSING], dtype=np.int32)
+        for name in ("bssid_ids", "sa_ids", "da_ids"):
+            ids = self._view(getattr(other, name))
+            remapped = np.where(ids >= 0, mac_map[np.maximum(ids, 0)], MISSING).astype(np.int32)
+            getattr(self, name).frombytes(remapped.tobytes())
+
+        stack_map = np.array(
+            [self._intern_protocols(stack) for stack in other.protocol_stacks] or [MISSING],
+            dtype=np.int32,
+        )
+        ids = self._view(other.protocol_ids)
+        remapped = np.where(ids >= 0, stack_map[np.maximum(ids, 0)], MISSING).astype(np.int32)
+        self.protocol_ids.frombytes(remapped.tobytes())
+
+    # ------------------------------------------------------------------
+    # Vectorized views
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _view(column: array) -> np.ndarray:
+        """Zero-copy NumPy view over an array column."""
+        if not len(column):
+            return np.empty(0, dtype=column.typecode)
+        return np.frombuffer(column, dtype=column.typecode)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Returns every column as a NumPy array (views, no copies)."""
+        return {
+            "timestamp": self._view(self.timestamps),
+            "subtype": self._view(self.subtypes),
+            "frequency": self._view(self.frequencies),
+            "rssi": self._view(self.rssi),
+            "category": self._view(self.categories),
+            "action": self._view(self.actions),
+            "btm_status": self._view(self.btm_status),
+            "assoc_status": self._view(self.assoc_status),
+            "reason_code": self._view(self.reason_codes),
+            "bssid": self._view(self.bssid_ids),
+            "sa": self._view(self.sa_ids),
+            "da": self._view(self.da_ids),
+            "protocol": self._view(self.protocol_ids),
+            "is_wlan": self._view(self.is_wlan),
+        }
+
+    @staticmethod
+    def band_masks(frequency: np.ndarray) -> Dict[str, np.ndarray]:
+        """Boolean masks of the frames seen on each band."""
+        return {
+            "2.4GHz": (frequency >= 2400) & (frequency <= 2500),
+            "5GHz": (frequency >= 5000) & (frequency <= 6000),
+        }
+
+    def summary_counts(self) -> Dict[str, Any]:
+        """
+        Frame counts for the `wireshark_raw["summary"]` block: totals and
+        BTM / association / reassociation / deauth / disassoc counters.
+        """
+        cols = self.columns()
+        subtype = cols["subtype"]
+        action = cols["action"]
+        btm_status = cols["btm_status"]
+        assoc_status = cols["assoc_status"]
+
+        wnm = (subtype == SUBTYPE_ACTION) & (cols["category"] == CATEGORY_WNM)
+        btm_resp = wnm & (action == ACTION_BTM_RESPONSE)
+        assoc_resp = subtype == SUBTYPE_ASSOC_RESP
+        reassoc_resp = subtype == SUBTYPE_REASSOC_RESP
+
+        return {
+            "total_packets": len(self),
+            "total_wlan_packets": int(np.count_nonzero(cols["is_wlan"])),
+            "btm": {
+                "requests": int(np.count_nonzero(wnm & (action == ACTION_BTM_REQUEST))),
+                "responses": int(np.count_nonzero(btm_resp)),
+                "responses_accept": int(np.count_nonzero(btm_resp & (btm_status == 0))),
+                "responses_reject": int(np.count_nonzero(btm_resp & (btm_status > 0))),
+            },
+            "assoc": {
+                "requests": int(np.count_nonzero(subtype == SUBTYPE_ASSOC_REQ)),
+                "responses": int(np.count_nonzero(assoc_resp)),
+                "responses_success": int(np.count_nonzero(assoc_resp & (assoc_status == 0))),
+                "responses_fail": int(np.count_nonzero(assoc_resp & (assoc_status > 0))),
+            },
+            "reassoc": {
+                "requests": int(np.count_nonzero(subtype == SUBTYPE_REASSOC_REQ)),
+                "responses": int(np.count_nonzero(reassoc_resp)),
+                "responses_success": int(np.count_nonzero(reassoc_resp & (assoc_status == 0))),
+                "responses_fail": int(np.count_nonzero(reassoc_resp & (assoc_status > 0))),
+            },
+            "deauth": {"count": int(np.count_nonzero(subtype == SUBTYPE_DEAUTH))},
+            "disassoc": {"count": int(np.count_nonzero(subtype == SUBTYPE_DISASSOC))},
+        }
+
+    def band_counters(self) -> Dict[str, Any]:
+        """
+        Per-band frame counters used for preventive steering detection, plus
+        the BTM and 802.11k/v/r activity seen in Action frames.
+        `btm_stats` / `kvr_stats` are only present when such frames exist.
+        """
+        cols = self.columns()
+        subtype = cols["subtype"]
+        category = cols["category"]
+        action = cols["action"]
+        bands = self.band_masks(cols["frequency"])
+        band_24, band_5 = bands["2.4GHz"], bands["5GHz"]
+
+        beacon = subtype == SUBTYPE_BEACON
+        probe_resp = subtype == SUBTYPE_PROBE_RESP
+        data = (subtype == SUBTYPE_QOS_DATA) | (subtype == SUBTYPE_DATA)
+
+        counters: Dict[str, Any] = {
+            "beacon_24": int(np.count_nonzero(beacon & band_24)),
+            "beacon_5": int(np.count_nonzero(beacon & band_5)),
+            "probe_req": int(np.count_nonzero(subtype == SUBTYPE_PROBE_REQ)),
+            "probe_resp_24": int(np.count_nonzero(probe_resp & band_24)),
+            "probe_resp_5": int(np.count_nonzero(probe_resp & band_5)),
+            "data_24": int(np.count_nonzero(data & band_24)),
+            "data_5": int(np.count_nonzero(data & band_5)),
+        }
+
+        action_frames = subtype == SUBTYPE_ACTION
+        wnm = action_frames & (category == CATEGORY_WNM)
+        if wnm.any():
+            counters["btm_stats"] = {
+                "requests": int(np.count_nonzero(wnm & (action == ACTION_BTM_REQUEST))),
+                "responses": int(np.count_nonzero(wnm & (action == ACTION_BTM_RESPONSE))),
+            }
+        if action_frames.any():
+            counters["kvr_stats"] = {
+                "11k": bool((action_frames & (category == CATEGORY_RADIO_MEASUREMENT)).any()),
+                "11v": bool(wnm.any()),
+                # 11r detection (Auth Alg = 2) is disabled, tshark field is unreliable
+                "11r": False,
+            }
+        return counters
+
+    def protocol_counter(self) -> Counter:
+        """Counts frames per protocol name (e.g. 'wlan', 'tcp')."""
+        ids = self._view(self.protocol_ids)
+        ids = ids[ids >= 0]
+        counter: Counter = Counter()
+        if not len(ids):
+            return counter
+        per_stack = np.bincount(ids, minlength=len(self.protocol_stacks))
+        for stack_id in np.flatnonzero(per_stack):
+            count = int(per_stack[stack_id])
+            for proto in self.protocol_stacks[stack_id].split(":"):
+                proto = proto.strip()
+                if proto:
+                    counter[proto] += count
+        return counter
+
+    def _count_macs(self, ids: np.ndarray) -> Counter:
+        ids = ids[ids >= 0]
+        counter: Counter = Counter()
+        if not len(ids):
+            return counter
+        per_mac = np.bincount(ids, minlength=len(self.macs))
+        for mac_id in np.flatnonzero(per_mac):
+            counter[self.macs[mac_id]] = int(per_mac[mac_id])
+        return counter
+
+    def mac_occurrences(self) -> Counter:
+        """How many times each MAC appears as SA or DA across the capture."""
+        cols = self.columns()
+        return self._count_macs(cols["sa"]) + self._count_macs(cols["da"])
+
+    def signal_mask(self) -> np.ndarray:
+        """Frames usable as RSSI samples: valid RSSI, known band and a MAC."""
+        cols = self.columns()
+        bands = self.band_masks(cols["frequency"])
+        return (
+            (cols["rssi"] != RSSI_MISSING)
+            & (bands["2.4GHz"] | bands["5GHz"])
+            & ((cols["sa"] >= 0) | (cols["da"] >= 0))
+            & (cols["subtype"] >= 0)
+        )
+
+    def signal_sources(self) -> Counter:
+        """How many RSSI samples each transmitter (SA) contributed."""
+        return self._count_macs(self._view(self.sa_ids)[self.signal_mask()])
+
+    def _signal_rows_for(self, mac: str, start_row: int = 0) -> np.ndarray:
+        """Rows of the RSSI samples transmitted by `mac` (from `start_row` on)."""
+        mac_id = self.mac_id(mac)
+        if mac_id == MISSING:
+            return np.empty(0, dtype=np.int64)
+        cols = self.columns()
+        rows = np.flatnonzero(self.signal_mask() & (cols["sa"] == mac_id))
+        if start_row:
+            rows = rows[rows >= start_row]
+        return rows
+
+    def signal_samples_for(self, mac: str, max_points: int = 500, start_row: int = 0) -> List[Dict[str, Any]]:
+        """
+        RSSI samples transmitted by `mac`, downsampled with LTTB to about
+        `max_points` (plus the samples where the band changes) so the UI
+        chart keeps the shape of the signal without being saturated.
+        `start_row` restricts the samples to frames appended after that row.
+        """
+        rows = self._signal_rows_for(mac, start_row)
+        if not len(rows):
+            return []
+
+        cols = self.columns()
+        timestamps = cols["timestamp"][rows]
+        rssi = cols["rssi"][rows]
+        frequency = cols["frequency"][rows]
+        da_ids = cols["da"][rows]
+        is_24 = self.band_masks(frequency)["2.4GHz"]
+
+        if len(rows) > max_points:
+            band_changes = np.flatnonzero(is_24[1:] != is_24[:-1])
+            keep = np.concatenate((band_changes, band_changes + 1))
+            selected = downsample_indices(timestamps, rssi, max_points, keep=keep)
+        else:
+            selected = np.arange(len(rows))
+
+        macs = self.macs
+        return [
+            {
+                "timestamp": float(timestamps[i]),
+                "rssi": int(rssi[i]),
+                "band": "2.4GHz" if is_24[i] else "5GHz",
+                "frequency": int(frequency[i]),
+                "sa": mac,
+                "da": macs[da_ids[i]] if da_ids[i] >= 0 else "",
+            }
+            for i in selected
+        ]
+
+    def signal_stats_for(self, mac: str) -> Dict[str, Any]:
+        """
+        Per-band RSSI statistics (all samples of `mac`, not the downsampled
+        chart series): count, min / max / mean, median and 10th percentile.
+        """
+        rows = self._signal_rows_for(mac)
+        cols = self.columns()
+        rssi = cols["rssi"][rows].astype(np.int16)
+        stats = {}
+        for band, mask in self.band_masks(cols["frequency"][rows]).items():
+            values = rssi[mask]
+            if not len(values):
+                stats[band] = {"samples": 0}
+                continue
+            p10, median = np.percentile(values, [10, 50])
+            stats[band] = {
+                "samples": int(len(values)),
+                "min": int(values.min()),
+                "max": int(values.max()),
+                "mean": round(float(values.mean()), 1),
+                "median": round(float(median), 1),
+                "p10": round(float(p10), 1),
+            }
+        return stats
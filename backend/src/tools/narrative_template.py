@@ -0,0 +1,280 @@
+"""
+Deterministic narrative for Band Steering analyses.
+Renders the sections of the LLM report (executive summary, roaming
+protocols, band transitions, association stability, network quality,
+client behavior, conclusion) from the compliance checks, transitions and
+KVR support of the analysis, without any network call.
+"""
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from ..models.btm_schemas import BandSteeringAnalysis, BTMStatusCode, ComplianceCheck
+from ..utils.deauth_validator import DeauthValidator
+
+# Narrative modes (setting `analysis_narrative_mode`)
+NARRATIVE_TEMPLATE = "template"  # Template only, no LLM call
+NARRATIVE_LLM = "llm"  # LLM narrative (template if the LLM call fails)
+NARRATIVE_TEMPLATE_FIRST = "template_first"  # Template now, LLM narrative replaces it later
+NARRATIVE_MODES = (NARRATIVE_TEMPLATE, NARRATIVE_LLM, NARRATIVE_TEMPLATE_FIRST)
+
+# Narrative status of an analysis (`narrative_status`)
+NARRATIVE_PENDING = "pending"  # LLM narrative not generated yet
+NARRATIVE_COMPLETED = "completed"
+NARRATIVE_FAILED = "failed"  # LLM call failed, the template narrative is kept
+
+_SUCCESS_VERDICTS = ("SUCCESS", "EXCELLENT", "GOOD", "PREVENTIVE_SUCCESS")
+
+
+def _value(field: Any) -> Any:
+    """Plain value of an enum field (models may keep enum members)."""
+    return getattr(field, "value", field)
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.3f} s" if value is not None else "n/a"
+
+
+class NarrativeTemplate:
+    """
+    Builds the Markdown report of an analysis with the same section
+    structure as the LLM narrative. Only numbers present in the analysis
+    or its raw stats are used, and the verdict is never contradicted:
+    failed checks are the only causes given for a non-successful verdict.
+    """
+
+    def render(self, analysis: BandSteeringAnalysis, raw_data: Optional[Dict[str, Any]] = None) -> str:
+        raw_data = raw_data or {}
+        diagnostics = raw_data.get("diagnostics", {})
+        summary = (diagnostics.get("wireshark_raw") or {}).get("summary", {})
+
+        sections = [
+            ("EXECUTIVE SUMMARY", self._executive_summary(analysis)),
+            ("ROAMING PROTOCOL ANALYSIS (802.11k/v/r)", self._roaming_protocols(analysis, summary)),
+            ("BAND TRANSITION ANALYSIS", self._band_transitions(analysis, raw_data)),
+            ("ASSOCIATION STABILITY", self._association_stability(analysis, raw_data)),
+            ("NETWORK QUALITY", self._network_quality(diagnostics)),
+            ("CLIENT BEHAVIOR", self._client_behavior(analysis, raw_data, summary)),
+            ("FINAL CONCLUSION", self._conclusion(analysis)),
+        ]
+
+        lines = [f"## Band Steering Audit Report: {analysis.filename}", ""]
+        number = 0
+        for title, body in sections:
+            if not body:
+                continue
+            number += 1
+            lines.append(f"### {number}. {title}")
+            lines.append("")
+            lines.extend(body)
+            lines.append("")
+        return "\n".join(lines).rstrip() + "\n"
+
+    @staticmethod
+    def _failed_checks(analysis: BandSteeringAnalysis) -> List[ComplianceCheck]:
+        return [check for check in analysis.compliance_checks if not check.passed]
+
+    @staticmethod
+    def _is_success(analysis: BandSteeringAnalysis) -> bool:
+        return (analysis.verdict or "").upper() in _SUCCESS_VERDICTS
+
+    def _executive_summary(self, analysis: BandSteeringAnalysis) -> List[str]:
+        device = analysis.devices[0] if analysis.devices else None
+        device_name = " ".join(
+            part for part in (device.vendor, device.device_model) if part
+        ) if device else "Unknown device"
+        lines = [
+            f"**Verdict: {analysis.verdict}.** Device under test: {device_name}"
+            + (f" ({device.mac_address})" if device else "") + ".",
+            "",
+        ]
+
+        failed = self._failed_checks(analysis)
+        if self._is_success(analysis):
+            lines.append(
+                "The capture meets the band steering criteria: "
+                f"{analysis.successful_transitions} successful transition(s) and "
+                f"{analysis.btm_requests} BTM request(s) with a "
+                f"{analysis.btm_success_rate * 100:.1f}% success rate."
+            )
+            if failed:
+                lines.append("")
+                lines.append(
+                    "Observations that do not change the verdict: "
+                    + ", ".join(check.check_name for check in failed) + "."
+                )
+        elif failed:
+            lines.append("The verdict is caused by the following failed checks:")
+            lines.append("")
+            for check in failed:
+                lines.append(f"- **{check.check_name}**: FAILED ({check.details or check.description})")
+        else:
+            lines.append("No compliance check failed, but the capture does not show enough steering activity to confirm the behavior.")
+
+        passed = [check.check_name for check in analysis.compliance_checks if check.passed]
+        if passed:
+            lines.append("")
+            lines.append("Passed checks: " + ", ".join(passed) + ".")
+        return lines
+
+    @staticmethod
+    def _roaming_protocols(analysis: BandSteeringAnalysis, summary: Dict[str, Any]) -> List[str]:
+        kvr = analysis.kvr_support
+        supported = [name for name, flag in (("802.11k", kvr.k_support), ("802.11v", kvr.v_support), ("802.11r", kvr.r_support)) if flag]
+        missing = [name for name, flag in (("802.11k", kvr.k_support), ("802.11v", kvr.v_support), ("802.11r", kvr.r_support)) if not flag]
+
+        lines = [
+            "- Standards detected: " + (", ".join(supported) if supported else "none") + ".",
+        ]
+        if missing:
+            lines.append("- Not detected: " + ", ".join(missing) + ".")
+
+        btm = summary.get("btm", {})
+        lines.append(
+            f"- BTM (802.11v): {analysis.btm_requests} request(s), {analysis.btm_responses} response(s), "
+            f"success rate {analysis.btm_success_rate * 100:.1f}%."
+        )
+        if btm.get("responses_accept") or btm.get("responses_reject"):
+            lines.append(
+                f"- BTM responses: {btm.get('responses_accept', 0)} Accept, "
+                f"{btm.get('responses_reject', 0)} Reject."
+            )
+        codes = btm.get("status_codes") or []
+        if codes:
+            lines.append(
+                "- BTM status codes observed: "
+                + ", ".join(f"{code} ({BTMStatusCode.get_description(code)})" for code in codes)
+                + "."
+            )
+        if analysis.btm_requests and not analysis.btm_responses:
+            lines.append("- The client did not answer the BTM requests (no cooperation with the AP).")
+        return lines
+
+    @staticmethod
+    def _band_transitions(analysis: BandSteeringAnalysis, raw_data: Dict[str, Any]) -> List[str]:
+        transitions = analysis.transitions
+        steering = raw_data.get("steering_analysis", {})
+        if not transitions and not steering.get("preventive_steering"):
+            return ["- No steering transitions were detected in the capture."]
+
+        band_changes = sum(1 for t in transitions if t.is_band_change and t.is_successful)
+        types = Counter(_value(t.steering_type) for t in transitions)
+        lines = [
+            f"- Transitions detected: {len(transitions)}.",
+            f"- Steering attempts: {analysis.successful_transitions} successful, "
+            f"{analysis.failed_transitions} failed.",
+            f"- Successful band changes (2.4 GHz <-> 5 GHz): {band_changes}.",
+        ]
+        if types:
+            lines.append(
+                "- Steering type: "
+                + ", ".join(f"{count} {steering_type}" for steering_type, count in types.most_common())
+                + "."
+            )
+        if steering.get("preventive_steering"):
+            lines.append("- Preventive steering detected (the 2.4 GHz band was silenced for the client).")
+        if steering.get("avg_transition_time") or steering.get("max_transition_time"):
+            lines.append(
+                f"- Transition time: average {_seconds(steering.get('avg_transition_time'))}, "
+                f"maximum {_seconds(steering.get('max_transition_time'))}."
+            )
+
+        metrics = analysis.band_metrics or {}
+        if metrics.get("time_2_4ghz") or metrics.get("time_5ghz"):
+            lines.append(
+                f"- Time in band: {metrics.get('time_2_4ghz', 0.0)} s on 2.4 GHz, "
+                f"{metrics.get('time_5ghz', 0.0)} s on 5 GHz."
+            )
+        if analysis.loops_detected:
+            lines.append("- Band ping-pong (loop) detected: the client returned to a previous AP shortly after a transition.")
+
+        reasons = Counter(t.failure_reason for t in transitions if not t.is_successful and t.failure_reason)
+        for reason, count in reasons.most_common(3):
+            lines.append(f"- Failed transition cause: {reason} ({count}).")
+        return lines
+
+    @staticmethod
+    def _association_stability(analysis: BandSteeringAnalysis, raw_data: Dict[str, Any]) -> List[str]:
+        # Same client-scoped counts as the "Association and Reassociation" check
+        device = analysis.devices[0] if analysis.devices else None
+        disconnections = DeauthValidator.count_client_disconnections(
+            raw_data.get("steering_events", []), device.mac_address if device else None
+        )
+        failures = ((raw_data.get("diagnostics") or {}).get("band_counters") or {}).get("association_failures", [])
+        if not disconnections["deauth"] and not disconnections["disassoc"] and not failures:
+            return []
+
+        lines = [
+            f"- Disconnections directed to the client: {disconnections['deauth']} Deauthentication "
+            f"({disconnections['deauth_forced']} forced), {disconnections['disassoc']} Disassociation "
+            f"({disconnections['disassoc_forced']} forced).",
+        ]
+        if disconnections["reason_codes"]:
+            lines.append("- Reason codes: " + ", ".join(str(code) for code in disconnections["reason_codes"]) + ".")
+        if failures:
+            statuses = Counter(str(failure.get("status")) for failure in failures)
+            lines.append(
+                f"- Failed (re)association responses: {len(failures)} (status "
+                + ", ".join(f"{status} x{count}" for status, count in statuses.most_common())
+                + ")."
+            )
+        if disconnections["deauth"]:
+            lines.append("- Deauthentications interrupt the client's connection; cooperative steering (BTM) avoids them.")
+        return lines
+
+    @staticmethod
+    def _network_quality(diagnostics: Dict[str, Any]) -> List[str]:
+        metrics = [
+            ("TCP retransmissions", diagnostics.get("tcp_retransmissions")),
+            ("WLAN retries", diagnostics.get("wlan_retries")),
+            ("DNS errors", diagnostics.get("dns_errors")),
+        ]
+        present = [(name, value) for name, value in metrics if value is not None]
+        if not present:
+            return []
+        return ["- " + ", ".join(f"{name}: {value}" for name, value in present) + "."]
+
+    @staticmethod
+    def _client_behavior(
+        analysis: BandSteeringAnalysis,
+        raw_data: Dict[str, Any],
+        summary: Dict[str, Any],
+    ) -> List[str]:
+        lines = []
+        device = analysis.devices[0] if analysis.devices else None
+        if device:
+            lines.append(f"- Category: {_value(device.device_category)}.")
+            if device.is_virtual:
+                lines.append("- The MAC address is locally administered (randomized or virtual).")
+
+        for band, stats in sorted((raw_data.get("signal_stats") or {}).items()):
+            if stats.get("samples"):
+                lines.append(
+                    f"- RSSI on {band}: median {stats['median']} dBm "
+                    f"(min {stats['min']}, max {stats['max']}, {stats['samples']} samples)."
+                )
+
+        # BTM responses (Accept vs Reject), not transition success
+        btm = summary.get("btm", {})
+        accepts = btm.get("responses_accept", 0)
+        rejects = btm.get("responses_reject", 0)
+        if accepts or rejects:
+            cooperation = "cooperative" if accepts >= rejects else "mostly rejecting"
+            lines.append(f"- BTM behavior: {cooperation} ({accepts} Accept, {rejects} Reject).")
+        return lines
+
+    def _conclusion(self, analysis: BandSteeringAnalysis) -> List[str]:
+        if self._is_success(analysis):
+            return [
+                f"The band steering test is **successful** ({analysis.verdict}): the minimum criteria "
+                "of the compliance table were met."
+            ]
+        failed = self._failed_checks(analysis)
+        lines = [f"The band steering test result is **{analysis.verdict}**."]
+        recommendations = [check for check in failed if check.recommendation]
+        if recommendations:
+            lines.append("")
+            lines.append("Recommended actions:")
+            lines.append("")
+            for check in recommendations:
+                lines.append(f"- {check.check_name}: {check.recommendation}")
+        return lines
@@ -0,0 +1,148 @@
+"""
+Incremental snapshots of a capture parse in progress.
+Lets the UI show running counters, transitions and signal points while a
+large capture is still being parsed, instead of waiting for the whole
+analysis pipeline to finish.
+"""
+import time
+from typing import Dict, Any, Optional, Callable, Set, Tuple
+
+from ..utils.deauth_validator import REASSOC_TIMEOUT_SECONDS
+from .transition_engine import TransitionEngine
+
+# Rows between two clock checks (keeps the per-row cost to a counter increment)
+_CHECK_EVERY_ROWS = 1024
+
+
+class ParseSnapshotEmitter:
+    """
+    Builds a snapshot of the parse state at most every `interval_seconds`
+    and hands it to `callback`.
+
+    Each snapshot carries running frame and BTM / association / deauth
+    counters, the transitions detected since the previous snapshot and the
+    signal points of the (provisional) primary client added since then.
+    Transitions are only reported once they are older than
+    REASSOC_TIMEOUT_SECONDS, so an open deauth → reassoc sequence is not
+    reported as failed and then again as successful.
+    """
+
+    def __init__(
+        self,
+        tool,
+        callback: Callable[[Dict[str, Any]], None],
+        interval_seconds: float = 1.0,
+        signal_points: int = 100,
+        client_mac_hint: Optional[str] = None,
+    ):
+        self.tool = tool
+        self.callback = callback
+        self.interval_seconds = interval_seconds
+        self.signal_points = signal_points
+        self.client_mac_hint = client_mac_hint
+
+        self._started = time.monotonic()
+        self._next_emit = self._started + interval_seconds
+        self._rows = 0
+        self._sequence = 0
+        self._reported_transitions: Set[Tuple] = set()
+        self._signal_client: Optional[str] = None
+        self._signal_row = 0
+
+    def maybe_emit(self, state: Dict[str, Any]) -> None:
+        """Called once per parsed row; emits when the cadence interval has elapsed."""
+        self._rows += 1
+        if self._rows % _CHECK_EVERY_ROWS:
+            return
+        self.emit_if_due(state)
+
+    def emit_if_due(self, state: Dict[str, Any]) -> None:
+        if time.monotonic() >= self._next_emit:
+            self.emit(state)
+
+    def emit(self, state: Dict[str, Any]) -> None:
+        """Builds a snapshot now and passes it to the callback (errors are ignored)."""
+        self._next_emit = time.monotonic() + self.interval_seconds
+        try:
+            snapshot = self._build_snapshot(state)
+        except Exception:
+            return
+        try:
+            self.callback(snapshot)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _transition_key(transition: Dict[str, Any]) -> Tuple:
+        return (
+            transition.get("client"),
+            transition.get("type"),
+            transition.get("deauth_time") or transition.get("reassoc_time"),
+            transition.get("to_bssid"),
+        )
+
+    def _build_snapshot(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        tool = self.tool
+        frames = state["frames"]
+        steering_events = state["steering_events"]
+        bssid_info = state["bssid_info"]
+        frame_count = len(frames)
+
+        capture_seconds = 0.0
+        last_timestamp = None
+        if frame_count:
+            last_timestamp = frames.timestamps[-1]
+            capture_seconds = max(0.0, last_timestamp - frames.timestamps[0])
+
+        # New, settled transitions (same detection as the final analysis)
+        engine = TransitionEngine(bssid_info=bssid_info)
+        _, client_events, _ = engine.group_events(steering_events)
+        transitions = engine.detect_transitions(client_events)["transitions"]
+        new_transitions = []
+        if last_timestamp is not None:
+            settled_before = last_timestamp - REASSOC_TIMEOUT_SECONDS
+            for transition in transitions:
+                start = transition.get("deauth_time") or transition.get("reassoc_time") or 0
+                key = self._transition_key(transition)
+                if start <= settled_before and key not in self._reported_transitions:
+                    self._reported_transitions.add(key)
+                    new_transitions.append(transition)
+
+        # Provisional primary client; the chart restarts if it changes
+        client_mac = tool._select_primary_client_mac(
+            steering_events=steering_events,
+            signal_sources=frames.signal_sources(),
+            mac_occurrences=frames.mac_occurrences(),
+            bssid_info=bssid_info,
+            client_mac_hint=self.client_mac_hint,
+            mac_registry=frames.mac_registry,
+        )
+        signal_reset = False
+        if client_mac != self._signal_client:
+            signal_reset = self._signal_client is not None
+            self._signal_client = client_mac
+            self._signal_row = 0
+        signal_samples = []
+        if client_mac and client_mac != "Unknown":
+            signal_samples = frames.signal_samples_for(
+                client_mac,
+                max_points=self.signal_points,
+                start_row=self._signal_row,
+            )
+        self._signal_row = frame_count
+
+        self._sequence += 1
+        return {
+            "sequence": self._sequence,
+            "elapsed_seconds": round(time.monotonic() - self._started, 3),
+            "frames_parsed": frame_count,
+            "capture_seconds": round(capture_seconds, 3),
+            "counters": frames.summary_counts(),
+            "steering_events": len(steering_events),
+            "bssids": len(bssid_info),
+            "transitions_detected": len(self._reported_transitions),
+            "new_transitions": new_transitions,
+            "client_mac": client_mac,
+            "signal_reset": signal_reset,
+            "signal_samples": signal_samples,
+        }
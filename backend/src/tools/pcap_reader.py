@@ -0,0 +1,578 @@
+"""
+Native pcap / pcapng reader for 802.11 captures.
+Decodes the fields used by the band steering analysis directly from the
+radiotap and 802.11 headers with `mmap` + `struct`, avoiding tshark's process
+startup and full dissection. Rows have the same layout and value formats as
+`tshark -T fields` for `TSHARK_FIELDS`; anything the reader cannot decode
+raises `UnsupportedCaptureError` so the caller can fall back to tshark.
+"""
+import mmap
+import struct
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LINKTYPE_IEEE802_11 = 105
+LINKTYPE_IEEE802_11_RADIOTAP = 127
+SUPPORTED_LINKTYPES = {LINKTYPE_IEEE802_11, LINKTYPE_IEEE802_11_RADIOTAP}
+
+# Column positions, in the order of wireshark_tool.TSHARK_FIELDS
+FIELD_COUNT = 20
+F_TIME, F_PROTOCOLS, F_LEN = 0, 1, 4
+F_SUBTYPE, F_BSSID, F_SA, F_DA, F_FREQUENCY = 8, 9, 10, 11, 12
+F_REASON, F_SSID, F_CATEGORY, F_ACTION, F_BTM_STATUS, F_STATUS, F_SIGNAL = 13, 14, 15, 16, 17, 18, 19
+
+# pcap global header magic -> (byte order, nanosecond timestamps)
+_PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", False),
+    b"\xa1\xb2\xc3\xd4": (">", False),
+    b"\x4d\x3c\xb2\xa1": ("<", True),
+    b"\xa1\xb2\x3c\x4d": (">", True),
+}
+_PCAPNG_SHB = b"\x0a\x0d\x0d\x0a"
+
+# pcapng block types
+_BT_IDB = 1
+_BT_PB = 2
+_BT_SPB = 3
+_BT_EPB = 6
+
+# radiotap presence bit -> (alignment, size), for the bits up to XChannel
+_RADIOTAP_FIELDS = {
+    0: (8, 8),   # TSFT
+    1: (1, 1),   # Flags
+    2: (1, 1),   # Rate
+    3: (2, 4),   # Channel (freq, flags)
+    4: (1, 2),   # FHSS
+    5: (1, 1),   # dBm antenna signal
+    6: (1, 1),   # dBm antenna noise
+    7: (2, 2),   # Lock quality
+    8: (2, 2),   # TX attenuation
+    9: (2, 2),   # dB TX attenuation
+    10: (1, 1),  # dBm TX power
+    11: (1, 1),  # Antenna
+    12: (1, 1),  # dB antenna signal
+    13: (1, 1),  # dB antenna noise
+    14: (2, 2),  # RX flags
+    15: (2, 2),  # TX flags
+    16: (1, 1),  # RTS retries
+    17: (1, 1),  # Data retries
+    18: (4, 8),  # XChannel (flags, freq, channel, maxpower)
+}
+_RT_FLAGS_FCS = 0x10
+
+_U16LE = struct.Struct("<H")
+_U32LE = struct.Struct("<I")
+
+# Management frame subtypes whose body carries information elements, and the IE offset
+_IE_OFFSETS = {0: 4, 2: 10, 4: 0, 5: 12, 8: 12}
+
+
+class UnsupportedCaptureError(Exception):
+    """The capture uses a format, block or link type the native reader does not decode."""
+
+
+def _mac(frame, offset: int) -> str:
+    return frame[offset:offset + 6].hex(":")
+
+
+def _find_ssid(frame, offset: int) -> str:
+    """Returns the SSID element (tag 0) of an IE list, decoded as text."""
+    end = len(frame)
+    while offset + 2 <= end:
+        tag = frame[offset]
+        length = frame[offset + 1]
+        if tag == 0:
+            return bytes(frame[offset + 2:offset + 2 + length]).decode("utf-8", errors="replace")
+        offset += 2 + length
+    return ""
+
+
+def _parse_radiotap(data) -> Tuple[int, Optional[int], Optional[int], bool]:
+    """
+    Parses the radiotap header.
+    Returns (header length, frequency MHz, dBm signal, FCS at end of frame).
+    """
+    if len(data) < 8:
+        raise UnsupportedCaptureError("Truncated radiotap header")
+    rt_len = _U16LE.unpack_from(data, 2)[0]
+    present = _U32LE.unpack_from(data, 4)[0]
+    if rt_len < 8 or rt_len > len(data):
+        raise UnsupportedCaptureError("Invalid radiotap length")
+
+    # Skip extended presence bitmaps; we only decode fields of the first one
+    offset = 8
+    word = present
+    while word & 0x80000000:
+        if offset + 4 > rt_len:
+            raise UnsupportedCaptureError("Invalid radiotap presence bitmap")
+        word = _U32LE.unpack_from(data, offset)[0]
+        offset += 4
+
+    frequency = None
+    signal = None
+    fcs = False
+    for bit in range(19):
+        if not present & (1 << bit):
+            continue
+        align, size = _RADIOTAP_FIELDS[bit]
+        offset = (offset + align - 1) & ~(align - 1)
+        if offset + size > rt_len:
+            break
+        if bit == 1:
+            fcs = bool(data[offset] & _RT_FLAGS_FCS)
+        elif bit == 3:
+            frequency = _U16LE.unpack_from(data, offset)[0] or None
+        elif bit == 5:
+            signal = data[offset] - 256 if data[offset] > 127 else data[offset]
+        elif bit == 18 and frequency is None:
+            frequency = _U16LE.unpack_from(data, offset + 4)[0] or None
+        offset += size
+
+    return rt_len, frequency, signal, fcs
+
+
+def decode_frame(linktype: int, data, timestamp: str, orig_len: int) -> List[str]:
+    """Decodes one captured frame into a row of field values."""
+    fields = [""] * FIELD_COUNT
+    fields[F_TIME] = timestamp
+    fields[F_LEN] = str(orig_len)
+
+    if linktype == LINKTYPE_IEEE802_11_RADIOTAP:
+        rt_len, frequency, signal, fcs = _parse_radiotap(data)
+        frame = data[rt_len:]
+        fields[F_PROTOCOLS] = "radiotap:wlan_radio:wlan"
+        if frequency:
+            fields[F_FREQUENCY] = str(frequency)
+        if signal is not None:
+            fields[F_SIGNAL] = str(signal)
+        if fcs:
+            frame = frame[:-4]
+    elif linktype == LINKTYPE_IEEE802_11:
+        frame = data
+        fields[F_PROTOCOLS] = "wlan_radio:wlan"
+    else:
+        raise UnsupportedCaptureError(f"Unsupported link type {linktype}")
+
+    if len(frame) < 2:
+        return fields
+
+    fc0 = frame[0]
+    fc1 = frame[1]
+    frame_type = (fc0 >> 2) & 0x3
+    subtype = (fc0 >> 4) & 0xF
+    fields[F_SUBTYPE] = "0x%04x" % ((frame_type << 4) | subtype)
+
+    to_ds = fc1 & 0x01
+    from_ds = fc1 & 0x02
+    protected = fc1 & 0x40
+
+    if frame_type == 0:
+        # Management: DA = addr1, SA = addr2, BSSID = addr3
+        if len(frame) < 24:
+            return fields
+        fields[F_DA] = _mac(frame, 4)
+        fields[F_SA] = _mac(frame, 10)
+        fields[F_BSSID] = _mac(frame, 16)
+        if protected:
+            # Body is encrypted (PMF); tshark cannot decode it either
+            return fields
+
+        body = 28 if fc1 & 0x80 else 24  # +HT Control when the Order bit is set
+        if subtype in (1, 3):  # (Re)Association Response: capability, status, AID
+            if len(frame) >= body + 4:
+                fields[F_STATUS] = str(_U16LE.unpack_from(frame, body + 2)[0])
+        elif subtype in (10, 12):  # Disassociation / Deauthentication
+            if len(frame) >= body + 2:
+                fields[F_REASON] = str(_U16LE.unpack_from(frame, body)[0])
+        elif subtype == 11:  # Authentication: algorithm, sequence, status
+            if len(frame) >= body + 6:
+                fields[F_STATUS] = str(_U16LE.unpack_from(frame, body + 4)[0])
+        elif subtype == 13:  # Action
+            if len(frame) >= body + 2:
+                category = frame[body]
+                action = frame[body + 1]
+                fields[F_CATEGORY] = str(category)
+                fields[F_ACTION] = str(action)
+                # WNM BSS Transition Management Response: dialog token, status
+                if category == 10 and action == 8 and len(frame) >= body + 4:
+                    fields[F_BTM_STATUS] = str(frame[body + 3])
+
+        ie_offset = _IE_OFFSETS.get(subtype)
+        if ie_offset is not None:
+            fields[F_SSID] = _find_ssid(frame, body + ie_offset)
+
+    elif frame_type == 2:
+        # Data: address roles depend on the DS bits
+        if len(frame) < 24:
+            return fields
+        if not to_ds and not from_ds:
+            fields[F_DA], fields[F_SA], fields[F_BSSID] = _mac(frame, 4), _mac(frame, 10), _mac(frame, 16)
+        elif to_ds and not from_ds:
+            fields[F_BSSID], fields[F_SA], fields[F_DA] = _mac(frame, 4), _mac(frame, 10), _mac(frame, 16)
+        elif from_ds and not to_ds:
+            fields[F_DA], fields[F_BSSID], fields[F_SA] = _mac(frame, 4), _mac(frame, 10), _mac(frame, 16)
+        elif len(frame) >= 30:
+            # WDS: addr3 = DA, addr4 = SA, no BSSID
+            fields[F_DA], fields[F_SA] = _mac(frame, 16), _mac(frame, 24)
+
+    # Control frames only carry RA/TA, which are not part of the extracted fields
+    return fields
+
+
+def frame_addresses(linktype: int, data) -> List[bytes]:
+    """
+    Unicast addresses of a frame (addr1, addr2 and, for management and data
+    frames, addr3) as raw 6-byte values. Empty for unsupported link types.
+    """
+    if linktype == LINKTYPE_IEEE802_11_RADIOTAP:
+        try:
+            rt_len, _, _, fcs = _parse_radiotap(data)
+        except UnsupportedCaptureError:
+            return []
+        frame = data[rt_len:len(data) - 4] if fcs else data[rt_len:]
+    elif linktype == LINKTYPE_IEEE802_11:
+        frame = data
+    else:
+        return []
+
+    size = len(frame)
+    offsets = []
+    if size >= 10:
+        offsets.append(4)
+    if size >= 16:
+        offsets.append(10)
+    if size >= 22 and (frame[0] >> 2) & 0x3 in (0, 2):
+        offsets.append(16)
+    # Group (broadcast / multicast) addresses identify no station
+    return [bytes(frame[o:o + 6]) for o in offsets if not frame[o] & 0x01]
+
+
+class PcapReader:
+    """
+    Memory-mapped reader for pcap (micro/nanosecond, both byte orders) and
+    pcapng (SHB, IDB, EPB and obsolete PB blocks) captures with 802.11 or
+    radiotap link types.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def probe(self) -> None:
+        """
+        Validates the file header and the interfaces declared before the
+        first packet. Raises UnsupportedCaptureError if the native reader
+        cannot be used.
+        """
+        with open(self.file_path, "rb") as f:
+            header = f.read(64 * 1024)
+
+        if len(header) < 24:
+            raise UnsupportedCaptureError("File too short to be a capture")
+
+        magic = header[:4]
+        if magic in _PCAP_MAGICS:
+            endian, _ = _PCAP_MAGICS[magic]
+            linktype = struct.unpack_from(endian + "I", header, 20)[0] & 0xFFFF
+            if linktype not in SUPPORTED_LINKTYPES:
+                raise UnsupportedCaptureError(f"Unsupported link type {linktype}")
+            return
+
+        if magic != _PCAPNG_SHB:
+            raise UnsupportedCaptureError("Unknown capture format")
+
+        endian = self._pcapng_endian(header, 0)
+        offset = 0
+        while offset + 12 <= len(header):
+            block_type, block_len = struct.unpack_from(endian + "II", header, offset)
+            if block_len < 12 or block_len % 4:
+                raise UnsupportedCaptureError("Corrupt pcapng block")
+            if block_type == _BT_IDB:
+                if offset + 10 > len(header):
+                    break
+                linktype = struct.unpack_from(endian + "H", header, offset + 8)[0]
+                if linktype not in SUPPORTED_LINKTYPES:
+                    raise UnsupportedCaptureError(f"Unsupported link type {linktype}")
+            elif block_type == _BT_SPB:
+                raise UnsupportedCaptureError("Simple Packet Blocks carry no timestamps")
+            elif block_type in (_BT_EPB, _BT_PB):
+                break
+            offset += block_len
+
+    @staticmethod
+    def _pcapng_endian(buf, offset: int) -> str:
+        bom = bytes(buf[offset + 8:offset + 12])
+        if bom == b"\x4d\x3c\x2b\x1a":
+            return "<"
+        if bom == b"\x1a\x2b\x3c\x4d":
+            return ">"
+        raise UnsupportedCaptureError("Invalid pcapng byte-order magic")
+
+    def rows(self) -> Iterator[List[str]]:
+        """Yields one decoded row per captured frame, in file order."""
+        with open(self.file_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise UnsupportedCaptureError("Empty capture file")
+            try:
+                view = memoryview(mm)
+                try:
+                    magic = bytes(view[:4])
+                    if magic in _PCAP_MAGICS:
+                        yield from self._pcap_rows(view, *_PCAP_MAGICS[magic])
+                    elif magic == _PCAPNG_SHB:
+                        yield from self._pcapng_rows(view)
+                    else:
+                        raise UnsupportedCaptureError("Unknown capture format")
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+
+    def _pcap_rows(self, view, endian: str, nanoseconds: bool) -> Iterator[List[str]]:
+        size = len(view)
+        if size < 24:
+            raise UnsupportedCaptureError("Truncated pcap header")
+        linktype = struct.unpack_from(endian + "I", view, 20)[0] & 0xFFFF
+        if linktype not in SUPPORTED_LINKTYPES:
+            raise UnsupportedCaptureError(f"Unsupported link type {linktype}")
+
+        record = struct.Struct(endian + "IIII")
+        offset = 24
+        while offset + 16 <= size:
+            ts_sec, ts_frac, incl_len, orig_len = record.unpack_from(view, offset)
+            offset += 16
+            if offset + incl_len > size:
+                break  # Last record cut short: keep what was read, like tshark
+            timestamp = f"{ts_sec}.{ts_frac:09d}" if nanoseconds else f"{ts_sec}.{ts_frac:06d}000"
+            yield decode_frame(linktype, view[offset:offset + incl_len], timestamp, orig_len)
+            offset += incl_len
+
+    def _pcapng_rows(self, view) -> Iterator[List[str]]:
+        size = len(view)
+        offset = 0
+        endian = "<"
+        interfaces: List[Dict[str, int]] = []
+
+        while offset + 12 <= size:
+            if bytes(view[offset:offset + 4]) == _PCAPNG_SHB:
+                # New section: byte order and interfaces are reset
+                endian = self._pcapng_endian(view, offset)
+                interfaces = []
+            block_type, block_len = struct.unpack_from(endian + "II", view, offset)
+            if block_len < 12 or block_len % 4:
+                raise UnsupportedCaptureError("Corrupt pcapng block")
+            if offset + block_len > size:
+                break  # Last block cut short
+
+            if block_type == _BT_IDB:
+                interfaces.append(self._parse_idb(view, offset, block_len, endian))
+            elif block_type in (_BT_EPB, _BT_PB):
+                if block_type == _BT_EPB:
+                    iface_id, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(
+                        endian + "IIIII", view, offset + 8
+                    )
+                else:
+                    iface_id, _, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(
+                        endian + "HHIIII", view, offset + 8
+                    )
+                if iface_id >= len(interfaces):
+                    raise UnsupportedCaptureError("Packet references an unknown interface")
+                iface = interfaces[iface_id]
+                data_start = offset + 28
+                yield decode_frame(
+                    iface["linktype"],
+                    view[data_start:data_start + cap_len],
+                    self._pcapng_timestamp(iface, (ts_high << 32) | ts_low),
+                    orig_len,
+                )
+            elif block_type == _BT_SPB:
+                raise UnsupportedCaptureError("Simple Packet Blocks carry no timestamps")
+
+            offset += block_len
+
+    def _parse_idb(
+        self, view, offset: int, block_len: int, endian: str, check_linktype: bool = True
+    ) -> Dict[str, int]:
+        linktype = struct.unpack_from(endian + "H", view, offset + 8)[0]
+        if check_linktype and linktype not in SUPPORTED_LINKTYPES:
+            raise UnsupportedCaptureError(f"Unsupported link type {linktype}")
+
+        iface = {"linktype": linktype, "base": 10, "exponent": 6, "offset": 0}
+        opt = offset + 16
+        end = offset + block_len - 4
+        while opt + 4 <= end:
+            code, length = struct.unpack_from(endian + "HH", view, opt)
+            if code == 0:  # opt_endofopt
+                break
+            value = opt + 4
+            if code == 9 and length >= 1:  # if_tsresol
+                resolution = view[value]
+                iface["base"] = 2 if resolution & 0x80 else 10
+                iface["exponent"] = resolution & 0x7F
+            elif code == 14 and length >= 8:  # if_tsoffset (seconds)
+                iface["offset"] = struct.unpack_from(endian + "q", view, value)[0]
+            opt = value + ((length + 3) & ~3)
+        return iface
+
+    def _records(self, view) -> Iterator[Tuple[Optional[float], int, int, Optional[int], int, int]]:
+        """
+        Yields the raw records of the capture as (timestamp, start, end,
+        linktype, data_start, captured_length), without decoding frames (any
+        link type). Packets carry their epoch timestamp; headers (pcap global
+        header, pcapng non-packet blocks) have timestamp and linktype None.
+        """
+        size = len(view)
+        magic = bytes(view[:4])
+        if magic in _PCAP_MAGICS:
+            endian, nanoseconds = _PCAP_MAGICS[magic]
+            if size < 24:
+                raise UnsupportedCaptureError("Truncated pcap header")
+            yield None, 0, 24, None, 0, 0
+            linktype = struct.unpack_from(endian + "I", view, 20)[0] & 0xFFFF
+            record = struct.Struct(endian + "IIII")
+            scale = 1e-9 if nanoseconds else 1e-6
+            offset = 24
+            while offset + 16 <= size:
+                ts_sec, ts_frac, incl_len, _ = record.unpack_from(view, offset)
+                end = offset + 16 + incl_len
+                if end > size:
+                    break
+                yield ts_sec + ts_frac * scale, offset, end, linktype, offset + 16, incl_len
+                offset = end
+            return
+
+        if magic != _PCAPNG_SHB:
+            raise UnsupportedCaptureError("Unknown capture format")
+        offset = 0
+        endian = "<"
+        interfaces: List[Dict[str, int]] = []
+        while offset + 12 <= size:
+            if bytes(view[offset:offset + 4]) == _PCAPNG_SHB:
+                endian = self._pcapng_endian(view, offset)
+                interfaces = []
+            block_type, block_len = struct.unpack_from(endian + "II", view, offset)
+            if block_len < 12 or block_len % 4:
+                raise UnsupportedCaptureError("Corrupt pcapng block")
+            end = offset + block_len
+            if end > size:
+                break
+
+            if block_type in (_BT_EPB, _BT_PB):
+                if block_type == _BT_EPB:
+                    iface_id, ts_high, ts_low, cap_len = struct.unpack_from(endian + "IIII", view, offset + 8)
+                else:
+                    iface_id, _, ts_high, ts_low, cap_len = struct.unpack_from(endian + "HHIII", view, offset + 8)
+                if iface_id >= len(interfaces):
+                    raise UnsupportedCaptureError("Packet references an unknown interface")
+                iface = interfaces[iface_id]
+                timestamp = float(self._pcapng_timestamp(iface, (ts_high << 32) | ts_low))
+                yield timestamp, offset, end, iface["linktype"], offset + 28, cap_len
+            elif block_type == _BT_SPB:
+                raise UnsupportedCaptureError("Simple Packet Blocks carry no timestamps")
+            else:
+                if block_type == _BT_IDB:
+                    interfaces.append(self._parse_idb(view, offset, block_len, endian, check_linktype=False))
+                yield None, offset, end, None, 0, 0
+            offset = end
+
+    def records(self) -> Iterator[Tuple[Optional[float], int, int, Optional[int], Optional[memoryview]]]:
+        """
+        Yields (timestamp, start, end, linktype, frame data) for every record
+        of the capture, in file order. Headers have timestamp, linktype and
+        data None. The data view is only valid until the next record.
+        """
+        with open(self.file_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise UnsupportedCaptureError("Empty capture file")
+            try:
+                view = memoryview(mm)
+                try:
+                    for timestamp, start, end, linktype, data_start, cap_len in self._records(view):
+                        if timestamp is None:
+                            yield None, start, end, None, None
+                            continue
+                        with view[data_start:data_start + cap_len] as data:
+                            yield timestamp, start, end, linktype, data
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+
+    def count_packets(self) -> int:
+        """Number of packets in the capture (headers only, frames are not decoded)."""
+        with open(self.file_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return 0
+            try:
+                view = memoryview(mm)
+                try:
+                    return sum(1 for record in self._records(view) if record[0] is not None)
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+
+    def split_time_ranges(self, windows: List[Tuple[float, float]], output_paths: List[str]) -> List[int]:
+        """
+        Writes the packets of every time window ([start, end], inclusive) to
+        its output file in one sequential read of the capture, counting them
+        as they are written. Headers are copied to every output, so each
+        fragment is a valid capture in the input's format. Returns the packet
+        count of each window.
+        """
+        order = sorted(range(len(windows)), key=lambda i: windows[i][0])
+        starts = [windows[i][0] for i in order]
+        max_span = max((end - start for start, end in windows), default=0.0)
+        counts = [0] * len(windows)
+
+        with open(self.file_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise UnsupportedCaptureError("Empty capture file")
+            outputs = [open(path, "wb", buffering=1024 * 1024) for path in output_paths]
+            try:
+                view = memoryview(mm)
+                try:
+                    for timestamp, start, end, _, _, _ in self._records(view):
+                        with view[start:end] as record:
+                            if timestamp is None:
+                                for output in outputs:
+                                    output.write(record)
+                                continue
+                            # Only windows starting in [timestamp - max_span, timestamp] can contain it
+                            first = bisect_left(starts, timestamp - max_span)
+                            last = bisect_right(starts, timestamp)
+                            for position in range(first, last):
+                                index = order[position]
+                                if timestamp <= windows[index][1]:
+                                    outputs[index].write(record)
+                                    counts[index] += 1
+                finally:
+                    view.release()
+            finally:
+                for output in outputs:
+                    output.close()
+                mm.close()
+        return counts
+
+    @staticmethod
+    def _pcapng_timestamp(iface: Dict[str, int], ticks: int) -> str:
+        """Formats a pcapng timestamp like frame.time_epoch (nanoseconds)."""
+        exponent = iface["exponent"]
+        if iface["base"] == 10:
+            units = 10 ** exponent
+            seconds, fraction = divmod(ticks, units)
+            if exponent <= 9:
+                nanos = fraction * 10 ** (9 - exponent)
+            else:
+                nanos = fraction // 10 ** (exponent - 9)
+        else:
+            seconds = ticks >> exponent
+            nanos = ((ticks & ((1 << exponent) - 1)) * 1_000_000_000) >> exponent
+        return f"{seconds + iface['offset']}.{nanos:09d}"
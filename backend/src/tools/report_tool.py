@@ -7,6 +7,9 @@ import json
 from pathlib import Path
 from typing import Optional
 
+from ..core.analysis_catalog import get_analysis_catalog
+from ..core.analysis_storage import load_analysis
+
 # Limit: ~8k tokens ≈ 6000 characters. We need to include all the data
 # structured for the agent to respond with precision.
 MAX_REPORT_CHARS = 6000
@@ -25,13 +28,14 @@ def _load_report_json(report_id: str) -> Optional[dict]:
     base_dir = _get_base_dir()
     if not base_dir.exists():
         return None
-    for path in base_dir.glob(f"**/{report_id}.json"):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError):
-            return None
-    return None
+    path = get_analysis_catalog(base_dir).find_json(report_id)
+    if path is None:
+        return None
+    try:
+        # The summary is enough: raw stats are not part of the report summary
+        return load_analysis(path, include_raw=False)
+    except (json.JSONDecodeError, OSError):
+        return None
 
 
 def _build_summary(data: dict, user_question: Optional[str] = None) -> str:
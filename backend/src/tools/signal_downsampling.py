@@ -0,0 +1,70 @@
+"""
+Shape-preserving downsampling of RSSI series for the signal chart.
+Largest-Triangle-Three-Buckets keeps, in every bucket, the point that
+forms the largest triangle with its neighbours, so the dips around a
+roaming event survive where a fixed `[::step]` stride would drop them.
+"""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the `threshold` points LTTB selects from the series (x, y).
+    `x` must be non-decreasing. Returns every index when the series already
+    fits.
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket boundaries over the inner points (first and last are always kept)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if end <= start:
+            end = start + 1
+
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = min(n, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area for every candidate of this bucket
+        px, py = x[previous], y[previous]
+        areas = np.abs(
+            (px - avg_x) * (y[start:end] - py)
+            - (px - x[start:end]) * (avg_y - py)
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def downsample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    keep: np.ndarray = None,
+) -> np.ndarray:
+    """
+    LTTB selection of about `max_points` indices plus the indices in `keep`
+    (e.g. the samples where the band changes), sorted and unique.
+    """
+    indices = lttb_indices(x, y, max_points)
+    if keep is not None and len(keep):
+        indices = np.union1d(indices, keep)
+    return indices
@@ -0,0 +1,457 @@
+"""
+Band steering transition engine.
+Consumes the parsed steering events once (sort, group by client) and, over
+the same client timelines, produces the transitions and counters of
+WiresharkTool (`steering_analysis`) and the association-driven transitions
+BTMAnalyzer reports as `SteeringTransition`.
+"""
+from typing import Dict, Any, Optional, List, Tuple
+
+from ..models.btm_schemas import SteeringTransition, SteeringType
+from ..utils.deauth_validator import DeauthValidator, REASSOC_TIMEOUT_SECONDS
+from ..utils.mac_registry import MacRegistry, normalize_mac
+from .event_timeline import ClientTimeline, RESPONSE_SUBTYPES
+
+# Association status codes of a successful (Re)Association Response
+_ASSOC_SUCCESS_CODES = frozenset({"0", "0x00", "0x0", "0x0000"})
+
+
+def normalize_band(band: Optional[str]) -> Optional[str]:
+    if not band:
+        return None
+    band_str = str(band).lower()
+    if "5" in band_str:
+        return "5GHz"
+    if "2.4" in band_str or "2,4" in band_str:
+        return "2.4GHz"
+    return band
+
+
+def classify_transition(
+    reassoc_found: bool,
+    transition_time: Optional[float],
+    is_band_change: bool,
+    is_bssid_change: bool,
+    returned_to_original: bool,
+) -> str:
+    """Classifies a steering transition based on its quality."""
+    if not reassoc_found:
+        return "NO_REASSOC"
+
+    if returned_to_original:
+        return "LOOP"
+
+    if not (is_band_change or is_bssid_change):
+        return "NO_CHANGE"
+
+    if transition_time < 2.0:  # Increased from 1.0 to 2.0 for SUCCESS
+        return "SUCCESS"
+    elif transition_time < 8.0:  # Increased from 3.0 to 8.0 for SLOW
+        return "SLOW"
+    else:
+        return "TIMEOUT"
+
+
+class TransitionEngine:
+    """
+    Detects aggressive (Deauth/Disassoc → Reassoc) and assisted (BTM /
+    direct Reassoc) transitions per client.
+
+    `bssid_info` is the BSSID table of the parse; when it is not available
+    (e.g. BTMAnalyzer used on its own) the BSSIDs seen in the events are used
+    to tell APs from clients.
+    """
+
+    def __init__(self, bssid_info: Optional[Dict[str, Any]] = None, mac_registry: Optional[MacRegistry] = None):
+        self.bssid_info = bssid_info
+        self.mac_registry = mac_registry or MacRegistry()
+        # BSSIDs seen in the events themselves (filled by group_events)
+        self.event_bssids: set = set()
+
+    def group_events(self, events: list) -> Tuple[list, Dict[str, ClientTimeline], Dict[str, Dict[str, int]]]:
+        """
+        Sorts events by time and groups them by client, filtering known BSSIDs.
+        The same pass counts BTM requests / accepted responses per client.
+        """
+        sorted_events = sorted(events, key=lambda x: x["timestamp"])
+
+        if self.bssid_info is None:
+            self.bssid_info = {e.get("bssid"): {} for e in sorted_events if e.get("bssid")}
+        mac_registry = self.mac_registry
+        for bssid in self.bssid_info:
+            mac_registry.add_bssid(bssid)
+        bssid_ids = mac_registry.bssid_ids
+        intern = mac_registry.intern
+
+        grouped: Dict[str, list] = {}
+        # BTM frames without a client are kept under None: they count in the
+        # capture-wide totals, never in a client's
+        btm_by_client: Dict[Optional[str], Dict[str, int]] = {}
+        event_bssids = self.event_bssids
+        for event in sorted_events:
+            client = event.get("client_mac")
+            bssid = event.get("bssid") or event.get("ap_bssid")
+            if bssid:
+                event_bssids.add(normalize_mac(bssid))
+            if event.get("type") == "btm":
+                counts = btm_by_client.setdefault(client or None, {"requests": 0, "accepts": 0})
+                if event.get("event_type") == "request":
+                    counts["requests"] += 1
+                elif event.get("event_type") == "response" and str(event.get("status_code")) == "0":
+                    counts["accepts"] += 1
+            if not client:
+                continue
+            client_id = intern(client)
+            if client_id not in bssid_ids:
+                mac_registry.client_ids.add(client_id)
+                grouped.setdefault(client, []).append(event)
+
+        client_events = {
+            client: ClientTimeline(client, client_list)
+            for client, client_list in grouped.items()
+        }
+        return sorted_events, client_events, btm_by_client
+
+    def count_btm(
+        self,
+        btm_by_client: Dict[str, Dict[str, int]],
+        band_counters: Optional[dict],
+        primary_client_mac: Optional[str],
+    ) -> Tuple[int, int]:
+        """Steering attempts and successes based on BTM requests / accepted responses."""
+        if not band_counters or "btm_stats" not in band_counters:
+            return 0, 0
+
+        if primary_client_mac:
+            counts = btm_by_client.get(primary_client_mac, {})
+            return counts.get("requests", 0), counts.get("accepts", 0)
+
+        accepts = sum(counts["accepts"] for counts in btm_by_client.values())
+        return band_counters["btm_stats"].get("requests", 0), accepts
+
+    def detect_transitions(self, client_events: Dict[str, ClientTimeline]) -> Dict[str, Any]:
+        """
+        Analyzes aggressive and assisted transitions by client.
+        Linear in the number of events: look-ahead searches use the
+        timeline indexes instead of scanning the remaining events.
+        """
+        result = {
+            "transitions": [],
+            "attempts": 0,
+            "successes": 0,
+            "failures": 0,
+            "loop_detected": False,
+            "transition_times": [],
+        }
+
+        for client_mac, timeline in client_events.items():
+            if len(timeline) < 2:
+                continue
+
+            current_bssid = None
+            last_reassoc_time = None
+            last_btm_request = None
+            last_btm_status = None
+
+            for i, event in enumerate(timeline):
+                event_subtype = event["subtype"]
+
+                if event.get("type") == "btm":
+                    if event.get("event_type") == "request":
+                        last_btm_request = event
+                        last_btm_status = None
+                    else:
+                        last_btm_status = event.get("status_code")
+                    continue
+
+                # Case 1: Aggressive steering (Deauth/Disassoc → Reassoc)
+                if event_subtype in (10, 12):
+                    transition = self._aggressive_transition(client_mac, event, timeline, i, current_bssid)
+                    if transition is None:
+                        continue
+                    self._record(result, transition)
+                    if transition["reassoc_time"] is not None and transition["to_bssid"]:
+                        current_bssid = transition["to_bssid"]
+
+                # Case 2: Assisted steering (Direct Reassociation)
+                elif event_subtype in (2, 3):
+                    new_bssid = event["bssid"]
+                    btm_request = last_btm_request
+                    if btm_request and event["timestamp"] - btm_request["timestamp"] >= REASSOC_TIMEOUT_SECONDS:
+                        btm_request = None
+                    if current_bssid and new_bssid and current_bssid != new_bssid:
+                        transition = self._assisted_transition(
+                            client_mac, event, timeline, i,
+                            current_bssid, last_reassoc_time,
+                            btm_request, last_btm_status if btm_request else None,
+                        )
+                        self._record(result, transition)
+                        # A BTM Request starts at most one transition
+                        last_btm_request = None
+                    if new_bssid:
+                        current_bssid = new_bssid
+                        last_reassoc_time = event["timestamp"]
+
+                # Update current BSSID for initial Association
+                elif event_subtype in (0, 1) and event.get("bssid"):
+                    if not current_bssid:
+                        current_bssid = event["bssid"]
+                        last_reassoc_time = event["timestamp"]
+
+        return result
+
+    @staticmethod
+    def _record(result: Dict[str, Any], transition: Dict[str, Any]) -> None:
+        status = transition["status"]
+        result["transitions"].append(transition)
+        result["attempts"] += 1
+        if status == "SUCCESS":
+            result["successes"] += 1
+        elif status in ("LOOP", "NO_REASSOC") or (status == "TIMEOUT" and transition["type"] == "aggressive"):
+            result["failures"] += 1
+        if transition["returned_to_original"]:
+            result["loop_detected"] = True
+        if transition["transition_time"] is not None:
+            result["transition_times"].append(transition["transition_time"])
+
+    @staticmethod
+    def _aggressive_transition(
+        client_mac: str,
+        event: dict,
+        timeline: ClientTimeline,
+        start_index: int,
+        current_bssid: Optional[str],
+    ) -> Optional[Dict[str, Any]]:
+        """Transition started by a forced Deauth/Disassoc (None if not forced)."""
+        is_forced, _, _ = DeauthValidator.validate_and_classify(event, client_mac)
+        if not is_forced:
+            return None
+
+        deauth_time = event["timestamp"]
+        deauth_bssid = event.get("bssid")
+        deauth_band = event["band"]
+
+        reassoc_found = False
+        reassoc_time = None
+        new_bssid = None
+        new_band = None
+
+        # Only the first (Re)Association Response within the timeout decides
+        response_index = timeline.next_of(
+            RESPONSE_SUBTYPES,
+            after=start_index,
+            max_timestamp=deauth_time + REASSOC_TIMEOUT_SECONDS,
+        )
+        if response_index is not None:
+            response = timeline[response_index]
+            status_code = str(response.get("assoc_status_code", "0"))
+            if not status_code.isdigit() or int(status_code) == 0:
+                reassoc_found = True
+                reassoc_time = response["timestamp"]
+                new_bssid = response["bssid"]
+                new_band = response["band"]
+
+        transition_time = reassoc_time - deauth_time if reassoc_time is not None else None
+
+        deauth_band_norm = normalize_band(deauth_band)
+        new_band_norm = normalize_band(new_band)
+        is_band_change = bool(deauth_band_norm and new_band_norm and deauth_band_norm != new_band_norm)
+        is_bssid_change = bool(deauth_bssid and new_bssid and deauth_bssid != new_bssid)
+        returned_to_original = bool(reassoc_found and new_bssid and current_bssid and new_bssid == current_bssid)
+
+        return {
+            "client": client_mac,
+            "type": "aggressive",
+            "deauth_time": deauth_time,
+            "reassoc_time": reassoc_time,
+            "transition_time": transition_time,
+            "from_bssid": deauth_bssid,
+            "to_bssid": new_bssid,
+            "from_band": deauth_band,
+            "to_band": new_band,
+            "is_band_change": is_band_change,
+            "reason_code": event["reason_code"],
+            "status": classify_transition(
+                reassoc_found, transition_time, is_band_change, is_bssid_change, returned_to_original
+            ),
+            "returned_to_original": returned_to_original,
+            "btm_request_time": None,
+            "btm_status_code": None,
+        }
+
+    def _assisted_transition(
+        self,
+        client_mac: str,
+        event: dict,
+        timeline: ClientTimeline,
+        start_index: int,
+        current_bssid: str,
+        last_reassoc_time: Optional[float],
+        btm_request: Optional[dict],
+        btm_status: Optional[int],
+    ) -> Dict[str, Any]:
+        """Transition to a new BSSID by direct reassociation (BTM-assisted or not)."""
+        new_bssid = event["bssid"]
+        new_band = event["band"]
+        reassoc_time = event["timestamp"]
+
+        transition_time = reassoc_time - last_reassoc_time if last_reassoc_time else None
+
+        old_band = (self.bssid_info.get(current_bssid) or {}).get("band")
+        old_band_norm = normalize_band(old_band)
+        new_band_norm = normalize_band(new_band)
+        is_band_change = bool(old_band_norm and new_band_norm and old_band_norm != new_band_norm)
+
+        # Ping-pong: back to the previous BSSID within the next 4 events
+        returned_to_original = any(
+            timeline[next_index].get("bssid") == current_bssid
+            for next_index in range(start_index + 1, min(start_index + 5, len(timeline)))
+        )
+
+        return {
+            "client": client_mac,
+            "type": "assisted",
+            "deauth_time": None,
+            "reassoc_time": reassoc_time,
+            "transition_time": transition_time,
+            "from_bssid": current_bssid,
+            "to_bssid": new_bssid,
+            "from_band": old_band,
+            "to_band": new_band,
+            "is_band_change": is_band_change,
+            "reason_code": None,
+            "status": classify_transition(True, transition_time, is_band_change, True, returned_to_original),
+            "returned_to_original": returned_to_original,
+            "btm_request_time": btm_request["timestamp"] if btm_request else None,
+            "btm_status_code": btm_status,
+        }
+
+    @staticmethod
+    def _is_btm_request(event: dict) -> bool:
+        return (
+            (event.get("type") == "btm" and event.get("event_type") == "request")
+            or (event.get("subtype") == 13 and str(event.get("action_code", "")) == "7")
+        )
+
+    def detect_association_transitions(self, client_events: Dict[str, ClientTimeline]) -> List[Dict[str, Any]]:
+        """
+        Transitions as BTMAnalyzer reports them (`SteeringTransition` fields):
+        every successful (Re)Association Response closes one, started by the
+        client's last forced Deauth/Disassoc (aggressive) or BTM Request
+        (assisted) within the reassociation timeout, or by itself (unknown).
+        Consecutive transitions of a client on different bands are marked as
+        band changes.
+        """
+        transitions = []
+
+        for client_mac, timeline in client_events.items():
+            # Clients that also act as a BSSID in the events are APs
+            if normalize_mac(client_mac) in self.event_bssids:
+                continue
+
+            last_btm_request = None
+            last_deauth = None
+
+            for event in timeline:
+                subtype = event.get("subtype")
+
+                if self._is_btm_request(event):
+                    last_btm_request = event
+                elif event.get("type") in ("Deauthentication", "Disassociation") or subtype in (10, 12):
+                    is_forced, _, _ = DeauthValidator.validate_and_classify(event, client_mac)
+                    if is_forced:
+                        last_deauth = event
+
+                is_response = (
+                    event.get("type") in ("Reassociation Response", "Association Response")
+                    or subtype in RESPONSE_SUBTYPES
+                )
+                if not is_response or str(event.get("assoc_status_code", "")) not in _ASSOC_SUCCESS_CODES:
+                    continue
+
+                end_time = event["timestamp"]
+                if last_deauth is not None and end_time - last_deauth["timestamp"] < REASSOC_TIMEOUT_SECONDS:
+                    start_event, steering_type = last_deauth, SteeringType.AGGRESSIVE
+                    last_deauth = None
+                elif last_btm_request is not None and end_time - last_btm_request["timestamp"] < REASSOC_TIMEOUT_SECONDS:
+                    # The BTM Request stays active: several reassociations may follow it
+                    start_event, steering_type = last_btm_request, SteeringType.ASSISTED
+                else:
+                    # Spontaneous roaming, or assisted without the Request captured
+                    start_event, steering_type = event, SteeringType.UNKNOWN
+
+                from_band = start_event.get("band")
+                to_band = event.get("band")
+                transitions.append({
+                    "client_mac": client_mac,
+                    "steering_type": steering_type.value,
+                    "start_time": start_event["timestamp"],
+                    "end_time": end_time,
+                    "duration": end_time - start_event["timestamp"],
+                    "from_bssid": start_event.get("bssid"),
+                    "to_bssid": event.get("bssid"),
+                    "from_band": from_band,
+                    "to_band": to_band,
+                    "is_successful": True,
+                    "is_band_change": bool(from_band and to_band and from_band != to_band),
+                })
+
+        # A client seen on different bands in consecutive transitions changed
+        # band between them, even if neither transition shows it on its own
+        last_band_by_client: Dict[str, str] = {}
+        for transition in sorted(transitions, key=lambda t: t["start_time"]):
+            band = transition["to_band"] or transition["from_band"]
+            if not band:
+                continue
+            last_band = last_band_by_client.get(transition["client_mac"])
+            if last_band and last_band != band:
+                if not transition["from_band"]:
+                    transition["from_band"] = last_band
+                transition["to_band"] = band
+                transition["is_band_change"] = True
+            last_band_by_client[transition["client_mac"]] = band
+
+        return transitions
+
+    def analyze(
+        self,
+        events: list,
+        band_counters: Optional[dict] = None,
+        primary_client_mac: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Full pass over the steering events: transitions plus the aggregated
+        attempt / success / failure counters and transition time metrics.
+        """
+        _, client_events, btm_by_client = self.group_events(events)
+        btm_attempts, btm_successes = self.count_btm(btm_by_client, band_counters, primary_client_mac)
+        detected = self.detect_transitions(client_events)
+        association_transitions = self.detect_association_transitions(client_events)
+
+        transitions = detected["transitions"]
+        transition_times = detected["transition_times"]
+        attempts = max(btm_attempts + detected["attempts"], len(transitions))
+        successes = btm_successes + detected["successes"]
+
+        avg_time = sum(transition_times) / len(transition_times) if transition_times else 0.0
+        max_time = max(transition_times) if transition_times else 0.0
+
+        return {
+            "transitions": transitions,
+            "association_transitions": association_transitions,
+            "steering_attempts": attempts,
+            "successful_transitions": successes,
+            "failed_transitions": max(0, attempts - successes),
+            "transition_failures": detected["failures"],
+            "loop_detected": detected["loop_detected"] or len(transitions) > 3,
+            "avg_transition_time": round(avg_time, 3),
+            "max_transition_time": round(max_time, 3),
+            "transition_times": transition_times,
+            "clients_analyzed": len(client_events),
+            "btm_by_client": btm_by_client,
+        }
+
+    @staticmethod
+    def to_steering_transitions(transitions: List[Dict[str, Any]]) -> List[SteeringTransition]:
+        """Builds `SteeringTransition` objects from `detect_association_transitions` dicts."""
+        return [SteeringTransition(**transition) for transition in transitions or []]
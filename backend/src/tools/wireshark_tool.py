@@ -6,12 +6,47 @@ structures that act as the source of truth for the rest of the system.
 
 import os
 from collections import Counter
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Iterator, Set, Callable
 
 from openai import OpenAI
 from ..settings import settings
-from ..utils.deauth_validator import DeauthValidator, REASSOC_TIMEOUT_SECONDS
-
+from ..utils.mac_registry import MacRegistry, normalize_mac, MAC_BROADCAST
+from .frame_table import FrameTable
+from .pcap_reader import PcapReader, UnsupportedCaptureError, F_BSSID, F_SSID
+from .capture_scope import CaptureScope
+from .parse_snapshots import ParseSnapshotEmitter
+from .transition_engine import TransitionEngine
+
+# Fields extracted from tshark, in the column order `_ingest_row` unpacks them
+TSHARK_FIELDS = (
+    "frame.time_epoch",
+    "frame.protocols",
+    "ip.src",
+    "ip.dst",
+    "frame.len",
+    "tcp.analysis.retransmission",
+    "wlan.fc.retry",
+    "dns.flags.rcode",
+    "wlan.fc.type_subtype",
+    "wlan.bssid",
+    "wlan.sa",  # Source Address (cliente)
+    "wlan.da",  # Destination Address
+    "wlan_radio.frequency",  # Frecuencia (2.4GHz vs 5GHz)
+    "wlan.fixed.reason_code",  # Reason code for deauth/disassoc
+    "wlan.ssid",  # SSID
+    # Campos BTM (802.11v) - Campos reales de Wireshark 4.6.2
+    "wlan.fixed.category_code",                # Category (10 = WNM)
+    "wlan.fixed.action_code",                  # Action (7=Req, 8=Resp)
+    "wlan.fixed.bss_transition_status_code",   # BTM Status Code (v1)
+    "wlan.fixed.status_code",       # Association Status Code (0=Success)
+    "wlan_radio.signal_dbm",        # RSSI / Signal Strength
+)
+
+# Hard limit for a single tshark run
+TSHARK_TIMEOUT_SECONDS = 300
+
+# Frame subtypes that produce band steering events (assoc, reassoc, disassoc, deauth, action)
+EVENT_SUBTYPES = frozenset({0, 1, 2, 3, 10, 12, 13})
 
 class WiresharkTool:
 
@@ -121,752 +156,1284 @@ class WiresharkTool:
             # Default: use direct values
             return (wlan_sa or 'N/A', wlan_da or 'Broadcast', wlan_sa, wlan_da)
 
+    def get_tshark_version(self) -> str:
+        """Returns the first line of `tshark --version` (cached per instance)."""
+        if getattr(self, "_tshark_version", None) is None:
+            import subprocess
+            import shutil
+
+            version = "unavailable"
+            tshark_path = shutil.which("tshark")
+            if tshark_path:
+                try:
+                    result = subprocess.run(
+                        [tshark_path, "--version"],
+                        capture_output=True,
+                        text=True,
+                        timeout=30,
+                        check=False,
+                    )
+                    lines = result.stdout.strip().splitlines()
+                    if lines:
+                        version = lines[0].strip()
+                except Exception:
+                    pass
+            self._tshark_version = version
+        return self._tshark_version
+
+    def _build_tshark_command(self, tshark_path: str, file_path: str) -> List[str]:
+        """Builds the tshark field-extraction command for `TSHARK_FIELDS`."""
+        cmd = [tshark_path, "-r", file_path, "-T", "fields"]
+        for field in TSHARK_FIELDS:
+            cmd.extend(["-e", field])
+        return cmd
+
+    def _stream_tshark_rows(self, cmd: List[str], timeout: float = TSHARK_TIMEOUT_SECONDS) -> Iterator[str]:
+        """
+        Runs tshark and yields its stdout line by line as it is produced.
+        Only one line is held in memory at a time, so the parser overlaps with
+        tshark's dissection and memory does not grow with the capture size.
+        stderr goes to a temporary file so a chatty tshark can never block on a
+        full pipe while we are reading stdout.
+        """
+        import subprocess
+        import tempfile
+        import threading
+
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                bufsize=1024 * 1024,
+            )
+            timed_out = threading.Event()
+
+            def _kill_on_timeout():
+                timed_out.set()
+                process.kill()
+
+            watchdog = threading.Timer(timeout, _kill_on_timeout)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                for line in process.stdout:
+                    yield line
+                returncode = process.wait()
+            finally:
+                watchdog.cancel()
+                # The consumer may stop early (or raise); never leave tshark running
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            if returncode != 0:
+                stderr_file.seek(0)
+                raise RuntimeError(stderr_file.read() or "Error executing tshark")
+
     def _extract_basic_stats(
         self,
         file_path: str,
-        max_packets: int = 2000,
+        max_packets: Optional[int] = None,
         ssid_filter: Optional[str] = None,
         client_mac_hint: Optional[str] = None,
+        scope: Optional[CaptureScope] = None,
+        snapshot_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        multi_client: bool = False,
     ) -> Dict[str, Any]:
         """
         Extracts detailed capture statistics with a focus on band steering.
         Analyzes time sequences, BSSID transitions, and quality metrics.
+        tshark output is consumed as a stream: each row is parsed as soon as
+        tshark emits it and is then discarded. Large captures are split into
+        slices that are dissected in parallel (see `_parse_capture_parallel`).
+
+        `max_packets` / `ssid_filter` (or a full `scope`) enable a scoped
+        analysis: only matching frames are parsed, parsing may stop early,
+        and `stats["scope"]` reports what was skipped.
+
+        `snapshot_callback` receives partial results while parsing runs
+        (see `ParseSnapshotEmitter`), every `analysis_snapshot_interval_seconds`.
+
+        `multi_client` adds `stats["clients"]`, the per-station breakdown used
+        to analyze every client of the capture from this single parse.
         """
-        import subprocess
+        if scope is None and (max_packets or ssid_filter):
+            scope = CaptureScope(ssid=ssid_filter, max_packets=max_packets)
+        if scope is not None and not scope.is_empty:
+            client_mac_hint = client_mac_hint or scope.client_mac
+
+        snapshots = None
+        if snapshot_callback and settings.analysis_snapshot_interval_seconds > 0:
+            snapshots = ParseSnapshotEmitter(
+                self,
+                snapshot_callback,
+                interval_seconds=settings.analysis_snapshot_interval_seconds,
+                signal_points=settings.analysis_snapshot_signal_points,
+                client_mac_hint=client_mac_hint,
+            )
+
+        if scope is not None and not scope.is_empty:
+            state = self._parse_capture_scoped(file_path, scope, snapshots)
+        elif self._should_parse_in_parallel(file_path):
+            state = self._parse_capture_parallel(file_path, snapshots)
+        else:
+            state = self._parse_capture(file_path, snapshots)
+
+        stats = self._finalize_stats(state, client_mac_hint=client_mac_hint, multi_client=multi_client)
+        if "scope" in state:
+            stats["scope"] = state["scope"]
+        return stats
+
+    def _parse_capture_scoped(
+        self,
+        file_path: str,
+        scope: CaptureScope,
+        snapshots: Optional[ParseSnapshotEmitter] = None,
+    ) -> Dict[str, Any]:
+        """
+        Parses only the frames inside `scope`, stopping when a budget runs out.
+        Always serial: budgets and the relative time window are defined over
+        the capture as a whole. The parse state gets a `scope` report.
+        """
+        import time
+
+        started = time.monotonic()
+        deadline = started + scope.max_parse_seconds if scope.max_parse_seconds else None
+        report = {
+            "requested": scope.to_dict(),
+            "reader": None,
+            "display_filter": None,
+            "ssid_bssids": [],
+            "ssid_matched": None,
+            "frames_read": None,      # Frames examined (None if tshark filtered them)
+            "frames_analyzed": 0,     # Frames that passed the filters and were parsed
+            "frames_skipped": None,   # Frames dropped by the filters
+            "stopped_early": False,
+            "stop_reason": None,      # "max_packets" | "max_parse_seconds" | "time_window"
+            "parse_seconds": 0.0,
+        }
+
+        if scope.ssid:
+            scope.ssid_bssids = self._discover_ssid_bssids(file_path, scope.ssid)
+            report["ssid_bssids"] = sorted(scope.ssid_bssids)
+            report["ssid_matched"] = bool(scope.ssid_bssids)
+
+        state = None
+        if settings.capture_reader != "tshark":
+            state = self._parse_scoped_native(file_path, scope, report, deadline, snapshots)
+        if state is None:
+            state = self._parse_scoped_tshark(file_path, scope, report, deadline, snapshots)
+
+        if report["frames_read"] is not None:
+            report["frames_skipped"] = report["frames_read"] - report["frames_analyzed"]
+        report["stopped_early"] = report["stop_reason"] is not None
+        report["parse_seconds"] = round(time.monotonic() - started, 3)
+        state["scope"] = report
+        return state
+
+    def _parse_scoped_native(
+        self,
+        file_path: str,
+        scope: CaptureScope,
+        report: Dict[str, Any],
+        deadline: Optional[float],
+        snapshots: Optional[ParseSnapshotEmitter] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Scoped parse with the native reader; rows are pre-filtered before ingestion."""
+        import time
+
+        reader = PcapReader(file_path)
+        try:
+            reader.probe()
+            state = self._new_parse_state()
+            summary = state["wireshark_raw"]["summary"]
+            first_time = None
+            read = analyzed = 0
+            stop_reason = None
+            for fields in reader.rows():
+                read += 1
+                timestamp = scope.row_time(fields)
+                if first_time is None:
+                    first_time = timestamp
+                relative_time = timestamp - first_time
+                if scope.end_time is not None and relative_time > scope.end_time:
+                    read -= 1
+                    stop_reason = "time_window"
+                    break
+                if scope.matches(fields, relative_time):
+                    if scope.max_packets and analyzed >= scope.max_packets:
+                        read -= 1
+                        stop_reason = "max_packets"
+                        break
+                    summary["total_lines"] += 1
+                    self._ingest_fields(state, fields)
+                    analyzed += 1
+                    if snapshots:
+                        snapshots.maybe_emit(state)
+                if deadline and not read % 256 and time.monotonic() >= deadline:
+                    stop_reason = "max_parse_seconds"
+                    break
+        except (UnsupportedCaptureError, OSError):
+            return None
+
+        report.update({
+            "reader": "native",
+            "frames_read": read,
+            "frames_analyzed": analyzed,
+            "stop_reason": stop_reason,
+        })
+        return state
+
+    def _parse_scoped_tshark(
+        self,
+        file_path: str,
+        scope: CaptureScope,
+        report: Dict[str, Any],
+        deadline: Optional[float],
+        snapshots: Optional[ParseSnapshotEmitter] = None,
+    ) -> Dict[str, Any]:
+        """Scoped parse with tshark; the frame filters become a `-Y` display filter."""
         import shutil
-        from datetime import datetime
+        import subprocess
+        import time
 
         tshark_path = shutil.which("tshark")
         if not tshark_path:
             raise RuntimeError("tshark is not available in PATH.")
 
-        protocol_counter = Counter()
-        src_counter = Counter()
-        dst_counter = Counter()
+        cmd = self._build_tshark_command(tshark_path, file_path)
+        display_filter = scope.display_filter()
+        if display_filter:
+            cmd.extend(["-Y", display_filter])
 
-        total_packets = 0
-        total_bytes = 0
-        total_tcp_packets = 0
-        total_wlan_packets = 0
+        timeout = TSHARK_TIMEOUT_SECONDS
+        if deadline:
+            # Also bounds the time tshark spends reading frames the filter rejects
+            timeout = max(1.0, min(timeout, deadline - time.monotonic()))
 
-        tcp_retransmissions = 0
-        wlan_retries = 0
-        dns_errors = 0
+        state = self._new_parse_state()
+        analyzed = 0
+        stop_reason = None
+        try:
+            for line in self._stream_tshark_rows(cmd, timeout=timeout):
+                if scope.max_packets and analyzed >= scope.max_packets:
+                    stop_reason = "max_packets"
+                    break
+                self._ingest_row(state, line)
+                analyzed += 1
+                if snapshots:
+                    snapshots.maybe_emit(state)
+                if deadline and not analyzed % 256 and time.monotonic() >= deadline:
+                    stop_reason = "max_parse_seconds"
+                    break
+        except subprocess.TimeoutExpired:
+            if not deadline:
+                raise
+            stop_reason = "max_parse_seconds"
+
+        frames_read = analyzed
+        if display_filter:
+            # tshark drops filtered frames itself; the total comes from capinfos
+            total = self._count_capture_frames(file_path)
+            frames_read = total if stop_reason is None else None
+        report.update({
+            "reader": "tshark",
+            "display_filter": display_filter,
+            "frames_read": frames_read,
+            "frames_analyzed": analyzed,
+            "stop_reason": stop_reason,
+        })
+        return state
+
+    def _count_capture_frames(self, file_path: str) -> Optional[int]:
+        """Number of frames in the capture according to capinfos (None if unavailable)."""
+        import shutil
+        import subprocess
 
-        # Structures for band steering analysis
-        steering_events = []  # List of events ordered chronologically
-        client_sessions = {}  # Sessions by client MAC
-        bssid_info = {}  # Information for each BSSID (band, channel)
-        
+        capinfos_path = shutil.which("capinfos")
+        if not capinfos_path:
+            return None
+        try:
+            result = subprocess.run(
+                [capinfos_path, "-T", "-r", "-M", "-c", file_path],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                check=False,
+            )
+            return int(result.stdout.strip().split("\t")[-1])
+        except Exception:
+            return None
+
+    def _discover_ssid_bssids(self, file_path: str, ssid: str) -> Set[str]:
+        """
+        BSSIDs that advertise `ssid` (Beacons, Probe Responses, association
+        frames). Scoping by SSID keeps every frame of those BSSIDs, since most
+        frames (data, BTM, deauth) do not carry the SSID themselves.
+        """
+        import shutil
+
+        bssids: Set[str] = set()
+        if settings.capture_reader != "tshark":
+            reader = PcapReader(file_path)
+            try:
+                reader.probe()
+                for fields in reader.rows():
+                    if fields[F_SSID] == ssid and fields[F_BSSID]:
+                        bssids.add(fields[F_BSSID])
+                return bssids
+            except (UnsupportedCaptureError, OSError):
+                bssids = set()
+
+        tshark_path = shutil.which("tshark")
+        if not tshark_path:
+            raise RuntimeError("tshark is not available in PATH.")
+        escaped = ssid.replace("\\", "\\\\").replace('"', '\\"')
         cmd = [
-            tshark_path,
-            "-r", file_path,
-            "-T", "fields",
-            "-e", "frame.time_epoch",
-            "-e", "frame.protocols",
-            "-e", "ip.src",
-            "-e", "ip.dst",
-            "-e", "frame.len",
-            "-e", "tcp.analysis.retransmission",
-            "-e", "wlan.fc.retry",
-            "-e", "dns.flags.rcode",
-            "-e", "wlan.fc.type_subtype",
-            "-e", "wlan.bssid",
-            "-e", "wlan.sa",  # Source Address (cliente)
-            "-e", "wlan.da",  # Destination Address
-            "-e", "wlan_radio.frequency",  # Frecuencia (2.4GHz vs 5GHz)
-            "-e", "wlan.fixed.reason_code",  # Reason code for deauth/disassoc
-            "-e", "wlan.ssid",  # SSID
-            # Campos BTM (802.11v) - Campos reales de Wireshark 4.6.2
-            "-e", "wlan.fixed.category_code",                # Category (10 = WNM)
-            "-e", "wlan.fixed.action_code",                  # Action (7=Req, 8=Resp)
-            "-e", "wlan.fixed.bss_transition_status_code",   # BTM Status Code (v1)
-            "-e", "wlan.fixed.status_code",       # Association Status Code (0=Success)
-            "-e", "wlan_radio.signal_dbm",        # RSSI / Signal Strength
+            tshark_path, "-r", file_path,
+            "-Y", f'wlan.ssid == "{escaped}"',
+            "-T", "fields", "-e", "wlan.bssid",
         ]
+        for line in self._stream_tshark_rows(cmd):
+            bssid = line.strip()
+            if bssid:
+                bssids.add(bssid)
+        return bssids
+
+    def _parse_capture(
+        self,
+        file_path: str,
+        snapshots: Optional[ParseSnapshotEmitter] = None,
+    ) -> Dict[str, Any]:
+        """
+        Parses a whole capture into a parse state. Uses the native pcap reader
+        when possible and falls back to a single tshark process otherwise.
+        """
+        import shutil
+
+        if settings.capture_reader != "tshark":
+            state = self._parse_capture_native(file_path, snapshots)
+            if state is not None:
+                return state
+
+        tshark_path = shutil.which("tshark")
+        if not tshark_path:
+            raise RuntimeError("tshark is not available in PATH.")
 
+        cmd = self._build_tshark_command(tshark_path, file_path)
+
+        state = self._new_parse_state()
+        for line in self._stream_tshark_rows(cmd):
+            self._ingest_row(state, line)
+            if snapshots:
+                snapshots.maybe_emit(state)
+        return state
+
+    def _parse_capture_native(
+        self,
+        file_path: str,
+        snapshots: Optional[ParseSnapshotEmitter] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Parses the capture with the native pcap/pcapng reader (no tshark).
+        Returns None when the capture uses something the reader does not
+        decode, so the caller can fall back to tshark.
+        """
+        reader = PcapReader(file_path)
+        try:
+            reader.probe()
+            state = self._new_parse_state()
+            summary = state["wireshark_raw"]["summary"]
+            for fields in reader.rows():
+                summary["total_lines"] += 1
+                self._ingest_fields(state, fields)
+                if snapshots:
+                    snapshots.maybe_emit(state)
+            return state
+        except (UnsupportedCaptureError, OSError):
+            return None
+
+    def _parallel_workers(self) -> int:
+        """Number of worker processes for parallel parsing (0 in settings = all cores)."""
+        return max(1, settings.parallel_parse_workers or os.cpu_count() or 1)
+
+    def _should_parse_in_parallel(self, file_path: str) -> bool:
+        """Parallel parsing pays off only for large captures and needs editcap."""
+        import shutil
 
+        if not settings.parallel_parse_enabled or self._parallel_workers() < 2:
+            return False
+        if not shutil.which("editcap"):
+            return False
+        try:
+            return os.path.getsize(file_path) >= settings.parallel_parse_min_bytes
+        except OSError:
+            return False
+
+    def _split_capture(self, file_path: str, output_dir: str, packets_per_slice: int) -> List[str]:
+        """
+        Splits a capture into consecutive packet-count slices with editcap.
+        Returns the slice paths in capture order.
+        """
+        import subprocess
+        import shutil
+
+        editcap_path = shutil.which("editcap")
+        if not editcap_path:
+            raise RuntimeError("editcap is not available in PATH.")
+
+        extension = os.path.splitext(file_path)[1] or ".pcap"
+        output_template = os.path.join(output_dir, f"slice{extension}")
         result = subprocess.run(
-            cmd,
+            [editcap_path, "-c", str(packets_per_slice), file_path, output_template],
             capture_output=True,
             text=True,
-            timeout=300,
-            check=False
+            timeout=TSHARK_TIMEOUT_SECONDS,
+            check=False,
         )
-
         if result.returncode != 0:
-            raise RuntimeError(result.stderr or "Error executing tshark")
+            raise RuntimeError(result.stderr or "Error splitting capture with editcap")
 
-        # Diagnostic logging
-        lines = result.stdout.splitlines()
-        
-        # Show first 3 lines for diagnosis
-        if lines:
-            for i, line in enumerate(lines[:3], 1):
-                pass
+        # editcap names slices <prefix>_<00000 index>_<timestamp><ext>, so name order is capture order
+        return sorted(os.path.join(output_dir, name) for name in os.listdir(output_dir))
 
-        # WLAN packet counter for diagnosis
-        wlan_packets_with_subtype = 0
-        wlan_packets_without_subtype = 0
-        subtype_counter = Counter()  # Frame types counter
-        
-        # Counters for Preventive Steering (Client Steering) detection
-        all_client_macs = []
-        band_counters = {
-            "beacon_24": 0, "beacon_5": 0,
-            "probe_req": 0,
-            "probe_resp_24": 0, "probe_resp_5": 0,
-            "data_24": 0, "data_5": 0,
-        }
+    def _parse_capture_parallel(
+        self,
+        file_path: str,
+        snapshots: Optional[ParseSnapshotEmitter] = None,
+    ) -> Dict[str, Any]:
+        """
+        Splits the capture into slices, dissects them in a process pool and
+        merges the partial parse states in capture order.
 
-        # Temporary list for signal samples (for continuous chart)
-        temp_signal_samples = []
-        
-        # ========================================================================
-        # WIRESHARK RAW: Source of truth - Capture exact tshark data
-        # ========================================================================
-        wireshark_raw = {
-            "summary": {
-                "total_lines": len(lines),
-                "total_packets": 0,
-                "total_wlan_packets": 0,
-                "btm": {
-                    "requests": 0,
-                    "responses": 0,
-                    "responses_accept": 0,  # status_code == 0
-                    "responses_reject": 0,   # status_code != 0
-                    "status_codes": []
-                },
-                "assoc": {
-                    "requests": 0,
-                    "responses": 0,
-                    "responses_success": 0,  # status_code == 0
-                    "responses_fail": 0      # status_code != 0
-                },
-                "reassoc": {
-                    "requests": 0,
-                    "responses": 0,
-                    "responses_success": 0,
-                    "responses_fail": 0
-                },
-                "deauth": {
-                    "count": 0,
-                    "reason_codes": []
-                },
-                "disassoc": {
-                    "count": 0,
-                    "reason_codes": []
+        Only per-frame parsing runs per slice. Client selection and transition
+        detection run afterwards over the merged, time-ordered event stream,
+        so steering sequences that cross a slice boundary (within
+        REASSOC_TIMEOUT_SECONDS) are stitched exactly as in the serial path.
+        """
+        import shutil
+        import tempfile
+        from concurrent.futures import ProcessPoolExecutor
+
+        slice_dir = tempfile.mkdtemp(prefix="capture_slices_")
+        try:
+            slices = self._split_capture(file_path, slice_dir, settings.parallel_parse_slice_packets)
+            if len(slices) < 2:
+                return self._parse_capture(file_path, snapshots)
+
+            merged = self._new_parse_state()
+            workers = min(self._parallel_workers(), len(slices))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map() yields results in submission order, i.e. capture order
+                for partial in pool.map(_parse_capture_slice, slices):
+                    self._merge_parse_state(merged, partial)
+                    if snapshots:
+                        snapshots.emit_if_due(merged)
+            return merged
+        finally:
+            shutil.rmtree(slice_dir, ignore_errors=True)
+
+    @staticmethod
+    def _merge_unique(target: list, values: list) -> None:
+        """Appends values not yet present, preserving first-seen order."""
+        for value in values:
+            if value not in target:
+                target.append(value)
+
+    def _merge_parse_state(self, merged: Dict[str, Any], partial: Dict[str, Any]) -> None:
+        """
+        Folds the parse state of the next capture slice into `merged`.
+        Slices must be merged in capture order: first-seen lists, BSSID
+        information and the capped samples depend on it.
+        """
+        merged["frames"].extend(partial["frames"])
+        for key in ("total_bytes", "total_tcp_packets", "tcp_retransmissions",
+                    "wlan_retries", "dns_errors", "wlan_packets_without_subtype"):
+            merged[key] += partial[key]
+        merged["src_counter"].update(partial["src_counter"])
+        merged["dst_counter"].update(partial["dst_counter"])
+
+        merged["steering_events"].extend(partial["steering_events"])
+        merged["association_failures"].extend(partial["association_failures"])
+        self._merge_unique(merged["btm_status_codes"], partial["btm_status_codes"])
+
+        # BSSID info: first sighting wins, band filled in by the first event that has one
+        bssid_info = merged["bssid_info"]
+        for bssid, info in partial["bssid_info"].items():
+            if bssid not in bssid_info:
+                bssid_info[bssid] = info
+            elif info.get("band") and not bssid_info[bssid].get("band"):
+                bssid_info[bssid]["band"] = info["band"]
+                bssid_info[bssid]["frequency"] = info["frequency"]
+
+        merged_raw = merged["wireshark_raw"]
+        partial_raw = partial["wireshark_raw"]
+        merged_summary = merged_raw["summary"]
+        partial_summary = partial_raw["summary"]
+
+        merged_summary["total_lines"] += partial_summary["total_lines"]
+        self._merge_unique(merged_summary["btm"]["status_codes"], partial_summary["btm"]["status_codes"])
+        for key in ("deauth", "disassoc"):
+            self._merge_unique(merged_summary[key]["reason_codes"], partial_summary[key]["reason_codes"])
+        for freq_key, band in partial_summary["freq_band_map"].items():
+            merged_summary["freq_band_map"].setdefault(freq_key, band)
+
+        remaining = merged_raw["general_sample_limit"] - len(merged_raw["general_sample"])
+        if remaining > 0:
+            merged_raw["general_sample"].extend(partial_raw["general_sample"][:remaining])
+        merged_raw["truncated"] = merged_raw["truncated"] or partial_raw["truncated"]
+
+        # Re-apply the per-BSSID Beacon cap across slices
+        beacon_tracking = merged_raw["beacon_tracking"]
+        bssids_seen = beacon_tracking["bssids_seen"]
+        max_per_bssid = beacon_tracking["max_beacons_per_bssid"]
+        for row in partial_raw["sample"]:
+            if row.get("subtype") == "8":
+                freq = row.get("frequency") or ""
+                beacon_id = self._beacon_id(row.get("bssid", ""), int(freq) if freq.isdigit() else 0)
+                ts = float(row["timestamp"])
+                entry = bssids_seen.get(beacon_id)
+                if entry is None:
+                    bssids_seen[beacon_id] = {
+                        "first_seen_time": ts,
+                        "saved_count": 1,
+                        "last_saved_time": ts,
+                    }
+                elif entry["saved_count"] < max_per_bssid:
+                    entry["saved_count"] += 1
+                    entry["last_saved_time"] = ts
+                else:
+                    continue
+            merged_raw["sample"].append(row)
+
+    def _new_parse_state(self) -> Dict[str, Any]:
+        """Creates the accumulators that `_ingest_row` fills row by row."""
+        return {
+            # Columnar per-frame data; counters are computed from it at the end
+            "frames": FrameTable(),
+            "src_counter": Counter(),
+            "dst_counter": Counter(),
+            "total_bytes": 0,
+            "total_tcp_packets": 0,
+            "tcp_retransmissions": 0,
+            "wlan_retries": 0,
+            "dns_errors": 0,
+            # Structures for band steering analysis
+            "steering_events": [],  # List of events ordered chronologically
+            "bssid_info": {},  # Information for each BSSID (band, channel)
+            "wlan_packets_without_subtype": 0,
+            # First-seen ordered lists, filled only by the (rare) event frames
+            "btm_status_codes": [],
+            "association_failures": [],
+            # ================================================================
+            # WIRESHARK RAW: Source of truth - Capture exact tshark data
+            # ================================================================
+            "wireshark_raw": {
+                "summary": {
+                    "total_lines": 0,
+                    "total_packets": 0,
+                    "total_wlan_packets": 0,
+                    "btm": {
+                        "requests": 0,
+                        "responses": 0,
+                        "responses_accept": 0,  # status_code == 0
+                        "responses_reject": 0,   # status_code != 0
+                        "status_codes": []
+                    },
+                    "assoc": {
+                        "requests": 0,
+                        "responses": 0,
+                        "responses_success": 0,  # status_code == 0
+                        "responses_fail": 0      # status_code != 0
+                    },
+                    "reassoc": {
+                        "requests": 0,
+                        "responses": 0,
+                        "responses_success": 0,
+                        "responses_fail": 0
+                    },
+                    "deauth": {
+                        "count": 0,
+                        "reason_codes": []
+                    },
+                    "disassoc": {
+                        "count": 0,
+                        "reason_codes": []
+                    },
+                    "freq_band_map": {}  # frequency -> detected band
                 },
-                "freq_band_map": {}  # frequency -> detected band
+                "sample": [],  # Important packets for band steering (with smart Beacon filtering)
+                "general_sample": [],  # General sample of first N packets for reference
+                "general_sample_limit": 50,
+                "truncated": False,
+                # Tracking for smart Beacon filtering
+                "beacon_tracking": {
+                    "bssids_seen": {},  # BSSID -> {first_seen_time, count, last_saved_time}
+                    "max_beacons_per_bssid": 3,  # Max Beacons to save per BSSID
+                    "beacon_window_sec": 5.0  # Time window to consider Beacons "close" to events
+                }
             },
-            "sample": [],  # Important packets for band steering (with smart Beacon filtering)
-            "general_sample": [],  # General sample of first N packets for reference
-            "general_sample_limit": 50,
-            "truncated": False,
-            # Tracking for smart Beacon filtering
-            "beacon_tracking": {
-                "bssids_seen": {},  # BSSID -> {first_seen_time, count, last_saved_time}
-                "max_beacons_per_bssid": 3,  # Max Beacons to save per BSSID
-                "beacon_window_sec": 5.0  # Time window to consider Beacons "close" to events
-            }
         }
 
-        for line in lines:
-            if not line.strip():
-                continue
+    @staticmethod
+    def _beacon_id(bssid: str, frequency: int) -> str:
+        """Key used to cap the number of Beacons saved per BSSID in the raw sample."""
+        return bssid if bssid else f"no_bssid_{frequency}" if frequency else "unknown"
 
-            fields = line.split("\t")
-            # Adjust for 20 fields (per corrected cmd command)
-            while len(fields) < 20:
-                fields.append("")
+    def _ingest_row(self, state: Dict[str, Any], line: str) -> None:
+        """Parses one tshark output row (tab-separated `TSHARK_FIELDS`)."""
+        state["wireshark_raw"]["summary"]["total_lines"] += 1
 
-            (timestamp, protocols, ip_src, ip_dst, frame_len, tcp_r, wlan_r, 
-             dns_r, subtype, bssid, wlan_sa, wlan_da, frequency, reason_code, ssid,
-             category_code, action_code, btm_status_code,
-             assoc_status_code, signal_strength) = fields[:20] # Take only expected fields
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            return
 
-            total_packets += 1
-            wireshark_raw["summary"]["total_packets"] += 1
-            
-            # Normalize fields
-            timestamp_float = float(timestamp) if timestamp and timestamp.strip() else 0.0
-            subtype_int = self._normalize_subtype(subtype) if subtype else -1
-            freq_normalized = self._normalize_frequency(frequency) if frequency else 0
-            bssid_clean = bssid.strip() if bssid else ""
-            wlan_sa_clean = wlan_sa.strip() if wlan_sa else ""
-            wlan_da_clean = wlan_da.strip() if wlan_da else ""
-            ssid_clean = ssid.strip() if ssid else ""
-            frame_len_int = int(frame_len) if frame_len and frame_len.strip().isdigit() else 0
-            
-            # Normalize status codes
-            btm_status_normalized = self._normalize_status_code(btm_status_code) if btm_status_code else -1
-            assoc_status_normalized = self._normalize_status_code(assoc_status_code) if assoc_status_code else -1
-            reason_code_normalized = self._normalize_status_code(reason_code) if reason_code else -1
-            
-            # Normalize category and action codes
-            category_normalized = self._normalize_status_code(category_code) if category_code else -1
-            action_normalized = self._normalize_status_code(action_code) if action_code else -1
+        self._ingest_fields(state, line.split("\t"))
+
+    def _ingest_fields(self, state: Dict[str, Any], fields: List[str]) -> None:
+        """
+        Folds one frame, given as field values in `TSHARK_FIELDS` order, into
+        the parse state. Fed by tshark rows or by the native capture reader.
+        Every frame is appended to the frame table; only band steering events
+        (association, deauth, BTM...) and the raw samples allocate dicts.
+        """
+        wireshark_raw = state["wireshark_raw"]
+
+        # Adjust to the expected number of fields
+        while len(fields) < len(TSHARK_FIELDS):
+            fields.append("")
+
+        (timestamp, protocols, ip_src, ip_dst, frame_len, tcp_r, wlan_r, 
+         dns_r, subtype, bssid, wlan_sa, wlan_da, frequency, reason_code, ssid,
+         category_code, action_code, btm_status_code,
+         assoc_status_code, signal_strength) = fields[:len(TSHARK_FIELDS)] # Take only expected fields
+
+        # Normalize fields
+        timestamp_float = float(timestamp) if timestamp and timestamp.strip() else 0.0
+        subtype_int = self._normalize_subtype(subtype) if subtype else -1
+        freq_normalized = self._normalize_frequency(frequency) if frequency else 0
+        bssid_clean = bssid.strip() if bssid else ""
+        wlan_sa_clean = wlan_sa.strip() if wlan_sa else ""
+        wlan_da_clean = wlan_da.strip() if wlan_da else ""
+        ssid_clean = ssid.strip() if ssid else ""
+        frame_len_int = int(frame_len) if frame_len and frame_len.strip().isdigit() else 0
+        
+        # Normalize status codes
+        btm_status_normalized = self._normalize_status_code(btm_status_code) if btm_status_code else -1
+        assoc_status_normalized = self._normalize_status_code(assoc_status_code) if assoc_status_code else -1
+        reason_code_normalized = self._normalize_status_code(reason_code) if reason_code else -1
+        
+        # Normalize category and action codes
+        category_normalized = self._normalize_status_code(category_code) if category_code else -1
+        action_normalized = self._normalize_status_code(action_code) if action_code else -1
+        
+        # Normalize RSSI
+        rssi_normalized = None
+        if signal_strength and signal_strength.strip():
+            try:
+                rssi_val = float(signal_strength.strip())
+                if -120 <= rssi_val <= 0:  # Valid RSSI range
+                    rssi_normalized = int(rssi_val)
+            except (ValueError, AttributeError):
+                pass
+
+        # Raw type_subtype as reported by tshark (used by counters and events)
+        raw_subtype = -1
+        if subtype:
+            try:
+                raw_subtype = int(subtype, 16) if subtype.startswith('0x') else int(subtype)
+            except ValueError:
+                # If it cannot be parsed, ignore this packet for event analysis
+                state["wlan_packets_without_subtype"] += 1
+
+        # Band of the current packet (integer MHz as reported by radiotap)
+        freq_mhz_int = 0
+        current_band = None
+        if frequency:
+            try:
+                freq_mhz_int = int(frequency)
+                if 2400 <= freq_mhz_int <= 2500:
+                    current_band = "2.4GHz"
+                elif 5000 <= freq_mhz_int <= 6000:
+                    current_band = "5GHz"
+            except ValueError:
+                pass
+
+        sample_rssi = None
+        if signal_strength:
+            try:
+                sample_rssi = int(signal_strength)
+            except ValueError:
+                pass
+
+        state["frames"].append(
+            timestamp=timestamp_float,
+            subtype=raw_subtype,
+            frequency=freq_mhz_int,
+            rssi=sample_rssi,
+            category=category_normalized,
+            action=action_normalized,
+            btm_status=btm_status_normalized,
+            assoc_status=assoc_status_normalized,
+            reason_code=reason_code_normalized,
+            bssid=bssid_clean,
+            sa=wlan_sa_clean,
+            da=wlan_da_clean,
+            protocols=protocols,
+        )
+        
+        # Save raw sample: Important packets with smart Beacon filtering
+        is_important_packet = False
+        is_beacon = False
+        should_save_beacon = False
+        
+        # Determine if it's an important packet for band steering
+        if subtype_int >= 0:
+                
+            # Detectar Beacon (subtype 8)
+            if subtype_int == 8:
+                is_beacon = True
+                is_important_packet = True  # Temporary, then we decide whether to save it
+            # Critical packets: ALWAYS save (BTM, Association, Reassociation, Deauth, Disassoc)
+            elif subtype_int in [0, 1, 2, 3, 10, 12, 13]:
+                is_important_packet = True
+                # For Action frames, check if it's BTM
+                if subtype_int == 13:
+                    if category_normalized == 10:  # WNM (802.11v)
+                        is_important_packet = True
+                    else:
+                        is_important_packet = False  # Only save WNM Action frames
+        
+        # Special logic for Beacons: smart filtering
+        if is_beacon:
+            beacon_tracking = wireshark_raw["beacon_tracking"]
+            max_per_bssid = beacon_tracking["max_beacons_per_bssid"]
             
-            # Normalize RSSI
-            rssi_normalized = None
-            if signal_strength and signal_strength.strip():
-                try:
-                    rssi_val = float(signal_strength.strip())
-                    if -120 <= rssi_val <= 0:  # Valid RSSI range
-                        rssi_normalized = int(rssi_val)
-                except (ValueError, AttributeError):
-                    pass
+            # Use BSSID or a unique identifier if no BSSID
+            beacon_id = self._beacon_id(bssid_clean, freq_normalized)
             
+            if beacon_id not in beacon_tracking["bssids_seen"]:
+                # New BSSID: save the first Beacon
+                beacon_tracking["bssids_seen"][beacon_id] = {
+                    "first_seen_time": timestamp_float,
+                    "saved_count": 0,  # Saved Beacons counter (not total)
+                    "last_saved_time": timestamp_float
+                }
+                should_save_beacon = True
+                beacon_tracking["bssids_seen"][beacon_id]["saved_count"] = 1
+            else:
+                beacon_entry = beacon_tracking["bssids_seen"][beacon_id]
+                
+                # Save only the first N Beacons per BSSID
+                if beacon_entry["saved_count"] < max_per_bssid:
+                    should_save_beacon = True
+                    beacon_entry["saved_count"] += 1
+                    beacon_entry["last_saved_time"] = timestamp_float
+                else:
+                    # We already saved enough Beacons from this BSSID
+                    should_save_beacon = False
+        
+        # Save important packets (non-Beacons always, Beacons only if they pass the filter)
+        if is_important_packet and (not is_beacon or should_save_beacon):
             # Determine correct direction based on frame type
             source, destination, client_mac, ap_mac = self._determine_frame_direction(
                 subtype_int, bssid_clean, wlan_sa_clean, wlan_da_clean
             )
-            
-            # Record MACs to determine client
-            if wlan_sa_clean: all_client_macs.append(wlan_sa_clean)
-            if wlan_da_clean: all_client_macs.append(wlan_da_clean)
-            
-            # Detect if it's a WLAN packet and update counters
-            if protocols and "wlan" in protocols.lower():
-                total_wlan_packets += 1
-                wireshark_raw["summary"]["total_wlan_packets"] += 1
-            
-            # Save raw sample: Important packets with smart Beacon filtering
-            is_important_packet = False
-            is_beacon = False
-            should_save_beacon = False
-            
-            # Determine if it's an important packet for band steering
-            if subtype_int >= 0:
-                    
-                # Detectar Beacon (subtype 8)
-                if subtype_int == 8:
-                    is_beacon = True
-                    is_important_packet = True  # Temporary, then we decide whether to save it
-                # Critical packets: ALWAYS save (BTM, Association, Reassociation, Deauth, Disassoc)
-                elif subtype_int in [0, 1, 2, 3, 10, 12, 13]:
-                    is_important_packet = True
-                    # For Action frames, check if it's BTM
-                    if subtype_int == 13:
-                        if category_normalized == 10:  # WNM (802.11v)
-                            is_important_packet = True
-                        else:
-                            is_important_packet = False  # Only save WNM Action frames
-            
-            # Special logic for Beacons: smart filtering
-            if is_beacon:
-                beacon_tracking = wireshark_raw["beacon_tracking"]
-                max_per_bssid = beacon_tracking["max_beacons_per_bssid"]
-                
-                # Use BSSID or a unique identifier if no BSSID
-                beacon_id = bssid_clean if bssid_clean else f"no_bssid_{freq_normalized}" if freq_normalized else "unknown"
-                
-                if beacon_id not in beacon_tracking["bssids_seen"]:
-                    # New BSSID: save the first Beacon
-                    beacon_tracking["bssids_seen"][beacon_id] = {
-                        "first_seen_time": timestamp_float,
-                        "saved_count": 0,  # Saved Beacons counter (not total)
-                        "last_saved_time": timestamp_float
-                    }
-                    should_save_beacon = True
-                    beacon_tracking["bssids_seen"][beacon_id]["saved_count"] = 1
-                else:
-                    bssid_info = beacon_tracking["bssids_seen"][beacon_id]
-                    
-                    # Save only the first N Beacons per BSSID
-                    if bssid_info["saved_count"] < max_per_bssid:
-                        should_save_beacon = True
-                        bssid_info["saved_count"] += 1
-                        bssid_info["last_saved_time"] = timestamp_float
-                    else:
-                        # We already saved enough Beacons from this BSSID
-                        should_save_beacon = False
-            
-            # Save important packets (non-Beacons always, Beacons only if they pass the filter)
-            if is_important_packet and (not is_beacon or should_save_beacon):
-                raw_row = {
-                    "timestamp": str(timestamp_float),  # Keep as string to preserve precision
-                    "protocols": protocols.strip() if protocols else "",
-                    "subtype": str(subtype_int) if subtype_int >= 0 else subtype if subtype else "",
-                    "bssid": bssid_clean,
-                    "wlan_sa": wlan_sa_clean,
-                    "wlan_da": wlan_da_clean,
-                    "source": source,  # Corrected address per frame type
-                    "destination": destination,  # Corrected address per frame type
-                    "frequency": str(freq_normalized) if freq_normalized > 0 else frequency if frequency else "",
-                    "reason_code": str(reason_code_normalized) if reason_code_normalized >= 0 else reason_code if reason_code else "",
-                    "ssid": ssid_clean,
-                    "category_code": str(category_normalized) if category_normalized >= 0 else category_code if category_code else "",
-                    "action_code": str(action_normalized) if action_normalized >= 0 else action_code if action_code else "",
-                    "btm_status_code": str(btm_status_normalized) if btm_status_normalized >= 0 else btm_status_code if btm_status_code else "",
-                    "assoc_status_code": str(assoc_status_normalized) if assoc_status_normalized >= 0 else assoc_status_code if assoc_status_code else "",
-                    "signal_strength": str(rssi_normalized) if rssi_normalized is not None else signal_strength if signal_strength else "",
-                    "frame_len": str(frame_len_int) if frame_len_int > 0 else frame_len if frame_len else "",
-                    "ip_src": ip_src.strip() if ip_src else "",
-                    "ip_dst": ip_dst.strip() if ip_dst else "",
-                    "client_mac": client_mac if client_mac else "",
-                    "ap_mac": ap_mac if ap_mac else ""
-                }
-                wireshark_raw["sample"].append(raw_row)
-            
-            # Also save a general sample (first N rows) for reference
-            if len(wireshark_raw.get("general_sample", [])) < 50:
-                if "general_sample" not in wireshark_raw:
-                    wireshark_raw["general_sample"] = []
-                wireshark_raw["general_sample"].append({
-                    "timestamp": timestamp,
-                    "protocols": protocols,
-                    "subtype": subtype,
-                    "bssid": bssid,
-                    "wlan_sa": wlan_sa,
-                    "wlan_da": wlan_da,
-                    "frequency": frequency
-                })
-            
-            # Contadores de protocolos
-            if protocols:
-                for proto in protocols.split(":"):
-                    proto = proto.strip()
-                    if proto:
-                        protocol_counter[proto] += 1
-
-            # Detailed analysis of 802.11 events
-            if subtype:
-                try:
-                    # Conversion subtype (igual)
-                    if subtype.startswith('0x'):
-                        subtype_int = int(subtype, 16)
-                    else:
-                        subtype_int = int(subtype)
-                    
-                    wlan_packets_with_subtype += 1
-                    subtype_counter[subtype_int] += 1  # Contar este tipo de frame
-                    
-                    # --- BTM DETECTION (802.11v) ---
-                    # Subtype 13 = Action Frame, Category 10 = WNM
-                    
-                    # Normalizar category_code (dec/hex)
-                    cat_val = -1
-                    try:
-                        if category_code:
-                            cat_val = int(category_code) if category_code.isdigit() else int(category_code, 16)
-                    except Exception:
-                        pass
-
-                    if subtype_int == 13 and cat_val == 10: # Category 10 = WNM
-                        # Normalize action_code (dec/hex)
-                        ac_val = None
-                        try:
-                            if action_code:
-                                ac_val = int(action_code) if action_code.isdigit() else int(action_code, 16)
-                        except Exception:
-                            pass
-
-                        if "btm_stats" not in band_counters:
-                            band_counters["btm_stats"] = {"requests": 0, "responses": 0, "status_codes": []}
-
-                        if ac_val == 7: # BTM Request
-                             band_counters["btm_stats"]["requests"] += 1
-                             # Capture in raw summary
-                             wireshark_raw["summary"]["btm"]["requests"] += 1
-                             # Map frequency to band
-                             if frequency:
-                                 try:
-                                     freq_val = int(frequency) if isinstance(frequency, str) and frequency.isdigit() else float(frequency)
-                                     freq_key = str(freq_val)
-                                     if freq_key not in wireshark_raw["summary"]["freq_band_map"]:
-                                         if 2400 <= freq_val <= 2500:
-                                             wireshark_raw["summary"]["freq_band_map"][freq_key] = "2.4GHz"
-                                         elif 5000 <= freq_val <= 6000:
-                                             wireshark_raw["summary"]["freq_band_map"][freq_key] = "5GHz"
-                                 except (ValueError, TypeError):
-                                     pass
-                             
-                             # Calculate band from frequency if available (correct inconsistency)
-                             btm_band = current_band
-                             if frequency:
-                                 try:
-                                     freq_val = int(frequency) if isinstance(frequency, str) and frequency.isdigit() else float(frequency)
-                                     if 2400 <= freq_val <= 2500:
-                                         btm_band = "2.4GHz"
-                                     elif 5000 <= freq_val <= 6000:
-                                         btm_band = "5GHz"
-                                 except (ValueError, TypeError):
-                                     pass
-                             
-                             # Register event for chart
-                             steering_events.append({
-                                 "timestamp": float(timestamp) if timestamp else 0,
-                                 "type": "btm",
-                                 "event_type": "request",
-                                 "subtype": subtype_int,
-                                 "bssid": bssid, # Source BSSID (usually wlan_sa)
-                                 "client_mac": wlan_da, # In Request, the client is the destination
-                                 "ap_bssid": wlan_sa,   # In Request, the AP is the source
-                                 "wlan_sa": wlan_sa,
-                                 "wlan_da": wlan_da,
-                                 "band": btm_band,
-                                 "frequency": int(frequency) if frequency else 0,
-                                 "rssi": int(signal_strength) if signal_strength else None,
-                                 "status_code": None
-                             })
-                             
-                        elif ac_val == 8: # BTM Response
-                            band_counters["btm_stats"]["responses"] += 1
-                            # Capture in raw summary
-                            wireshark_raw["summary"]["btm"]["responses"] += 1
-                            # Process status code
-                            if btm_status_code:
-                                try:
-                                    status_int = int(btm_status_code) if str(btm_status_code).isdigit() else int(btm_status_code, 16)
-                                    if str(status_int) not in wireshark_raw["summary"]["btm"]["status_codes"]:
-                                        wireshark_raw["summary"]["btm"]["status_codes"].append(str(status_int))
-                                    if status_int == 0:
-                                        wireshark_raw["summary"]["btm"]["responses_accept"] += 1
-                                    else:
-                                        wireshark_raw["summary"]["btm"]["responses_reject"] += 1
-                                except (ValueError, TypeError):
-                                    pass
-                            
-                            # Calculate band from frequency if available (correct inconsistency)
-                            btm_response_band = current_band
-                            if frequency:
-                                try:
-                                    freq_val = int(frequency) if isinstance(frequency, str) and frequency.isdigit() else float(frequency)
-                                    if 2400 <= freq_val <= 2500:
-                                        btm_response_band = "2.4GHz"
-                                    elif 5000 <= freq_val <= 6000:
-                                        btm_response_band = "5GHz"
-                                except (ValueError, TypeError):
-                                    pass
-                            
-                            # Register event for chart
-                            steering_events.append({
-                                 "timestamp": float(timestamp) if timestamp else 0,
-                                 "type": "btm",
-                                 "event_type": "response",
-                                 "subtype": subtype_int,
-                                 "bssid": bssid,
-                                 "client_mac": wlan_sa, # In Response, the client is the source
-                                 "ap_bssid": wlan_da,   # In Response, the AP is the destination
-                                 "wlan_sa": wlan_sa,
-                                 "wlan_da": wlan_da,
-                                 "band": btm_response_band,
-                                 "frequency": int(frequency) if frequency else 0,
-                                 "rssi": int(signal_strength) if signal_strength else None,
-                                 "status_code": int(btm_status_code) if btm_status_code and btm_status_code.isdigit() else None
-                             })
-                        
-                        # Universal status code capture
-                        if btm_status_code and btm_status_code != "":
-                            if btm_status_code not in band_counters["btm_stats"]["status_codes"]:
-                                band_counters["btm_stats"]["status_codes"].append(btm_status_code)
-
-                    # --- PREVENTIVE STEERING LOGIC ---
-                    # Determine current packet band
-                    current_band = None
-                    if frequency:
-                        try:
-                            freq_mhz_val = int(frequency)
-                            if 2400 <= freq_mhz_val <= 2500:
-                                current_band = "2.4GHz"
-                            elif 5000 <= freq_mhz_val <= 6000:
-                                current_band = "5GHz"
-                        except ValueError:
-                            pass
+            raw_row = {
+                "timestamp": str(timestamp_float),  # Keep as string to preserve precision
+                "protocols": protocols.strip() if protocols else "",
+                "subtype": str(subtype_int) if subtype_int >= 0 else subtype if subtype else "",
+                "bssid": bssid_clean,
+                "wlan_sa": wlan_sa_clean,
+                "wlan_da": wlan_da_clean,
+                "source": source,  # Corrected address per frame type
+                "destination": destination,  # Corrected address per frame type
+                "frequency": str(freq_normalized) if freq_normalized > 0 else frequency if frequency else "",
+                "reason_code": str(reason_code_normalized) if reason_code_normalized >= 0 else reason_code if reason_code else "",
+                "ssid": ssid_clean,
+                "category_code": str(category_normalized) if category_normalized >= 0 else category_code if category_code else "",
+                "action_code": str(action_normalized) if action_normalized >= 0 else action_code if action_code else "",
+                "btm_status_code": str(btm_status_normalized) if btm_status_normalized >= 0 else btm_status_code if btm_status_code else "",
+                "assoc_status_code": str(assoc_status_normalized) if assoc_status_normalized >= 0 else assoc_status_code if assoc_status_code else "",
+                "signal_strength": str(rssi_normalized) if rssi_normalized is not None else signal_strength if signal_strength else "",
+                "frame_len": str(frame_len_int) if frame_len_int > 0 else frame_len if frame_len else "",
+                "ip_src": ip_src.strip() if ip_src else "",
+                "ip_dst": ip_dst.strip() if ip_dst else "",
+                "client_mac": client_mac if client_mac else "",
+                "ap_mac": ap_mac if ap_mac else ""
+            }
+            wireshark_raw["sample"].append(raw_row)
+        
+        # Also save a general sample (first N rows) for reference
+        if len(wireshark_raw["general_sample"]) < wireshark_raw["general_sample_limit"]:
+            wireshark_raw["general_sample"].append({
+                "timestamp": timestamp,
+                "protocols": protocols,
+                "subtype": subtype,
+                "bssid": bssid,
+                "wlan_sa": wlan_sa,
+                "wlan_da": wlan_da,
+                "frequency": frequency
+            })
+
+        # Detailed analysis of 802.11 events (counters come from the frame table)
+        if raw_subtype not in EVENT_SUBTYPES:
+            return
+
+        steering_events = state["steering_events"]
+        bssid_info = state["bssid_info"]
+        subtype_int = raw_subtype
 
-                    # Count key frames by band
-                    if subtype_int == 8:  # Beacon
-                        if current_band == "2.4GHz":
-                            band_counters["beacon_24"] += 1
-                        elif current_band == "5GHz":
-                            band_counters["beacon_5"] += 1
-                    
-                    elif subtype_int == 4:  # Probe Request
-                        band_counters["probe_req"] += 1
-                    
-                    elif subtype_int == 5:  # Probe Response
-                        if current_band == "2.4GHz":
-                            band_counters["probe_resp_24"] += 1
-                        elif current_band == "5GHz":
-                            band_counters["probe_resp_5"] += 1
-                            
-                    elif subtype_int in [0x28, 0x20]:  # QoS Data (40) o Data (32)
-                        if current_band == "2.4GHz":
-                            band_counters["data_24"] += 1
-                        elif current_band == "5GHz":
-                            band_counters["data_5"] += 1
-                    # -------------------------------------
-
-                    # --- SIGNAL SAMPLE COLLECTION ---
-                    # Save a sample if we have RSSI and valid band
-                    if signal_strength and current_band:
+        try:
+            # --- BTM DETECTION (802.11v) ---
+            # Subtype 13 = Action Frame, Category 10 = WNM
+            if subtype_int == 13 and category_normalized == 10:
+                if action_normalized == 7: # BTM Request
+                     # Map frequency to band
+                     if frequency:
                          try:
-                             rssi_val = int(signal_strength)
-                             # Only save if value is realistic and we have MACs
-                             if -120 < rssi_val < 0 and (wlan_sa or wlan_da):
-                                 temp_signal_samples.append({
-                                     "timestamp": float(timestamp) if timestamp else 0,
-                                     "rssi": rssi_val,
-                                     "band": current_band,
-                                     "frequency": int(frequency) if frequency else 0,
-                                     "sa": wlan_sa,
-                                     "da": wlan_da
-                                 })
-                         except Exception:
+                             freq_val = int(frequency) if isinstance(frequency, str) and frequency.isdigit() else float(frequency)
+                             freq_key = str(freq_val)
+                             if freq_key not in wireshark_raw["summary"]["freq_band_map"]:
+                                 if 2400 <= freq_val <= 2500:
+                                     wireshark_raw["summary"]["freq_band_map"][freq_key] = "2.4GHz"
+                                 elif 5000 <= freq_val <= 6000:
+                                     wireshark_raw["summary"]["freq_band_map"][freq_key] = "5GHz"
+                         except (ValueError, TypeError):
                              pass
-
-                    # --- KVR SUPPORT DETECTION (802.11k/v/r) ---
-                    # 11v (WNM) and 11k (Radio Measurement) operate over Action Frames (Subtype 13)
-                    if subtype_int == 13:
-                        if "kvr_stats" not in band_counters:
-                             band_counters["kvr_stats"] = {"11k": False, "11v": False, "11r": False}
-                        
-                        # 11k: Category 5 (Radio Measurement)
-                        if cat_val == 5:
-                            band_counters["kvr_stats"]["11k"] = True
-
-                        # 11v: Category 10 (WNM)
-                        if cat_val == 10:
-                            band_counters["kvr_stats"]["11v"] = True
-                            # Note: 11v BTM log is already done above in the BTM section
-                    
-                    # 11r: Detected in Authentication Frames (Subtype 11) with Auth Alg = 2
-                    # (Logic commented temporarily due to failure in tshark wlan.fixed.auth_alg)
-                    
-                    # Mark 11v also if we detect explicit BTM activity
-                    if band_counters.get("btm_stats", {}).get("requests", 0) > 0 or band_counters.get("btm_stats", {}).get("responses", 0) > 0:
-                        if "kvr_stats" not in band_counters:
-                             band_counters["kvr_stats"] = {"11k": False, "11v": False, "11r": False}
-                        band_counters["kvr_stats"]["11v"] = True
-                    
-                    # --- NEW ASSOCIATION VALIDATION LOGIC (Status Code) ---
-                    # (KVR Capabilities detection disabled temporarily due to failure in tshark)
+                     
+                     # Calculate band from frequency if available (correct inconsistency)
+                     btm_band = current_band
+                     if frequency:
+                         try:
+                             freq_val = int(frequency) if isinstance(frequency, str) and frequency.isdigit() else float(frequency)
+                             if 2400 <= freq_val <= 2500:
+                                 btm_band = "2.4GHz"
+                             elif 5000 <= freq_val <= 6000:
+                                 btm_band = "5GHz"
+                         except (ValueError, TypeError):
+                             pass
+                     
+                     # Register event for chart
+                     steering_events.append({
+                         "timestamp": float(timestamp) if timestamp else 0,
+                         "type": "btm",
+                         "event_type": "request",
+                         "subtype": subtype_int,
+                         "bssid": bssid, # Source BSSID (usually wlan_sa)
+                         "client_mac": wlan_da, # In Request, the client is the destination
+                         "ap_bssid": wlan_sa,   # In Request, the AP is the source
+                         "wlan_sa": wlan_sa,
+                         "wlan_da": wlan_da,
+                         "band": btm_band,
+                         "frequency": int(frequency) if frequency else 0,
+                         "rssi": int(signal_strength) if signal_strength else None,
+                         "status_code": None
+                     })
+                     
+                elif action_normalized == 8: # BTM Response
+                    # Status codes in order of appearance
+                    if btm_status_normalized >= 0:
+                        if str(btm_status_normalized) not in wireshark_raw["summary"]["btm"]["status_codes"]:
+                            wireshark_raw["summary"]["btm"]["status_codes"].append(str(btm_status_normalized))
                     
-                    # 1. Association Status Validation (Assoc/Reassoc Response)
-                    # Subtype 1=Assoc Resp, 3=Reassoc Resp
-                    if subtype_int in [1, 3] and assoc_status_code:
+                    # Calculate band from frequency if available (correct inconsistency)
+                    btm_response_band = current_band
+                    if frequency:
                         try:
-                            s_code = int(assoc_status_code) if assoc_status_code.isdigit() else int(assoc_status_code, 16)
-                            if s_code != 0:
-                                # Record explicit failure in diagnostic counters if necessary
-                                if "association_failures" not in band_counters:
-                                    band_counters["association_failures"] = []
-                                band_counters["association_failures"].append({
-                                    "status": s_code,
-                                    "time": timestamp,
-                                    "bssid": bssid
-                                })
-                        except Exception:
+                            freq_val = int(frequency) if isinstance(frequency, str) and frequency.isdigit() else float(frequency)
+                            if 2400 <= freq_val <= 2500:
+                                btm_response_band = "2.4GHz"
+                            elif 5000 <= freq_val <= 6000:
+                                btm_response_band = "5GHz"
+                        except (ValueError, TypeError):
                             pass
-
-                    
-                    event_type = None
-                    
-                    if subtype_int == 0:
-                        event_type = "Association Request"
-                    elif subtype_int == 1:
-                        event_type = "Association Response"
-                    elif subtype_int == 2:
-                        event_type = "Reassociation Request"
-                    elif subtype_int == 3:
-                        event_type = "Reassociation Response"
-                    elif subtype_int == 10:
-                        event_type = "Disassociation"
-                    elif subtype_int == 12:
-                        event_type = "Deauthentication"
                     
-                    if event_type:
-                        # Capture raw data for important events
-                        if subtype_int == 0:  # Association Request
-                            wireshark_raw["summary"]["assoc"]["requests"] += 1
-                        elif subtype_int == 1:  # Association Response
-                            wireshark_raw["summary"]["assoc"]["responses"] += 1
-                            if assoc_status_code:
-                                try:
-                                    s_code = int(assoc_status_code) if assoc_status_code.isdigit() else int(assoc_status_code, 16)
-                                    if s_code == 0:
-                                        wireshark_raw["summary"]["assoc"]["responses_success"] += 1
-                                    else:
-                                        wireshark_raw["summary"]["assoc"]["responses_fail"] += 1
-                                except (ValueError, TypeError):
-                                    pass
-                        elif subtype_int == 2:  # Reassociation Request
-                            wireshark_raw["summary"]["reassoc"]["requests"] += 1
-                        elif subtype_int == 3:  # Reassociation Response
-                            wireshark_raw["summary"]["reassoc"]["responses"] += 1
-                            if assoc_status_code:
-                                try:
-                                    s_code = int(assoc_status_code) if assoc_status_code.isdigit() else int(assoc_status_code, 16)
-                                    if s_code == 0:
-                                        wireshark_raw["summary"]["reassoc"]["responses_success"] += 1
-                                    else:
-                                        wireshark_raw["summary"]["reassoc"]["responses_fail"] += 1
-                                except (ValueError, TypeError):
-                                    pass
-                        elif subtype_int == 10:  # Disassociation
-                            wireshark_raw["summary"]["disassoc"]["count"] += 1
-                            if reason_code:
-                                if reason_code not in wireshark_raw["summary"]["disassoc"]["reason_codes"]:
-                                    wireshark_raw["summary"]["disassoc"]["reason_codes"].append(reason_code)
-                        elif subtype_int == 12:  # Deauthentication
-                            wireshark_raw["summary"]["deauth"]["count"] += 1
-                            if reason_code:
-                                if reason_code not in wireshark_raw["summary"]["deauth"]["reason_codes"]:
-                                    wireshark_raw["summary"]["deauth"]["reason_codes"].append(reason_code)
-                        
-                        # Determine band
-                        band = None
-                        if frequency:
-                            try:
-                                freq_mhz = float(frequency)
-                                if 2400 <= freq_mhz <= 2500:
-                                    band = "2.4GHz"
-                                elif 5000 <= freq_mhz <= 6000:
-                                    band = "5GHz"
-                                # Mapear frecuencia a banda en raw
-                                freq_key = str(int(freq_mhz))
-                                if freq_key not in wireshark_raw["summary"]["freq_band_map"]:
-                                    wireshark_raw["summary"]["freq_band_map"][freq_key] = band
-                            except ValueError:
-                                pass
-                        
-                        # Determine client_mac correctly: the client is the one that is NOT the BSSID
-                        # In Deauth/Disassoc: if it comes from AP (SA=BSSID), the client is DA
-                        # If it comes from client (SA=client), the client is SA
-                        client_mac_value = None
-                        if bssid:
-                            if wlan_sa and wlan_sa.lower() == bssid.lower():
-                                client_mac_value = wlan_da  # AP sends, client receives
-                            elif wlan_da and wlan_da.lower() == bssid.lower():
-                                client_mac_value = wlan_sa  # Client sends, AP receives
-                            else:
-                                # Fallback: use the one that is not broadcast/multicast
-                                client_mac_value = wlan_da if wlan_da and wlan_da != "ff:ff:ff:ff:ff:ff" else wlan_sa
-                        else:
-                            # Without BSSID, use the one that is not broadcast
-                            client_mac_value = wlan_da if wlan_da and wlan_da != "ff:ff:ff:ff:ff:ff" else wlan_sa
-                        
-                        event = {
-                            "timestamp": float(timestamp) if timestamp else 0,
-                            "type": event_type,
-                            "subtype": subtype_int,
-                            "sa": wlan_sa,
-                            "da": wlan_da,
-                            "client_mac": client_mac_value or wlan_sa or wlan_da,
-                            "bssid": bssid,
+                    # Register event for chart
+                    steering_events.append({
+                         "timestamp": float(timestamp) if timestamp else 0,
+                         "type": "btm",
+                         "event_type": "response",
+                         "subtype": subtype_int,
+                         "bssid": bssid,
+                         "client_mac": wlan_sa, # In Response, the client is the source
+                         "ap_bssid": wlan_da,   # In Response, the AP is the destination
+                         "wlan_sa": wlan_sa,
+                         "wlan_da": wlan_da,
+                         "band": btm_response_band,
+                         "frequency": int(frequency) if frequency else 0,
+                         "rssi": int(signal_strength) if signal_strength else None,
+                         "status_code": int(btm_status_code) if btm_status_code and btm_status_code.isdigit() else None
+                     })
+                
+                # Universal status code capture
+                if btm_status_code and btm_status_code not in state["btm_status_codes"]:
+                    state["btm_status_codes"].append(btm_status_code)
+
+            # --- ASSOCIATION VALIDATION LOGIC (Status Code) ---
+            # Subtype 1=Assoc Resp, 3=Reassoc Resp
+            if subtype_int in [1, 3] and assoc_status_normalized > 0:
+                # Record explicit failure in diagnostic counters
+                state["association_failures"].append({
+                    "status": assoc_status_normalized,
+                    "time": timestamp,
+                    "bssid": bssid
+                })
+
+            event_type = None
+            
+            if subtype_int == 0:
+                event_type = "Association Request"
+            elif subtype_int == 1:
+                event_type = "Association Response"
+            elif subtype_int == 2:
+                event_type = "Reassociation Request"
+            elif subtype_int == 3:
+                event_type = "Reassociation Response"
+            elif subtype_int == 10:
+                event_type = "Disassociation"
+            elif subtype_int == 12:
+                event_type = "Deauthentication"
+            
+            if event_type:
+                # Reason codes in order of appearance
+                if subtype_int == 10:  # Disassociation
+                    if reason_code:
+                        if reason_code not in wireshark_raw["summary"]["disassoc"]["reason_codes"]:
+                            wireshark_raw["summary"]["disassoc"]["reason_codes"].append(reason_code)
+                elif subtype_int == 12:  # Deauthentication
+                    if reason_code:
+                        if reason_code not in wireshark_raw["summary"]["deauth"]["reason_codes"]:
+                            wireshark_raw["summary"]["deauth"]["reason_codes"].append(reason_code)
+                
+                # Determine band
+                band = None
+                if frequency:
+                    try:
+                        freq_mhz = float(frequency)
+                        if 2400 <= freq_mhz <= 2500:
+                            band = "2.4GHz"
+                        elif 5000 <= freq_mhz <= 6000:
+                            band = "5GHz"
+                        # Mapear frecuencia a banda en raw
+                        freq_key = str(int(freq_mhz))
+                        if freq_key not in wireshark_raw["summary"]["freq_band_map"]:
+                            wireshark_raw["summary"]["freq_band_map"][freq_key] = band
+                    except ValueError:
+                        pass
+                
+                # Determine client_mac correctly: the client is the one that is NOT the BSSID
+                # In Deauth/Disassoc: if it comes from AP (SA=BSSID), the client is DA
+                # If it comes from client (SA=client), the client is SA
+                # (compared by the ids interned when the frame was appended)
+                frames = state["frames"]
+                mac_registry = frames.mac_registry
+                bssid_id = frames.bssid_ids[-1]
+                sa_id = frames.sa_ids[-1]
+                da_id = frames.da_ids[-1]
+                da_usable = da_id >= 0 and not mac_registry.flags[da_id] & MAC_BROADCAST
+                client_mac_value = None
+                if bssid_id >= 0 and sa_id == bssid_id:
+                    client_mac_value = wlan_da  # AP sends, client receives
+                elif bssid_id >= 0 and da_id == bssid_id:
+                    client_mac_value = wlan_sa  # Client sends, AP receives
+                else:
+                    # Fallback (or no BSSID): use the one that is not broadcast
+                    client_mac_value = wlan_da if da_usable else wlan_sa
+                
+                event = {
+                    "timestamp": float(timestamp) if timestamp else 0,
+                    "type": event_type,
+                    "subtype": subtype_int,
+                    "sa": wlan_sa,
+                    "da": wlan_da,
+                    "client_mac": client_mac_value or wlan_sa or wlan_da,
+                    "bssid": bssid,
+                    "ssid": ssid,
+                    "band": band,
+                    "frequency": frequency,
+                    "reason_code": reason_code,
+                    "assoc_status_code": assoc_status_code,
+                    "signal_strength": signal_strength
+                }
+                steering_events.append(event)
+                mac_registry.add_client(event["client_mac"])
+
+                # Register BSSID information (even without band)
+                if bssid:
+                    mac_registry.add_bssid(bssid)
+                    if bssid not in bssid_info:
+                        bssid_info[bssid] = {
+                            "band": band,  # Can be None
                             "ssid": ssid,
-                            "band": band,
-                            "frequency": frequency,
-                            "reason_code": reason_code,
-                            "assoc_status_code": assoc_status_code,
-                            "signal_strength": signal_strength
+                            "frequency": frequency
                         }
-                        steering_events.append(event)
-                        
-                        # Register BSSID information (even without band)
-                        if bssid:
-                            if bssid not in bssid_info:
-                                bssid_info[bssid] = {
-                                    "band": band,  # Can be None
-                                    "ssid": ssid,
-                                    "frequency": frequency
-                                }
-                            # Update band if we now have info and didn't before
-                            elif band and not bssid_info[bssid].get("band"):
-                                bssid_info[bssid]["band"] = band
-                                bssid_info[bssid]["frequency"] = frequency
-                except (ValueError, AttributeError):
-                    # If it cannot be parsed, ignore this packet
-                    wlan_packets_without_subtype += 1
-
-        # Results logging
-        
-        # Show most common frame types
-        if subtype_counter:
-            for subtype_val, count in subtype_counter.most_common(10):
-                frame_name = {
-                    0: "Association Request",
-                    1: "Association Response",
-                    2: "Reassociation Request",
-                    3: "Reassociation Response",
-                    8: "Beacon",
-                    10: "Disassociation",
-                    12: "Deauthentication",
-                    4: "Probe Request",
-                    5: "Probe Response",
-                    13: "Action",
-                    24: "Block Ack Request",
-                    25: "Block Ack",
-                     28: "QoS Data"
-                }.get(subtype_val, f"Unknown (0x{subtype_val:02x})")
-        
+                    # Update band if we now have info and didn't before
+                    elif band and not bssid_info[bssid].get("band"):
+                        bssid_info[bssid]["band"] = band
+                        bssid_info[bssid]["frequency"] = frequency
+        except (ValueError, AttributeError):
+            # If it cannot be parsed, ignore this packet
+            state["wlan_packets_without_subtype"] += 1
+
+    def _aggregate_frame_counters(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fills the `wireshark_raw["summary"]` counts and builds `band_counters`
+        from the frame table with vectorized operations.
+        """
+        frames = state["frames"]
+        summary = state["wireshark_raw"]["summary"]
+
+        counts = frames.summary_counts()
+        summary["total_packets"] = counts["total_packets"]
+        summary["total_wlan_packets"] = counts["total_wlan_packets"]
+        for key in ("btm", "assoc", "reassoc", "deauth", "disassoc"):
+            summary[key].update(counts[key])
+
+        band_counters = frames.band_counters()
+        if "btm_stats" in band_counters:
+            band_counters["btm_stats"]["status_codes"] = state["btm_status_codes"]
+        if state["association_failures"]:
+            band_counters["association_failures"] = state["association_failures"]
+        return band_counters
+
+    def _finalize_stats(
+        self,
+        state: Dict[str, Any],
+        client_mac_hint: Optional[str] = None,
+        multi_client: bool = False,
+    ) -> Dict[str, Any]:
+        """Runs the capture-wide analysis over a fully ingested parse state."""
+        frames = state["frames"]
+        steering_events = state["steering_events"]
+        bssid_info = state["bssid_info"]
+        band_counters = self._aggregate_frame_counters(state)
+
         # 1. Determine primary Client MAC (precise and robust)
         client_mac = self._select_primary_client_mac(
             steering_events=steering_events,
-            temp_signal_samples=temp_signal_samples,
-            all_client_macs=all_client_macs,
+            signal_sources=frames.signal_sources(),
+            mac_occurrences=frames.mac_occurrences(),
             bssid_info=bssid_info,
             client_mac_hint=client_mac_hint,
+            mac_registry=frames.mac_registry,
         )
 
         # 2. Client sessions and transitions analysis
-        steering_analysis = self._analyze_steering_patterns(steering_events, bssid_info, band_counters, client_mac)
+        steering_analysis = self._analyze_steering_patterns(
+            steering_events, bssid_info, band_counters, client_mac, mac_registry=frames.mac_registry
+        )
         
         # 3. Capture quality evaluation for band steering
         capture_quality = self._evaluate_capture_quality(steering_analysis, steering_events)
 
         # 4. Build diagnostics block (numerical source of truth)
         diagnostics = self._build_diagnostics_block(
-            tcp_retransmissions=tcp_retransmissions,
-            wlan_retries=wlan_retries,
-            dns_errors=dns_errors,
+            tcp_retransmissions=state["tcp_retransmissions"],
+            wlan_retries=state["wlan_retries"],
+            dns_errors=state["dns_errors"],
             steering_events=steering_events,
             bssid_info=bssid_info,
             client_mac=client_mac,
             capture_quality=capture_quality,
             band_counters=band_counters,
-            wireshark_raw=wireshark_raw,
+            wireshark_raw=state["wireshark_raw"],
         )
 
-        # 5. Filter signal samples for continuous chart
+        # 5. Signal samples for continuous chart: packets where the client is
+        # the source (SA), to see its RSSI (LTTB-downsampled), plus per-band
+        # statistics over all of its samples
         final_signal_samples = []
+        signal_stats = {}
         if client_mac and client_mac != "Unknown":
-            # Use packets where the client is the source (SA) to see its RSSI
-            client_samples = [s for s in temp_signal_samples if s["sa"] == client_mac]
-            
-            # Simple sampling to not saturate UI (max ~500 points)
-            if len(client_samples) > 500:
-                 step = len(client_samples) // 500
-                 if step < 1: step = 1
-                 final_signal_samples = client_samples[::step]
-            else:
-                 final_signal_samples = client_samples
+            final_signal_samples = frames.signal_samples_for(
+                client_mac, max_points=settings.signal_sample_points
+            )
+            signal_stats = frames.signal_stats_for(client_mac)
 
-        return {
-            "total_packets": total_packets,
-            "total_tcp_packets": total_tcp_packets,
-            "total_wlan_packets": total_wlan_packets,
-            "approx_total_bytes": total_bytes,
+        stats = {
+            "total_packets": len(frames),
+            "total_tcp_packets": state["total_tcp_packets"],
+            "total_wlan_packets": state["wireshark_raw"]["summary"]["total_wlan_packets"],
+            "approx_total_bytes": state["total_bytes"],
             "diagnostics": diagnostics,
             "steering_analysis": steering_analysis,
             "steering_events": steering_events,
             "signal_samples": final_signal_samples, # NEW
-            "top_protocols": protocol_counter.most_common(10),
-            "top_sources": src_counter.most_common(10),
-            "top_destinations": dst_counter.most_common(10),
+            "signal_stats": signal_stats,
+            "top_protocols": frames.protocol_counter().most_common(10),
+            "top_sources": state["src_counter"].most_common(10),
+            "top_destinations": state["dst_counter"].most_common(10),
         }
+        if multi_client:
+            stats["clients"] = self._build_client_breakdown(
+                steering_events, bssid_info, band_counters, frames, state["wireshark_raw"]["summary"]
+            )
+        return stats
+
+    def _partition_events_by_client(
+        self,
+        steering_events: list,
+        mac_registry: MacRegistry,
+    ) -> Dict[int, list]:
+        """
+        Steering events of each station, keyed by interned MAC id, in one
+        pass. Events whose client is a BSSID or a group address are dropped.
+        """
+        by_client: Dict[int, list] = {}
+        is_candidate = mac_registry.is_client_candidate
+        intern = mac_registry.intern
+        for event in steering_events:
+            client = event.get("client_mac")
+            if client and is_candidate(client):
+                by_client.setdefault(intern(client), []).append(event)
+        return by_client
+
+    def _client_band_counters(self, band_counters: dict, events: list) -> dict:
+        """
+        Capture-wide `band_counters` with the BTM counters and association
+        failures restricted to one station's events.
+        """
+        counters = dict(band_counters)
+        if "btm_stats" in band_counters:
+            requests = responses = 0
+            status_codes = []
+            for event in events:
+                if event.get("type") != "btm":
+                    continue
+                if event.get("event_type") == "request":
+                    requests += 1
+                elif event.get("event_type") == "response":
+                    responses += 1
+                    code = event.get("status_code")
+                    if code is not None and code not in status_codes:
+                        status_codes.append(code)
+            counters["btm_stats"] = {
+                "requests": requests,
+                "responses": responses,
+                "status_codes": status_codes,
+            }
+
+        failures = []
+        for event in events:
+            if event.get("subtype") not in (1, 3):
+                continue
+            status = self._normalize_status_code(str(event.get("assoc_status_code") or ""))
+            if status > 0:
+                failures.append({"status": status, "time": event["timestamp"], "bssid": event.get("bssid")})
+        if failures:
+            counters["association_failures"] = failures
+        else:
+            counters.pop("association_failures", None)
+        return counters
+
+    def _client_raw_summary(self, summary: Dict[str, Any], events: list) -> Dict[str, Any]:
+        """
+        `wireshark_raw.summary` restricted to one station: BTM, (re)association
+        and Deauth/Disassoc counters over its own events. Capture-wide totals
+        and the frequency/band map are kept as they are.
+        """
+        station = {
+            "total_packets": summary.get("total_packets", 0),
+            "total_wlan_packets": summary.get("total_wlan_packets", 0),
+            "btm": {"requests": 0, "responses": 0, "responses_accept": 0, "responses_reject": 0, "status_codes": []},
+            "assoc": {"requests": 0, "responses": 0, "responses_success": 0, "responses_fail": 0},
+            "reassoc": {"requests": 0, "responses": 0, "responses_success": 0, "responses_fail": 0},
+            "deauth": {"count": 0, "reason_codes": []},
+            "disassoc": {"count": 0, "reason_codes": []},
+            "freq_band_map": summary.get("freq_band_map", {}),
+        }
+        for event in events:
+            subtype = event.get("subtype")
+            if event.get("type") == "btm":
+                btm = station["btm"]
+                if event.get("event_type") == "request":
+                    btm["requests"] += 1
+                elif event.get("event_type") == "response":
+                    btm["responses"] += 1
+                    code = event.get("status_code")
+                    if code is not None:
+                        if code == 0:
+                            btm["responses_accept"] += 1
+                        elif code > 0:
+                            btm["responses_reject"] += 1
+                        if str(code) not in btm["status_codes"]:
+                            btm["status_codes"].append(str(code))
+            elif subtype in (0, 1, 2, 3):
+                counters = station["assoc" if subtype in (0, 1) else "reassoc"]
+                if subtype in (0, 2):
+                    counters["requests"] += 1
+                else:
+                    counters["responses"] += 1
+                    status = self._normalize_status_code(str(event.get("assoc_status_code") or ""))
+                    if status == 0:
+                        counters["responses_success"] += 1
+                    elif status > 0:
+                        counters["responses_fail"] += 1
+            elif subtype in (10, 12):
+                counters = station["disassoc" if subtype == 10 else "deauth"]
+                counters["count"] += 1
+                reason_code = event.get("reason_code")
+                if reason_code and reason_code not in counters["reason_codes"]:
+                    counters["reason_codes"].append(reason_code)
+        return station
+
+    def _build_client_breakdown(
+        self,
+        steering_events: list,
+        bssid_info: Dict[str, Any],
+        band_counters: Dict[str, Any],
+        frames: FrameTable,
+        raw_summary: Dict[str, Any],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-station results for multi-client analysis: each station's own
+        steering events, steering analysis, BTM counters, raw frame summary
+        and signal series.
+        Stations are ranked by number of steering events and capped at
+        `multi_client_max_stations`.
+        """
+        mac_registry = frames.mac_registry
+        by_client = self._partition_events_by_client(steering_events, mac_registry)
+        ranked = sorted(by_client.items(), key=lambda item: len(item[1]), reverse=True)
+
+        clients: Dict[str, Dict[str, Any]] = {}
+        for mac_id, events in ranked[:max(0, settings.multi_client_max_stations)]:
+            client_mac = mac_registry.macs[mac_id]
+            client_counters = self._client_band_counters(band_counters, events)
+            clients[client_mac] = {
+                "client_mac": client_mac,
+                "steering_events": events,
+                "steering_analysis": self._analyze_steering_patterns(
+                    events, bssid_info, client_counters, client_mac, mac_registry=mac_registry
+                ),
+                "band_counters": client_counters,
+                "wireshark_raw": {"summary": self._client_raw_summary(raw_summary, events)},
+                "signal_samples": frames.signal_samples_for(
+                    client_mac, max_points=settings.signal_sample_points
+                ),
+                "signal_stats": frames.signal_stats_for(client_mac),
+            }
+        return clients
 
     def _select_primary_client_mac(
         self,
         steering_events,
-        temp_signal_samples,
-        all_client_macs,
+        signal_sources: Counter,
+        mac_occurrences: Counter,
         bssid_info,
         client_mac_hint: Optional[str],
+        mac_registry: Optional[MacRegistry] = None,
     ) -> str:
         """
         Determines the primary client MAC using multiple evidence sources.
+        Candidates are checked against `mac_registry` (the frame table's,
+        when available), where every MAC was normalized once at parse time.
         
         Prioritizes:
         - Explicit user hint (if valid and not a BSSID).
@@ -876,74 +1443,52 @@ class WiresharkTool:
         """
         client_mac = "Unknown"
 
-        def is_valid_client_mac(mac: str) -> bool:
-            if not mac or mac in ("ff:ff:ff:ff:ff:ff", "00:00:00:00:00:00"):
-                return False
-            try:
-                first_octet = int(mac.split(":")[0], 16)
-                # Filter multicast / group addresses
-                if first_octet & 1:
-                    return False
-            except Exception:
-                return False
-            return True
-
-        def _normalize_mac(mac: str) -> str:
-            return (mac or "").lower().replace("-", ":").strip()
-
-        known_bssids = set(
-            _normalize_mac(b) for b in (bssid_info or {}).keys() if b
-        )
+        if mac_registry is None:
+            mac_registry = MacRegistry()
+        for bssid in bssid_info or ():
+            mac_registry.add_bssid(bssid)
+        is_candidate = mac_registry.is_client_candidate
 
         # 1) Explicit user hint
-        if client_mac_hint:
-            hint_norm = _normalize_mac(client_mac_hint)
-            if is_valid_client_mac(hint_norm) and hint_norm not in known_bssids:
-                return hint_norm
+        if client_mac_hint and is_candidate(client_mac_hint):
+            return normalize_mac(client_mac_hint)
 
+        # Scores per interned MAC id
         mac_score = Counter()
+        intern = mac_registry.intern
 
         # 2) Strong evidence from 802.11 events
         for ev in steering_events:
             subtype = ev.get("subtype")
-            ev_type = ev.get("type")
-            ev_event_type = ev.get("event_type")
 
             # Candidate via calculated client_mac (when it exists)
-            cand = _normalize_mac(ev.get("client_mac"))
-            if cand and is_valid_client_mac(cand) and cand not in known_bssids:
-                mac_score[cand] += 1
+            cand = ev.get("client_mac")
+            cand_ok = bool(cand) and is_candidate(cand)
+            if cand_ok:
+                mac_score[intern(cand)] += 1
 
             # Association/Reassociation Request -> SA del evento
             if subtype in [0, 2]:
-                cand_sa = _normalize_mac(ev.get("sa") or ev.get("wlan_sa"))
-                if cand_sa and is_valid_client_mac(cand_sa) and cand_sa not in known_bssids:
-                    mac_score[cand_sa] += 5
+                cand_sa = ev.get("sa") or ev.get("wlan_sa")
+                if cand_sa and is_candidate(cand_sa):
+                    mac_score[intern(cand_sa)] += 5
 
             # Explicit BTM Response (WiresharkTool format)
-            if ev_type == "btm" and ev_event_type == "response":
-                cand_cli = _normalize_mac(ev.get("client_mac"))
-                if cand_cli and is_valid_client_mac(cand_cli) and cand_cli not in known_bssids:
-                    mac_score[cand_cli] += 8
+            if cand_ok and ev.get("type") == "btm" and ev.get("event_type") == "response":
+                mac_score[intern(cand)] += 8
 
         # 3) Evidence from RSSI samples: the client is the actual sender of frames with RSSI
-        for s in temp_signal_samples:
-            cand_sa = _normalize_mac(s.get("sa"))
-            if cand_sa and is_valid_client_mac(cand_sa) and cand_sa not in known_bssids:
-                mac_score[cand_sa] += 2
-
-        # 4) Fallback: global occurrence frequency in all_client_macs (less reliable)
-        fallback_clients = [
-            _normalize_mac(m)
-            for m in all_client_macs
-            if is_valid_client_mac(_normalize_mac(m))
-            and _normalize_mac(m) not in known_bssids
-        ]
-        if fallback_clients:
-            mac_score.update(Counter(fallback_clients))
+        for sa, samples in signal_sources.items():
+            if is_candidate(sa):
+                mac_score[intern(sa)] += 2 * samples
+
+        # 4) Fallback: global occurrence frequency as SA/DA (less reliable)
+        for mac, occurrences in mac_occurrences.items():
+            if is_candidate(mac):
+                mac_score[intern(mac)] += occurrences
 
         if mac_score:
-            client_mac = mac_score.most_common(1)[0][0]
+            client_mac = mac_registry.macs[mac_score.most_common(1)[0][0]]
 
         return client_mac
 
@@ -1030,6 +1575,7 @@ class WiresharkTool:
         bssid_info: dict,
         band_counters: dict = None,
         primary_client_mac: str = None,
+        mac_registry: Optional[MacRegistry] = None,
     ) -> Dict[str, Any]:
         """
         Analyzes band steering patterns in captured events.
@@ -1038,6 +1584,9 @@ class WiresharkTool:
         1. Aggressive steering (Deauth → Reassoc).
         2. Assisted steering (Direct Reassoc).
         3. Preventive steering (client steering by silencing 2.4GHz).
+
+        Transitions and counters come from `TransitionEngine`; the same pass
+        yields the association transitions BTMAnalyzer reports.
         """
         
         # Detect Preventive Steering (always checked, even without transition events)
@@ -1046,6 +1595,7 @@ class WiresharkTool:
         if not events and not preventive_detected:
             return {
                 "transitions": [],
+                "association_transitions": [],
                 "steering_attempts": 0,
                 "successful_transitions": 0,
                 "failed_transitions": 0,
@@ -1058,66 +1608,37 @@ class WiresharkTool:
                 "preventive_steering": False
             }
         
-        (
-            sorted_events,
-            client_events,
-        ) = self._group_events_by_client(events=events, bssid_info=bssid_info)
-
-        (
-            total_steering_attempts,
-            successful_transitions,
-        ) = self._count_btm_attempts_and_successes(
-            sorted_events=sorted_events,
+        engine = TransitionEngine(bssid_info=bssid_info, mac_registry=mac_registry)
+        result = engine.analyze(
+            events,
             band_counters=band_counters,
             primary_client_mac=primary_client_mac,
         )
 
-        (
-            transitions,
-            client_attempts,
-            client_successes,
-            failed_transitions,
-            loop_detected,
-            transition_times,
-        ) = self._analyze_client_transitions(
-            client_events=client_events,
-            bssid_info=bssid_info,
-        )
-
-        total_steering_attempts += client_attempts
-        successful_transitions += client_successes
-        
-        avg_transition_time, max_transition_time = self._compute_transition_metrics(
-            transition_times=transition_times,
-        )
-
         verdict = self._determine_overall_steering_verdict(
             preventive_detected=preventive_detected,
-            total_steering_attempts=total_steering_attempts,
+            total_steering_attempts=result["steering_attempts"],
             band_counters=band_counters or {},
-            successful_transitions=successful_transitions,
-            failed_transitions=failed_transitions,
-            loop_detected=loop_detected,
-            avg_transition_time=avg_transition_time,
+            successful_transitions=result["successful_transitions"],
+            failed_transitions=result["transition_failures"],
+            loop_detected=result["loop_detected"],
+            avg_transition_time=result["avg_transition_time"],
             events=events,
             primary_client_mac=primary_client_mac,
         )
 
-        total_attempts_final = max(total_steering_attempts, len(transitions))
-
         return {
-            "transitions": transitions,
-            "steering_attempts": total_attempts_final,
-            "successful_transitions": successful_transitions,
-            "failed_transitions": max(
-                0, total_attempts_final - successful_transitions
-            ),
-            "loop_detected": loop_detected or len(transitions) > 3,
-            "avg_transition_time": round(avg_transition_time, 3),
-            "max_transition_time": round(max_transition_time, 3),
-            "transition_times": transition_times,
+            "transitions": result["transitions"],
+            "association_transitions": result["association_transitions"],
+            "steering_attempts": result["steering_attempts"],
+            "successful_transitions": result["successful_transitions"],
+            "failed_transitions": result["failed_transitions"],
+            "loop_detected": result["loop_detected"],
+            "avg_transition_time": result["avg_transition_time"],
+            "max_transition_time": result["max_transition_time"],
+            "transition_times": result["transition_times"],
             "verdict": verdict,
-            "clients_analyzed": len(client_events),
+            "clients_analyzed": result["clients_analyzed"],
             "preventive_steering": preventive_detected,
         }
 
@@ -1155,422 +1676,6 @@ class WiresharkTool:
         
         return False
 
-    def _group_events_by_client(
-        self,
-        events: list,
-        bssid_info: dict,
-    ) -> (list, Dict[str, list]):
-        """
-        Sorts events by time and groups them by client, filtering known BSSIDs.
-        """
-        sorted_events = sorted(events, key=lambda x: x["timestamp"])
-
-        known_bssids_set = set(bssid_info.keys()) if bssid_info else set()
-
-        def is_bssid(mac: str) -> bool:
-            if not mac:
-                return True
-            mac_normalized = mac.lower().replace("-", ":")
-            for bssid in known_bssids_set:
-                if bssid.lower().replace("-", ":") == mac_normalized:
-                    return True
-            return False
-
-        client_events: Dict[str, list] = {}
-        for event in sorted_events:
-            client = event.get("client_mac")
-            if client and client != "" and not is_bssid(client):
-                client_events.setdefault(client, []).append(event)
-
-        return sorted_events, client_events
-
-    def _count_btm_attempts_and_successes(
-        self,
-        sorted_events: list,
-        band_counters: Optional[dict],
-        primary_client_mac: Optional[str],
-    ) -> (int, int):
-        """
-        Counts steering attempts and successes based on BTM (requests/responses).
-        """
-        total_steering_attempts = 0
-        successful_transitions = 0
-
-        if not band_counters or "btm_stats" not in band_counters:
-            return total_steering_attempts, successful_transitions
-
-        btm_stats = band_counters["btm_stats"]
-
-        if primary_client_mac:
-            btm_requests_count = sum(
-                1
-                for event in sorted_events
-                if event.get("type") == "btm"
-                and event.get("event_type") == "request"
-                and event.get("client_mac") == primary_client_mac
-            )
-        else:
-            btm_requests_count = btm_stats.get("requests", 0)
-
-        if btm_requests_count > 0:
-            total_steering_attempts += btm_requests_count
-
-        btm_successful_responses = sum(
-            1
-            for event in sorted_events
-            if event.get("type") == "btm"
-            and event.get("event_type") == "response"
-            and (
-                event.get("status_code") == 0
-                or str(event.get("status_code")) == "0"
-            )
-            and (not primary_client_mac or event.get("client_mac") == primary_client_mac)
-        )
-
-        if btm_successful_responses > 0:
-            successful_transitions += btm_successful_responses
-
-        return total_steering_attempts, successful_transitions
-
-    def _analyze_client_transitions(
-        self,
-        client_events: Dict[str, list],
-        bssid_info: dict,
-    ) -> (list, int, int, int, bool, list):
-        """
-        Analyzes aggressive and assisted transitions by client.
-        """
-        transitions = []
-        total_steering_attempts = 0
-        successful_transitions = 0
-        failed_transitions = 0
-        loop_detected = False
-        transition_times: list = []
-
-        def normalize_band(band):
-            if not band:
-                return None
-            band_str = str(band).lower()
-            if "5" in band_str:
-                return "5GHz"
-            if "2.4" in band_str or "2,4" in band_str:
-                return "2.4GHz"
-            return band
-
-        for client_mac, client_event_list in client_events.items():
-            if len(client_event_list) < 2:
-                continue
-
-            current_bssid = None
-            last_reassoc_time = None
-
-            for i, event in enumerate(client_event_list):
-                event_subtype = event["subtype"]
-
-                # Case 1: Aggressive steering (Deauth/Disassoc → Reassoc)
-                if event_subtype in [10, 12]:
-                    (
-                        new_transitions,
-                        attempts_inc,
-                        success_inc,
-                        fail_inc,
-                        loop_flag,
-                        new_times,
-                        current_bssid,
-                    ) = self._process_aggressive_steering_event(
-                        client_mac=client_mac,
-                        event=event,
-                        client_event_list=client_event_list,
-                        start_index=i,
-                        current_bssid=current_bssid,
-                        normalize_band=normalize_band,
-                    )
-
-                    transitions.extend(new_transitions)
-                    total_steering_attempts += attempts_inc
-                    successful_transitions += success_inc
-                    failed_transitions += fail_inc
-                    if loop_flag:
-                        loop_detected = True
-                    transition_times.extend(new_times)
-
-                # Case 2: Assisted steering (Direct Reassociation)
-                elif event_subtype in [2, 3]:
-                    (
-                        new_transitions,
-                        attempts_inc,
-                        success_inc,
-                        fail_inc,
-                        loop_flag,
-                        new_times,
-                        current_bssid,
-                        last_reassoc_time,
-                    ) = self._process_assisted_steering_event(
-                        client_mac=client_mac,
-                        event=event,
-                        client_event_list=client_event_list,
-                        start_index=i,
-                        current_bssid=current_bssid,
-                        last_reassoc_time=last_reassoc_time,
-                        bssid_info=bssid_info,
-                        normalize_band=normalize_band,
-                    )
-
-                    transitions.extend(new_transitions)
-                    total_steering_attempts += attempts_inc
-                    successful_transitions += success_inc
-                    failed_transitions += fail_inc
-                    if loop_flag:
-                        loop_detected = True
-                    transition_times.extend(new_times)
-
-                # Update current BSSID for initial Association
-                elif event_subtype in [0, 1] and event.get("bssid"):
-                    if not current_bssid:
-                        current_bssid = event["bssid"]
-                        last_reassoc_time = event["timestamp"]
-
-        return (
-            transitions,
-            total_steering_attempts,
-            successful_transitions,
-            failed_transitions,
-            loop_detected,
-            transition_times,
-        )
-
-    def _process_aggressive_steering_event(
-        self,
-        client_mac: str,
-        event: dict,
-        client_event_list: list,
-        start_index: int,
-        current_bssid: Optional[str],
-        normalize_band,
-    ):
-        """Processes an aggressive steering event (Deauth/Disassoc)."""
-        transitions = []
-        attempts_inc = 0
-        success_inc = 0
-        fail_inc = 0
-        loop_flag = False
-        new_times = []
-
-        deauth_band = event["band"]
-        deauth_time = event["timestamp"]
-        reason_code = event["reason_code"]
-        deauth_bssid = event.get("bssid")
-
-        is_forced, classification, desc = DeauthValidator.validate_and_classify(
-            event, client_mac
-        )
-        if not is_forced:
-            return transitions, attempts_inc, success_inc, fail_inc, loop_flag, new_times, current_bssid
-
-        attempts_inc += 1
-
-        reassoc_found = False
-        reassoc_time = None
-        new_bssid = None
-        new_band = None
-
-        reassoc_limit = REASSOC_TIMEOUT_SECONDS
-        for next_event in client_event_list[start_index + 1 :]:
-            if (next_event["timestamp"] - deauth_time) > reassoc_limit:
-                break
-
-            if next_event["subtype"] in [1, 3]:
-                current_status_code = next_event.get("assoc_status_code", "0")
-                try:
-                    s_val = (
-                        int(current_status_code)
-                        if str(current_status_code).isdigit()
-                        else 0
-                    )
-                except Exception:
-                    s_val = 0
-
-                if s_val == 0:
-                    reassoc_found = True
-                    reassoc_time = next_event["timestamp"]
-                    new_bssid = next_event["bssid"]
-                    new_band = next_event["band"]
-                    break
-                else:
-                    reassoc_found = False
-                    break
-
-        transition_time = (
-            reassoc_time - deauth_time if reassoc_time is not None else None
-        )
-
-        deauth_band_norm = normalize_band(deauth_band)
-        new_band_norm = normalize_band(new_band)
-        is_band_change = (
-            deauth_band_norm
-            and new_band_norm
-            and deauth_band_norm != new_band_norm
-        )
-        is_bssid_change = (
-            deauth_bssid and new_bssid and deauth_bssid != new_bssid
-        )
-
-        returned_to_original = False
-        if reassoc_found and new_bssid and current_bssid:
-            if new_bssid == current_bssid:
-                returned_to_original = True
-                loop_flag = True
-
-        status = self._classify_transition(
-            reassoc_found,
-            transition_time,
-            is_band_change,
-            is_bssid_change,
-            returned_to_original,
-        )
-
-        if status == "SUCCESS":
-            success_inc += 1
-        elif status in ["LOOP", "TIMEOUT", "NO_REASSOC"]:
-            fail_inc += 1
-
-        if transition_time is not None:
-            new_times.append(transition_time)
-
-        transitions.append(
-            {
-                "client": client_mac,
-                "type": "aggressive",
-                "deauth_time": deauth_time,
-                "reassoc_time": reassoc_time,
-                "transition_time": transition_time,
-                "from_bssid": deauth_bssid,
-                "to_bssid": new_bssid,
-                "from_band": deauth_band,
-                "to_band": new_band,
-                "is_band_change": is_band_change,
-                "reason_code": reason_code,
-                "status": status,
-                "returned_to_original": returned_to_original,
-            }
-        )
-
-        if reassoc_found and new_bssid:
-            current_bssid = new_bssid
-
-        return transitions, attempts_inc, success_inc, fail_inc, loop_flag, new_times, current_bssid
-
-    def _process_assisted_steering_event(
-        self,
-        client_mac: str,
-        event: dict,
-        client_event_list: list,
-        start_index: int,
-        current_bssid: Optional[str],
-        last_reassoc_time: Optional[float],
-        bssid_info: dict,
-        normalize_band,
-    ):
-        """Processes an assisted steering event (direct reassociation)."""
-        transitions = []
-        attempts_inc = 0
-        success_inc = 0
-        fail_inc = 0
-        loop_flag = False
-        new_times = []
-
-        new_bssid = event["bssid"]
-        new_band = event["band"]
-        reassoc_time = event["timestamp"]
-
-        if current_bssid and new_bssid and current_bssid != new_bssid:
-            attempts_inc += 1
-
-            transition_time = None
-            if last_reassoc_time:
-                transition_time = reassoc_time - last_reassoc_time
-
-            old_band = None
-            if current_bssid in bssid_info:
-                old_band = bssid_info[current_bssid].get("band")
-
-            old_band_norm = normalize_band(old_band)
-            new_band_norm = normalize_band(new_band)
-            is_band_change = (
-                old_band_norm
-                and new_band_norm
-                and old_band_norm != new_band_norm
-            )
-            is_bssid_change = True
-
-            returned_to_original = False
-            for next_event in client_event_list[
-                start_index + 1 : min(start_index + 5, len(client_event_list))
-            ]:
-                if next_event.get("bssid") == current_bssid:
-                    returned_to_original = True
-                    loop_flag = True
-                    break
-
-            status = self._classify_transition(
-                True,
-                transition_time,
-                is_band_change,
-                is_bssid_change,
-                returned_to_original,
-            )
-
-            if status == "SUCCESS":
-                success_inc += 1
-            elif status in ["LOOP", "SLOW"]:
-                if status == "LOOP":
-                    fail_inc += 1
-
-            if transition_time is not None:
-                new_times.append(transition_time)
-
-            transitions.append(
-                {
-                    "client": client_mac,
-                    "type": "assisted",
-                    "deauth_time": None,
-                    "reassoc_time": reassoc_time,
-                    "transition_time": transition_time,
-                    "from_bssid": current_bssid,
-                    "to_bssid": new_bssid,
-                    "from_band": old_band,
-                    "to_band": new_band,
-                    "is_band_change": is_band_change,
-                    "reason_code": None,
-                    "status": status,
-                    "returned_to_original": returned_to_original,
-                }
-            )
-
-        if new_bssid:
-            current_bssid = new_bssid
-            last_reassoc_time = reassoc_time
-
-        return (
-            transitions,
-            attempts_inc,
-            success_inc,
-            fail_inc,
-            loop_flag,
-            new_times,
-            current_bssid,
-            last_reassoc_time,
-        )
-
-    def _compute_transition_metrics(self, transition_times: list) -> (float, float):
-        """Calculates aggregate transition time metrics."""
-        if not transition_times:
-            return 0.0, 0.0
-
-        avg_transition_time = sum(transition_times) / len(transition_times)
-        max_transition_time = max(transition_times)
-        return avg_transition_time, max_transition_time
-
     def _determine_overall_steering_verdict(
         self,
         preventive_detected: bool,
@@ -1611,26 +1716,6 @@ class WiresharkTool:
             primary_client_mac,
         )
     
-    def _classify_transition(self, reassoc_found: bool, transition_time: float, 
-                            is_band_change: bool, is_bssid_change: bool, 
-                            returned_to_original: bool) -> str:
-        """Classifies a steering transition based on its quality."""
-        if not reassoc_found:
-            return "NO_REASSOC"
-        
-        if returned_to_original:
-            return "LOOP"
-        
-        if not (is_band_change or is_bssid_change):
-            return "NO_CHANGE"
-        
-        if transition_time < 2.0: # Increased from 1.0 to 2.0 for SUCCESS
-            return "SUCCESS"
-        elif transition_time < 8.0: # Increased from 3.0 to 8.0 for SLOW
-            return "SLOW"
-        else:
-            return "TIMEOUT"
-    
     def _determine_verdict(self, attempts: int, successful: int, failed: int,
                           loop_detected: bool, avg_time: float, band_counters: dict = None,
                           steering_events: list = None, client_mac: str = None) -> str:
@@ -1877,6 +1962,20 @@ class WiresharkTool:
             assoc_failures_summary += "\n"
 
 
+        # Client signal per band (computed over every RSSI sample)
+        signal_summary = ""
+        signal_stats = stats.get("signal_stats") or {}
+        if any(band.get("samples") for band in signal_stats.values()):
+            signal_summary = "📶 CLIENT SIGNAL (RSSI per band):\n"
+            for band, band_stats in signal_stats.items():
+                if band_stats.get("samples"):
+                    signal_summary += (
+                        f"- {band}: {band_stats['samples']} samples | mean {band_stats['mean']} dBm | "
+                        f"median {band_stats['median']} dBm | p10 {band_stats['p10']} dBm | "
+                        f"range {band_stats['min']}..{band_stats['max']} dBm\n"
+                    )
+            signal_summary += "\n"
+
         # Transitions summary
         transitions_summary = ""
         if sa["transitions"]:
@@ -1933,6 +2032,7 @@ class WiresharkTool:
             f"{kvr_summary}"
             f"{btm_summary}"
             f"{assoc_failures_summary}"
+            f"{signal_summary}"
             f"{transitions_summary}"
             f"## NETWORK INDICATORS\n\n"
             f"- **TCP Retransmissions:** {d['tcp_retransmissions']}\n"
@@ -2134,4 +2234,16 @@ class WiresharkTool:
             "stats": stats,
             "technical_summary": technical_summary,
             "forced_evaluation": force_evaluation,
-        }
\ No newline at end of file
+        }
+
+
+# Parser instance reused by each worker process of the parallel parse
+_slice_parser: Optional[WiresharkTool] = None
+
+
+def _parse_capture_slice(slice_path: str) -> Dict[str, Any]:
+    """Process-pool entry point: parses one capture slice into a partial parse state."""
+    global _slice_parser
+    if _slice_parser is None:
+        _slice_parser = WiresharkTool()
+    return _slice_parser._parse_capture(slice_path)
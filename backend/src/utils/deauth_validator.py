@@ -7,7 +7,9 @@ This module is critical for:
 2. Distinguishing between forced exile vs. normal departures (inactivity, client-initiated)
 3. Unifying logic between wireshark_tool.py and btm_analyzer.py
 """
-from typing import Dict, Tuple
+from typing import Any, Dict, List, Tuple
+
+from .mac_registry import normalize_mac, is_group_address
 
 # IEEE 802.11 reason codes indicating GRACEFUL departure (normal/voluntary)
 GRACEFUL_DEAUTH_REASONS = {
@@ -44,25 +46,15 @@ class DeauthValidator:
     @staticmethod
     def normalize_mac(mac: str) -> str:
         """Normalizes MAC address to lowercase format without strict validation."""
-        if not mac:
-            return ""
-        return mac.strip().lower()
+        return normalize_mac(mac)
 
     @staticmethod
     def is_broadcast(da: str) -> bool:
         """
-        Returns True if the destination address is broadcast or multicast.
-        
-        - Broadcast: ff:ff:ff:ff:ff:ff
-        - Multicast IPv4: 01:00:5e:xx:xx:xx
-        - Multicast IPv6: 33:33:xx:xx:xx:xx
+        Returns True if the destination address is broadcast or multicast
+        (group bit set: ff:ff:ff:ff:ff:ff, 01:00:5e:xx:xx:xx, 33:33:xx:xx:xx:xx...).
         """
-        da_norm = DeauthValidator.normalize_mac(da)
-        return (
-            da_norm == "ff:ff:ff:ff:ff:ff"
-            or da_norm.startswith("01:00:5e")
-            or da_norm.startswith("33:33")
-        )
+        return is_group_address(da)
 
     @staticmethod
     def is_directed_to_client(
@@ -157,20 +149,18 @@ class DeauthValidator:
             - "forced_to_client": AP exiles the client (forced reason code)
             - "unknown": Cannot be classified (missing fields)
         """
-        da = event.get("da", "").strip().lower()
-        sa = event.get("sa", "").strip().lower()
+        da_norm = normalize_mac(event.get("da"))
+        sa_norm = normalize_mac(event.get("sa"))
         
         # Check broadcast first
-        if da and DeauthValidator.is_broadcast(da):
+        if da_norm and is_group_address(da_norm):
             return "broadcast"
         
-        if not da and not sa:
+        if not da_norm and not sa_norm:
             return "unknown"
         
         # Check if it involves the client (as receiver or sender)
-        client_norm = DeauthValidator.normalize_mac(client_mac)
-        da_norm = DeauthValidator.normalize_mac(da) if da else ""
-        sa_norm = DeauthValidator.normalize_mac(sa) if sa else ""
+        client_norm = normalize_mac(client_mac)
         
         # Check if the client is involved
         client_is_receiver = da_norm == client_norm  # AP → Client
@@ -266,6 +256,29 @@ class DeauthValidator:
         
         return is_forced, classification, description
 
+    @staticmethod
+    def count_client_disconnections(events: List[Dict], client_mac: str) -> Dict[str, Any]:
+        """
+        Deauth/Disassoc frames directed to (or sent by) `client_mac`, and how
+        many of them are forced exiles, with their reason codes in order of
+        appearance.
+        """
+        counts = {"deauth": 0, "deauth_forced": 0, "disassoc": 0, "disassoc_forced": 0, "reason_codes": []}
+        if not client_mac:
+            return counts
+        for event in events or []:
+            subtype = event.get("subtype")
+            if subtype not in (10, 12) or not DeauthValidator.is_directed_to_client(event, client_mac):
+                continue
+            kind = "disassoc" if subtype == 10 else "deauth"
+            counts[kind] += 1
+            if DeauthValidator.validate_and_classify(event, client_mac)[0]:
+                counts[f"{kind}_forced"] += 1
+            reason_code = event.get("reason_code")
+            if reason_code and reason_code not in counts["reason_codes"]:
+                counts["reason_codes"].append(reason_code)
+        return counts
+
 
 # Configuration
 REASSOC_TIMEOUT_SECONDS = 15.0  # Time window to search for reassoc after deauth
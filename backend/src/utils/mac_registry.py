@@ -0,0 +1,171 @@
+"""
+Registry of MAC addresses seen during an analysis.
+Each address is normalized and interned to an integer id once; its
+broadcast / multicast / locally-administered bits are decoded at that
+point and the AP (BSSID) and client roles are kept as sets of ids, so
+later checks are hash lookups instead of string normalization and scans.
+"""
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Iterable, Optional, Set
+
+# Id of empty / missing addresses (same sentinel as the frame table)
+MISSING = -1
+
+# Address bits, decoded once per distinct MAC
+MAC_BROADCAST = 0x01  # ff:ff:ff:ff:ff:ff
+MAC_MULTICAST = 0x02  # group bit (includes broadcast, 01:00:5e:*, 33:33:*)
+MAC_LOCAL = 0x04  # locally administered (randomized / virtual)
+MAC_NULL = 0x08  # 00:00:00:00:00:00
+MAC_INVALID = 0x10  # not six hex octets
+
+# Addresses that can never be a client station
+NOT_CLIENT = MAC_MULTICAST | MAC_NULL | MAC_INVALID
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+_SEPARATORS = str.maketrans("", "", ":-. \t")
+
+
+@lru_cache(maxsize=65536)
+def normalize_mac(mac: Optional[str]) -> str:
+    """
+    Lowercase colon-separated form ("aa:bb:cc:dd:ee:ff"). Accepts "-", "."
+    and bare 12-digit spellings; other strings are returned stripped and
+    lowercased.
+    """
+    if not mac:
+        return ""
+    value = mac.strip().lower()
+    digits = value.translate(_SEPARATORS)
+    if len(digits) == 12 and _HEX_DIGITS.issuperset(digits):
+        return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+    return value
+
+
+@lru_cache(maxsize=65536)
+def mac_flags(mac: Optional[str]) -> int:
+    """MAC_* bits of an address (normalized or not)."""
+    normalized = normalize_mac(mac)
+    if len(normalized) != 17 or normalized.count(":") != 5:
+        return MAC_INVALID
+    first_octet = int(normalized[:2], 16)
+    flags = 0
+    if normalized == "ff:ff:ff:ff:ff:ff":
+        flags |= MAC_BROADCAST
+    if first_octet & 0x01:
+        flags |= MAC_MULTICAST
+    if first_octet & 0x02:
+        flags |= MAC_LOCAL
+    if normalized == "00:00:00:00:00:00":
+        flags |= MAC_NULL
+    return flags
+
+
+def is_group_address(mac: Optional[str]) -> bool:
+    """Broadcast or multicast destination."""
+    return bool(mac_flags(mac) & MAC_MULTICAST)
+
+
+def is_valid_client_mac(mac: Optional[str]) -> bool:
+    """Well-formed unicast, non-null address."""
+    return bool(mac) and not mac_flags(mac) & NOT_CLIENT
+
+
+def is_locally_administered(mac: Optional[str]) -> bool:
+    flags = mac_flags(mac)
+    return not flags & MAC_INVALID and bool(flags & MAC_LOCAL)
+
+
+class MacRegistry:
+    """
+    Interns MAC addresses to dense integer ids.
+
+    `macs[id]` is the normalized address and `flags[id]` its MAC_* bits.
+    Any spelling of an address already seen (e.g. upper case) resolves to
+    the same id with a single dict lookup.
+    """
+
+    def __init__(self) -> None:
+        self.macs: List[str] = []
+        self.flags = array("B")
+        self._ids: Dict[str, int] = {}
+        self.bssid_ids: Set[int] = set()
+        self.client_ids: Set[int] = set()
+
+    @classmethod
+    def from_bssids(cls, bssids: Optional[Iterable[str]]) -> "MacRegistry":
+        """Registry whose BSSID set holds `bssids` (e.g. the keys of `bssid_info`)."""
+        registry = cls()
+        for bssid in bssids or ():
+            registry.add_bssid(bssid)
+        return registry
+
+    def __len__(self) -> int:
+        return len(self.macs)
+
+    def __contains__(self, mac: str) -> bool:
+        return self.id_of(mac) != MISSING
+
+    def intern(self, mac: Optional[str]) -> int:
+        """Id of `mac`, registering it on first sight (MISSING for empty values)."""
+        if not mac:
+            return MISSING
+        mac_id = self._ids.get(mac)
+        if mac_id is not None:
+            return mac_id
+        normalized = normalize_mac(mac)
+        if not normalized:
+            return MISSING
+        mac_id = self._ids.get(normalized)
+        if mac_id is None:
+            mac_id = len(self.macs)
+            self.macs.append(normalized)
+            self.flags.append(mac_flags(normalized))
+            self._ids[normalized] = mac_id
+        # Remember this spelling too so it never gets normalized again
+        self._ids[mac] = mac_id
+        return mac_id
+
+    def id_of(self, mac: Optional[str]) -> int:
+        """Id of an already registered MAC, without adding it."""
+        if not mac:
+            return MISSING
+        mac_id = self._ids.get(mac)
+        if mac_id is None:
+            mac_id = self._ids.get(normalize_mac(mac), MISSING)
+        return mac_id
+
+    def add_bssid(self, mac: Optional[str]) -> int:
+        mac_id = self.intern(mac)
+        if mac_id != MISSING:
+            self.bssid_ids.add(mac_id)
+        return mac_id
+
+    def add_client(self, mac: Optional[str]) -> int:
+        mac_id = self.intern(mac)
+        if mac_id != MISSING:
+            self.client_ids.add(mac_id)
+        return mac_id
+
+    def is_bssid(self, mac: Optional[str]) -> bool:
+        mac_id = self.id_of(mac)
+        return mac_id != MISSING and mac_id in self.bssid_ids
+
+    def is_client_candidate(self, mac: Optional[str]) -> bool:
+        """Valid unicast station address that is not a known BSSID."""
+        mac_id = self.intern(mac)
+        return (
+            mac_id != MISSING
+            and not self.flags[mac_id] & NOT_CLIENT
+            and mac_id not in self.bssid_ids
+        )
+
+    def merge(self, other: "MacRegistry") -> List[int]:
+        """
+        Registers every address of `other` (keeping its roles) and returns
+        the id mapping other-id -> id in this registry.
+        """
+        mapping = [self.intern(mac) for mac in other.macs]
+        self.bssid_ids.update(mapping[mac_id] for mac_id in other.bssid_ids)
+        self.client_ids.update(mapping[mac_id] for mac_id in other.client_ids)
+        return mapping
@@ -1,42 +1,222 @@
 """
 Utility service for vendor lookup by OUI (MAC Address).
-Supports local cache and a static database of common vendors.
-Does not perform logging; only resolves vendors deterministically.
+Backed by the IEEE MA-L / MA-M / MA-S registries (24, 28 and 36-bit
+prefixes), loaded on first lookup into sorted integer arrays searched with
+bisect. Does not perform logging; only resolves vendors deterministically.
+
+Registry sources, first found wins:
+- the IEEE CSV exports (oui.csv, mam.csv, oui36.csv, iab.csv) in `oui_registry_dir`
+  (`src/data/oui` by default, written by `update_oui_registry.py` at image build);
+- Wireshark's `manuf` file (`oui_manuf_path`), installed with tshark < 4.2 or
+  exported with `tshark -G manuf`.
+`KNOWN_OUIS` fills in prefixes neither source has.
 """
+import csv
 import re
-from typing import Optional, Dict
+import threading
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional, Dict, List, Iterable, Tuple
+
+import numpy as np
+
+from ..settings import settings
+
+BUNDLED_REGISTRY_DIR = Path(__file__).resolve().parent.parent / "data" / "oui"
+
+# IEEE registry export -> prefix length in bits
+REGISTRY_FILES = (("oui36.csv", 36), ("iab.csv", 36), ("mam.csv", 28), ("oui.csv", 24))
+
+# Most specific first: an MA-S block wins over the MA-L it was carved from
+PREFIX_BITS = (36, 28, 24)
+
+_OUI_PATTERN = re.compile(r'^([0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2})')
+_SEPARATORS = str.maketrans("", "", ":-. \t")
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+# Words dropped when shortening registry organization names
+_GENERIC_WORDS = frozenset({
+    "inc", "incorporated", "ltd", "limited", "co", "corp", "corporation", "corporate",
+    "company", "llc", "gmbh", "ag", "sa", "s.a", "bv", "b.v", "kg", "plc", "pte", "pty",
+    "oy", "ab", "srl", "spa", "technologies", "technology", "tech", "electronics",
+    "systems", "communications", "communication", "international", "group", "holdings",
+    "industries", "industrial", "telecommunications", "electric", "products", "solutions",
+    "networks", "computer", "mobile", "devices", "the",
+})
+
+
+def short_vendor_name(organization: str) -> str:
+    """
+    Short vendor name of a registry organization ("Huawei Technologies
+    Co.,Ltd" -> "Huawei", "Hon Hai Precision Ind. Co.,Ltd." -> "Hon Hai"):
+    corporate and generic words are dropped and at most two words kept.
+    """
+    words = []
+    for word in re.split(r"[\s,]+", organization.strip()):
+        cleaned = word.strip(".,()")
+        if cleaned and cleaned.lower() not in _GENERIC_WORDS:
+            words.append(cleaned)
+        if len(words) == 2:
+            break
+    return " ".join(words) or organization.strip()
+
+
+def _mac_to_int(mac_address: str) -> Optional[int]:
+    """48-bit integer of a MAC (a bare OUI is padded with zeros), None if malformed."""
+    digits = mac_address.strip().lower().translate(_SEPARATORS)[:12]
+    if len(digits) < 6 or not _HEX_DIGITS.issuperset(digits):
+        return None
+    return int(digits.ljust(12, "0"), 16)
+
+
+class OUIRegistry:
+    """
+    Sorted prefix tables, one per prefix length: `prefixes[bits]` holds the
+    prefix values (ascending) and `vendor_ids[bits]` the index of their
+    vendor in `vendors`.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, int, str]]):
+        vendor_index: Dict[str, int] = {}
+        self.vendors: List[str] = []
+        tables: Dict[int, Dict[int, int]] = {bits: {} for bits in PREFIX_BITS}
+        for bits, prefix, vendor in entries:
+            vendor_id = vendor_index.get(vendor)
+            if vendor_id is None:
+                vendor_id = vendor_index[vendor] = len(self.vendors)
+                self.vendors.append(vendor)
+            # First source wins for a prefix
+            tables[bits].setdefault(prefix, vendor_id)
+
+        self.prefixes: Dict[int, array] = {}
+        self.vendor_ids: Dict[int, array] = {}
+        for bits, table in tables.items():
+            ordered = sorted(table.items())
+            self.prefixes[bits] = array("Q", (prefix for prefix, _ in ordered))
+            self.vendor_ids[bits] = array("I", (vendor_id for _, vendor_id in ordered))
+
+    def __len__(self) -> int:
+        return sum(len(prefixes) for prefixes in self.prefixes.values())
+
+    def lookup(self, mac: int) -> Optional[str]:
+        for bits in PREFIX_BITS:
+            prefixes = self.prefixes[bits]
+            prefix = mac >> (48 - bits)
+            position = bisect_right(prefixes, prefix) - 1
+            if position >= 0 and prefixes[position] == prefix:
+                return self.vendors[self.vendor_ids[bits][position]]
+        return None
+
+    def lookup_many(self, macs: np.ndarray) -> np.ndarray:
+        """Vendor id per MAC (uint64 array), -1 when no prefix matches."""
+        result = np.full(len(macs), -1, dtype=np.int64)
+        for bits in PREFIX_BITS:
+            prefixes = np.frombuffer(self.prefixes[bits], dtype=np.uint64)
+            if not len(prefixes):
+                continue
+            pending = np.flatnonzero(result < 0)
+            keys = macs[pending] >> np.uint64(48 - bits)
+            positions = np.searchsorted(prefixes, keys, side="right") - 1
+            found = (positions >= 0) & (prefixes[np.maximum(positions, 0)] == keys)
+            vendor_ids = np.frombuffer(self.vendor_ids[bits], dtype=np.uint32)
+            result[pending[found]] = vendor_ids[positions[found]]
+        return result
+
+
+def _ieee_csv_entries(path: Path, bits: int) -> Iterable[Tuple[int, int, str]]:
+    """Entries of an IEEE registry CSV (Registry,Assignment,Organization Name,...)."""
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        for row in csv.DictReader(f):
+            assignment = (row.get("Assignment") or "").strip()
+            organization = (row.get("Organization Name") or "").strip()
+            if not assignment or not organization:
+                continue
+            try:
+                prefix = int(assignment, 16)
+            except ValueError:
+                continue
+            yield bits, prefix, short_vendor_name(organization)
+
+
+def _manuf_entries(path: Path) -> Iterable[Tuple[int, int, str]]:
+    """Entries of a Wireshark manuf file ("00:1B:C5:00:00:00/36<TAB>Short<TAB>Long")."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) < 2:
+                continue
+            address, _, mask = columns[0].partition("/")
+            digits = address.lower().translate(_SEPARATORS)
+            bits = int(mask) if mask.isdigit() else len(digits) * 4
+            if bits not in PREFIX_BITS or len(digits) < bits // 4 or not _HEX_DIGITS.issuperset(digits):
+                continue
+            organization = columns[2] if len(columns) > 2 and columns[2].strip() else columns[1]
+            yield bits, int(digits[:bits // 4], 16), short_vendor_name(organization)
+
 
 class OUILookup:
     """
     Identifies the vendor of a device based on its MAC Address.
     """
-    
-    # Static database of common OUIs (Simplified for MVP)
-    # In production, this could load a CSV file or query an API.
+
+    # Fallback for prefixes missing from the registry (and the whole table
+    # when no registry file is available)
     KNOWN_OUIS = {
         # Apple
-        "00:17:f2": "Apple", "00:1b:63": "Apple", "00:1c:b3": "Apple", "00:1e:52": "Apple", "00:1f:5b": "Apple", 
+        "00:17:f2": "Apple", "00:1b:63": "Apple", "00:1c:b3": "Apple", "00:1e:52": "Apple", "00:1f:5b": "Apple",
         "00:1f:f3": "Apple", "00:21:e9": "Apple", "00:22:41": "Apple", "00:23:12": "Apple", "00:23:32": "Apple",
         "00:23:6c": "Apple", "00:23:df": "Apple", "00:24:36": "Apple", "00:25:00": "Apple", "00:25:4b": "Apple",
         "00:25:bc": "Apple", "00:26:08": "Apple", "00:26:4a": "Apple", "00:26:b0": "Apple", "00:26:bb": "Apple",
-        
+
         # Samsung
         "00:02:78": "Samsung", "00:07:ab": "Samsung", "00:09:18": "Samsung", "00:0d:ae": "Samsung",
         "00:12:47": "Samsung", "00:12:fb": "Samsung", "00:13:77": "Samsung", "00:15:99": "Samsung",
         "00:15:b9": "Samsung", "00:16:32": "Samsung", "00:16:6b": "Samsung", "00:16:db": "Samsung",
-        
+
         # Huawei
         "00:18:82": "Huawei", "00:19:e0": "Huawei", "00:1e:10": "Huawei", "00:25:68": "Huawei",
         "00:46:4b": "Huawei", "00:66:4b": "Huawei", "00:e0:fc": "Huawei",
-        
+
         # Intel (Common chips in laptops)
         "00:13:e8": "Intel", "00:1b:21": "Intel", "00:21:6a": "Intel", "00:22:fb": "Intel",
-        
+
         # Random / Virtual
         "02:00:00": "Virtual", "06:00:00": "Virtual"
     }
-    
-    _cache: Dict[str, str] = {}
+
+    def __init__(self, registry_dir: Optional[str] = None, manuf_path: Optional[str] = None):
+        self.registry_dir = Path(registry_dir or settings.oui_registry_dir or BUNDLED_REGISTRY_DIR)
+        self.manuf_path = Path(manuf_path or settings.oui_manuf_path)
+        self._registry: Optional[OUIRegistry] = None
+        self.registry_source: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def registry(self) -> OUIRegistry:
+        """Prefix tables, loaded on first use."""
+        if self._registry is None:
+            with self._lock:
+                if self._registry is None:
+                    self._registry = self._load_registry()
+        return self._registry
+
+    def _load_registry(self) -> OUIRegistry:
+        entries: List[Tuple[int, int, str]] = []
+        csv_files = [(self.registry_dir / name, bits) for name, bits in REGISTRY_FILES]
+        if any(path.exists() for path, _ in csv_files):
+            for path, bits in csv_files:
+                if path.exists():
+                    entries.extend(_ieee_csv_entries(path, bits))
+            self.registry_source = str(self.registry_dir)
+        elif self.manuf_path.exists():
+            entries.extend(_manuf_entries(self.manuf_path))
+            self.registry_source = str(self.manuf_path)
+
+        entries.extend((24, int(oui.replace(":", ""), 16), vendor) for oui, vendor in self.KNOWN_OUIS.items())
+        return OUIRegistry(entries)
 
     def lookup_vendor(self, mac_address: str) -> str:
         """
@@ -45,38 +225,26 @@ class OUILookup:
         """
         if not mac_address:
             return "Unknown"
-        
-        # Normalize MAC
-        normalized_mac = mac_address.lower().replace("-", ":")
-        
-        # Extract OUI (first 3 octets: xx:xx:xx)
-        # Basic format validation
-        match = re.match(r'^([0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2})', normalized_mac)
-        if not match:
+        mac = _mac_to_int(mac_address)
+        if mac is None:
             return "Unknown"
-            
-        oui = match.group(1)
-        
-        # Check cache
-        if oui in self._cache:
-            return self._cache[oui]
-        
-        # Check internal DB
-        vendor = self.KNOWN_OUIS.get(oui)
-        
-        if not vendor:
-            # Attempt for "fuzzy" lookup or external API would go here
-            # For now return Unknown
-            vendor = "Unknown"
-        
-        # Save in cache
-        self._cache[oui] = vendor
-        return vendor
+        return self.registry.lookup(mac) or "Unknown"
+
+    def lookup_vendors(self, mac_addresses: List[str]) -> List[str]:
+        """Vendor of every MAC in one vectorized pass ('Unknown' when not found)."""
+        values = [_mac_to_int(mac) if mac else None for mac in mac_addresses]
+        macs = np.array([value if value is not None else 0 for value in values], dtype=np.uint64)
+        registry = self.registry
+        vendor_ids = registry.lookup_many(macs)
+        return [
+            registry.vendors[vendor_id] if vendor_id >= 0 and value is not None else "Unknown"
+            for vendor_id, value in zip(vendor_ids.tolist(), values)
+        ]
 
     def get_oui(self, mac_address: str) -> str:
         """Extracts the OUI from a MAC."""
         normalized_mac = mac_address.lower().replace("-", ":")
-        match = re.match(r'^([0-9a-f]{2}:[0-9a-f]{2}:[0-9a-f]{2})', normalized_mac)
+        match = _OUI_PATTERN.match(normalized_mac)
         return match.group(1) if match else "00:00:00"
 
 # Singleton instance for easy use
@@ -0,0 +1,92 @@
+"""
+Mergeable quantile sketch (DDSketch-style logarithmic buckets).
+Values are counted in buckets whose bounds grow geometrically, so any
+quantile is answered with a bounded relative error whatever the number of
+values. Sketches merge by adding bucket counts, and values can be removed
+by subtracting them, which lets persisted aggregates follow deletions.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+# Bucket of the values too small to be told apart from zero
+ZERO_BUCKET = -(2 ** 31)
+
+
+class QuantileSketch:
+    """
+    Counts per logarithmic bucket: bucket `k` holds the values in
+    (gamma^(k-1), gamma^k], with gamma = (1 + alpha) / (1 - alpha), so the
+    representative value of a bucket is within `relative_accuracy` (alpha)
+    of every value counted in it. Values <= `min_value` (and negative ones)
+    go to the zero bucket.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        min_value: float = 1e-6,
+        buckets: Optional[Dict[int, int]] = None,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    def bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return ZERO_BUCKET
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def value(self, bucket: int) -> float:
+        """Representative value of a bucket."""
+        if bucket == ZERO_BUCKET:
+            return 0.0
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Counts `value` (`count` times; a negative count removes it)."""
+        bucket = self.bucket(value)
+        total = self.buckets.get(bucket, 0) + count
+        if total:
+            self.buckets[bucket] = total
+        else:
+            self.buckets.pop(bucket, None)
+
+    def update(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Adds the counts of a sketch built with the same accuracy."""
+        for bucket, count in other.buckets.items():
+            total = self.buckets.get(bucket, 0) + count
+            if total:
+                self.buckets[bucket] = total
+            else:
+                self.buckets.pop(bucket, None)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), None if the sketch is empty."""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return self.value(bucket)
+        return self.value(max(self.buckets))
+
+    def summary(self, quantiles: Iterable[float] = (0.5, 0.9, 0.99), digits: int = 4) -> Dict[str, Optional[float]]:
+        """{"count", "p50", "p90", ...} of the sketch."""
+        result: Dict[str, Optional[float]] = {"count": self.count}
+        for q in quantiles:
+            value = self.quantile(q)
+            result[f"p{q * 100:g}"] = round(value, digits) if value is not None else None
+        return result
@@ -0,0 +1,39 @@
+"""
+Batch jobs keep only their compact per-file result in the API process;
+the full response is released once the batch has extracted it.
+"""
+import time
+
+from src.services.analysis_batches import AnalysisBatchManager
+from src.services.analysis_jobs import JOB_COMPLETED, AnalysisJobManager
+
+from conftest import write_capture
+
+
+def test_batch_releases_full_job_results(workspace):
+    captures = []
+    for name in ("a.pcap", "b.pcap"):
+        write_capture(workspace / name)
+        captures.append((str(workspace / name), name))
+
+    job_manager = AnalysisJobManager(max_workers=1)
+    batches = AnalysisBatchManager(job_manager=job_manager, concurrency=2)
+    try:
+        batch_id = batches.submit(captures)["batch_id"]
+        for _ in range(600):
+            status = batches.get_status(batch_id, include_results=True)
+            if status["status"] == JOB_COMPLETED:
+                break
+            time.sleep(0.5)
+    finally:
+        job_manager.shutdown()
+
+    assert status["status"] == JOB_COMPLETED
+    assert [r["status"] for r in status["results"]] == [JOB_COMPLETED, JOB_COMPLETED]
+    for result in status["results"]:
+        job = job_manager.get_status(result["job_id"])
+        assert result["analysis_id"] and job["analysis_id"] == result["analysis_id"]
+        assert job["result_released"] and not job["result_ready"]
+        assert job["result_url"] == f"/reports/{result['analysis_id']}"
+        assert job_manager.get_result(result["job_id"]) is None
+        assert job_manager.get_future(result["job_id"]) is None
@@ -0,0 +1,26 @@
+"""
+Parse cache counters across processes: analyses run in the job workers,
+while `/network-analysis/cache/stats` is served by the API process.
+"""
+from src.core.capture_cache import CaptureParseCache
+from src.services.analysis_jobs import AnalysisJobManager
+
+from conftest import write_capture
+
+
+def test_hits_from_worker_processes_are_reported(workspace):
+    manager = AnalysisJobManager(max_workers=1)
+    try:
+        for upload in ("first.pcap", "second.pcap"):
+            capture = workspace / upload
+            write_capture(capture)
+            job = manager.submit(str(capture), original_filename=upload)
+            manager.get_future(job["job_id"]).result(timeout=300)
+    finally:
+        manager.shutdown()
+
+    stats = CaptureParseCache(cache_dir=str(workspace / "cache")).stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["entries"] == 1
@@ -0,0 +1,19 @@
+"""tshark display filter built for a scoped analysis."""
+from src.tools.capture_scope import CaptureScope
+
+
+def test_display_filter_separates_bssid_set_with_commas():
+    scope = CaptureScope(ssid="lab", client_mac="00-11-22-33-44-01", start_time=5, end_time=60)
+    scope.ssid_bssids = {"aa:bb:cc:00:00:02", "aa:bb:cc:00:00:01"}
+    assert scope.display_filter() == (
+        "wlan.bssid in {aa:bb:cc:00:00:01, aa:bb:cc:00:00:02}"
+        " && (wlan.addr == 00:11:22:33:44:01 || wlan.fc.type_subtype == 0x0008)"
+        " && frame.time_relative >= 5.0"
+        " && frame.time_relative <= 60.0"
+    )
+
+
+def test_display_filter_ignores_unmatched_ssid():
+    scope = CaptureScope(ssid="lab")
+    scope.ssid_bssids = set()
+    assert scope.display_filter() is None
@@ -0,0 +1,164 @@
+"""
+TransitionEngine against the pre-engine pipeline (WiresharkTool's own
+transition pass plus BTMAnalyzer._analyze_transitions) on a fixed capture.
+The expected values were produced by that pipeline on the same events.
+"""
+import copy
+
+import pytest
+
+from src.tools.btm_analyzer import BTMAnalyzer
+from src.tools.transition_engine import TransitionEngine
+
+AP_24 = "aa:bb:cc:00:00:01"
+AP_5 = "aa:bb:cc:00:00:02"
+CLIENT_A = "00:11:22:33:44:01"
+CLIENT_B = "00:11:22:33:44:02"
+BANDS = {AP_24: ("2.4GHz", 2437), AP_5: ("5GHz", 5180)}
+
+
+def _frame(timestamp, subtype, event_type, ap, client, from_client, **extra):
+    band, frequency = BANDS[ap]
+    sa, da = (client, ap) if from_client else (ap, client)
+    event = {
+        "timestamp": timestamp, "type": event_type, "subtype": subtype,
+        "sa": sa, "da": da, "client_mac": client, "bssid": ap, "ssid": "lab",
+        "band": band, "frequency": frequency, "reason_code": None,
+        "assoc_status_code": None, "signal_strength": "-50",
+    }
+    event.update(extra)
+    return event
+
+
+def _roam(timestamp, ap, client, subtypes=(2, 3)):
+    request, response = subtypes
+    return [
+        _frame(timestamp, request, "Reassociation Request" if request == 2 else "Association Request", ap, client, True),
+        _frame(timestamp + 0.02, response, "Reassociation Response" if response == 3 else "Association Response",
+               ap, client, False, assoc_status_code="0"),
+    ]
+
+
+def _btm(timestamp, ap, client, event_type, status_code=None):
+    band, frequency = BANDS[ap]
+    sa, da = (ap, client) if event_type == "request" else (client, ap)
+    return {
+        "timestamp": timestamp, "type": "btm", "event_type": event_type, "subtype": 13,
+        "bssid": ap, "client_mac": client, "ap_bssid": ap, "wlan_sa": sa, "wlan_da": da,
+        "band": band, "frequency": frequency, "rssi": -50, "status_code": status_code,
+    }
+
+
+def build_capture():
+    """Steering events, BSSID table and counters of a small two-band capture."""
+    events = [
+        # Client A: associates on 2.4GHz, BTM-steered to 5GHz, kicked back to
+        # 2.4GHz by a Deauth, then ping-pongs between the bands
+        *_roam(1.0, AP_24, CLIENT_A, subtypes=(0, 1)),
+        _btm(10.0, AP_24, CLIENT_A, "request"),
+        _btm(10.2, AP_24, CLIENT_A, "response", status_code=0),
+        *_roam(10.5, AP_5, CLIENT_A),
+        _frame(20.0, 12, "Deauthentication", AP_5, CLIENT_A, False, reason_code="5"),
+        *_roam(20.8, AP_24, CLIENT_A),
+        *_roam(30.0, AP_5, CLIENT_A),
+        *_roam(31.0, AP_24, CLIENT_A),
+        # Client B: the first frames captured are a BTM exchange, no association before it
+        _btm(5.0, AP_24, CLIENT_B, "request"),
+        _btm(5.1, AP_24, CLIENT_B, "response", status_code=0),
+        *_roam(5.4, AP_5, CLIENT_B),
+        _btm(40.0, AP_5, CLIENT_B, "request"),
+        _btm(40.1, AP_5, CLIENT_B, "response", status_code=6),
+        *_roam(41.0, AP_5, CLIENT_B),
+    ]
+    bssid_info = {
+        bssid: {"band": band, "ssid": "lab", "frequency": frequency}
+        for bssid, (band, frequency) in BANDS.items()
+    }
+    band_counters = {
+        "btm_stats": {"requests": 3, "responses": 3, "status_codes": ["0", "6"]},
+        "beacon_24": 100, "beacon_5": 100, "data_24": 40, "data_5": 60,
+        "assoc_count": 1, "reassoc_count": 7, "deauth_count": 1, "disassoc_count": 0,
+    }
+    wireshark_raw = {
+        "summary": {
+            "btm": {"requests": 3, "responses": 3, "responses_accept": 2, "responses_reject": 1, "status_codes": ["0", "6"]},
+            "deauth": {"count": 1}, "disassoc": {"count": 0},
+        }
+    }
+    return events, bssid_info, band_counters, wireshark_raw
+
+
+# steering_analysis counters of the baseline WiresharkTool
+BASELINE_STEERING = {
+    "steering_attempts": 7,
+    "successful_transitions": 4,
+    "failed_transitions": 3,
+    "loop_detected": True,
+    "avg_transition_time": 5.12,
+    "max_transition_time": 9.5,
+    "clients_analyzed": 2,
+}
+
+# BTMAnalyzer transitions of the baseline: (client, type, from, to, band change)
+BASELINE_TRANSITIONS = [
+    (CLIENT_A, "unknown", AP_24, AP_24, False),
+    (CLIENT_A, "assisted", AP_24, AP_5, True),
+    (CLIENT_A, "aggressive", AP_5, AP_24, True),
+    (CLIENT_A, "unknown", AP_5, AP_5, True),
+    (CLIENT_A, "unknown", AP_24, AP_24, True),
+    (CLIENT_B, "assisted", AP_24, AP_5, True),
+    (CLIENT_B, "assisted", AP_5, AP_5, False),
+]
+
+
+def _steering_analysis():
+    events, bssid_info, band_counters, _ = build_capture()
+    return TransitionEngine(bssid_info=bssid_info).analyze(events, band_counters=band_counters)
+
+
+def _btm_analysis(transitions_from_engine: bool):
+    events, _, band_counters, wireshark_raw = build_capture()
+    steering = _steering_analysis()
+    combined = dict(band_counters)
+    combined.update(steering)
+    combined["wireshark_raw"] = wireshark_raw
+    transitions = None
+    if transitions_from_engine:
+        transitions = TransitionEngine.to_steering_transitions(steering["association_transitions"])
+    return BTMAnalyzer().analyze_btm_events(
+        steering_events=copy.deepcopy(events),
+        band_counters=combined,
+        wireshark_raw=wireshark_raw,
+        transitions=transitions,
+    )
+
+
+def test_steering_counters_match_baseline():
+    result = _steering_analysis()
+    assert {key: result[key] for key in BASELINE_STEERING} == BASELINE_STEERING
+
+
+def test_btm_request_without_prior_association_starts_no_transition():
+    # Client B's BTM Request comes before any association: no origin AP is known
+    assert not [t for t in _steering_analysis()["transitions"] if t["client"] == CLIENT_B]
+
+
+@pytest.mark.parametrize("transitions_from_engine", [True, False])
+def test_btm_analysis_matches_baseline(transitions_from_engine):
+    analysis = _btm_analysis(transitions_from_engine)
+
+    assert analysis.btm_requests == 7
+    assert analysis.btm_responses == 3
+    assert analysis.successful_transitions == 4
+    assert analysis.failed_transitions == 3
+    assert analysis.btm_success_rate == pytest.approx(4 / 7)
+    assert analysis.loops_detected is True
+    assert analysis.verdict == "FAILED"
+    assert [
+        (t.client_mac, t.steering_type.value, t.from_bssid, t.to_bssid, t.is_band_change)
+        for t in analysis.transitions
+    ] == BASELINE_TRANSITIONS
+
+    effective = next(c for c in analysis.compliance_checks if c.check_name == "Effective Steering")
+    assert effective.passed
+    assert effective.details.startswith("BAND CHANGE TRANSITIONS: 5 | TOTAL TRANSITIONS: 4 | BTM ACCEPT: 2")
@@ -0,0 +1,74 @@
+"""
+Downloads the IEEE MAC address registries used by OUILookup.
+
+Fetches the MA-L (oui.csv), MA-M (mam.csv), MA-S (oui36.csv) and IAB
+(iab.csv) exports into the registry directory, replacing each file only
+once it has been downloaded completely. Run it when building the image
+or whenever vendor names look out of date.
+
+Usage (from backend/):
+    python update_oui_registry.py
+    python update_oui_registry.py --output-dir /app/src/data/oui
+"""
+import argparse
+import os
+import sys
+import urllib.request
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(backend_dir))
+
+REGISTRY_URLS = {
+    "oui.csv": "https://standards-oui.ieee.org/oui/oui.csv",
+    "mam.csv": "https://standards-oui.ieee.org/oui28/mam.csv",
+    "oui36.csv": "https://standards-oui.ieee.org/oui36/oui36.csv",
+    "iab.csv": "https://standards-oui.ieee.org/iab/iab.csv",
+}
+
+
+def download(url: str, path: Path, timeout: float = 60.0) -> int:
+    """Downloads `url` to `path` atomically. Returns the number of bytes written."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    request = urllib.request.Request(url, headers={"User-Agent": "pipe-oui-updater"})
+    with urllib.request.urlopen(request, timeout=timeout) as response, open(tmp_path, "wb") as f:
+        size = 0
+        for chunk in iter(lambda: response.read(1024 * 1024), b""):
+            f.write(chunk)
+            size += len(chunk)
+    os.replace(tmp_path, path)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=str(backend_dir / "src" / "data" / "oui"),
+                        help="Registry directory read by OUILookup")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    failed = 0
+    for name, url in REGISTRY_URLS.items():
+        try:
+            size = download(url, output_dir / name)
+            print(f"  {name}: {size / 1024:.0f} KB")
+        except OSError as e:
+            failed += 1
+            print(f"  ! {name}: {e}")
+
+    # Report what the lookup resolves with the refreshed files (needs the
+    # backend settings, which may be unavailable at image build time)
+    try:
+        from src.utils.oui_lookup import OUILookup  # noqa: E402
+    except Exception as e:
+        print(f"Registry check skipped: {e.__class__.__name__}")
+    else:
+        lookup = OUILookup(registry_dir=str(output_dir))
+        print(f"{len(lookup.registry)} prefixes loaded from {lookup.registry_source}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()